@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能测试模块
+使用模拟设备和录制截图测量市场操作序列各阶段及各基础环节的耗时分布（p50/p95/p99）与吞吐量
+"""
+
+from .stats import summarize, compare_results
+from .phase_timer import PhaseTimer
+from .benchmarks import BENCHMARKS, run_benchmarks
+
+__all__ = [
+    "summarize",
+    "compare_results",
+    "PhaseTimer",
+    "BENCHMARKS",
+    "run_benchmarks"
+]
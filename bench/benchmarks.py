@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能测试项
+市场操作序列（按点击、等待、滑动、截图、编码、保存分阶段计时）及其基础环节：
+截图、PNG编码、模板匹配、OCR、截图历史写入、截图保存，全部使用模拟设备和录制截图离线运行
+"""
+
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import cv2
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.frame_utils import encode_frame, crop_frame
+from screenshot import screenshot_store
+from screenshot.capture_history import CaptureHistoryStore
+from screenshot.screenshot_store import ScreenshotStore
+from recognition.template_matcher import TemplateMatcher
+from recognition.ocr_pipeline import OCRPipeline, normalize_crop
+from market_automation import market_clicker as market_clicker_module
+from market_automation.market_clicker import MarketClicker
+from test.fake_device import FakeDeviceManager, SCREENSHOT_DIR, DEFAULT_SCREENS
+from bench.stats import summarize
+from bench.phase_timer import PhaseTimer
+
+# 基础环节使用的录制截图（报价界面）与模板区域（关闭按钮）
+QUOTES_FRAME = os.path.join(SCREENSHOT_DIR, DEFAULT_SCREENS["quotes"]["image"])
+TEMPLATE_ROI = (650, 295, 70, 70)
+
+
+class BenchContext:
+    """性能测试上下文：配置、日志、录制帧、临时工作目录与模拟设备参数"""
+    
+    def __init__(self, work_dir: str, latency=0.0, jitter: float = 0.0, seed: int = 0):
+        """初始化性能测试上下文
+        
+        Args:
+            work_dir: 临时工作目录（截图、数据库都写在这里）
+            latency: 模拟设备的操作延迟（秒），数值或按操作名的字典
+            jitter: 模拟设备的延迟抖动上限（秒）
+            seed: 抖动的随机种子
+        """
+        self.work_dir = work_dir
+        self.config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        self.config.set('screenshot.save_path', os.path.join(work_dir, "screenshots"))
+        self.logger = Logger(console_output=False)
+        self.frame = cv2.imread(QUOTES_FRAME)
+        self.device_options = {"latency": latency, "jitter": jitter, "seed": seed}
+    
+    def create_u2_manager(self) -> FakeDeviceManager:
+        """创建并连接模拟设备管理器"""
+        u2_manager = FakeDeviceManager(self.config, self.logger, device_id="bench-device", **self.device_options)
+        if not u2_manager.initialize():
+            raise RuntimeError("模拟设备连接失败")
+        return u2_manager
+
+
+def time_calls(function: Callable[[int], Any], iterations: int) -> Dict[str, Any]:
+    """重复调用并汇总耗时
+    
+    Args:
+        function: 被测函数，参数为迭代序号
+        iterations: 调用次数
+    
+    Returns:
+        Dict[str, Any]: summarize 结果
+    """
+    samples = []
+    start = time.perf_counter()
+    for index in range(iterations):
+        call_start = time.perf_counter()
+        function(index)
+        samples.append(time.perf_counter() - call_start)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def bench_market_sequence(context: BenchContext, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """完整市场操作序列，按阶段分别统计（阶段可能嵌套：wait 含等待期间的截图，save 含编码）"""
+    u2_manager = context.create_u2_manager()
+    market_clicker = MarketClicker(u2_manager, context.config, context.logger)
+    market_clicker.initialize()
+    
+    samples = []
+    with PhaseTimer() as timer:
+        timer.wrap(u2_manager, 'tap_element', 'tap')
+        timer.wrap(u2_manager, 'swipe_element', 'swipe')
+        timer.wrap(u2_manager, 'take_frame', 'capture')
+        timer.wrap(market_clicker, 'wait_for_settle', 'wait')
+        timer.wrap(screenshot_store, 'encode_frame', 'encode')
+        timer.wrap(ScreenshotStore, 'put_frame', 'save')
+        timer.wrap(market_clicker_module, 'write_frame', 'save')
+        
+        start = time.perf_counter()
+        for _ in range(iterations):
+            u2_manager.fake_device.app_start(u2_manager.fake_device.package)
+            sequence_start = time.perf_counter()
+            if not market_clicker.execute_market_sequence():
+                raise RuntimeError("市场操作序列执行失败")
+            samples.append(time.perf_counter() - sequence_start)
+        wall_time = time.perf_counter() - start
+        phases = timer.get_samples()
+    
+    results = {"sequence.total": summarize(samples, wall_time)}
+    for phase in ('tap', 'wait', 'swipe', 'capture', 'encode', 'save'):
+        results[f"sequence.{phase}"] = summarize(phases.get(phase, []), wall_time)
+    u2_manager.cleanup()
+    return results
+
+
+def bench_capture(context: BenchContext, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """截取原始帧（UIAutomator2Manager.take_frame）"""
+    u2_manager = context.create_u2_manager()
+    result = time_calls(lambda _: u2_manager.take_frame(), iterations)
+    u2_manager.cleanup()
+    return {"capture": result}
+
+
+def bench_png_encode(context: BenchContext, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """整屏帧PNG编码"""
+    return {"png_encode": time_calls(lambda _: encode_frame(context.frame), iterations)}
+
+
+def bench_template_match(context: BenchContext, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """整屏模板匹配（模板已缓存，每次重新预处理帧）"""
+    matcher = TemplateMatcher(context.config, context.logger)
+    matcher.register_template("bench_template", crop_frame(context.frame, TEMPLATE_ROI).copy())
+    
+    def match(_):
+        if matcher.match_template(context.frame, "bench_template") is None:
+            raise RuntimeError("模板匹配失败")
+    
+    return {"template_match": time_calls(match, iterations)}
+
+
+def bench_ocr(context: BenchContext, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """报价列表可视区域OCR：切分与归一化（ocr_prepare），以及完整识别（ocr，需要Tesseract，不使用缓存）"""
+    context.config.set('ocr.cache.enabled', False)
+    context.config.set('ocr.saveRecords', False)
+    pipeline = OCRPipeline(context.config, context.logger)
+    viewport = tuple(context.config.get('market_automation', {}).get('quote_list', {}).get(
+        'viewport', [20, 490, 680, 720]))
+    image = crop_frame(context.frame, viewport).copy()
+    
+    def prepare(_):
+        for _, _, cell in pipeline.split_cells(image):
+            for options in pipeline.fields.values():
+                region = crop_frame(cell, tuple(options['roi']))
+                if region.size:
+                    normalize_crop(region)
+    
+    results = {"ocr_prepare": time_calls(prepare, iterations)}
+    if pipeline.available:
+        results["ocr"] = time_calls(lambda _: pipeline.submit(image).result(), iterations)
+    else:
+        results["ocr"] = {"count": 0, "skipped": "未安装pytesseract"}
+    pipeline.cleanup()
+    return results
+
+
+def bench_history_save(context: BenchContext, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """截图历史记录写入（SQLite，每条单独提交）"""
+    store = CaptureHistoryStore(os.path.join(context.work_dir, "capture_history.db"))
+    store.connect()
+    height, width = context.frame.shape[:2]
+    
+    def append(index):
+        store.append({
+            "record_id": f"bench_{index}", "task_id": "bench", "timestamp": time.time(),
+            "file_path": os.path.join(context.work_dir, f"bench_{index}.png"), "file_size": 0,
+            "width": width, "height": height, "format": "PNG", "processing_time": 0.0, "success": True
+        })
+    
+    result = time_calls(append, iterations)
+    store.disconnect()
+    return {"history_save": result}
+
+
+def bench_screenshot_save(context: BenchContext, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """截图保存（内容寻址存储，每帧内容不同，均需编码并写入）"""
+    store = ScreenshotStore(os.path.join(context.work_dir, "store"))
+    frame = context.frame.copy()
+    
+    def save(index):
+        frame[0, 0] = (index % 256, index // 256 % 256, index // 65536 % 256)
+        if store.put_frame(frame, f"bench_{index}.png") is None:
+            raise RuntimeError("截图保存失败")
+    
+    return {"screenshot_save": time_calls(save, iterations)}
+
+
+# 名称 -> (测试函数, 是否为完整序列)；完整序列耗时较长，单独指定迭代次数
+BENCHMARKS = {
+    "market_sequence": (bench_market_sequence, True),
+    "capture": (bench_capture, False),
+    "png_encode": (bench_png_encode, False),
+    "template_match": (bench_template_match, False),
+    "ocr": (bench_ocr, False),
+    "history_save": (bench_history_save, False),
+    "screenshot_save": (bench_screenshot_save, False)
+}
+
+
+def run_benchmarks(names: Optional[List[str]] = None, iterations: int = 50, sequence_iterations: int = 3,
+                   latency=0.0, jitter: float = 0.0, seed: int = 0, label: str = "") -> Dict[str, Any]:
+    """运行性能测试
+    
+    Args:
+        names: 要运行的测试名称，None表示全部
+        iterations: 基础环节的重复次数
+        sequence_iterations: 完整序列的重复次数
+        latency: 模拟设备的操作延迟（秒），数值或按操作名的字典
+        jitter: 模拟设备的延迟抖动上限（秒）
+        seed: 抖动的随机种子
+        label: 结果标签（如版本号）
+    
+    Returns:
+        Dict[str, Any]: {"meta": 运行环境与参数, "results": {名称: summarize结果}}
+    """
+    names = names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"未知的性能测试：{', '.join(unknown)}")
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        context = BenchContext(work_dir, latency, jitter, seed)
+        for name in names:
+            function, is_sequence = BENCHMARKS[name]
+            results.update(function(context, sequence_iterations if is_sequence else iterations))
+    
+    return {
+        "meta": {
+            "label": label,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "iterations": iterations,
+            "sequence_iterations": sequence_iterations,
+            "latency": latency,
+            "jitter": jitter,
+            "seed": seed
+        },
+        "results": results
+    }
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+阶段计时模块
+临时替换对象（实例、类或模块）上的方法，记录每次调用的耗时，结束后恢复原方法
+"""
+
+import functools
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+
+class PhaseTimer:
+    """按阶段记录调用耗时的计时器
+    
+    阶段之间可能嵌套（如等待画面稳定期间的截图同时计入 wait 和 capture），各阶段分别统计
+    """
+    
+    def __init__(self):
+        """初始化阶段计时器"""
+        self.samples = defaultdict(list)
+        self.patches = []
+        self.lock = threading.Lock()
+    
+    def wrap(self, owner: Any, attribute: str, phase: str):
+        """替换 owner.attribute，调用耗时计入 phase
+        
+        Args:
+            owner: 实例、类或模块
+            attribute: 方法或函数名
+            phase: 阶段名称
+        """
+        original = getattr(owner, attribute)
+        had_own = attribute in vars(owner)
+        
+        # 替换为普通函数：放在类上时调用会绑定 self，放在实例或模块上时原样调用
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    self.samples[phase].append(elapsed)
+        
+        setattr(owner, attribute, functools.wraps(original)(timed))
+        self.patches.append((owner, attribute, original, had_own))
+    
+    def restore(self):
+        """恢复所有被替换的方法"""
+        for owner, attribute, original, had_own in reversed(self.patches):
+            if had_own:
+                setattr(owner, attribute, original)
+            else:
+                delattr(owner, attribute)
+        self.patches = []
+    
+    def get_samples(self) -> Dict[str, List[float]]:
+        """获取各阶段的耗时样本（秒）"""
+        with self.lock:
+            return {phase: list(values) for phase, values in self.samples.items()}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.restore()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能测试运行脚本
+运行性能测试并输出 p50/p95/p99 与吞吐量，可保存为JSON并与基线结果比较（有退化时返回码为1）
+
+用法：
+    python bench/run_bench.py --output data/bench/current.json
+    python bench/run_bench.py --baseline data/bench/baseline.json --tolerance 0.2
+    python bench/run_bench.py --only png_encode,template_match --iterations 200
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from bench.benchmarks import BENCHMARKS, run_benchmarks
+from bench.stats import compare_results, format_table
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="市场自动化性能测试")
+    parser.add_argument("--only", default="", help=f"逗号分隔的测试名称，可选：{', '.join(BENCHMARKS)}")
+    parser.add_argument("--iterations", type=int, default=50, help="基础环节的重复次数")
+    parser.add_argument("--sequence-iterations", type=int, default=3, help="完整市场操作序列的重复次数")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟设备每次操作的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="模拟设备延迟抖动上限（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="抖动的随机种子")
+    parser.add_argument("--label", default="", help="结果标签（如版本号）")
+    parser.add_argument("--output", help="结果JSON文件路径")
+    parser.add_argument("--baseline", help="基线结果JSON文件路径，提供时比较并报告退化")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的相对变慢比例")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """主函数
+    
+    Returns:
+        int: 返回码，与基线比较出现退化时为1
+    """
+    args = parse_args(argv)
+    names = [name.strip() for name in args.only.split(",") if name.strip()] or None
+    report = run_benchmarks(names, args.iterations, args.sequence_iterations,
+                            args.latency, args.jitter, args.seed, args.label)
+    print(format_table(report["results"]))
+    
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["baseline"] = {"path": args.baseline, "meta": baseline.get("meta", {})}
+        report["comparison"] = compare_results(report["results"], baseline.get("results", {}), args.tolerance)
+        regressions = [item for item in report["comparison"] if item["regressed"]]
+        
+        print(f"\n与基线比较（{args.baseline}，容差{args.tolerance:.0%}）：")
+        for item in report["comparison"]:
+            mark = "退化" if item["regressed"] else "正常"
+            print(f"  {item['name']:<24}{item['metric']:<5}{item['baseline']:>10.3f} -> {item['current']:>10.3f} ms"
+                  f"  x{item['ratio']:.2f}  {mark}")
+    
+    if args.output:
+        output_dir = os.path.dirname(args.output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存至：{args.output}")
+    
+    if regressions:
+        print(f"\n发现{len(regressions)}项性能退化")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+耗时统计模块
+把耗时样本汇总为分位数与吞吐量，并与基线结果比较找出性能退化
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# 与基线比较的指标
+COMPARE_METRICS = ("p50", "p95")
+
+
+def summarize(samples: List[float], wall_time: Optional[float] = None) -> Dict[str, Any]:
+    """汇总耗时样本
+    
+    Args:
+        samples: 每次操作的耗时（秒）
+        wall_time: 全部操作的总墙钟时间（秒），None时取样本之和
+    
+    Returns:
+        Dict[str, Any]: 次数、平均值、分位数、最值（毫秒）及吞吐量（次/秒）
+    """
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    wall_time = wall_time if wall_time is not None else float(values.sum()) / 1000
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "min_ms": round(float(values.min()), 3),
+        "max_ms": round(float(values.max()), 3),
+        "throughput": round(len(samples) / wall_time, 3) if wall_time > 0 else 0
+    }
+
+
+def compare_results(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+                    tolerance: float = 0.2, min_delta_ms: float = 1.0) -> List[Dict[str, Any]]:
+    """与基线比较各项的 p50、p95
+    
+    Args:
+        current: 本次结果 {名称: summarize结果}
+        baseline: 基线结果
+        tolerance: 允许的相对变慢比例，超过视为退化
+        min_delta_ms: 绝对差值低于该值时不视为退化（避免亚毫秒级操作的噪声）
+    
+    Returns:
+        List[Dict[str, Any]]: 两边都有的每项指标的比较结果（name、metric、baseline、current、ratio、regressed）
+    """
+    comparisons = []
+    for name in sorted(set(current) & set(baseline)):
+        for metric in COMPARE_METRICS:
+            key = f"{metric}_ms"
+            old, new = baseline[name].get(key), current[name].get(key)
+            if old is None or new is None:
+                continue
+            ratio = new / old if old > 0 else float("inf") if new > 0 else 1.0
+            comparisons.append({
+                "name": name,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + tolerance and new - old > min_delta_ms
+            })
+    return comparisons
+
+
+def format_table(results: Dict[str, Dict[str, Any]]) -> str:
+    """把结果格式化为文本表格
+    
+    Args:
+        results: {名称: summarize结果}
+    
+    Returns:
+        str: 表格文本
+    """
+    lines = [f"{'名称':<24}{'次数':>6}{'p50(ms)':>12}{'p95(ms)':>12}{'p99(ms)':>12}{'次/秒':>10}"]
+    for name, summary in results.items():
+        if not summary.get("count"):
+            lines.append(f"{name:<24}{'跳过':>6}  {summary.get('skipped', '')}")
+            continue
+        lines.append(f"{name:<24}{summary['count']:>6}{summary['p50_ms']:>12.3f}{summary['p95_ms']:>12.3f}"
+                     f"{summary['p99_ms']:>12.3f}{summary['throughput']:>10.2f}")
+    return "\n".join(lines)
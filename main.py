@@ -5,6 +5,8 @@ from utils.config_manager import ConfigManager
 from utils.device_manager import DeviceManager
 from utils.uiautomator2_manager import UIAutomator2Manager
 from utils.logger import Logger
+from utils.tracing import configure_tracing
+from utils.metrics import configure_metrics
 from market_automation.market_clicker import MarketClicker
 
 # 添加项目根目录到Python路径
@@ -73,6 +75,8 @@ def main():
     # 1. 初始化工具（读取配置 + 连接设备 + 初始化截图/日志）
     config = ConfigManager("config/market_config.json")
     logger = Logger()
+    tracer = configure_tracing(config, logger)
+    configure_metrics(config, logger)
     device_manager = DeviceManager(config, logger)
     
     # 2. 确认设备连接成功
@@ -162,5 +166,10 @@ def main():
             market_clicker.cleanup()
         u2_manager.cleanup()
 
+        # 导出本次运行各步骤的耗时追踪（配置了 tracing.traceFile 时）
+        trace_path = tracer.export_chrome_trace()
+        if trace_path:
+            logger.info(f"耗时追踪已保存至：{trace_path}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
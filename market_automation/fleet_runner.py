@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多设备市场自动化模块
+发现所有已连接的模拟器，为每台设备创建独立的UIAutomator2管理器和市场点击器，
+并行执行市场操作序列，所有设备共享一个模板匹配器（及其识别线程池），最后汇总结果
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.interfaces import BaseModule
+from utils.device_manager import DeviceManager
+from utils.uiautomator2_manager import UIAutomator2Manager
+from utils.tracing import configure_tracing
+from utils.metrics import configure_metrics
+from recognition.template_matcher import TemplateMatcher
+from recognition.ocr_pipeline import OCRPipeline
+from market_automation.market_clicker import MarketClicker
+
+
+@dataclass
+class DeviceRunResult:
+    """单台设备的运行结果数据类"""
+    serial: str
+    success: bool = False
+    rounds: int = 0
+    succeeded_rounds: int = 0
+    duration: float = 0.0
+    round_durations: List[float] = field(default_factory=list)
+    error: Optional[str] = None
+    
+    @property
+    def average_round_time(self) -> float:
+        """平均每轮耗时（秒）"""
+        return sum(self.round_durations) / len(self.round_durations) if self.round_durations else 0
+
+
+@dataclass
+class FleetResult:
+    """多设备运行汇总结果数据类"""
+    devices: List[DeviceRunResult]
+    duration: float
+    recognition_stats: Dict[str, Any] = field(default_factory=dict)
+    ocr_stats: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def succeeded(self) -> List[str]:
+        """全部轮次成功的设备"""
+        return [result.serial for result in self.devices if result.success]
+    
+    @property
+    def failed(self) -> List[str]:
+        """存在失败轮次的设备"""
+        return [result.serial for result in self.devices if not result.success]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        total_rounds = sum(result.rounds for result in self.devices)
+        return {
+            "device_count": len(self.devices),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "duration": self.duration,
+            "total_rounds": total_rounds,
+            "succeeded_rounds": sum(result.succeeded_rounds for result in self.devices),
+            "rounds_per_minute": total_rounds / self.duration * 60 if self.duration > 0 else 0,
+            "devices": [dict(asdict(result), average_round_time=result.average_round_time)
+                        for result in self.devices],
+            "recognition": self.recognition_stats,
+            "ocr": self.ocr_stats
+        }
+
+
+class FleetRunner(BaseModule):
+    """多设备市场自动化运行器类"""
+    
+    def __init__(self, config_manager, logger, device_manager: Optional[DeviceManager] = None,
+                 u2_factory: Optional[Callable[[str], Any]] = None):
+        """初始化多设备运行器
+        
+        Args:
+            config_manager: 配置管理器实例
+            logger: 日志记录器实例
+            device_manager: 设备管理器实例，None时自动创建
+            u2_factory: 按设备序列号创建UIAutomator2管理器的工厂函数，None使用默认实现
+        """
+        super().__init__(config_manager, logger)
+        self.device_manager = device_manager or DeviceManager(config_manager, logger)
+        self.u2_factory = u2_factory or self._create_u2_manager
+        self.config = self.config_manager.get('fleet', {})
+        
+        # 设备筛选：serials 为空表示使用全部已连接设备，maxDevices 为0表示不限
+        self.serials = self.config.get('serials', [])
+        self.exclude = self.config.get('exclude', [])
+        self.max_devices = self.config.get('maxDevices', 0)
+        
+        # 节奏控制：设备错峰启动间隔、每台设备两轮之间的最小间隔（秒）
+        self.start_interval = self.config.get('startInterval', 0.5)
+        self.round_interval = self.config.get('roundInterval', 0)
+        
+        # 所有设备共享的模板匹配器（识别线程池大小由 recognition.matchWorkers 控制）
+        self.template_matcher = TemplateMatcher(config_manager, logger)
+        
+        # 所有设备共享的OCR流水线（识别进程池大小由 ocr.workers 控制），ocr.enabled 为false时不识别
+        self.ocr_pipeline = None
+        if self.config_manager.get('ocr.enabled', False):
+            self.ocr_pipeline = OCRPipeline(config_manager, logger)
+        
+        # 运行状态
+        self.sessions = {}
+        self.results = {}
+        self.results_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.last_result = None
+        self.tracer = None
+    
+    def initialize(self) -> bool:
+        """初始化模块
+        
+        Returns:
+            bool: 初始化是否成功
+        """
+        try:
+            self.tracer = configure_tracing(self.config_manager, self.logger)
+            configure_metrics(self.config_manager, self.logger)
+            if not self.template_matcher.initialize():
+                return False
+            if self.ocr_pipeline is not None and not self.ocr_pipeline.initialize():
+                return False
+            self.is_initialized = True
+            self.start_time = time.time()
+            self.logger.info("多设备运行器初始化成功")
+            return True
+        except Exception as e:
+            self.logger.error(f"多设备运行器初始化失败：{str(e)}")
+            return False
+    
+    def cleanup(self) -> bool:
+        """清理模块资源
+        
+        Returns:
+            bool: 清理是否成功
+        """
+        try:
+            self.stop()
+            self.template_matcher.cleanup()
+            if self.ocr_pipeline is not None:
+                self.ocr_pipeline.cleanup()
+            self.device_manager.close()
+            if self.tracer is not None:
+                self.tracer.export_chrome_trace()
+            self.is_initialized = False
+            self.logger.info("多设备运行器资源清理完成")
+            return True
+        except Exception as e:
+            self.logger.error(f"多设备运行器资源清理失败：{str(e)}")
+            return False
+    
+    def discover_devices(self) -> List[str]:
+        """发现可用设备
+        
+        Returns:
+            List[str]: 设备序列号列表
+        """
+        devices = self.device_manager._get_connected_devices()
+        if self.serials:
+            devices = [serial for serial in devices if serial in self.serials]
+        devices = [serial for serial in devices if serial not in self.exclude]
+        if self.max_devices > 0:
+            devices = devices[:self.max_devices]
+        
+        self.logger.info(f"发现 {len(devices)} 台设备：{', '.join(devices)}")
+        return devices
+    
+    def run(self, rounds: int = 1, devices: Optional[List[str]] = None) -> FleetResult:
+        """在所有设备上并行执行市场操作序列
+        
+        Args:
+            rounds: 每台设备执行的轮数
+            devices: 设备序列号列表，None表示自动发现
+        
+        Returns:
+            FleetResult: 汇总结果
+        """
+        start = time.time()
+        self.stop_event.clear()
+        if devices is None:
+            devices = self.discover_devices()
+        
+        with self.results_lock:
+            self.results = {serial: DeviceRunResult(serial) for serial in devices}
+        
+        threads = []
+        for index, serial in enumerate(devices):
+            thread = threading.Thread(
+                target=self._run_device,
+                args=(serial, rounds, index * self.start_interval),
+                name=f"Fleet-{serial}",
+                daemon=True
+            )
+            threads.append(thread)
+            thread.start()
+        
+        for thread in threads:
+            thread.join()
+        
+        result = FleetResult(
+            devices=[self.results[serial] for serial in devices],
+            duration=time.time() - start,
+            recognition_stats=self.template_matcher.get_stats(),
+            ocr_stats=self.ocr_pipeline.get_stats() if self.ocr_pipeline is not None else {}
+        )
+        self.last_result = result
+        self.logger.info(f"多设备运行完成：成功 {len(result.succeeded)} 台，失败 {len(result.failed)} 台，"
+                         f"耗时 {result.duration:.2f}秒")
+        return result
+    
+    def stop(self):
+        """请求所有设备在当前轮次结束后停止"""
+        self.stop_event.set()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """获取模块状态
+        
+        Returns:
+            Dict[str, Any]: 状态信息
+        """
+        status = super().get_status()
+        with self.results_lock:
+            status.update({
+                'active_devices': list(self.sessions.keys()),
+                'results': {serial: asdict(result) for serial, result in self.results.items()},
+                'recognition': self.template_matcher.get_stats()
+            })
+        return status
+    
+    def _create_u2_manager(self, serial: str):
+        """创建并连接指定设备的UIAutomator2管理器"""
+        u2_manager = UIAutomator2Manager(self.config_manager, self.logger, device_id=serial)
+        if not u2_manager.initialize():
+            return None
+        return u2_manager
+    
+    def _create_clicker(self, serial: str, u2_manager) -> MarketClicker:
+        """创建设备专属的市场点击器（截图保存到按设备区分的子目录）"""
+        market_clicker = MarketClicker(u2_manager, self.config_manager, self.logger)
+        market_clicker.screenshot_dir = os.path.join(market_clicker.screenshot_dir, re.sub(r'[^\w.-]', '_', serial))
+        os.makedirs(market_clicker.screenshot_dir, exist_ok=True)
+        market_clicker.attach_template_matcher(self.template_matcher)
+        market_clicker.attach_ocr_pipeline(self.ocr_pipeline)
+        market_clicker.initialize()
+        return market_clicker
+    
+    def _run_device(self, serial: str, rounds: int, start_delay: float):
+        """设备线程：错峰启动后按节奏执行多轮市场操作序列"""
+        result = self.results[serial]
+        start = time.time()
+        u2_manager = None
+        market_clicker = None
+        
+        try:
+            if start_delay > 0 and self.stop_event.wait(start_delay):
+                return
+            
+            u2_manager = self.u2_factory(serial)
+            if u2_manager is None:
+                result.error = "UIAutomator2连接失败"
+                self.logger.error(f"[{serial}] UIAutomator2连接失败")
+                return
+            
+            market_clicker = self._create_clicker(serial, u2_manager)
+            with self.results_lock:
+                self.sessions[serial] = market_clicker
+            
+            for round_index in range(rounds):
+                if self.stop_event.is_set():
+                    break
+                
+                round_start = time.time()
+                success = market_clicker.execute_market_sequence()
+                round_duration = time.time() - round_start
+                
+                with self.results_lock:
+                    result.rounds += 1
+                    result.round_durations.append(round_duration)
+                    if success:
+                        result.succeeded_rounds += 1
+                self.logger.info(f"[{serial}] 第{round_index + 1}轮{'成功' if success else '失败'}，"
+                                 f"耗时 {round_duration:.2f}秒")
+                
+                # 每台设备独立控制两轮之间的间隔
+                remaining = self.round_interval - round_duration
+                if round_index < rounds - 1 and remaining > 0 and self.stop_event.wait(remaining):
+                    break
+            
+            result.success = result.rounds > 0 and result.succeeded_rounds == result.rounds
+        
+        except Exception as e:
+            result.error = str(e)
+            self.logger.error(f"[{serial}] 设备运行异常：{str(e)}")
+        
+        finally:
+            result.duration = time.time() - start
+            with self.results_lock:
+                self.sessions.pop(serial, None)
+            if market_clicker is not None:
+                market_clicker.cleanup()
+            if u2_manager is not None:
+                u2_manager.cleanup()
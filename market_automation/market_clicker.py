@@ -16,6 +16,29 @@ sys.path.insert(0, PROJECT_ROOT)
 
 from utils.interfaces import BaseModule
 from utils.logger import Logger
+from utils.frame_utils import write_frame
+from utils.tracing import traced
+from utils.metrics import registry
+from screenshot.settle_detector import ScreenSettleDetector
+from screenshot.screenshot_store import ScreenshotStore
+from screenshot.screenshot_index import ScreenshotIndex, INDEX_FILENAME
+from screenshot.frame_stream import FrameStreamer
+from recognition.template_matcher import TemplateMatcher
+from recognition.ocr_pipeline import OCRPipeline
+from recognition.scroll_tracker import ScrollTracker
+from market_automation.quote_paginator import QuotePaginator
+
+# 市场操作指标：按钮模板匹配耗时，以及每台设备的操作序列耗时、结果和最近一次成功时间
+TEMPLATE_MATCH_SECONDS = registry.histogram(
+    "template_match_duration_seconds", "按钮模板匹配耗时（秒）", ("template",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+TEMPLATE_MATCH_MISSES = registry.counter("template_match_misses_total", "未匹配到按钮模板的次数", ("template",))
+MARKET_SEQUENCE_SECONDS = registry.histogram(
+    "market_sequence_duration_seconds", "完整市场操作序列耗时（秒）", ("device",),
+    buckets=(1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0))
+MARKET_SEQUENCES = registry.counter("market_sequence_total", "执行的市场操作序列数", ("device", "result"))
+MARKET_SEQUENCE_LAST_SUCCESS = registry.gauge(
+    "market_sequence_last_success_timestamp_seconds", "最近一次市场操作序列成功的时间戳", ("device",))
 
 
 class MarketClicker(BaseModule):
@@ -50,6 +73,122 @@ class MarketClicker(BaseModule):
             'after_scroll': self.config.get('after_scroll', 1)
         }
     
+        # 截图保存目录（多设备运行时按设备区分）
+        self.screenshot_dir = self.config_manager.get('screenshot', {}).get('save_path', 'data/screenshots/')
+        
+        # 截图文件索引位于截图根目录，与其他写入方共用，过期清理按索引进行（首次截图时打开）
+        self.screenshot_index_path = os.path.join(self.screenshot_dir, INDEX_FILENAME)
+        self.screenshot_index = None
+        
+        # 内容寻址存储：相同画面只写入一次，清单记录逻辑文件名，截图路径为 blobs/ 下的文件
+        # （screenshot.dedup.enabled 为 true 时首次截图按截图目录创建，或调用 attach_screenshot_store() 绑定共享实例）
+        self.dedup_config = self.config_manager.get('screenshot', {}).get('dedup', {})
+        self.screenshot_store = None
+        self.store_attached = False
+        
+        # 可选的连续帧流（FrameStreamer），存在时截图直接读取缓冲区中的最新帧
+        self.frame_stream = None
+        self.last_action_time = 0
+    
+        # 可选的模板匹配器（TemplateMatcher），存在时按配置的模板和搜索区域定位按钮
+        self.template_matcher = None
+        
+        # 未从外部绑定时，initialize() 按 screenshot.stream.enabled / recognition.enabled / ocr.enabled 自行创建的模块
+        self.owned_modules = []
+        
+        # 画面稳定检测：wait_times 作为等待上限，画面稳定后立即进入下一步
+        self.settle_config = self.config.get('settle', {})
+        self.settle_detector = ScreenSettleDetector.from_config(self._next_settle_frame, self.settle_config)
+        self._settle_frame_time = 0
+        
+        # 报价列表扫描：按实测滚动距离拼接长图，每次前进一屏（减去重叠区域）
+        self.quote_list_config = self.config.get('quote_list', {})
+        self.scroll_tracker = ScrollTracker.from_config(self.quote_list_config)
+        self.quote_paginator = QuotePaginator(self, config_manager, logger)
+    
+    def attach_frame_stream(self, frame_stream):
+        """绑定连续帧流采集器
+        
+        Args:
+            frame_stream: FrameStreamer实例，None表示解除绑定
+        """
+        self.frame_stream = frame_stream
+    
+    def attach_template_matcher(self, template_matcher):
+        """绑定模板匹配器，并注册坐标配置中带 template 的按钮
+        
+        Args:
+            template_matcher: TemplateMatcher实例，None表示解除绑定
+        """
+        self.template_matcher = template_matcher
+        if template_matcher is not None:
+            template_matcher.register_templates(self.coordinates, PROJECT_ROOT)
+    
+    def attach_screenshot_store(self, screenshot_store):
+        """绑定共享的内容寻址存储（如 FileStorageManager.screenshot_store），同一目录只使用一个存储实例
+        
+        Args:
+            screenshot_store: ScreenshotStore实例，None表示解除绑定
+        """
+        self.screenshot_store = screenshot_store
+        self.store_attached = screenshot_store is not None
+    
+    def attach_ocr_pipeline(self, ocr_pipeline):
+        """绑定OCR流水线，扫描报价列表时边翻页边识别
+        
+        Args:
+            ocr_pipeline: OCRPipeline实例，None表示解除绑定
+        """
+        self.quote_paginator.ocr_pipeline = ocr_pipeline
+    
+    def _resolve_coordinates(self, name: str) -> Dict[str, int]:
+        """获取按钮坐标
+        
+        配置了模板且绑定了模板匹配器时，先在配置的搜索区域内匹配，
+        未匹配到则返回配置中的固定坐标
+        
+        Args:
+            name: 坐标名称
+        
+        Returns:
+            Dict[str, int]: 坐标 {'x': x, 'y': y}
+        """
+        coords = self.coordinates[name]
+        if self.template_matcher is None or name not in self.template_matcher.named_templates:
+            return coords
+        
+        frame = self.grab_frame()
+        if frame is None:
+            return coords
+        
+        start_time = time.perf_counter()
+        result = self.template_matcher.match_template(frame, name)
+        TEMPLATE_MATCH_SECONDS.labels(name).observe(time.perf_counter() - start_time)
+        if result is None:
+            TEMPLATE_MATCH_MISSES.labels(name).inc()
+            self.logger.warning(f"未匹配到{name}模板，使用配置坐标")
+            return coords
+        return {'x': result['x'], 'y': result['y']}
+    
+    def grab_frame(self, after_ts: Optional[float] = None, timeout: float = 5.0):
+        """获取当前屏幕帧
+        
+        绑定了帧流时从缓冲区读取，否则直接向设备请求一帧
+        
+        Args:
+            after_ts: 要求帧采集时间晚于该时间戳，None表示不限制
+            timeout: 等待新帧的超时时间（秒）
+            
+        Returns:
+            Optional[np.ndarray]: BGR帧
+        """
+        if self.frame_stream is not None and self.frame_stream.is_running:
+            if after_ts:
+                return self.frame_stream.wait_for_frame(after_ts, timeout)
+            return self.frame_stream.latest_frame()
+        return self.u2_manager.take_frame()
+    
+    @traced("market.click_market_button", "market")
     def click_market_button(self) -> bool:
         """点击市场按钮 (366, 1204)
         
@@ -57,13 +196,15 @@ class MarketClicker(BaseModule):
             bool: 操作是否成功
         """
         try:
-            coords = self.coordinates['market_button']
-            self.logger.info(f"点击市场按钮，坐标：({coords['x']}, {coords['y']})")
+            coords = self._resolve_coordinates('market_button')
+            self.logger.info("点击市场按钮，坐标：(%s, %s)", coords['x'], coords['y'])
             
+            reference = self._reference_frame()
             success = self.u2_manager.tap_element(coords['x'], coords['y'])
+            self.last_action_time = time.time()
             if success:
                 self.logger.info("市场按钮点击成功")
-                time.sleep(self.wait_times['after_market_click'])
+                self.wait_for_settle(self.wait_times['after_market_click'], reference)
                 return True
             else:
                 self.logger.error("市场按钮点击失败")
@@ -73,6 +214,7 @@ class MarketClicker(BaseModule):
             self.logger.error(f"点击市场按钮异常：{str(e)}")
             return False
     
+    @traced("market.click_quote_button", "market")
     def click_quote_button(self) -> bool:
         """点击报价绿色按钮 (320, 445)
         
@@ -81,12 +223,14 @@ class MarketClicker(BaseModule):
         """
         try:
             coords = self.coordinates['quote_button']
-            self.logger.info(f"点击报价绿色按钮，坐标：({coords['x']}, {coords['y']})")
+            self.logger.info("点击报价绿色按钮，坐标：(%s, %s)", coords['x'], coords['y'])
             
+            reference = self._reference_frame()
             success = self.u2_manager.tap_element(coords['x'], coords['y'])
+            self.last_action_time = time.time()
             if success:
                 self.logger.info("报价绿色按钮点击成功")
-                time.sleep(self.wait_times['after_quote_click'])
+                self.wait_for_settle(self.wait_times['after_quote_click'], reference)
                 return True
             else:
                 self.logger.error("报价绿色按钮点击失败")
@@ -96,6 +240,7 @@ class MarketClicker(BaseModule):
             self.logger.error(f"点击报价绿色按钮异常：{str(e)}")
             return False
     
+    @traced("market.click_show_all_quotes", "market")
     def click_show_all_quotes(self) -> bool:
         """点击显示全部报价 (358, 894)
         
@@ -104,12 +249,14 @@ class MarketClicker(BaseModule):
         """
         try:
             coords = self.coordinates['show_all_quotes']
-            self.logger.info(f"点击显示全部报价，坐标：({coords['x']}, {coords['y']})")
+            self.logger.info("点击显示全部报价，坐标：(%s, %s)", coords['x'], coords['y'])
             
+            reference = self._reference_frame()
             success = self.u2_manager.tap_element(coords['x'], coords['y'])
+            self.last_action_time = time.time()
             if success:
                 self.logger.info("显示全部报价点击成功")
-                time.sleep(self.wait_times['after_show_all'])
+                self.wait_for_settle(self.wait_times['after_show_all'], reference)
                 return True
             else:
                 self.logger.error("显示全部报价点击失败")
@@ -119,6 +266,7 @@ class MarketClicker(BaseModule):
             self.logger.error(f"点击显示全部报价异常：{str(e)}")
             return False
     
+    @traced("market.scroll_up_at_quotes_position", "market")
     def scroll_up_at_quotes_position(self) -> bool:
         """在显示全部报价位置向上滑动
         
@@ -143,10 +291,12 @@ class MarketClicker(BaseModule):
             # 计算实际滑动距离（用于日志显示）
             scroll_distance = abs(start_coords['y'] - end_coords['y'])
             
-            self.logger.info(f"在报价位置向上滑动，从({start_coords['x']}, {start_coords['y']})到({end_coords['x']}, {end_coords['y']})")
-            self.logger.info(f"滑动距离：{scroll_distance}像素，持续时间：500毫秒")
+            self.logger.info("在报价位置向上滑动，从(%s, %s)到(%s, %s)",
+                             start_coords['x'], start_coords['y'], end_coords['x'], end_coords['y'])
+            self.logger.info("滑动距离：%s像素，持续时间：500毫秒", scroll_distance)
             
             # 执行滑动操作
+            reference = self._reference_frame()
             # swipe_element 参数说明：
             # - start_coords['x'], start_coords['y']: 滑动起始坐标
             # - end_coords['x'], end_coords['y']: 滑动结束坐标
@@ -156,11 +306,12 @@ class MarketClicker(BaseModule):
                 end_coords['x'], end_coords['y'],
                 duration=500  # 滑动持续时间500毫秒，可根据需要调整（值越大滑动越慢）
             )
+            self.last_action_time = time.time()
             
             if success:
                 self.logger.info("向上滑动成功")
-                # 滑动后等待时间，确保界面稳定
-                time.sleep(self.wait_times['after_scroll'])
+                # 滑动后等待界面稳定（after_scroll 为等待上限）
+                self.wait_for_settle(self.wait_times['after_scroll'], reference)
                 return True
             else:
                 self.logger.error("向上滑动失败")
@@ -170,6 +321,52 @@ class MarketClicker(BaseModule):
             self.logger.error(f"向上滑动异常：{str(e)}")
             return False
     
+    def _next_settle_frame(self):
+        """为稳定检测提供下一帧，帧流模式下保证每次返回更新的帧"""
+        if self.frame_stream is not None and self.frame_stream.is_running:
+            entry = self.frame_stream.wait_for_frame_with_timestamp(self._settle_frame_time, timeout=1.0, copy=False)
+            if entry is None:
+                return None
+            frame, self._settle_frame_time = entry
+            return frame
+        return self.u2_manager.take_frame()
+    
+    def _reference_frame(self):
+        """获取操作前的参考帧：帧流模式下取最新帧，否则截取一帧（关闭稳定检测时不获取）"""
+        if not self.settle_config.get('enabled', True):
+            return None
+        if self.frame_stream is not None and self.frame_stream.is_running:
+            return self.frame_stream.latest_frame()
+        return self.u2_manager.take_frame()
+    
+    @traced("market.wait_for_settle", "market")
+    def wait_for_settle(self, max_wait: float, reference=None, roi=None) -> bool:
+        """等待画面稳定，最长等待 max_wait 秒
+        
+        Args:
+            max_wait: 最长等待时间（秒）
+            reference: 操作前的参考帧，提供时先等待画面发生变化
+            roi: 关注区域 (x, y, width, height)，None时使用配置中的区域
+            
+        Returns:
+            bool: 画面是否在超时前稳定
+        """
+        if not self.settle_config.get('enabled', True):
+            time.sleep(max_wait)
+            return True
+        
+        self._settle_frame_time = self.last_action_time
+        if roi is None and self.settle_config.get('roi'):
+            roi = tuple(self.settle_config['roi'])
+        
+        result = self.settle_detector.wait_until_stable(max_wait, roi=roi, reference=reference)
+        if result.stable:
+            self.logger.debug("画面已稳定，耗时：%.3f秒，检测帧数：%s", result.elapsed, result.frames)
+        else:
+            self.logger.debug("等待画面稳定超时：%s秒，最后帧差：%.2f", max_wait, result.last_diff)
+        return result.stable
+    
+    @traced("market.take_screenshot", "market", record_args=("name_prefix",))
     def take_screenshot(self, name_prefix: str = "market") -> Optional[str]:
         """截取当前屏幕
         
@@ -180,11 +377,11 @@ class MarketClicker(BaseModule):
             Optional[str]: 截图文件路径，失败返回None
         """
         try:
-            self.logger.info(f"开始截图，前缀：{name_prefix}")
+            self.logger.info("开始截图，前缀：%s", name_prefix)
             
-            # 使用UIAutomator2管理器截图
-            screenshot_data = self.u2_manager.take_screenshot()
-            if not screenshot_data:
+            # 获取上一次操作之后的原始帧，仅在写入磁盘时编码
+            frame = self.grab_frame(self.last_action_time)
+            if frame is None:
                 self.logger.error("截图失败：无法获取截图数据")
                 return None
             
@@ -192,25 +389,67 @@ class MarketClicker(BaseModule):
             timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
             filename = f"{name_prefix}_{timestamp}.png"
             
-            # 确保截图目录存在
-            screenshot_dir = self.config_manager.get('screenshot', {}).get('save_path', 'data/screenshots/')
-            import os
-            os.makedirs(screenshot_dir, exist_ok=True)
-            
-            # 保存截图
-            file_path = os.path.join(screenshot_dir, filename)
-            
-            # 将字节数据保存为文件
-            with open(file_path, 'wb') as f:
-                f.write(screenshot_data)
+            # 保存截图：启用去重时按内容保存，返回实际文件路径
+            screenshot_store = self._get_screenshot_store()
+            if screenshot_store is not None:
+                entry = screenshot_store.put_frame(frame, filename)
+                if entry is None:
+                    self.logger.error(f"截图失败：无法保存 {filename}")
+                    return None
+                self.logger.info("截图成功，%s 保存至：%s%s", filename, entry.path,
+                                 "（重复画面，未重新写入）" if entry.deduplicated else "")
+                return entry.path
+            
+            file_path = os.path.join(self.screenshot_dir, filename)
+            if not write_frame(frame, file_path):
+                self.logger.error(f"截图失败：无法写入文件 {file_path}")
+                return None
+            self._index_file(file_path)
             
-            self.logger.info(f"截图成功，保存至：{file_path}")
+            self.logger.info("截图成功，保存至：%s", file_path)
             return file_path
             
         except Exception as e:
             self.logger.error(f"截图异常：{str(e)}")
             return None
     
+    def _get_screenshot_store(self) -> Optional[ScreenshotStore]:
+        """获取绑定的共享存储或当前截图目录的内容寻址存储，未启用去重时返回None"""
+        if self.store_attached:
+            return self.screenshot_store
+        if not self.dedup_config.get('enabled', False):
+            return None
+        if self.screenshot_store is None or self.screenshot_store.root_dir != self.screenshot_dir:
+            self.screenshot_store = ScreenshotStore(
+                self.screenshot_dir,
+                near_duplicate_distance=self.dedup_config.get('nearDuplicateDistance', 0),
+                logger=self.logger,
+                max_entries=self.dedup_config.get('maxEntries', 10000),
+                index=self._get_screenshot_index()
+            )
+        return self.screenshot_store
+    
+    def _get_screenshot_index(self) -> Optional[ScreenshotIndex]:
+        """获取截图文件索引（首次使用时打开），打开失败返回None"""
+        if self.screenshot_index is None:
+            try:
+                screenshot_index = ScreenshotIndex(self.screenshot_index_path)
+                screenshot_index.connect()
+                self.screenshot_index = screenshot_index
+            except Exception as e:
+                self.logger.error(f"打开截图索引失败：{str(e)}")
+        return self.screenshot_index
+    
+    def _index_file(self, file_path: str):
+        """直接写入的截图登记到索引"""
+        try:
+            screenshot_index = self._get_screenshot_index()
+            if screenshot_index is not None:
+                screenshot_index.add(file_path, time.time(), os.path.getsize(file_path))
+        except Exception as e:
+            self.logger.error(f"登记截图索引失败：{str(e)}")
+    
+    @traced("market.scroll_up_800_pixels", "market")
     def scroll_up_800_pixels(self) -> bool:
         """向上滑动715像素
         
@@ -229,19 +468,21 @@ class MarketClicker(BaseModule):
             end_x, end_y = 360, 185
             scroll_distance = abs(start_y - end_y)
             
-            self.logger.info(f"向上滑动715像素，从({start_x}, {start_y})到({end_x}, {end_y})")
-            self.logger.info(f"滑动距离：{scroll_distance}像素，持续时间：500毫秒")
+            self.logger.info("向上滑动715像素，从(%s, %s)到(%s, %s)", start_x, start_y, end_x, end_y)
+            self.logger.info("滑动距离：%s像素，持续时间：500毫秒", scroll_distance)
             
             # 执行滑动操作
+            reference = self._reference_frame()
             success = self.u2_manager.swipe_element(
                 start_x, start_y,
                 end_x, end_y,
                 duration=500  # 滑动持续时间500毫秒
             )
+            self.last_action_time = time.time()
             
             if success:
                 self.logger.info("向上滑动715像素成功")
-                time.sleep(self.wait_times['after_scroll'])
+                self.wait_for_settle(self.wait_times['after_scroll'], reference)
                 return True
             else:
                 self.logger.error("向上滑动715像素失败")
@@ -251,12 +492,122 @@ class MarketClicker(BaseModule):
             self.logger.error(f"向上滑动715像素异常：{str(e)}")
             return False
     
+    @traced("market.scroll_quote_list", "market", record_args=("advance",))
+    def scroll_quote_list(self, advance: Optional[int] = None) -> Optional[int]:
+        """报价列表前进一屏：按校准后的距离滑动，等待列表稳定后估计实际滚动距离并拼接
+        
+        Args:
+            advance: 期望的前进距离（像素），None表示前进一屏减去重叠高度
+        
+        Returns:
+            Optional[int]: 实际滚动距离（像素），失败返回None
+        """
+        try:
+            tracker = self.scroll_tracker
+            if tracker.frame_count == 0:
+                frame = self.grab_frame()
+                if frame is None:
+                    self.logger.error("报价列表滚动失败：无法获取截图数据")
+                    return None
+                tracker.add_frame(frame)
+            
+            # 从可视区域底部向上滑动
+            x, y, width, height = tracker.viewport
+            start_x = self.quote_list_config.get('swipeX', x + width // 2)
+            start_y = y + height - self.quote_list_config.get('swipeBottomMargin', 40)
+            distance = tracker.next_swipe_distance(advance)
+            
+            reference = self._reference_frame()
+            success = self.u2_manager.swipe_element(
+                start_x, start_y, start_x, start_y - distance,
+                duration=self.quote_list_config.get('swipeDuration', 500)
+            )
+            self.last_action_time = time.time()
+            if not success:
+                self.logger.error("报价列表滑动失败")
+                return None
+            
+            self.wait_for_settle(self.wait_times['after_scroll'], reference, roi=tracker.viewport)
+            frame = self.grab_frame(self.last_action_time)
+            if frame is None:
+                self.logger.error("报价列表滚动失败：无法获取截图数据")
+                return None
+            
+            offset = tracker.add_frame(frame, commanded=distance)
+            if offset is None:
+                # 跟踪丢失（多为滚动过头），从当前帧重新开始拼接
+                self.logger.warning(f"报价列表滚动跟踪丢失，滑动距离：{distance}像素")
+                tracker.resync(frame)
+                return None
+            
+            self.logger.info("报价列表滑动%s像素，实际滚动%s像素", distance, offset)
+            return offset
+        
+        except Exception as e:
+            self.logger.error(f"报价列表滚动异常：{str(e)}")
+            return None
+    
+    @traced("market.scan_quote_list", "market")
+    def scan_quote_list(self, name_prefix: str = "quote_list") -> Optional[str]:
+        """扫描整个报价列表：逐屏滚动直到列表到底，保存拼接后的长图
+        
+        Args:
+            name_prefix: 长图文件名前缀
+        
+        Returns:
+            Optional[str]: 长图文件路径，失败返回None
+        """
+        result = self.quote_paginator.paginate(name_prefix)
+        return result.stitched_path if result else None
+    
+    @traced("market.save_frame", "market", record_args=("name_prefix",))
+    def save_frame(self, frame, name_prefix: str) -> Optional[str]:
+        """保存图像帧（启用去重时按内容保存）
+        
+        Args:
+            frame: OpenCV格式图像帧
+            name_prefix: 文件名前缀
+        
+        Returns:
+            Optional[str]: 文件路径，失败返回None
+        """
+        try:
+            timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
+            filename = f"{name_prefix}_{timestamp}.png"
+            screenshot_store = self._get_screenshot_store()
+            if screenshot_store is not None:
+                entry = screenshot_store.put_frame(frame, filename)
+                return entry.path if entry else None
+            
+            file_path = os.path.join(self.screenshot_dir, filename)
+            if not write_frame(frame, file_path):
+                return None
+            self._index_file(file_path)
+            return file_path
+        
+        except Exception as e:
+            self.logger.error(f"保存图像异常：{str(e)}")
+            return None
+    
+    @traced("market.execute_market_sequence", "market")
     def execute_market_sequence(self) -> bool:
         """执行完整的市场操作序列
         
         Returns:
             bool: 整个序列是否执行成功
         """
+        device = getattr(self.u2_manager, 'device_id', None) or "default"
+        start_time = time.perf_counter()
+        success = self._run_market_sequence()
+        
+        MARKET_SEQUENCE_SECONDS.labels(device).observe(time.perf_counter() - start_time)
+        MARKET_SEQUENCES.labels(device, "success" if success else "failure").inc()
+        if success:
+            MARKET_SEQUENCE_LAST_SUCCESS.labels(device).set_to_current_time()
+        return success
+    
+    def _run_market_sequence(self) -> bool:
+        """依次执行市场操作序列的各步骤"""
         try:
             self.logger.info("开始执行市场操作序列")
             
@@ -287,27 +638,12 @@ class MarketClicker(BaseModule):
             # 点击显示全部报价后截图
             self.take_screenshot("after_show_all_quotes")
             
-            # 第四步：向上滑动200像素
-            if not self.scroll_up_at_quotes_position():
-                self.logger.error("市场操作序列失败：向上滑动200像素失败")
+            # 第四步：逐屏扫描报价列表并拼接为长图（按实测滚动距离前进，不重复、不遗漏）
+            self.logger.info("执行第四步：扫描报价列表")
+            if not self.scan_quote_list():
+                self.logger.error("市场操作序列失败：扫描报价列表失败")
                 return False
             
-            # 滑动后截图
-            self.take_screenshot("after_scroll_200")
-            
-            # 第五步：截图
-            self.logger.info("执行第五步：截图")
-            self.take_screenshot("step5_screenshot")
-            
-            # 第六步：向上滚动800像素
-            self.logger.info("执行第六步：向上滚动800像素")
-            if not self.scroll_up_800_pixels():
-                self.logger.error("市场操作序列失败：向上滚动800像素失败")
-                return False
-            
-            # 滚动800像素后截图
-            self.take_screenshot("after_scroll_800")
-            
             self.logger.info("市场操作序列执行完成")
             return True
             
@@ -322,6 +658,23 @@ class MarketClicker(BaseModule):
             bool: 初始化是否成功
         """
         try:
+            # 按配置创建帧流、模板匹配器和OCR流水线（FleetRunner 等已绑定共享实例时不再创建）
+            if self.frame_stream is None and self.config_manager.get('screenshot.stream.enabled', False):
+                frame_stream = FrameStreamer(self.config_manager, self.logger, self.u2_manager)
+                if frame_stream.initialize():
+                    self.owned_modules.append(frame_stream)
+                    self.attach_frame_stream(frame_stream)
+            if self.template_matcher is None and self.config_manager.get('recognition.enabled', False):
+                template_matcher = TemplateMatcher(self.config_manager, self.logger)
+                if template_matcher.initialize():
+                    self.owned_modules.append(template_matcher)
+                    self.attach_template_matcher(template_matcher)
+            if self.quote_paginator.ocr_pipeline is None and self.config_manager.get('ocr.enabled', False):
+                ocr_pipeline = OCRPipeline(self.config_manager, self.logger)
+                if ocr_pipeline.initialize():
+                    self.owned_modules.append(ocr_pipeline)
+                    self.attach_ocr_pipeline(ocr_pipeline)
+            
             self.is_initialized = True
             self.start_time = time.time()
             self.logger.info("市场点击器初始化成功")
@@ -337,6 +690,23 @@ class MarketClicker(BaseModule):
             bool: 清理是否成功
         """
         try:
+            for module in self.owned_modules:
+                if module is self.frame_stream:
+                    self.attach_frame_stream(None)
+                if module is self.template_matcher:
+                    self.template_matcher = None
+                if module is self.quote_paginator.ocr_pipeline:
+                    self.attach_ocr_pipeline(None)
+                module.cleanup()
+            self.owned_modules.clear()
+            
+            # 关闭自行打开的截图索引（绑定的共享存储由其所有者关闭）
+            if not self.store_attached:
+                self.screenshot_store = None
+            if self.screenshot_index is not None:
+                self.screenshot_index.disconnect()
+                self.screenshot_index = None
+            
             self.is_initialized = False
             self.logger.info("市场点击器资源清理完成")
             return True
@@ -354,6 +724,8 @@ class MarketClicker(BaseModule):
         status.update({
             'coordinates': self.coordinates,
             'wait_times': self.wait_times,
+            'scroll_tracker': self.scroll_tracker.get_stats(),
+            'pagination': self.quote_paginator.last_result.to_dict() if self.quote_paginator.last_result else None,
             'u2_manager_connected': self.u2_manager.is_connected if self.u2_manager else False
         })
         return status
\ No newline at end of file
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报价列表翻页模块
+持续滚动"显示全部报价"列表直到到底（滑动后画面不再变化），每次滑动的距离按行高对齐，
+使每一屏在不超过重叠限制的前提下露出尽可能多的完整新行，并统计翻页速度（页/秒、行/秒）
+"""
+
+import os
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.interfaces import BaseModule
+from recognition.scroll_tracker import find_row_separators, estimate_row_pitch
+
+
+@dataclass
+class PaginationResult:
+    """一次翻页扫描的结果数据类"""
+    pages: int
+    swipes: int
+    rows: int
+    duration: float
+    reached_end: bool
+    lost_count: int = 0
+    row_pitch: Optional[float] = None
+    offsets: List[int] = field(default_factory=list)
+    stitched_path: Optional[str] = None
+    ocr_rows: int = 0
+    
+    @property
+    def pages_per_second(self) -> float:
+        """每秒翻页数"""
+        return self.pages / self.duration if self.duration > 0 else 0
+    
+    @property
+    def rows_per_second(self) -> float:
+        """每秒采集的行数"""
+        return self.rows / self.duration if self.duration > 0 else 0
+    
+    @property
+    def rows_per_swipe(self) -> float:
+        """平均每次滑动新增的行数"""
+        return self.rows / self.swipes if self.swipes else 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return dict(asdict(self), pages_per_second=self.pages_per_second,
+                    rows_per_second=self.rows_per_second, rows_per_swipe=self.rows_per_swipe)
+
+
+class QuotePaginator(BaseModule):
+    """报价列表翻页类"""
+    
+    def __init__(self, market_clicker, config_manager, logger):
+        """初始化报价列表翻页器
+        
+        Args:
+            market_clicker: 市场点击器实例（提供滑动、取帧和滚动跟踪器）
+            config_manager: 配置管理器实例
+            logger: 日志记录器实例
+        """
+        super().__init__(config_manager, logger)
+        self.market_clicker = market_clicker
+        
+        # 翻页上限：最多滑动次数、最多页数；itemsPerPage 用于无法识别行分隔时估算行数
+        automation_config = self.config_manager.get('automation', {})
+        self.max_scroll_count = automation_config.get('maxScrollCount', 10)
+        self.max_pages = automation_config.get('maxPages', 10)
+        self.items_per_page = automation_config.get('itemsPerPage', 20)
+        
+        # 行对齐：滑动距离取行高的整数倍，使每屏底部落在行分隔处
+        quote_list_config = self.config_manager.get('market_automation', {}).get('quote_list', {})
+        self.align_rows = quote_list_config.get('alignRows', True)
+        self.separator_max_std = quote_list_config.get('separatorMaxStd', 3.0)
+        
+        # 可选的OCR流水线，存在时每翻一页就把已完整露出的行提交识别（与滑动并行）
+        self.ocr_pipeline = None
+        self.ocr_futures = []
+        self.ocr_top = 0
+        self.ocr_rows = 0
+        
+        self.last_result = None
+    
+    @property
+    def tracker(self):
+        """滚动跟踪器"""
+        return self.market_clicker.scroll_tracker
+    
+    def initialize(self) -> bool:
+        """初始化模块
+        
+        Returns:
+            bool: 初始化是否成功
+        """
+        self.is_initialized = True
+        self.start_time = time.time()
+        return True
+    
+    def cleanup(self) -> bool:
+        """清理模块资源
+        
+        Returns:
+            bool: 清理是否成功
+        """
+        self.is_initialized = False
+        return True
+    
+    def get_status(self) -> Dict[str, Any]:
+        """获取模块状态
+        
+        Returns:
+            Dict[str, Any]: 状态信息
+        """
+        status = super().get_status()
+        status.update({
+            'max_scroll_count': self.max_scroll_count,
+            'max_pages': self.max_pages,
+            'last_result': self.last_result.to_dict() if self.last_result else None
+        })
+        return status
+    
+    def paginate(self, name_prefix: str = "quote_list", save: bool = True) -> Optional[PaginationResult]:
+        """从当前位置滚动报价列表直到到底或达到上限
+        
+        Args:
+            name_prefix: 长图文件名前缀
+            save: 是否保存拼接后的长图
+        
+        Returns:
+            Optional[PaginationResult]: 翻页结果，无法获取画面时返回None
+        """
+        try:
+            tracker = self.tracker
+            tracker.reset()
+            start = time.time()
+            
+            frame = self.market_clicker.grab_frame()
+            if frame is None:
+                self.logger.error("报价列表翻页失败：无法获取截图数据")
+                return None
+            tracker.add_frame(frame)
+            self.ocr_futures = []
+            self.ocr_top = 0
+            self.ocr_rows = 0
+            
+            swipes = 0
+            while swipes < self.max_scroll_count and len(tracker.blocks) < self.max_pages:
+                if tracker.at_end or not self.market_clicker.u2_manager.is_connected:
+                    break
+                advance = self.plan_advance() if self.align_rows else None
+                self.market_clicker.scroll_quote_list(advance)
+                swipes += 1
+                self._submit_ocr_rows(final=False)
+            
+            self._submit_ocr_rows(final=True)
+            stitched = tracker.stitched()
+            separators = find_row_separators(stitched, self.separator_max_std)
+            row_pitch = estimate_row_pitch(separators)
+            result = PaginationResult(
+                pages=len(tracker.blocks),
+                swipes=swipes,
+                rows=self.count_rows(stitched, separators, row_pitch),
+                duration=time.time() - start,
+                reached_end=tracker.at_end,
+                lost_count=tracker.lost_count,
+                row_pitch=row_pitch,
+                offsets=list(tracker.offsets),
+                ocr_rows=self.ocr_rows
+            )
+            if save:
+                result.stitched_path = self.market_clicker.save_frame(stitched, name_prefix)
+            
+            self.last_result = result
+            self.logger.info(f"报价列表翻页完成：{result.pages}页，{result.rows}行，滑动{swipes}次，"
+                             f"耗时{result.duration:.2f}秒，{result.pages_per_second:.2f}页/秒，"
+                             f"{result.rows_per_second:.2f}行/秒，是否到底：{result.reached_end}")
+            return result
+        
+        except Exception as e:
+            self.logger.error(f"报价列表翻页异常：{str(e)}")
+            return None
+    
+    def collect_records(self, timeout: Optional[float] = None) -> List[Any]:
+        """等待最近一次翻页提交的OCR识别完成（不要在驱动设备的线程中调用）
+        
+        Args:
+            timeout: 每批识别的超时时间（秒）
+        
+        Returns:
+            List[QuoteRecord]: 报价记录（按行列顺序）
+        """
+        records = []
+        for future in self.ocr_futures:
+            try:
+                records.extend(future.result(timeout))
+            except Exception as e:
+                self.logger.error(f"获取OCR识别结果失败：{str(e)}")
+        return records
+    
+    def _submit_ocr_rows(self, final: bool):
+        """把尚未识别且已完整露出的行提交给OCR流水线（非最终提交时不提交贴着底边的行）"""
+        pipeline = self.ocr_pipeline
+        if pipeline is None or not pipeline.available:
+            return
+        
+        pending = self.tracker.stitched()[self.ocr_top:]
+        rows = pipeline.segment_rows(pending)
+        if not final:
+            rows = [(top, bottom) for top, bottom in rows if bottom < pending.shape[0]]
+        if not rows:
+            return
+        
+        bottom = rows[-1][1]
+        future = pipeline.submit(pending[:bottom], rows=rows, first_row=self.ocr_rows)
+        if future is not None:
+            self.ocr_futures.append(future)
+            self.ocr_top += bottom
+            self.ocr_rows += len(rows)
+    
+    def plan_advance(self) -> Optional[int]:
+        """计划下一次的前进距离：不超过单次最大前进距离的前提下，使新一屏底部落在行分隔处
+        
+        Returns:
+            Optional[int]: 前进距离（像素），当前屏不足两个行分隔时返回None（前进最大距离）
+        """
+        tracker = self.tracker
+        if tracker.current is None:
+            return None
+        
+        separators = find_row_separators(tracker.current, self.separator_max_std)
+        row_pitch = estimate_row_pitch(separators)
+        if not row_pitch:
+            return None
+        
+        # 当前屏最后一个分隔之后每隔一个行高还有一个分隔，取最大且不超限的一个作为新一屏的底部
+        rows = int((tracker.max_advance + tracker.viewport_height - separators[-1]) // row_pitch)
+        advance = int(round(separators[-1] + rows * row_pitch)) - tracker.viewport_height
+        return advance if advance > tracker.min_progress else None
+    
+    def count_rows(self, stitched, separators: List[int], row_pitch: Optional[float]) -> int:
+        """统计长图中的完整行数
+        
+        Args:
+            stitched: 拼接后的长图
+            separators: 行分隔纵坐标
+            row_pitch: 行高
+        
+        Returns:
+            int: 行数（相邻分隔之间、以及首尾分隔到图像边缘之间至少半个行高的区域计为一行）
+        """
+        if stitched is None:
+            return 0
+        if row_pitch is None:
+            return int(round(stitched.shape[0] / self.tracker.viewport_height * self.items_per_page))
+        boundaries = [0] + list(separators) + [stitched.shape[0]]
+        return sum(1 for top, bottom in zip(boundaries, boundaries[1:]) if bottom - top >= row_pitch / 2)
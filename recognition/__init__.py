@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图像识别模块
+负责按钮模板匹配、界面元素定位、列表滚动跟踪、报价OCR识别等功能
+"""
+
+from .template_matcher import TemplateMatcher, TemplateEntry, PreparedFrame
+from .scroll_tracker import ScrollTracker
+from .ocr_pipeline import OCRPipeline, QuoteRecord
+from .ocr_cache import OCRCache
+
+__all__ = [
+    "TemplateMatcher",
+    "TemplateEntry",
+    "PreparedFrame",
+    "ScrollTracker",
+    "OCRPipeline",
+    "QuoteRecord",
+    "OCRCache"
+]
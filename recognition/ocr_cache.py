@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR结果缓存模块
+以归一化（二值化、缩放）后的字段图像及识别参数的哈希为键缓存识别文本：
+内存LRU为第一层，可选的 SQLite 文件为第二层（跨运行复用），命中时完全跳过Tesseract；
+磁盘按批查询，命中条目的使用时间先记在内存中，攒够一批再写回
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.interfaces import DatabaseInterface
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache (last_used);
+"""
+
+
+class OCRCacheStore(DatabaseInterface):
+    """OCR结果磁盘缓存类（SQLite）"""
+    
+    def __init__(self, db_path: str, flush_size: int = 256):
+        """初始化磁盘缓存
+        
+        Args:
+            db_path: 数据库文件路径，":memory:" 表示内存数据库
+            flush_size: 累计多少条使用时间后写回磁盘
+        """
+        self.db_path = db_path
+        self.connection = None
+        self.lock = threading.RLock()
+        self.flush_size = flush_size
+        self.touched = {}
+    
+    def connect(self) -> bool:
+        """连接数据库并创建表结构
+        
+        Returns:
+            bool: 连接是否成功
+        """
+        with self.lock:
+            if self.connection is not None:
+                return True
+            if self.db_path != ":memory:":
+                db_dir = os.path.dirname(self.db_path)
+                if db_dir:
+                    os.makedirs(db_dir, exist_ok=True)
+            
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            self.connection.commit()
+            return True
+    
+    def disconnect(self) -> bool:
+        """断开数据库连接
+        
+        Returns:
+            bool: 断开是否成功
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.flush()
+                self.connection.close()
+                self.connection = None
+            return True
+    
+    def query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        """执行查询
+        
+        Args:
+            sql: SQL语句
+            params: 参数
+        
+        Returns:
+            List[Dict[str, Any]]: 查询结果
+        """
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(sql, params).fetchall()]
+    
+    def execute(self, sql: str, params: Tuple = ()) -> bool:
+        """执行SQL语句
+        
+        Args:
+            sql: SQL语句
+            params: 参数
+        
+        Returns:
+            bool: 执行是否成功
+        """
+        with self.lock:
+            self.connection.execute(sql, params)
+            self.connection.commit()
+            return True
+    
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存文本
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            Optional[str]: 识别文本，不存在返回None
+        """
+        return self.get_many([key]).get(key)
+    
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """批量读取缓存文本，命中条目的使用时间记在内存中，累计 flush_size 条后一次写回
+        
+        Args:
+            keys: 缓存键列表
+        
+        Returns:
+            Dict[str, str]: 命中的 {缓存键: 识别文本}
+        """
+        found = {}
+        with self.lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                found.update(self.connection.execute(
+                    f"SELECT key, text FROM ocr_cache WHERE key IN ({', '.join('?' for _ in chunk)})", chunk
+                ).fetchall())
+            now = time.time()
+            for key in found:
+                self.touched[key] = now
+            if len(self.touched) >= self.flush_size:
+                self.flush()
+        return found
+    
+    def flush(self):
+        """把内存中记录的使用时间批量写回"""
+        with self.lock:
+            if not self.touched:
+                return
+            self.connection.executemany("UPDATE ocr_cache SET last_used = ? WHERE key = ?",
+                                        [(last_used, key) for key, last_used in self.touched.items()])
+            self.connection.commit()
+            self.touched.clear()
+    
+    def put_many(self, items: List[Tuple[str, str]]):
+        """批量写入缓存文本
+        
+        Args:
+            items: (缓存键, 识别文本) 列表
+        """
+        now = time.time()
+        with self.lock:
+            for key, _ in items:
+                self.touched.pop(key, None)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO ocr_cache (key, text, created, last_used) VALUES (?, ?, ?, ?)",
+                [(key, text, now, now) for key, text in items]
+            )
+            self.connection.commit()
+    
+    def count(self) -> int:
+        """获取缓存条目数
+        
+        Returns:
+            int: 条目数量
+        """
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+    
+    def trim(self, max_entries: int) -> int:
+        """只保留最近使用的 max_entries 条
+        
+        Args:
+            max_entries: 最多保留的条目数
+        
+        Returns:
+            int: 删除的条目数量
+        """
+        with self.lock:
+            self.flush()
+            cursor = self.connection.execute(
+                "DELETE FROM ocr_cache WHERE key NOT IN "
+                "(SELECT key FROM ocr_cache ORDER BY last_used DESC LIMIT ?)",
+                (max_entries,)
+            )
+            self.connection.commit()
+            return cursor.rowcount
+
+
+class OCRCache:
+    """OCR结果两级缓存类"""
+    
+    def __init__(self, capacity: int = 4096, db_path: Optional[str] = None, max_disk_entries: int = 100000):
+        """初始化OCR结果缓存
+        
+        Args:
+            capacity: 内存LRU的条目上限
+            db_path: 磁盘缓存路径，None表示只使用内存缓存
+            max_disk_entries: 磁盘缓存的条目上限（关闭时裁剪）
+        """
+        self.capacity = capacity
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        
+        self.store = None
+        if db_path:
+            self.store = OCRCacheStore(db_path)
+            self.store.connect()
+        
+        # 统计
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(image: np.ndarray, options: Dict[str, Any]) -> str:
+        """计算缓存键：归一化图像内容加上影响识别结果的参数
+        
+        Args:
+            image: 归一化后的字段图像
+            options: 识别参数（lang、config）
+        
+        Returns:
+            str: 缓存键
+        """
+        image = np.ascontiguousarray(image)
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"{image.shape}|{options.get('lang', 'eng')}|{options.get('config', '')}".encode("utf-8"))
+        hasher.update(image.data)
+        return hasher.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """查找缓存：先查内存，再查磁盘（磁盘命中时放入内存）
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            Optional[str]: 识别文本，未命中返回None
+        """
+        return self.get_many([key]).get(key)
+    
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """批量查找缓存：先查内存，内存未命中的键一次查询磁盘（磁盘命中时放入内存）
+        
+        Args:
+            keys: 缓存键列表
+        
+        Returns:
+            Dict[str, str]: 命中的 {缓存键: 识别文本}
+        """
+        found = {}
+        missing = []
+        with self.lock:
+            for key in keys:
+                text = self.entries.get(key)
+                if text is not None:
+                    self.entries.move_to_end(key)
+                    found[key] = text
+                else:
+                    missing.append(key)
+            self.memory_hits += len(found)
+        
+        disk_found = self.store.get_many(missing) if self.store is not None and missing else {}
+        with self.lock:
+            for key, text in disk_found.items():
+                self._remember(key, text)
+            self.disk_hits += len(disk_found)
+            self.misses += len(missing) - len(disk_found)
+        found.update(disk_found)
+        return found
+    
+    def put_many(self, items: List[Tuple[str, str]]):
+        """写入识别结果（内存和磁盘）
+        
+        Args:
+            items: (缓存键, 识别文本) 列表
+        """
+        if not items:
+            return
+        with self.lock:
+            for key, text in items:
+                self._remember(key, text)
+        if self.store is not None:
+            self.store.put_many(items)
+    
+    def put(self, key: str, text: str):
+        """写入单条识别结果
+        
+        Args:
+            key: 缓存键
+            text: 识别文本
+        """
+        self.put_many([(key, text)])
+    
+    def clear(self):
+        """清空内存缓存"""
+        with self.lock:
+            self.entries.clear()
+    
+    def close(self):
+        """裁剪并关闭磁盘缓存"""
+        if self.store is not None:
+            self.store.trim(self.max_disk_entries)
+            self.store.disconnect()
+            self.store = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中统计
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self.entries),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0,
+                "disk_enabled": self.store is not None
+            }
+    
+    def _remember(self, key: str, text: str):
+        """放入内存LRU并淘汰最久未使用的条目（需持有锁）"""
+        self.entries[key] = text
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
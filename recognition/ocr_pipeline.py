@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR报价识别流水线
+把报价列表图像（可视区域或拼接后的长图）按行分隔切成行，再按列切成卡片，
+在进程池中对每张卡片的价格、数量等区域做OCR，输出结构化的报价记录。
+OCR是CPU密集型任务，提交后立即返回Future，不阻塞驱动设备的线程：
+切分、字段归一化和按帧批量查询OCR结果缓存都在准备线程中进行（同一批中相同的字段图像也只识别一次），
+只有未命中的字段交给进程池。
+pytesseract 为可选依赖，未安装时无法识别，但行列切分等功能仍可使用
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.interfaces import BaseModule, ImageRecognitionInterface, DataProcessingInterface
+from utils.frame_utils import ImageLike, crop_frame, decode_image, to_grayscale
+from recognition.scroll_tracker import find_row_separators
+from recognition.ocr_cache import OCRCache
+from screenshot.screenshot_store import ScreenshotStore
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+# 卡片内各字段的默认区域（相对卡片左上角）与识别参数
+DEFAULT_FIELDS = {
+    "tier": {"roi": [14, 8, 42, 42], "config": "--psm 10 -c tessedit_char_whitelist=0123456789"},
+    "quantity": {"roi": [165, 68, 45, 30], "config": "--psm 7 -c tessedit_char_whitelist=0123456789+"},
+    "price": {"roi": [46, 133, 90, 34], "config": "--psm 7 -c tessedit_char_whitelist=0123456789,"},
+    "gem_price": {"roi": [166, 133, 50, 34], "config": "--psm 7 -c tessedit_char_whitelist=0123456789-"}
+}
+
+# 数字字段中常见的误识别字符
+DIGIT_FIXES = str.maketrans({'O': '0', 'o': '0', 'D': '0', 'l': '1', 'I': '1', '|': '1', 'S': '5', 'B': '8'})
+
+
+@dataclass
+class QuoteRecord:
+    """报价记录数据类"""
+    name: Optional[str]
+    price: Optional[int]
+    quantity: Optional[int] = None
+    tier: Optional[int] = None
+    gem_price: Optional[int] = None
+    icon: Optional[str] = None
+    row: int = 0
+    column: int = 0
+    source: Optional[str] = None
+    timestamp: float = 0.0
+    texts: Dict[str, str] = field(default_factory=dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return asdict(self)
+
+
+def parse_number(text: Optional[str]) -> Optional[int]:
+    """解析OCR得到的数字（去除千分位，修正常见误识别，"100+"取100）
+    
+    Args:
+        text: OCR文本
+    
+    Returns:
+        Optional[int]: 数值，没有数字（如"-"）时返回None
+    """
+    if not text:
+        return None
+    digits = ''.join(ch for ch in text.translate(DIGIT_FIXES) if ch.isdigit())
+    return int(digits) if digits else None
+
+
+def normalize_crop(crop: np.ndarray, height: int = 32) -> np.ndarray:
+    """OCR前的归一化：灰度、按高度等比缩放、Otsu二值化，并统一为白底黑字
+    
+    Args:
+        crop: 字段区域图像
+        height: 归一化后的高度
+    
+    Returns:
+        np.ndarray: 二值图（uint8，0或255）
+    """
+    gray = to_grayscale(crop)
+    width = max(1, int(round(gray.shape[1] * height / max(1, gray.shape[0]))))
+    gray = cv2.resize(gray, (width, height), interpolation=cv2.INTER_CUBIC)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # 背景（多数像素）为黑色时反转
+    if np.count_nonzero(binary) < binary.size / 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+def tesseract_ocr(image: np.ndarray, options: Dict[str, Any]) -> str:
+    """使用Tesseract识别一个字段
+    
+    Args:
+        image: 归一化后的字段图像
+        options: 识别参数（lang、config、tesseract_cmd）
+    
+    Returns:
+        str: 识别文本
+    """
+    if pytesseract is None:
+        raise RuntimeError("未安装pytesseract，无法进行OCR")
+    if options.get('tesseract_cmd'):
+        pytesseract.pytesseract.tesseract_cmd = options['tesseract_cmd']
+    return pytesseract.image_to_string(image, lang=options.get('lang', 'eng'),
+                                       config=options.get('config', '')).strip()
+
+
+class OCRPipeline(BaseModule, ImageRecognitionInterface, DataProcessingInterface):
+    """OCR报价识别流水线类"""
+    
+    def __init__(self, config_manager, logger, ocr_function: Optional[Callable] = None):
+        """初始化OCR流水线
+        
+        Args:
+            config_manager: 配置管理器实例
+            logger: 日志记录器实例
+            ocr_function: 字段识别函数（需可被子进程序列化），None使用Tesseract
+        """
+        super().__init__(config_manager, logger)
+        self.config = self.config_manager.get('ocr', {})
+        self.ocr_function = ocr_function or tesseract_ocr
+        self.tesseract_cmd = self.config.get('tesseractCmd')
+        self.language = self.config.get('language', 'chi_sim')
+        
+        # 进程池大小，0表示CPU核心数（首次提交时创建）
+        self.workers = self.config.get('workers', 0) or os.cpu_count() or 1
+        self.executor = None
+        self.executor_lock = threading.Lock()
+        
+        # 准备线程数：切分、归一化与查缓存不占用提交线程（首次提交时创建）
+        self.prepare_workers = self.config.get('prepareWorkers', 2)
+        self.prepare_executor = None
+        
+        # 尚未完成的识别结果，清理时先等待它们完成再关闭线程池和进程池
+        self.in_flight = set()
+        
+        # 卡片布局：每行列数、完整行的最小高度、空卡片判定、字段区域、图标区域
+        self.columns = self.config.get('columns', 3)
+        self.min_row_height = self.config.get('minRowHeight', 150)
+        self.separator_max_std = self.config.get('separatorMaxStd', 3.0)
+        self.empty_std = self.config.get('emptyStd', 5.0)
+        self.fields = self.config.get('fields', DEFAULT_FIELDS)
+        self.icon_roi = tuple(self.config.get('iconRoi', [55, 15, 110, 115]))
+        
+        # 卡片上没有名称文字，名称按图标感知哈希查表，未登记的图标以哈希作为名称
+        self.icon_names = self.config.get('iconNames', {})
+        
+        # 识别结果缓存：内存LRU + 可选的磁盘缓存（data/cache 下的 SQLite 文件），首次提交时创建
+        self.cache_config = self.config.get('cache', {})
+        self.cache = None
+        
+        # 识别结果保存：识别完成后在回调线程中逐条校验并追加到按日期命名的文件
+        self.save_records = self.config.get('saveRecords', True)
+        self.output_path = self.config.get('outputPath', 'data/quotes')
+        self.save_lock = threading.Lock()
+        
+        # 统计
+        self.images_submitted = 0
+        self.fields_total = 0
+        self.ocr_calls = 0
+        self.cells_recognized = 0
+        self.records_extracted = 0
+        self.error_count = 0
+        self.images_completed = 0
+        self.total_ocr_time = 0.0
+        self.stats_lock = threading.Lock()
+    
+    @property
+    def available(self) -> bool:
+        """识别引擎是否可用"""
+        return self.ocr_function is not tesseract_ocr or pytesseract is not None
+    
+    def initialize(self) -> bool:
+        """初始化模块
+        
+        Returns:
+            bool: 初始化是否成功
+        """
+        try:
+            if not self.available:
+                self.logger.warning("未安装pytesseract，OCR识别不可用")
+            self.is_initialized = True
+            self.start_time = time.time()
+            self.logger.info(f"OCR流水线初始化成功，进程数：{self.workers}")
+            return True
+        except Exception as e:
+            self.logger.error(f"OCR流水线初始化失败：{str(e)}")
+            return False
+    
+    def cleanup(self) -> bool:
+        """清理模块资源
+        
+        Returns:
+            bool: 清理是否成功
+        """
+        # 进程池完成回调会把收尾工作提交到准备线程，等所有识别完成后再关闭
+        wait(self.in_flight.copy())
+        with self.executor_lock:
+            prepare_executor, self.prepare_executor = self.prepare_executor, None
+        if prepare_executor is not None:
+            prepare_executor.shutdown(wait=True)
+        with self.executor_lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+            if self.cache is not None:
+                self.cache.close()
+                self.cache = None
+        self.is_initialized = False
+        self.logger.info("OCR流水线资源清理完成")
+        return True
+    
+    def segment_rows(self, image: np.ndarray) -> List[Tuple[int, int]]:
+        """按行分隔切分列表图像
+        
+        Args:
+            image: 列表图像
+        
+        Returns:
+            List[Tuple[int, int]]: 完整行的 (上边界, 下边界)，高度不足的残缺行不计入
+        """
+        boundaries = [0] + find_row_separators(image, self.separator_max_std) + [image.shape[0]]
+        return [(top, bottom) for top, bottom in zip(boundaries, boundaries[1:])
+                if bottom - top >= self.min_row_height]
+    
+    def split_cells(self, image: np.ndarray, rows: Optional[List[Tuple[int, int]]] = None
+                    ) -> List[Tuple[int, int, np.ndarray]]:
+        """把列表图像切分为卡片
+        
+        Args:
+            image: 列表图像
+            rows: 行边界，None时自动切分
+        
+        Returns:
+            List[Tuple[int, int, np.ndarray]]: (行号, 列号, 卡片图像)，跳过空白卡片
+        """
+        rows = self.segment_rows(image) if rows is None else rows
+        column_width = image.shape[1] / self.columns
+        cells = []
+        for row_index, (top, bottom) in enumerate(rows):
+            for column in range(self.columns):
+                left, right = int(round(column * column_width)), int(round((column + 1) * column_width))
+                cell = image[top:bottom, left:right]
+                if float(to_grayscale(cell).std()) >= self.empty_std:
+                    cells.append((row_index, column, np.ascontiguousarray(cell)))
+        return cells
+    
+    def submit(self, image: ImageLike, source: Optional[str] = None, timestamp: Optional[float] = None,
+               rows: Optional[List[Tuple[int, int]]] = None, first_row: int = 0) -> Optional[Future]:
+        """提交列表图像识别，立即返回
+        
+        Args:
+            image: 列表图像（可视区域或拼接长图）或编码后的图片数据，识别完成前不要修改
+            source: 来源（如长图路径），写入记录
+            timestamp: 采集时间，None表示当前时间
+            rows: 已切分好的行边界，None时自动切分
+            first_row: 第一行的行号（分段提交长图时保持行号连续）
+        
+        Returns:
+            Optional[Future]: 完成后结果为 List[QuoteRecord]，识别引擎不可用或图像无效时返回None
+        """
+        try:
+            if not self.available:
+                self.logger.warning("未安装pytesseract，跳过OCR识别")
+                return None
+            image = decode_image(image)
+            if image is None:
+                self.logger.error("OCR识别失败：无法解析图像数据")
+                return None
+            
+            timestamp = timestamp if timestamp is not None else time.time()
+            result = Future()
+            result.set_running_or_notify_cancel()
+            self.in_flight.add(result)
+            result.add_done_callback(self.in_flight.discard)
+            self._get_prepare_executor().submit(self._prepare, result, image, rows, first_row, source,
+                                                timestamp, time.time())
+            return result
+        
+        except Exception as e:
+            self.logger.error(f"提交OCR识别失败：{str(e)}")
+            return None
+    
+    def submit_frame(self, frame: np.ndarray, viewport: Tuple[int, int, int, int], source: Optional[str] = None,
+                     timestamp: Optional[float] = None) -> Optional[Future]:
+        """提交整屏帧识别（先裁剪出列表可视区域）
+        
+        Args:
+            frame: 整屏帧
+            viewport: 列表可视区域 (x, y, width, height)
+            source: 来源
+            timestamp: 采集时间
+        
+        Returns:
+            Optional[Future]: 同 submit
+        """
+        return self.submit(crop_frame(frame, tuple(viewport)), source, timestamp)
+    
+    def recognize_image(self, image: ImageLike, source: Optional[str] = None,
+                        timeout: Optional[float] = None) -> List[QuoteRecord]:
+        """同步识别列表图像（不要在驱动设备的线程中调用）
+        
+        Args:
+            image: 列表图像或编码后的图片数据
+            source: 来源
+            timeout: 超时时间（秒）
+        
+        Returns:
+            List[QuoteRecord]: 报价记录，失败返回空列表
+        """
+        future = self.submit(image, source)
+        if future is None:
+            return []
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            self.logger.error(f"OCR识别失败：{str(e)}")
+            return []
+    
+    def recognize_text(self, image_data: ImageLike, language: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """OCR文字识别（整张图像，在进程池中执行并等待结果）
+        
+        Args:
+            image_data: 图像数据
+            language: 识别语言，None使用配置中的语言
+        
+        Returns:
+            Optional[Dict[str, Any]]: {'text': 文本, 'language': 语言}，失败返回None
+        """
+        try:
+            if not self.available:
+                self.logger.warning("未安装pytesseract，OCR识别不可用")
+                return None
+            image = decode_image(image_data)
+            if image is None:
+                self.logger.error("OCR识别失败：无法解析图像数据")
+                return None
+            
+            language = language or self.language
+            options = {'lang': language, 'config': '--psm 6', 'tesseract_cmd': self.tesseract_cmd}
+            text = self._get_executor().submit(self.ocr_function, normalize_crop(image, image.shape[0]), options).result()
+            return {'text': text, 'language': language}
+        except Exception as e:
+            self.logger.error(f"OCR文字识别失败：{str(e)}")
+            return None
+    
+    def match_template(self, image_data: ImageLike, template_data: ImageLike,
+                       threshold: float = 0.8) -> Optional[Dict[str, Any]]:
+        """模板匹配（OCR流水线不提供该功能，请使用TemplateMatcher）
+        
+        Returns:
+            Optional[Dict[str, Any]]: 始终返回None
+        """
+        self.logger.warning("OCR流水线不支持模板匹配")
+        return None
+    
+    def locate_element(self, image_data: ImageLike, element_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """定位界面元素（OCR流水线不提供该功能，请使用TemplateMatcher）
+        
+        Returns:
+            Optional[Dict[str, Any]]: 始终返回None
+        """
+        self.logger.warning("OCR流水线不支持元素定位")
+        return None
+    
+    def extract_equipment_data(self, image_data: ImageLike, recognition_result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """从一张卡片的识别文本中提取装备报价数据
+        
+        Args:
+            image_data: 卡片图像（用于计算图标哈希）
+            recognition_result: 各字段的识别文本 {字段名: 文本}
+        
+        Returns:
+            Optional[Dict[str, Any]]: 装备数据，没有识别到价格时返回None
+        """
+        try:
+            price = parse_number(recognition_result.get('price'))
+            if price is None:
+                return None
+            
+            icon = None
+            cell = decode_image(image_data)
+            if cell is not None:
+                icon_region = crop_frame(cell, self.icon_roi)
+                if icon_region.size:
+                    icon = f"{ScreenshotStore.perceptual_hash(icon_region):016x}"
+            
+            name = recognition_result.get('name') or self.icon_names.get(icon) or (f"icon:{icon}" if icon else None)
+            return {
+                'name': name,
+                'price': price,
+                'quantity': parse_number(recognition_result.get('quantity')),
+                'tier': parse_number(recognition_result.get('tier')),
+                'gem_price': parse_number(recognition_result.get('gem_price')),
+                'icon': icon
+            }
+        except Exception as e:
+            self.logger.error(f"提取装备数据失败：{str(e)}")
+            return None
+    
+    def validate_data(self, data: Dict[str, Any]) -> bool:
+        """验证报价数据（需有名称和正整数价格）
+        
+        Args:
+            data: 待验证数据
+        
+        Returns:
+            bool: 验证是否通过
+        """
+        price = data.get('price')
+        return bool(data.get('name')) and isinstance(price, int) and price > 0
+    
+    def save_data(self, data: Dict[str, Any]) -> bool:
+        """按日期追加保存报价数据（JSON Lines）
+        
+        Args:
+            data: 待保存数据
+        
+        Returns:
+            bool: 保存是否成功
+        """
+        try:
+            os.makedirs(self.output_path, exist_ok=True)
+            timestamp = data.get('timestamp') or time.time()
+            file_path = os.path.join(self.output_path, f"quotes_{time.strftime('%Y%m%d', time.localtime(timestamp))}.jsonl")
+            with self.save_lock, open(file_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+            return True
+        except Exception as e:
+            self.logger.error(f"保存报价数据失败：{str(e)}")
+            return False
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取识别统计
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        with self.stats_lock:
+            return {
+                "workers": self.workers,
+                "available": self.available,
+                "images_submitted": self.images_submitted,
+                "fields_total": self.fields_total,
+                "ocr_calls": self.ocr_calls,
+                "cells_recognized": self.cells_recognized,
+                "records_extracted": self.records_extracted,
+                "error_count": self.error_count,
+                "average_image_time": self.total_ocr_time / self.images_completed if self.images_completed else 0,
+                "cache": self.cache.get_stats() if self.cache is not None else None
+            }
+    
+    def get_status(self) -> Dict[str, Any]:
+        """获取模块状态
+        
+        Returns:
+            Dict[str, Any]: 状态信息
+        """
+        status = super().get_status()
+        status.update(self.get_stats())
+        return status
+    
+    def _get_cache(self) -> Optional[OCRCache]:
+        """获取OCR结果缓存（首次使用时创建），未启用时返回None"""
+        if not self.cache_config.get('enabled', True):
+            return None
+        with self.executor_lock:
+            if self.cache is None:
+                disk_path = self.cache_config.get('diskPath', 'data/cache/ocr_cache.db')
+                self.cache = OCRCache(
+                    capacity=self.cache_config.get('memoryEntries', 4096),
+                    db_path=disk_path if self.cache_config.get('diskEnabled', True) else None,
+                    max_disk_entries=self.cache_config.get('maxDiskEntries', 100000)
+                )
+            return self.cache
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """获取识别进程池（首次使用时创建）"""
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self.executor
+    
+    def _get_prepare_executor(self) -> ThreadPoolExecutor:
+        """获取准备线程池（首次使用时创建）"""
+        with self.executor_lock:
+            if self.prepare_executor is None:
+                self.prepare_executor = ThreadPoolExecutor(max_workers=max(1, self.prepare_workers),
+                                                           thread_name_prefix="OCRPrepare")
+            return self.prepare_executor
+    
+    def _prepare(self, result: Future, image: np.ndarray, rows: Optional[List[Tuple[int, int]]], first_row: int,
+                 source: Optional[str], timestamp: float, submitted: float):
+        """在准备线程中切分卡片、归一化字段并批量查询缓存，未命中的字段交给进程池"""
+        try:
+            cells = [(first_row + row, column, cell) for row, column, cell in self.split_cells(image, rows)]
+            
+            # 归一化各字段并按内容去重，cell_keys 记录每张卡片各字段对应的缓存键
+            jobs = {}
+            cell_keys = []
+            for _, _, cell in cells:
+                keys = {}
+                for name, options in self.fields.items():
+                    region = crop_frame(cell, tuple(options['roi']))
+                    if region.size == 0:
+                        continue
+                    normalized = normalize_crop(region)
+                    keys[name] = OCRCache.make_key(normalized, options)
+                    jobs.setdefault(keys[name], (normalized, options))
+                cell_keys.append(keys)
+            
+            # 整帧的字段一次查询缓存，命中的直接使用，其余交给进程池
+            cache = self._get_cache()
+            texts = cache.get_many(list(jobs)) if cache is not None else {}
+            pending = {}
+            executor = self._get_executor()
+            for key, (normalized, options) in jobs.items():
+                if key not in texts:
+                    pending[key] = executor.submit(self.ocr_function, normalized,
+                                                   dict(options, tesseract_cmd=self.tesseract_cmd))
+            with self.stats_lock:
+                self.images_submitted += 1
+                self.fields_total += sum(len(keys) for keys in cell_keys)
+                self.ocr_calls += len(pending)
+            
+            if not pending:
+                self._finish(result, cells, cell_keys, texts, pending, source, timestamp, submitted)
+                return
+            
+            remaining = [len(pending)]
+            lock = threading.Lock()
+            
+            def on_done(_):
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0]:
+                        return
+                # 回调运行在进程池的结果处理线程上，写缓存、计算哈希和保存记录交给准备线程
+                try:
+                    self._get_prepare_executor().submit(self._finish, result, cells, cell_keys, texts, pending,
+                                                        source, timestamp, submitted)
+                except Exception as e:
+                    result.set_exception(e)
+            
+            for future in list(pending.values()):
+                future.add_done_callback(on_done)
+        
+        except Exception as e:
+            self.logger.error(f"提交OCR识别失败：{str(e)}")
+            result.set_exception(e)
+    
+    def _finish(self, result: Future, cells, cell_keys, texts: Dict[str, str], pending: Dict[str, Future],
+                source: Optional[str], timestamp: float, submitted: float):
+        """所有字段识别完成后写入缓存并生成报价记录"""
+        try:
+            recognized = [(key, future.result()) for key, future in pending.items() if future.exception() is None]
+            texts.update(recognized)
+            if self.cache is not None:
+                self.cache.put_many(recognized)
+            
+            records = []
+            errors = 0
+            for (row, column, cell), keys in zip(cells, cell_keys):
+                if any(key not in texts for key in keys.values()):
+                    errors += 1
+                    continue
+                cell_texts = {name: texts[key] for name, key in keys.items()}
+                data = self.extract_equipment_data(cell, cell_texts)
+                if data is None:
+                    continue
+                records.append(QuoteRecord(row=row, column=column, source=source, timestamp=timestamp,
+                                           texts=cell_texts, **data))
+            
+            with self.stats_lock:
+                self.cells_recognized += len(cells) - errors
+                self.records_extracted += len(records)
+                self.error_count += errors
+                self.images_completed += 1
+                self.total_ocr_time += time.time() - submitted
+            if errors:
+                self.logger.warning(f"OCR识别失败：{errors}/{len(cells)}张卡片，"
+                                    f"首个错误：{self._first_error(pending.values())}")
+            if self.save_records:
+                for record in records:
+                    data = record.to_dict()
+                    if self.validate_data(data):
+                        self.save_data(data)
+            result.set_result(records)
+        except Exception as e:
+            result.set_exception(e)
+    
+    @staticmethod
+    def _first_error(futures) -> Optional[str]:
+        """第一个失败任务的错误信息"""
+        for future in futures:
+            if future.exception() is not None:
+                return str(future.exception())
+        return None
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+滚动偏移估计模块
+在列表可视区域内估计相邻两帧之间的真实垂直滚动距离（水平降采样后的行带模板匹配），
+把列表拼接为一张完整的长图，并根据实测距离校准下一次滑动的指令距离（抵消惯性滚动）
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.frame_utils import crop_frame, to_grayscale
+
+
+def find_row_separators(image: np.ndarray, max_std: float = 3.0, min_run: int = 3) -> List[int]:
+    """查找列表行之间的分隔带（整行像素几乎相同的连续区域，与图像上下边缘相接的不完整分隔带不计入）
+    
+    Args:
+        image: 列表图像（BGR或灰度）
+        max_std: 单行像素标准差上限，低于该值视为分隔行
+        min_run: 分隔带的最小连续行数
+    
+    Returns:
+        List[int]: 各分隔带中心的纵坐标（升序）
+    """
+    flat = to_grayscale(image).std(axis=1) <= max_std
+    separators = []
+    start = None
+    for y, is_flat in enumerate(np.append(flat, False)):
+        if is_flat and start is None:
+            start = y
+        elif not is_flat and start is not None:
+            if y - start >= min_run and start > 0 and y < len(flat):
+                separators.append((start + y - 1) // 2)
+            start = None
+    return separators
+
+
+def estimate_row_pitch(separators: List[int]) -> Optional[float]:
+    """根据分隔带位置估计行高（相邻分隔带间距的中位数）
+    
+    Args:
+        separators: 分隔带纵坐标
+    
+    Returns:
+        Optional[float]: 行高，分隔带不足两个时返回None
+    """
+    if len(separators) < 2:
+        return None
+    return float(np.median(np.diff(separators)))
+
+
+class ScrollTracker:
+    """列表滚动跟踪与拼接类"""
+    
+    def __init__(self, viewport: Tuple[int, int, int, int], overlap: int = 160, band: int = 96,
+                 column_step: int = 4, min_score: float = 0.9, search_margin: Optional[int] = None,
+                 min_progress: int = 4, inertia_smoothing: float = 0.5, first_swipe_ratio: float = 0.75):
+        """初始化滚动跟踪器
+        
+        Args:
+            viewport: 列表可视区域 (x, y, width, height)
+            overlap: 相邻两帧保留的重叠高度（像素），用于估计偏移
+            band: 匹配用的行带高度（像素），不能超过 overlap
+            column_step: 水平降采样倍数（只降水平方向，保留垂直精度）
+            min_score: 匹配得分下限，低于该值视为跟踪丢失
+            search_margin: 有预期偏移时的搜索范围（像素），None表示搜索全部可能的偏移
+            min_progress: 实测偏移不超过该值时视为列表已到底（滑动后画面不变）
+            inertia_smoothing: 惯性系数（实测距离/指令距离）的平滑系数
+            first_swipe_ratio: 惯性系数校准前的滑动距离比例（保守滑动，避免越过重叠区域）
+        """
+        self.viewport = tuple(viewport)
+        self.overlap = overlap
+        self.band = min(band, overlap)
+        self.column_step = max(1, column_step)
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.min_progress = min_progress
+        self.inertia_smoothing = inertia_smoothing
+        self.first_swipe_ratio = first_swipe_ratio
+        self.reset()
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ScrollTracker":
+        """从配置创建滚动跟踪器
+        
+        Args:
+            config: 配置字典（viewport、overlap、band、columnStep、minScore、searchMargin、minProgress）
+        
+        Returns:
+            ScrollTracker: 滚动跟踪器实例
+        """
+        return cls(
+            viewport=tuple(config.get('viewport', [20, 490, 680, 720])),
+            overlap=config.get('overlap', 160),
+            band=config.get('band', 96),
+            column_step=config.get('columnStep', 4),
+            min_score=config.get('minScore', 0.9),
+            search_margin=config.get('searchMargin'),
+            min_progress=config.get('minProgress', 4),
+            first_swipe_ratio=config.get('firstSwipeRatio', 0.75)
+        )
+    
+    def reset(self):
+        """清空拼接结果和校准状态"""
+        self.blocks = []
+        self.offsets = []
+        self.scores = []
+        self.previous = None
+        self.current = None
+        self.position = 0
+        self.inertia = 1.0
+        self.calibrated = False
+        self.lost_count = 0
+        self.gaps = 0
+        self.at_end = False
+    
+    @property
+    def frame_count(self) -> int:
+        """已拼接的帧数"""
+        return len(self.offsets) + (1 if self.blocks else 0)
+    
+    @property
+    def viewport_height(self) -> int:
+        """可视区域高度"""
+        return self.viewport[3]
+    
+    @property
+    def max_advance(self) -> int:
+        """单次滑动允许的最大前进距离（一屏减去重叠高度）"""
+        return self.viewport_height - self.overlap
+    
+    def next_swipe_distance(self, advance: Optional[int] = None) -> int:
+        """计算下一次滑动的指令距离
+        
+        Args:
+            advance: 期望的前进距离，None表示前进一屏减去重叠高度（超过该值时截断）
+        
+        Returns:
+            int: 指令滑动距离（像素），不超过可视区域高度
+        """
+        target = self.max_advance if advance is None else min(advance, self.max_advance)
+        if not self.calibrated:
+            target *= self.first_swipe_ratio
+        return min(self.viewport_height, int(round(target / self.inertia)))
+    
+    def add_frame(self, frame: np.ndarray, commanded: Optional[int] = None) -> Optional[int]:
+        """加入一帧：估计相对上一帧的偏移并拼接新露出的行
+        
+        Args:
+            frame: 完整屏幕帧（BGR或灰度）
+            commanded: 本次滑动的指令距离，用于限定搜索范围和校准惯性系数
+        
+        Returns:
+            Optional[int]: 实测偏移（像素），第一帧返回0，跟踪丢失返回None
+        """
+        crop = crop_frame(frame, self.viewport)
+        signature = self._signature(crop)
+        
+        if self.previous is None:
+            self.blocks.append(crop.copy())
+            self.previous = signature
+            self.current = crop
+            return 0
+        
+        # 滑动后画面不变（列表已到底），无纹理的行带也能判断
+        if float(np.abs(signature - self.previous).mean()) < 1.0:
+            estimate = (0, 1.0)
+        else:
+            expected = int(round(commanded * self.inertia)) if commanded else None
+            estimate = self.estimate_offset(self.previous, signature, expected)
+        if estimate is None:
+            self.lost_count += 1
+            return None
+        
+        offset, score = estimate
+        if offset > 0:
+            self.blocks.append(crop[self.viewport_height - offset:].copy())
+        self.offsets.append(offset)
+        self.scores.append(score)
+        self.position += offset
+        self.previous = signature
+        self.current = crop
+        self.at_end = offset <= self.min_progress
+        
+        # 校准惯性系数（只在确实发生滚动时，首次实测直接采用）
+        if commanded and not self.at_end:
+            ratio = offset / commanded
+            if self.calibrated:
+                ratio = self.inertia_smoothing * self.inertia + (1 - self.inertia_smoothing) * ratio
+            self.inertia = ratio
+            self.calibrated = True
+        return offset
+    
+    def resync(self, frame: np.ndarray):
+        """跟踪丢失后从当前帧重新开始拼接（两段之间的距离未知，记为一个缺口）
+        
+        滚动过头是跟踪丢失的主要原因，因此同时调大惯性系数以缩短下一次滑动
+        
+        Args:
+            frame: 完整屏幕帧（BGR或灰度）
+        """
+        crop = crop_frame(frame, self.viewport)
+        self.blocks.append(crop.copy())
+        self.previous = self._signature(crop)
+        self.current = crop
+        self.gaps += 1
+        self.inertia *= 1.25
+    
+    def estimate_offset(self, previous: np.ndarray, current: np.ndarray,
+                        expected: Optional[int] = None) -> Optional[Tuple[int, float]]:
+        """估计两帧之间内容向上移动的距离
+        
+        取当前帧顶部的行带，在上一帧中搜索其位置：位置即滚动距离
+        
+        Args:
+            previous: 上一帧的可视区域签名（见 _signature）
+            current: 当前帧的可视区域签名
+            expected: 预期偏移，提供时只在其附近搜索
+        
+        Returns:
+            Optional[Tuple[int, float]]: (偏移, 匹配得分)，得分过低时返回None
+        """
+        height = previous.shape[0]
+        band = current[:self.band]
+        low, high = 0, height - self.band
+        if expected is not None and self.search_margin is not None:
+            low = max(low, expected - self.search_margin)
+            high = min(high, expected + self.search_margin)
+        if high < low:
+            return None
+        
+        # 行带没有纹理时无法定位
+        if float(band.std()) < 1.0:
+            return None
+        
+        result = cv2.matchTemplate(previous[low:high + self.band], band, cv2.TM_CCOEFF_NORMED)
+        result = np.nan_to_num(result[:, 0], nan=-1.0)
+        best = int(np.argmax(result))
+        score = float(result[best])
+        if score < self.min_score:
+            return None
+        return low + best, score
+    
+    def stitched(self) -> Optional[np.ndarray]:
+        """获取拼接后的完整列表图像（跟踪丢失产生的缺口处直接相接）
+        
+        Returns:
+            Optional[np.ndarray]: 长图，没有帧时返回None
+        """
+        if not self.blocks:
+            return None
+        return np.vstack(self.blocks)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取跟踪统计
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            "frames": self.frame_count,
+            "position": self.position,
+            "stitched_height": self.position + (self.viewport_height if self.blocks else 0),
+            "offsets": list(self.offsets),
+            "min_score": min(self.scores) if self.scores else None,
+            "inertia": self.inertia,
+            "lost_count": self.lost_count,
+            "gaps": self.gaps,
+            "at_end": self.at_end
+        }
+    
+    def _signature(self, crop: np.ndarray) -> np.ndarray:
+        """可视区域签名：灰度图水平降采样，垂直方向保持原分辨率"""
+        gray = to_grayscale(crop)
+        width = max(1, gray.shape[1] // self.column_step)
+        return cv2.resize(gray, (width, gray.shape[0]), interpolation=cv2.INTER_AREA).astype(np.float32)
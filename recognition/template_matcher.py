@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板匹配器
+实现图像识别接口的模板匹配部分：模板只解码一次并缓存在LRU中，
+同时预先计算灰度图和图像金字塔，直接在内存帧上匹配，不经过临时文件。
+支持按模板配置搜索区域（ROI），以及先在1/4尺度粗匹配、再在候选位置附近精匹配的金字塔搜索。
+多个模板可共享同一帧的灰度图和金字塔，在线程池中并行匹配（OpenCV匹配时会释放GIL）
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from utils.interfaces import BaseModule, ImageRecognitionInterface
+from utils.frame_utils import ImageLike, decode_image, to_grayscale
+
+# 模板来源：文件路径、已注册的模板名、编码后的图片数据或帧数组
+TemplateSource = Union[str, bytes, np.ndarray]
+
+
+@dataclass
+class TemplateEntry:
+    """缓存的模板数据类"""
+    key: str
+    color: np.ndarray
+    gray: np.ndarray
+    pyramid: List[np.ndarray]
+    width: int
+    height: int
+    scaled: Dict[float, List[np.ndarray]] = field(default_factory=dict)
+
+
+class PreparedFrame:
+    """预处理后的帧
+    
+    灰度图只转换一次，金字塔层级按需生成并缓存，供多次模板匹配共享
+    """
+    
+    def __init__(self, image_data: ImageLike):
+        """初始化预处理帧
+        
+        Args:
+            image_data: 源帧或编码后的图片数据
+        """
+        gray = decode_image(image_data, grayscale=True)
+        if gray is None:
+            raise ValueError("无法解析图像数据")
+        self.levels = [gray]
+        self.lock = threading.Lock()
+    
+    @property
+    def gray(self) -> np.ndarray:
+        """全尺寸灰度图"""
+        return self.levels[0]
+    
+    def level(self, index: int) -> np.ndarray:
+        """获取金字塔层级（第 index 层为原图的 1/2^index）
+        
+        Args:
+            index: 层级序号
+        
+        Returns:
+            np.ndarray: 该层灰度图
+        """
+        if index < len(self.levels):
+            return self.levels[index]
+        with self.lock:
+            while len(self.levels) <= index:
+                self.levels.append(cv2.pyrDown(self.levels[-1]))
+            return self.levels[index]
+
+
+class TemplateMatcher(BaseModule, ImageRecognitionInterface):
+    """模板匹配器类"""
+    
+    def __init__(self, config_manager, logger):
+        """初始化模板匹配器
+        
+        Args:
+            config_manager: 配置管理器实例
+            logger: 日志记录器实例
+        """
+        super().__init__(config_manager, logger)
+        self.config = self.config_manager.get('recognition', {})
+        
+        # 缓存与匹配参数
+        self.cache_size = self.config.get('templateCacheSize', 32)
+        self.pyramid_levels = self.config.get('pyramidLevels', 3)
+        self.default_threshold = self.config.get('threshold', 0.8)
+        self.scales = self.config.get('scales', [1.0])
+        
+        # 搜索策略：full（全图匹配）或 coarse_to_fine（金字塔粗匹配后局部精匹配）
+        self.search_mode = self.config.get('searchMode', 'coarse_to_fine')
+        self.coarse_level = self.config.get('coarseLevel', 2)
+        self.coarse_candidates = self.config.get('coarseCandidates', 3)
+        self.roi_fallback = self.config.get('roiFallback', True)
+        
+        # 批量匹配线程池（首次使用时创建）
+        self.match_workers = self.config.get('matchWorkers', min(4, os.cpu_count() or 1))
+        self.executor = None
+        self.executor_lock = threading.Lock()
+        
+        # 模板LRU缓存与模板名注册表
+        self.template_cache = OrderedDict()
+        self.named_templates = {}
+        self.cache_lock = threading.RLock()
+        
+        # 统计
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.match_count = 0
+        self.total_match_time = 0.0
+        self.roi_hits = 0
+        self.roi_misses = 0
+        self.batch_count = 0
+        self.stats_lock = threading.Lock()
+    
+    def initialize(self) -> bool:
+        """初始化模块
+        
+        Returns:
+            bool: 初始化是否成功
+        """
+        try:
+            self.is_initialized = True
+            self.start_time = time.time()
+            self.logger.info("模板匹配器初始化成功")
+            return True
+        except Exception as e:
+            self.logger.error(f"模板匹配器初始化失败：{str(e)}")
+            return False
+    
+    def cleanup(self) -> bool:
+        """清理模块资源
+        
+        Returns:
+            bool: 清理是否成功
+        """
+        with self.executor_lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+        with self.cache_lock:
+            self.template_cache.clear()
+        self.is_initialized = False
+        self.logger.info("模板匹配器资源清理完成")
+        return True
+    
+    def register_template(self, name: str, source: TemplateSource,
+                          roi: Optional[Tuple[int, int, int, int]] = None,
+                          threshold: Optional[float] = None) -> bool:
+        """注册命名模板并预加载
+        
+        Args:
+            name: 模板名称
+            source: 模板文件路径、图片数据或帧数组
+            roi: 默认搜索区域 (x, y, width, height)，None表示全屏搜索
+            threshold: 默认匹配阈值，None使用全局阈值
+        
+        Returns:
+            bool: 注册是否成功
+        """
+        with self.cache_lock:
+            self.named_templates[name] = {
+                'source': source,
+                'roi': tuple(roi) if roi else None,
+                'threshold': threshold
+            }
+        return self.get_template(name) is not None
+    
+    def register_templates(self, templates_config: Dict[str, Dict[str, Any]],
+                           base_dir: Optional[str] = None) -> int:
+        """按配置批量注册模板
+        
+        Args:
+            templates_config: 模板配置，{名称: {"template": 路径, "roi": [x, y, w, h], "threshold": 阈值}}，
+                              不含 template 的条目会被跳过
+            base_dir: 相对路径的基准目录
+        
+        Returns:
+            int: 注册成功的模板数量
+        """
+        registered = 0
+        for name, template_config in templates_config.items():
+            path = template_config.get('template') if isinstance(template_config, dict) else None
+            if not path:
+                continue
+            if base_dir and not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            if self.register_template(name, path, template_config.get('roi'), template_config.get('threshold')):
+                registered += 1
+        return registered
+    
+    def get_template(self, source: TemplateSource) -> Optional[TemplateEntry]:
+        """获取模板（命中缓存时不重复解码）
+        
+        Args:
+            source: 模板名、文件路径、图片数据或帧数组
+        
+        Returns:
+            Optional[TemplateEntry]: 模板数据
+        """
+        try:
+            with self.cache_lock:
+                if isinstance(source, str) and source in self.named_templates:
+                    key = f"name:{source}"
+                    source = self.named_templates[source]['source']
+                else:
+                    key = self._template_key(source)
+                
+                if key is not None and key in self.template_cache:
+                    self.template_cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return self.template_cache[key]
+                
+                self.cache_misses += 1
+                entry = self._build_template(key or "array", source)
+                if entry is None:
+                    return None
+                
+                if key is not None:
+                    self.template_cache[key] = entry
+                    while len(self.template_cache) > self.cache_size:
+                        self.template_cache.popitem(last=False)
+                return entry
+        
+        except Exception as e:
+            self.logger.error(f"加载模板失败：{str(e)}")
+            return None
+    
+    def prepare_frame(self, image_data: Union[ImageLike, PreparedFrame]) -> Optional[PreparedFrame]:
+        """预处理帧（灰度转换与按需金字塔）
+        
+        Args:
+            image_data: 源帧、编码后的图片数据或已预处理的帧
+        
+        Returns:
+            Optional[PreparedFrame]: 预处理后的帧
+        """
+        if isinstance(image_data, PreparedFrame):
+            return image_data
+        try:
+            return PreparedFrame(image_data)
+        except Exception as e:
+            self.logger.error(f"帧预处理失败：{str(e)}")
+            return None
+    
+    def match_template(self, image_data: Union[ImageLike, PreparedFrame], template_data: TemplateSource,
+                       threshold: Optional[float] = None,
+                       roi: Optional[Tuple[int, int, int, int]] = None,
+                       mode: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """模板匹配
+        
+        先在搜索区域内匹配，区域内未达到阈值时再回退到全屏搜索
+        
+        Args:
+            image_data: 源帧、编码后的图片数据或已预处理的帧
+            template_data: 模板名、文件路径、图片数据或帧数组
+            threshold: 匹配阈值，None使用模板或全局默认值
+            roi: 搜索区域 (x, y, width, height)，None使用模板注册时的区域
+            mode: 全屏搜索策略，'full' 或 'coarse_to_fine'，None使用配置
+        
+        Returns:
+            Optional[Dict[str, Any]]: 匹配结果，未达到阈值返回None
+        """
+        try:
+            start = time.time()
+            
+            template = self.get_template(template_data)
+            if template is None:
+                return None
+            
+            prepared = self.prepare_frame(image_data)
+            if prepared is None:
+                return None
+            
+            threshold, roi = self._template_defaults(template_data, threshold, roi)
+            best = self._search(prepared, template, threshold, roi, mode or self.search_mode)
+            
+            with self.stats_lock:
+                self.match_count += 1
+                self.total_match_time += time.time() - start
+            
+            if best is None or best['score'] < threshold:
+                return None
+            return best
+        
+        except Exception as e:
+            self.logger.error(f"模板匹配失败：{str(e)}")
+            return None
+    
+    def match_many(self, image_data: Union[ImageLike, PreparedFrame],
+                   templates: Optional[Iterable[str]] = None,
+                   threshold: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """在同一帧上批量匹配多个模板
+        
+        帧只做一次灰度转换和金字塔构建，所有模板共享该预处理结果，并在线程池中并行匹配。
+        适合判断当前处于哪个界面（如市场界面、报价列表、关闭按钮）
+        
+        Args:
+            image_data: 源帧、编码后的图片数据或已预处理的帧
+            templates: 模板名或模板路径列表，None表示所有已注册的模板
+            threshold: 统一的匹配阈值，None使用各模板的默认值
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: 命中的模板 {模板名: 匹配结果}，结果中包含 score
+        """
+        try:
+            if templates is None:
+                with self.cache_lock:
+                    templates = list(self.named_templates.keys())
+            else:
+                templates = list(templates)
+            if not templates:
+                return {}
+            
+            prepared = self.prepare_frame(image_data)
+            if prepared is None:
+                return {}
+            
+            # 提前构建粗匹配层级，避免工作线程争用金字塔锁
+            if self.search_mode == 'coarse_to_fine':
+                prepared.level(self.coarse_level)
+            
+            if len(templates) == 1:
+                results = [self.match_template(prepared, templates[0], threshold)]
+            else:
+                executor = self._get_executor()
+                futures = [executor.submit(self.match_template, prepared, template, threshold)
+                           for template in templates]
+                results = [future.result() for future in futures]
+            
+            with self.stats_lock:
+                self.batch_count += 1
+            return {template: result for template, result in zip(templates, results) if result is not None}
+        
+        except Exception as e:
+            self.logger.error(f"批量模板匹配失败：{str(e)}")
+            return {}
+    
+    def locate_element(self, image_data: Union[ImageLike, PreparedFrame],
+                       element_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """定位界面元素
+        
+        Args:
+            image_data: 源帧或编码后的图片数据
+            element_config: 元素配置，包含 template（模板名或路径）、可选的 threshold 和 roi
+        
+        Returns:
+            Optional[Dict[str, Any]]: 定位结果
+        """
+        template = element_config.get('template')
+        if not template:
+            self.logger.error("元素配置缺少模板")
+            return None
+        roi = element_config.get('roi')
+        return self.match_template(image_data, template, element_config.get('threshold'),
+                                   tuple(roi) if roi else None)
+    
+    def recognize_text(self, image_data: ImageLike, language: str = 'chi_sim') -> Optional[Dict[str, Any]]:
+        """OCR文字识别（模板匹配器不提供该功能）
+        
+        Args:
+            image_data: 图像数据
+            language: 识别语言
+        
+        Returns:
+            Optional[Dict[str, Any]]: 始终返回None
+        """
+        self.logger.warning("模板匹配器不支持文字识别")
+        return None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取匹配统计
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            "cached_templates": len(self.template_cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "match_count": self.match_count,
+            "average_match_time": self.total_match_time / self.match_count if self.match_count > 0 else 0,
+            "roi_hits": self.roi_hits,
+            "roi_misses": self.roi_misses,
+            "batch_count": self.batch_count
+        }
+    
+    def get_status(self) -> Dict[str, Any]:
+        """获取模块状态
+        
+        Returns:
+            Dict[str, Any]: 状态信息
+        """
+        status = super().get_status()
+        status.update(self.get_stats())
+        return status
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取批量匹配线程池"""
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=max(1, self.match_workers),
+                                                   thread_name_prefix="TemplateMatcher")
+            return self.executor
+    
+    def _template_defaults(self, template_data: TemplateSource, threshold: Optional[float],
+                           roi: Optional[Tuple[int, int, int, int]]):
+        """合并调用参数与模板注册时的默认阈值和搜索区域"""
+        meta = None
+        if isinstance(template_data, str):
+            meta = self.named_templates.get(template_data)
+        if meta:
+            if threshold is None:
+                threshold = meta['threshold']
+            if roi is None:
+                roi = meta['roi']
+        if threshold is None:
+            threshold = self.default_threshold
+        return threshold, roi
+    
+    def _template_key(self, source: TemplateSource) -> Optional[str]:
+        """计算模板缓存键，帧数组不缓存"""
+        if isinstance(source, str):
+            return f"path:{os.path.abspath(source)}"
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return f"data:{hashlib.sha1(source).hexdigest()}"
+        return None
+    
+    def _build_pyramid(self, gray: np.ndarray) -> List[np.ndarray]:
+        """构建模板金字塔，层级过小时停止"""
+        pyramid = [gray]
+        for _ in range(1, self.pyramid_levels):
+            level = cv2.pyrDown(pyramid[-1])
+            if min(level.shape[:2]) < 8:
+                break
+            pyramid.append(level)
+        return pyramid
+    
+    def _build_template(self, key: str, source: TemplateSource) -> Optional[TemplateEntry]:
+        """解码模板并预计算灰度图与金字塔"""
+        if isinstance(source, str):
+            color = cv2.imread(source, cv2.IMREAD_COLOR)
+            if color is None:
+                self.logger.error(f"模板图读取失败：{source}")
+                return None
+        else:
+            color = decode_image(source)
+            if color is None:
+                self.logger.error("模板图解码失败")
+                return None
+        
+        gray = to_grayscale(color)
+        return TemplateEntry(
+            key=key,
+            color=color,
+            gray=gray,
+            pyramid=self._build_pyramid(gray),
+            width=gray.shape[1],
+            height=gray.shape[0]
+        )
+    
+    def _scaled_pyramid(self, template: TemplateEntry, scale: float) -> List[np.ndarray]:
+        """获取缩放后的模板金字塔（按需生成并缓存）"""
+        if scale == 1.0:
+            return template.pyramid
+        with self.cache_lock:
+            if scale not in template.scaled:
+                size = (max(1, int(round(template.width * scale))), max(1, int(round(template.height * scale))))
+                interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+                template.scaled[scale] = self._build_pyramid(cv2.resize(template.gray, size, interpolation=interpolation))
+            return template.scaled[scale]
+    
+    def _search(self, prepared: PreparedFrame, template: TemplateEntry, threshold: float,
+                roi: Optional[Tuple[int, int, int, int]], mode: str) -> Optional[Dict[str, Any]]:
+        """在所有尺度上搜索模板，返回最佳结果"""
+        best = None
+        if roi:
+            for scale in self.scales:
+                candidate = self._match_in_region(prepared.gray, self._scaled_pyramid(template, scale)[0], roi)
+                best = self._better(best, candidate, scale, 'roi')
+            if best is not None and best['score'] >= threshold:
+                with self.stats_lock:
+                    self.roi_hits += 1
+                return best
+            with self.stats_lock:
+                self.roi_misses += 1
+            if not self.roi_fallback:
+                return best
+            
+        for scale in self.scales:
+            pyramid = self._scaled_pyramid(template, scale)
+            if mode == 'coarse_to_fine':
+                candidate = self._match_coarse_to_fine(prepared, pyramid)
+                best = self._better(best, candidate, scale, 'coarse_to_fine')
+            else:
+                candidate = self._match_in_region(prepared.gray, pyramid[0], None)
+                best = self._better(best, candidate, scale, 'full')
+        return best
+    
+    @staticmethod
+    def _better(best: Optional[Dict[str, Any]], candidate: Optional[Dict[str, Any]],
+                scale: float, mode: str) -> Optional[Dict[str, Any]]:
+        """比较并保留得分更高的结果"""
+        if candidate is None:
+            return best
+        candidate['scale'] = scale
+        candidate['mode'] = mode
+        if best is None or candidate['score'] > best['score']:
+            return candidate
+        return best
+    
+    def _match_in_region(self, gray: np.ndarray, template_gray: np.ndarray,
+                         region: Optional[Tuple[int, int, int, int]]) -> Optional[Dict[str, Any]]:
+        """在指定区域内做全分辨率匹配，区域小于模板时自动扩展"""
+        frame_height, frame_width = gray.shape[:2]
+        height, width = template_gray.shape[:2]
+        if height > frame_height or width > frame_width:
+            return None
+        
+        if region is None:
+            x1, y1, x2, y2 = 0, 0, frame_width, frame_height
+        else:
+            x, y, region_width, region_height = region
+            x1, y1 = max(0, int(x)), max(0, int(y))
+            x2 = min(frame_width, max(int(x + region_width), x1 + width))
+            y2 = min(frame_height, max(int(y + region_height), y1 + height))
+            x1, y1 = min(x1, x2 - width), min(y1, y2 - height)
+        
+        result = cv2.matchTemplate(gray[y1:y2, x1:x2], template_gray, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        return self._build_result(x1 + max_loc[0], y1 + max_loc[1], width, height, max_val)
+    
+    def _match_coarse_to_fine(self, prepared: PreparedFrame, pyramid: List[np.ndarray]) -> Optional[Dict[str, Any]]:
+        """金字塔搜索：粗尺度全图匹配取若干候选，再在全分辨率下局部精匹配"""
+        level = min(self.coarse_level, len(pyramid) - 1)
+        if level <= 0:
+            return self._match_in_region(prepared.gray, pyramid[0], None)
+        
+        coarse_gray = prepared.level(level)
+        coarse_template = pyramid[level]
+        if coarse_template.shape[0] > coarse_gray.shape[0] or coarse_template.shape[1] > coarse_gray.shape[1]:
+            return self._match_in_region(prepared.gray, pyramid[0], None)
+        
+        result = cv2.matchTemplate(coarse_gray, coarse_template, cv2.TM_CCOEFF_NORMED)
+        candidates = self._top_candidates(result, self.coarse_candidates, coarse_template.shape[:2])
+        
+        factor = 2 ** level
+        margin = factor * 2
+        height, width = pyramid[0].shape[:2]
+        best = None
+        for left, top in candidates:
+            region = (left * factor - margin, top * factor - margin, width + 2 * margin, height + 2 * margin)
+            candidate = self._match_in_region(prepared.gray, pyramid[0], region)
+            if candidate is not None and (best is None or candidate['score'] > best['score']):
+                best = candidate
+        return best
+    
+    @staticmethod
+    def _top_candidates(result: np.ndarray, count: int, template_shape: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """从匹配结果图中取得分最高的若干位置（非极大值抑制）"""
+        result = result.copy()
+        suppress_height, suppress_width = max(1, template_shape[0] // 2), max(1, template_shape[1] // 2)
+        candidates = []
+        for _ in range(max(1, count)):
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            if max_val <= -1 or not np.isfinite(max_val):
+                break
+            candidates.append(max_loc)
+            x, y = max_loc
+            result[max(0, y - suppress_height):y + suppress_height + 1,
+                   max(0, x - suppress_width):x + suppress_width + 1] = -1
+        return candidates
+    
+    @staticmethod
+    def _build_result(left: int, top: int, width: int, height: int,
+                      score: float, scale: float = 1.0) -> Dict[str, Any]:
+        """构建匹配结果字典"""
+        return {
+            'x': int(left + width // 2),
+            'y': int(top + height // 2),
+            'left': int(left),
+            'top': int(top),
+            'width': int(width),
+            'height': int(height),
+            'score': float(score),
+            'scale': scale
+        }
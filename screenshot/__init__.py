@@ -8,9 +8,25 @@
 from .screenshot_manager import ScreenshotManager
 from .image_processor import ImageProcessor
 from .capture_manager import CaptureManager
+from .capture_queue import CaptureJobQueue
+from .capture_history import CaptureHistoryStore, CaptureHistoryRing
+from .screenshot_store import ScreenshotStore, StoredScreenshot
+from .screenshot_index import ScreenshotIndex
+from .frame_stream import FrameRingBuffer, FrameStreamer
+from .settle_detector import ScreenSettleDetector, SettleResult
 
 __all__ = [
     "ScreenshotManager",
     "ImageProcessor", 
-    "CaptureManager"
+    "CaptureManager",
+    "CaptureJobQueue",
+    "CaptureHistoryStore",
+    "CaptureHistoryRing",
+    "ScreenshotStore",
+    "StoredScreenshot",
+    "ScreenshotIndex",
+    "FrameRingBuffer",
+    "FrameStreamer",
+    "ScreenSettleDetector",
+    "SettleResult"
 ]
\ No newline at end of file
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图历史存储模块
+使用 SQLite（WAL模式）只追加地保存截图记录，按任务ID和时间建立索引，
+过期记录通过范围删除清理，不再整体重写历史文件；
+最近的记录另外保存在按列存储的内存环形缓冲区中，查询和统计直接在数组上切片计算
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.interfaces import DatabaseInterface
+from utils.tracing import traced
+
+# 记录字段（与 CaptureRecord 一致，区域拆分为四列）
+RECORD_COLUMNS = (
+    "record_id", "task_id", "timestamp", "file_path", "file_size", "width", "height",
+    "format", "region_x", "region_y", "region_width", "region_height",
+    "processing_time", "success", "error_message"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS capture_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    record_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    file_path TEXT,
+    file_size INTEGER NOT NULL DEFAULT 0,
+    width INTEGER NOT NULL DEFAULT 0,
+    height INTEGER NOT NULL DEFAULT 0,
+    format TEXT,
+    region_x INTEGER,
+    region_y INTEGER,
+    region_width INTEGER,
+    region_height INTEGER,
+    processing_time REAL NOT NULL DEFAULT 0,
+    success INTEGER NOT NULL DEFAULT 1,
+    error_message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_capture_history_timestamp ON capture_history (timestamp);
+CREATE INDEX IF NOT EXISTS idx_capture_history_task ON capture_history (task_id, timestamp);
+"""
+
+
+class CaptureHistoryStore(DatabaseInterface):
+    """截图历史存储类"""
+    
+    def __init__(self, db_path: str):
+        """初始化截图历史存储
+        
+        Args:
+            db_path: 数据库文件路径，":memory:" 表示内存数据库
+        """
+        self.db_path = db_path
+        self.connection = None
+        self.lock = threading.RLock()
+    
+    def connect(self) -> bool:
+        """连接数据库并创建表结构
+        
+        Returns:
+            bool: 连接是否成功
+        """
+        with self.lock:
+            if self.connection is not None:
+                return True
+            if self.db_path != ":memory:":
+                db_dir = os.path.dirname(self.db_path)
+                if db_dir:
+                    os.makedirs(db_dir, exist_ok=True)
+            
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            self.connection.commit()
+            return True
+    
+    def disconnect(self) -> bool:
+        """断开数据库连接
+        
+        Returns:
+            bool: 断开是否成功
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            return True
+    
+    def query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        """执行查询
+        
+        Args:
+            sql: SQL语句
+            params: 参数
+        
+        Returns:
+            List[Dict[str, Any]]: 查询结果
+        """
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(sql, params).fetchall()]
+    
+    def execute(self, sql: str, params: Tuple = ()) -> bool:
+        """执行SQL语句
+        
+        Args:
+            sql: SQL语句
+            params: 参数
+        
+        Returns:
+            bool: 执行是否成功
+        """
+        with self.lock:
+            self.connection.execute(sql, params)
+            self.connection.commit()
+            return True
+    
+    @traced("storage.history_append", "storage")
+    def append(self, record: Dict[str, Any]) -> int:
+        """追加一条截图记录
+        
+        Args:
+            record: 截图记录（CaptureRecord 的字典形式）
+        
+        Returns:
+            int: 记录行号
+        """
+        return self.append_many([record])
+    
+    @traced("storage.history_append_many", "storage")
+    def append_many(self, records: List[Dict[str, Any]]) -> int:
+        """在一个事务中追加多条截图记录
+        
+        Args:
+            records: 截图记录列表
+        
+        Returns:
+            int: 最后一条记录的行号
+        """
+        rows = [self._to_row(record) for record in records]
+        placeholders = ", ".join("?" for _ in RECORD_COLUMNS)
+        with self.lock:
+            cursor = self.connection.executemany(
+                f"INSERT INTO capture_history ({', '.join(RECORD_COLUMNS)}) VALUES ({placeholders})", rows
+            )
+            self.connection.commit()
+            return cursor.lastrowid
+    
+    def get_records(self, limit: int = 100, task_id: Optional[str] = None,
+                    start_time: Optional[float] = None,
+                    end_time: Optional[float] = None) -> List[Dict[str, Any]]:
+        """按任务ID和时间范围查询记录（按时间倒序）
+        
+        Args:
+            limit: 记录数量限制
+            task_id: 任务ID过滤
+            start_time: 开始时间
+            end_time: 结束时间
+        
+        Returns:
+            List[Dict[str, Any]]: 截图记录列表
+        """
+        conditions = []
+        params = []
+        if task_id:
+            conditions.append("task_id = ?")
+            params.append(task_id)
+        if start_time:
+            conditions.append("timestamp >= ?")
+            params.append(start_time)
+        if end_time:
+            conditions.append("timestamp <= ?")
+            params.append(end_time)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.query(
+            f"SELECT {', '.join(RECORD_COLUMNS)} FROM capture_history {where} "
+            f"ORDER BY timestamp DESC LIMIT ?",
+            tuple(params) + (limit,)
+        )
+        return [self._from_row(row) for row in rows]
+    
+    def count(self) -> int:
+        """获取记录总数
+        
+        Returns:
+            int: 记录数量
+        """
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM capture_history").fetchone()[0]
+    
+    def remove_before(self, cutoff_time: float) -> List[str]:
+        """删除早于指定时间的记录，并返回不再被任何记录引用的截图文件
+        
+        Args:
+            cutoff_time: 截止时间
+        
+        Returns:
+            List[str]: 需要由调用方删除的文件路径列表
+        """
+        return self._remove_where("timestamp < ?", (cutoff_time,))
+    
+    def remove_oldest(self, max_records: int) -> List[str]:
+        """只保留最新的 max_records 条记录，并返回不再被任何记录引用的截图文件
+        
+        Args:
+            max_records: 最大记录数
+        
+        Returns:
+            List[str]: 需要由调用方删除的文件路径列表
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id FROM capture_history ORDER BY id DESC LIMIT 1 OFFSET ?", (max_records,)
+            ).fetchone()
+            if row is None:
+                return []
+            return self._remove_where("id <= ?", (row[0],))
+    
+    def _remove_where(self, condition: str, params: Tuple) -> List[str]:
+        """在同一事务中取出待删记录的文件并删除记录，避免文件失去索引
+        
+        Args:
+            condition: 待删记录的条件
+            params: 条件参数
+        
+        Returns:
+            List[str]: 不再被剩余记录引用的文件路径列表
+        """
+        with self.lock:
+            files = [row[0] for row in self.connection.execute(
+                f"SELECT DISTINCT file_path FROM capture_history WHERE {condition} AND file_path IS NOT NULL "
+                f"AND file_path NOT IN (SELECT file_path FROM capture_history "
+                f"WHERE NOT ({condition}) AND file_path IS NOT NULL)",
+                params + params
+            ).fetchall()]
+            self.connection.execute(f"DELETE FROM capture_history WHERE {condition}", params)
+            self.connection.commit()
+            return files
+    
+    def import_json(self, json_path: str) -> int:
+        """导入旧版 capture_history.json，导入后将原文件重命名为 .migrated
+        
+        Args:
+            json_path: 旧版历史文件路径
+        
+        Returns:
+            int: 导入的记录数量
+        """
+        if not os.path.exists(json_path):
+            return 0
+        with open(json_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        if records:
+            self.append_many(records)
+        os.replace(json_path, json_path + ".migrated")
+        return len(records)
+    
+    @staticmethod
+    def _to_row(record: Dict[str, Any]) -> Tuple:
+        """记录字典转换为数据库行"""
+        region = record.get("region") or (None, None, None, None)
+        return (
+            record.get("record_id", ""),
+            record.get("task_id", ""),
+            record.get("timestamp", 0),
+            record.get("file_path"),
+            record.get("file_size", 0),
+            record.get("width", 0),
+            record.get("height", 0),
+            record.get("format"),
+            region[0], region[1], region[2], region[3],
+            record.get("processing_time", 0),
+            1 if record.get("success", True) else 0,
+            record.get("error_message")
+        )
+    
+    @staticmethod
+    def _from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        """数据库行转换为记录字典"""
+        region = (row.pop("region_x"), row.pop("region_y"), row.pop("region_width"), row.pop("region_height"))
+        row["region"] = None if region[0] is None else region
+        row["success"] = bool(row["success"])
+        return row
+
+
+class CaptureHistoryRing:
+    """按列存储的最近截图记录环形缓冲区类
+    
+    时间戳、处理耗时等数值字段保存在并行的 array 列中，任务ID驻留为整数编号
+    （按引用计数，槽位被覆盖或过期后不再使用的编号回收复用），
+    区域拆分为四个整数列（无区域记为-1），避免每条记录一个字典
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        """初始化环形缓冲区
+        
+        Args:
+            capacity: 最多保留的记录数
+        """
+        self.capacity = max(1, capacity)
+        self.lock = threading.RLock()
+        self.position = 0
+        self.size = 0
+        
+        # 数值列
+        self.timestamps = array('d', bytes(8 * self.capacity))
+        self.processing_times = array('d', bytes(8 * self.capacity))
+        self.file_sizes = array('q', bytes(8 * self.capacity))
+        self.widths = array('i', bytes(4 * self.capacity))
+        self.heights = array('i', bytes(4 * self.capacity))
+        self.task_codes = array('i', bytes(4 * self.capacity))
+        self.regions = array('i', bytes(16 * self.capacity))
+        self.successes = array('b', bytes(self.capacity))
+        
+        # 字符串列
+        self.record_ids = [None] * self.capacity
+        self.file_paths = [None] * self.capacity
+        self.formats = [None] * self.capacity
+        self.error_messages = [None] * self.capacity
+        
+        # 任务ID驻留表：编号 -> 任务ID、任务ID -> 编号、编号的引用次数与空闲编号
+        self.task_ids = []
+        self.task_index = {}
+        self.task_refs = []
+        self.free_codes = []
+    
+    def __len__(self) -> int:
+        with self.lock:
+            return self.size
+    
+    def append(self, record: Dict[str, Any]):
+        """追加一条记录，缓冲区满时覆盖最旧的记录
+        
+        Args:
+            record: 截图记录（CaptureRecord 的字典形式）
+        """
+        task_id = sys.intern(record.get("task_id", ""))
+        region = record.get("region") or (-1, -1, -1, -1)
+        
+        with self.lock:
+            slot = self.position
+            if self.size == self.capacity:
+                self._release_task(self.task_codes[slot])
+            task_code = self._acquire_task(task_id)
+            
+            self.timestamps[slot] = record.get("timestamp", 0)
+            self.processing_times[slot] = record.get("processing_time", 0)
+            self.file_sizes[slot] = record.get("file_size", 0)
+            self.widths[slot] = record.get("width", 0)
+            self.heights[slot] = record.get("height", 0)
+            self.task_codes[slot] = task_code
+            self.regions[slot * 4:slot * 4 + 4] = array('i', region)
+            self.successes[slot] = 1 if record.get("success", True) else 0
+            self.record_ids[slot] = record.get("record_id", "")
+            self.file_paths[slot] = record.get("file_path")
+            self.formats[slot] = record.get("format")
+            self.error_messages[slot] = record.get("error_message")
+            
+            self.position = (slot + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+    
+    def get_records(self, limit: int = 100, task_id: Optional[str] = None,
+                    start_time: Optional[float] = None,
+                    end_time: Optional[float] = None) -> List[Dict[str, Any]]:
+        """按任务ID和时间范围查询记录（按时间倒序）
+        
+        Args:
+            limit: 记录数量限制
+            task_id: 任务ID过滤
+            start_time: 开始时间
+            end_time: 结束时间
+        
+        Returns:
+            List[Dict[str, Any]]: 截图记录列表
+        """
+        with self.lock:
+            slots = self._ordered_slots()
+            mask = np.ones(len(slots), dtype=bool)
+            if task_id:
+                task_code = self.task_index.get(task_id)
+                if task_code is None:
+                    return []
+                mask &= self._column(self.task_codes, np.int32)[slots] == task_code
+            timestamps = self._column(self.timestamps, np.float64)[slots]
+            if start_time:
+                mask &= timestamps >= start_time
+            if end_time:
+                mask &= timestamps <= end_time
+            
+            selected = slots[mask]
+            selected = selected[np.argsort(-timestamps[mask], kind="stable")][:limit]
+            return [self._record_at(int(slot)) for slot in selected]
+    
+    def covers(self, start_time: Optional[float] = None) -> bool:
+        """判断缓冲区是否完整包含指定时间之后的记录
+        
+        Args:
+            start_time: 开始时间，None表示全部记录
+        
+        Returns:
+            bool: 开始时间不早于缓冲区中最旧的记录
+        """
+        with self.lock:
+            return start_time is not None and self.size > 0 and start_time >= self.oldest_timestamp()
+    
+    def oldest_timestamp(self) -> float:
+        """获取最旧记录的时间戳"""
+        with self.lock:
+            if self.size == 0:
+                return 0
+            return self.timestamps[(self.position - self.size) % self.capacity]
+    
+    def expire(self, cutoff_time: float) -> int:
+        """丢弃早于指定时间的记录
+        
+        Args:
+            cutoff_time: 截止时间
+        
+        Returns:
+            int: 丢弃的记录数量
+        """
+        with self.lock:
+            timestamps = self._column(self.timestamps, np.float64)[self._ordered_slots()]
+            expired = int(np.count_nonzero(timestamps < cutoff_time))
+            for slot in self._ordered_slots()[:expired]:
+                self._release_task(self.task_codes[slot])
+                self.record_ids[slot] = self.file_paths[slot] = None
+                self.formats[slot] = self.error_messages[slot] = None
+            self.size -= expired
+            return expired
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓冲区内记录的统计信息
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        with self.lock:
+            slots = self._ordered_slots()
+            if len(slots) == 0:
+                return {"records": 0}
+            
+            timestamps = self._column(self.timestamps, np.float64)[slots]
+            processing_times = self._column(self.processing_times, np.float64)[slots]
+            file_sizes = self._column(self.file_sizes, np.int64)[slots]
+            span = float(timestamps.max() - timestamps.min())
+            return {
+                "records": len(slots),
+                "success_rate": float(self._column(self.successes, np.int8)[slots].mean()),
+                "average_processing_time": float(processing_times.mean()),
+                "p95_processing_time": float(np.percentile(processing_times, 95)),
+                "average_file_size": float(file_sizes.mean()),
+                "captures_per_second": (len(slots) - 1) / span if span > 0 else 0
+            }
+    
+    def clear(self):
+        """清空缓冲区"""
+        with self.lock:
+            self.position = 0
+            self.size = 0
+            self.record_ids = [None] * self.capacity
+            self.file_paths = [None] * self.capacity
+            self.formats = [None] * self.capacity
+            self.error_messages = [None] * self.capacity
+            self.task_ids.clear()
+            self.task_index.clear()
+            self.task_refs.clear()
+            self.free_codes.clear()
+    
+    def _acquire_task(self, task_id: str) -> int:
+        """获取任务ID的编号并增加引用（需持有锁）"""
+        task_code = self.task_index.get(task_id)
+        if task_code is None:
+            if self.free_codes:
+                task_code = self.free_codes.pop()
+                self.task_ids[task_code] = task_id
+            else:
+                task_code = len(self.task_ids)
+                self.task_ids.append(task_id)
+                self.task_refs.append(0)
+            self.task_index[task_id] = task_code
+        self.task_refs[task_code] += 1
+        return task_code
+    
+    def _release_task(self, task_code: int):
+        """减少编号的引用，不再被任何槽位使用时回收（需持有锁）"""
+        self.task_refs[task_code] -= 1
+        if self.task_refs[task_code] == 0:
+            del self.task_index[self.task_ids[task_code]]
+            self.task_ids[task_code] = None
+            self.free_codes.append(task_code)
+    
+    def _ordered_slots(self) -> np.ndarray:
+        """按写入顺序（旧到新）排列的有效槽位"""
+        return np.arange(self.position - self.size, self.position) % self.capacity
+    
+    @staticmethod
+    def _column(column: array, dtype) -> np.ndarray:
+        """以零拷贝方式将 array 列视为 numpy 数组"""
+        return np.frombuffer(column, dtype=dtype)
+    
+    def _record_at(self, slot: int) -> Dict[str, Any]:
+        """还原指定槽位的记录字典"""
+        region = tuple(self.regions[slot * 4:slot * 4 + 4])
+        return {
+            "record_id": self.record_ids[slot],
+            "task_id": self.task_ids[self.task_codes[slot]],
+            "timestamp": self.timestamps[slot],
+            "file_path": self.file_paths[slot],
+            "file_size": self.file_sizes[slot],
+            "width": self.widths[slot],
+            "height": self.heights[slot],
+            "format": self.formats[slot],
+            "region": None if region[0] < 0 else region,
+            "processing_time": self.processing_times[slot],
+            "success": bool(self.successes[slot]),
+            "error_message": self.error_messages[slot]
+        }
@@ -2,25 +2,44 @@
 # -*- coding: utf-8 -*-
 """
 截图捕获管理器
-负责截图任务调度、批量截图处理、截图存储管理和截图历史记录等功能
+负责截图任务调度、批量截图处理、截图存储管理和截图历史记录等功能。
+调度器使用按下次截图时间排序的最小堆，在条件变量上等待到最近的截止时间。
+截图线程只负责从设备取帧，帧经有界队列交给处理线程池（预处理、编码保存、记录历史），
+回调在独立的线程池中执行，慢回调或PNG压缩不会拖慢其他任务的截图
 """
 
 import os
 import time
-import json
+import heapq
+import itertools
 import threading
 import asyncio
 from typing import Dict, Any, Optional, List, Tuple, Callable
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 from utils.interfaces import BaseModule
 from utils.logger import Logger
 from utils.config_manager import ConfigManager
 from utils.device_manager import DeviceManager
+from utils.frame_utils import encode_frame
+from utils.metrics import registry
 from screenshot.screenshot_manager import ScreenshotManager
 from screenshot.image_processor import ImageProcessor
+from screenshot.capture_queue import CaptureJobQueue
+from screenshot.capture_history import CaptureHistoryStore, CaptureHistoryRing
+from screenshot.screenshot_index import ScreenshotIndex, INDEX_FILENAME
+
+# 截图指标：每秒截图数为 capture_total 的速率，长时间不更新 capture_last_success 说明截图停滞
+CAPTURES = registry.counter("capture_total", "完成的截图次数", ("result",))
+CAPTURE_SECONDS = registry.histogram("capture_duration_seconds", "从取帧到保存、记录完成的耗时（秒）")
+CAPTURE_DROPPED = registry.counter("capture_dropped_total", "处理队列已满时丢弃的截图数")
+CAPTURE_QUEUE_DEPTH = registry.gauge("capture_queue_depth", "等待处理的截图数")
+CAPTURE_LAST_SUCCESS = registry.gauge("capture_last_success_timestamp_seconds", "最近一次截图成功的时间戳")
 
 
 @dataclass
@@ -57,6 +76,15 @@ class CaptureRecord:
     error_message: Optional[str] = None
 
 
+@dataclass
+class CaptureJob:
+    """待处理的截图数据类"""
+    task: CaptureTask
+    index: int
+    frame: np.ndarray
+    start_time: float
+
+
 class CaptureManager(BaseModule):
     """截图捕获管理器类"""
     
@@ -81,26 +109,49 @@ class CaptureManager(BaseModule):
         # 配置
         self.data_config = self.config_manager.get("data", {})
         self.retention_config = self.data_config.get("retention", {})
+        self.capture_config = self.config_manager.get("screenshot", {}).get("capture", {})
         
         # 存储路径
         self.screenshot_dir = "data/screenshots"
-        self.history_file = os.path.join(self.screenshot_dir, "capture_history.json")
+        self.history_file = os.path.join(self.screenshot_dir, "capture_history.json")  # 旧版历史文件，启动时迁移
         
         # 任务管理
         self.capture_tasks = {}
         self.task_queue = queue.Queue()
         self.task_lock = threading.RLock()
         
-        # 历史记录
-        self.capture_history = []
+        # 调度堆：(下次截图时间, 序号, 任务ID)，取消的任务在出堆时丢弃
+        self.schedule_heap = []
+        self.schedule_sequence = itertools.count()
+        self.schedule_condition = threading.Condition(self.task_lock)
+        
+        # 历史记录（SQLite只追加存储，每追加 historyTrimInterval 条按 maxRecords 裁剪一次；
+        # 最近 memoryRecords 条同时保存在按列存储的内存环形缓冲区中）
+        self.history_store = None
+        self.recent_history = CaptureHistoryRing(self.retention_config.get("memoryRecords", 1000))
         self.history_lock = threading.RLock()
+        self.history_appends = 0
+        self.history_trim_interval = self.retention_config.get("historyTrimInterval", 100)
         
-        # 调度器
+        # 截图文件索引（截图目录下，与市场点击器、内容存储和文件存储管理器共用），保存的截图在此登记，
+        # 过期清理按索引删除所有写入方的文件，不扫描目录
+        self.screenshot_index = None
+        
+        # 调度器、截图线程与处理线程池
         self.scheduler_thread = None
-        self.worker_thread = None
+        self.capture_thread = None
+        self.worker_threads = []
         self.is_running = False
+        self.processing_workers = self.capture_config.get("processingWorkers", 2)
+        self.job_queue = CaptureJobQueue(
+            self.capture_config.get("queueSize", 8),
+            self.capture_config.get("queuePolicy", "block")
+        )
+        self.callback_workers = self.capture_config.get("callbackWorkers", 1)
+        self.callback_executor = None
         
         # 性能统计
+        self.stats_lock = threading.Lock()
         self.total_captures = 0
         self.successful_captures = 0
         self.failed_captures = 0
@@ -122,8 +173,9 @@ class CaptureManager(BaseModule):
             if not self._check_dependencies():
                 return False
             
-            # 加载历史记录
+            # 加载历史记录并打开截图文件索引
             self._load_history()
+            self._open_screenshot_index()
             
             # 清理过期记录
             self._cleanup_expired_records()
@@ -153,12 +205,14 @@ class CaptureManager(BaseModule):
             # 停止调度器
             self._stop_scheduler()
             
-            # 保存历史记录
-            self._save_history()
+            # 关闭历史记录存储和截图文件索引
+            self._close_history()
+            self._close_screenshot_index()
             
             # 清理任务
             with self.task_lock:
                 self.capture_tasks.clear()
+                self.schedule_heap.clear()
             
             self.is_initialized = False
             self.logger.info("截图捕获管理器资源清理完成")
@@ -172,9 +226,12 @@ class CaptureManager(BaseModule):
                          interval: float = 1.0, count: int = 1,
                          callback: Optional[Callable] = None,
                          auto_save: bool = True, save_path: Optional[str] = None,
-                         preprocess: bool = True, compress: bool = True) -> str:
+                         preprocess: bool = True, compress: bool = True,
+                         delay: float = 0) -> str:
         """调度截图任务
         
+        第N次截图的时间固定为 首次截图时间 + N * interval，不会因调度延迟而累积漂移
+        
         Args:
             region: 截图区域
             interval: 截图间隔（秒）
@@ -184,32 +241,34 @@ class CaptureManager(BaseModule):
             save_path: 保存路径
             preprocess: 是否预处理
             compress: 是否压缩
+            delay: 首次截图前的延迟（秒）
             
         Returns:
             str: 任务ID
         """
         try:
-            # 生成任务ID
-            task_id = f"capture_{int(time.time() * 1000)}_{self.total_captures}"
+            now = time.time()
             
             # 创建任务
-            task = CaptureTask(
-                task_id=task_id,
-                region=region,
-                interval=interval,
-                count=count,
-                created_time=time.time(),
-                next_capture_time=time.time(),
-                callback=callback,
-                auto_save=auto_save,
-                save_path=save_path,
-                preprocess=preprocess,
-                compress=compress
-            )
-            
-            # 添加到任务列表
             with self.task_lock:
+                task_id = f"capture_{int(now * 1000)}_{next(self.schedule_sequence)}"
+                task = CaptureTask(
+                    task_id=task_id,
+                    region=region,
+                    interval=interval,
+                    count=count,
+                    created_time=now + delay,
+                    next_capture_time=now + delay,
+                    callback=callback,
+                    auto_save=auto_save,
+                    save_path=save_path,
+                    preprocess=preprocess,
+                    compress=compress
+                )
+            
+                # 添加到任务列表和调度堆
                 self.capture_tasks[task_id] = task
+                self._push_schedule(task)
             
             self.logger.info(f"调度截图任务: {task_id}, 区域: {region}, 间隔: {interval}秒, 次数: {count}")
             return task_id
@@ -230,7 +289,9 @@ class CaptureManager(BaseModule):
         try:
             with self.task_lock:
                 if task_id in self.capture_tasks:
+                    # 堆中的条目在出堆时发现任务已不存在而丢弃
                     del self.capture_tasks[task_id]
+                    self._compact_schedule()
                     self.logger.info(f"取消截图任务: {task_id}")
                     return True
                 else:
@@ -308,31 +369,35 @@ class CaptureManager(BaseModule):
             file_paths = []
             
             for i, region in enumerate(regions):
-                # 截图
-                screenshot_data = self.screenshot_manager.capture_screen(region)
-                if not screenshot_data:
+                # 截图（原始帧）
+                frame = self.screenshot_manager.capture_frame(region)
+                if frame is None:
                     self.logger.error(f"批量截图失败，区域: {region}")
                     continue
                 
                 # 处理图片
-                processed_data = self._process_screenshot(screenshot_data, True, True)
-                if not processed_data:
+                processed_frame = self._process_screenshot(frame, True)
+                if processed_frame is None:
                     self.logger.error(f"图片处理失败，区域: {region}")
                     continue
                 
-                # 保存文件
+                # 编码并保存文件
                 filename = f"batch_{i:03d}_{int(time.time() * 1000)}.png"
                 file_path = os.path.join(save_dir, filename)
+                encoded_data = self._encode_screenshot(processed_frame, True)
                 
-                if self.screenshot_manager.save_screenshot(processed_data, file_path):
+                if encoded_data and self.screenshot_manager.save_screenshot(encoded_data, file_path):
                     file_paths.append(file_path)
+                    task_id = f"batch_{int(time.time())}"
+                    self._index_file(file_path, len(encoded_data), task_id)
                     
                     # 记录历史
                     self._record_capture(
-                        task_id=f"batch_{int(time.time())}",
-                        screenshot_data=processed_data,
+                        task_id=task_id,
+                        frame=processed_frame,
                         region=region,
-                        file_path=file_path
+                        file_path=file_path,
+                        file_size=len(encoded_data)
                     )
                 else:
                     self.logger.error(f"保存截图失败: {file_path}")
@@ -359,23 +424,12 @@ class CaptureManager(BaseModule):
             List[Dict[str, Any]]: 历史记录列表
         """
         try:
-            with self.history_lock:
-                history = self.capture_history.copy()
-            
-            # 过滤
-            if task_id:
-                history = [record for record in history if record.get("task_id") == task_id]
-            
-            if start_time:
-                history = [record for record in history if record.get("timestamp", 0) >= start_time]
+            # 内存缓冲区能给出完整结果时直接返回，否则按任务ID、时间范围走数据库索引查询
+            history = self.recent_history.get_records(limit, task_id, start_time, end_time)
+            if len(history) >= limit or self.history_store is None or self.recent_history.covers(start_time):
+                return history
             
-            if end_time:
-                history = [record for record in history if record.get("timestamp", 0) <= end_time]
-            
-            # 排序和限制
-            history.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
-            
-            return history[:limit]
+            return self.history_store.get_records(limit, task_id, start_time, end_time)
             
         except Exception as e:
             self.logger.error(f"获取历史记录失败: {e}")
@@ -397,23 +451,15 @@ class CaptureManager(BaseModule):
             cutoff_time = time.time() - (days * 24 * 3600)
             cleaned_count = 0
             
-            # 遍历截图目录
-            for root, dirs, files in os.walk(self.screenshot_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    
-                    # 跳过历史文件
-                    if file == "capture_history.json":
-                        continue
-                    
-                    # 检查文件时间
-                    if os.path.getmtime(file_path) < cutoff_time:
-                        try:
-                            os.remove(file_path)
-                            cleaned_count += 1
-                            self.logger.debug(f"删除旧截图文件: {file_path}")
-                        except Exception as e:
-                            self.logger.error(f"删除文件失败: {file_path}, 错误: {e}")
+            # 截图文件索引登记了所有写入方保存的文件：按时间索引取出过期文件删除，不扫描目录，
+            # 未登记的文件（如录制的测试截图）不会被触及
+            if self.screenshot_index is not None:
+                cleaned_count += self._remove_files(self.screenshot_index.delete_before(cutoff_time))
+            
+            # 过期的历史记录一并删除，记录对应但未登记到索引的文件同时删除
+            self.recent_history.expire(cutoff_time)
+            if self.history_store is not None:
+                cleaned_count += self._remove_files(self.history_store.remove_before(cutoff_time))
             
             self.logger.info(f"清理旧截图文件完成，删除: {cleaned_count} 个文件")
             return cleaned_count
@@ -439,7 +485,9 @@ class CaptureManager(BaseModule):
             "total_capture_time": self.total_capture_time,
             "average_capture_time": avg_capture_time,
             "active_tasks": len(self.capture_tasks),
-            "history_records": len(self.capture_history),
+            "queue": self.job_queue.get_stats(),
+            "history_records": self.history_store.count() if self.history_store else len(self.recent_history),
+            "recent_history": self.recent_history.get_stats(),
             "uptime": time.time() - self.start_time if self.start_time > 0 else 0
         }
     
@@ -469,19 +517,29 @@ class CaptureManager(BaseModule):
             return False
     
     def _start_scheduler(self):
-        """启动调度器"""
+        """启动调度器、截图线程和处理线程池"""
         try:
             self.is_running = True
+            self.job_queue.reopen()
+            self.callback_executor = ThreadPoolExecutor(max_workers=max(1, self.callback_workers),
+                                                        thread_name_prefix="CaptureCallback")
             
             # 启动调度线程
-            self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
+            self.scheduler_thread = threading.Thread(target=self._scheduler_loop, name="CaptureScheduler", daemon=True)
             self.scheduler_thread.start()
             
-            # 启动工作线程
-            self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-            self.worker_thread.start()
+            # 启动截图线程（每个设备一个）
+            self.capture_thread = threading.Thread(target=self._capture_loop, name="CaptureDevice", daemon=True)
+            self.capture_thread.start()
             
-            self.logger.info("截图调度器已启动")
+            # 启动处理线程池
+            self.worker_threads = []
+            for index in range(max(1, self.processing_workers)):
+                worker = threading.Thread(target=self._worker_loop, name=f"CaptureWorker-{index}", daemon=True)
+                worker.start()
+                self.worker_threads.append(worker)
+            
+            self.logger.info(f"截图调度器已启动，处理线程数: {len(self.worker_threads)}")
             
         except Exception as e:
             self.logger.error(f"启动调度器失败: {e}")
@@ -489,189 +547,293 @@ class CaptureManager(BaseModule):
     def _stop_scheduler(self):
         """停止调度器"""
         try:
-            self.is_running = False
+            with self.schedule_condition:
+                self.is_running = False
+                self.schedule_condition.notify_all()
             
-            # 等待线程结束
+            # 等待线程结束：先停截图，再让处理线程处理完已入队的帧
             if self.scheduler_thread and self.scheduler_thread.is_alive():
                 self.scheduler_thread.join(timeout=5)
             
-            if self.worker_thread and self.worker_thread.is_alive():
-                self.worker_thread.join(timeout=5)
+            if self.capture_thread and self.capture_thread.is_alive():
+                self.capture_thread.join(timeout=5)
+            
+            self.job_queue.close()
+            for worker in self.worker_threads:
+                if worker.is_alive():
+                    worker.join(timeout=5)
+            self.worker_threads = []
+            
+            if self.callback_executor:
+                self.callback_executor.shutdown(wait=True)
+                self.callback_executor = None
             
             self.logger.info("截图调度器已停止")
             
         except Exception as e:
             self.logger.error(f"停止调度器失败: {e}")
     
+    def _push_schedule(self, task: CaptureTask):
+        """将任务的下次截图时间加入调度堆（调用方需持有 task_lock）"""
+        heapq.heappush(self.schedule_heap, (task.next_capture_time, next(self.schedule_sequence), task.task_id))
+        
+        # 新任务早于当前等待的截止时间时唤醒调度线程
+        if self.schedule_heap[0][2] == task.task_id:
+            self.schedule_condition.notify()
+    
+    def _compact_schedule(self):
+        """已取消任务的残留条目超过一半时重建调度堆（调用方需持有 task_lock）"""
+        if len(self.schedule_heap) > 2 * len(self.capture_tasks) + 16:
+            self.schedule_heap = [entry for entry in self.schedule_heap if entry[2] in self.capture_tasks]
+            heapq.heapify(self.schedule_heap)
+    
     def _scheduler_loop(self):
-        """调度器循环"""
-        while self.is_running:
-            try:
-                current_time = time.time()
-                
-                with self.task_lock:
-                    tasks_to_execute = []
+        """调度器循环：等待到最近的截止时间，取出到期任务放入执行队列"""
+        with self.schedule_condition:
+            while self.is_running:
+                try:
+                    if not self.schedule_heap:
+                        self.schedule_condition.wait()
+                        continue
+                    
+                    due_time, _, task_id = self.schedule_heap[0]
+                    wait_time = due_time - time.time()
+                    if wait_time > 0:
+                        self.schedule_condition.wait(wait_time)
+                        continue
                     
-                    # 检查需要执行的任务
-                    for task_id, task in list(self.capture_tasks.items()):
-                        if current_time >= task.next_capture_time and task.current_count < task.count:
-                            tasks_to_execute.append(task)
+                    heapq.heappop(self.schedule_heap)
+                    task = self.capture_tasks.get(task_id)
+                    if task is None or task.next_capture_time != due_time or task.current_count >= task.count:
+                        continue
                             
-                            # 更新下次执行时间
-                            task.next_capture_time = current_time + task.interval
-                            task.current_count += 1
+                    task.current_count += 1
+                    self.task_queue.put((task, task.current_count))
                             
-                            # 检查是否完成
-                            if task.current_count >= task.count:
-                                del self.capture_tasks[task_id]
-                                self.logger.info(f"任务完成: {task_id}")
-                    
-                    # 添加到执行队列
-                    for task in tasks_to_execute:
-                        self.task_queue.put(task)
+                    if task.current_count >= task.count:
+                        del self.capture_tasks[task_id]
+                        self.logger.info(f"任务完成: {task_id}")
+                    else:
+                        # 按首次截图时间推算，避免间隔误差累积
+                        task.next_capture_time = task.created_time + task.current_count * task.interval
+                        self._push_schedule(task)
                 
-                # 短暂休眠
-                time.sleep(0.1)
-                
-            except Exception as e:
-                self.logger.error(f"调度器循环错误: {e}")
-                time.sleep(1)
+                except Exception as e:
+                    self.logger.error(f"调度器循环错误: {e}")
+                    self.schedule_condition.wait(1)
     
-    def _worker_loop(self):
-        """工作线程循环"""
+    def _capture_loop(self):
+        """截图线程循环：从设备取帧后交给处理队列"""
         while self.is_running:
             try:
-                # 获取任务
                 try:
-                    task = self.task_queue.get(timeout=1)
+                    task, index = self.task_queue.get(timeout=0.5)
                 except queue.Empty:
                     continue
                 
-                # 执行截图
-                self._execute_capture_task(task)
+                job = self._capture_task(task, index)
+                if job is not None and not self.job_queue.put(job, key=task.task_id):
+                    CAPTURE_DROPPED.inc()
+                    self.logger.warning(f"处理队列已满，丢弃截图: {task.task_id}")
+                CAPTURE_QUEUE_DEPTH.set(len(self.job_queue))
                 
-                # 标记任务完成
                 self.task_queue.task_done()
                 
+            except Exception as e:
+                self.logger.error(f"截图线程循环错误: {e}")
+                time.sleep(1)
+    
+    def _worker_loop(self):
+        """处理线程循环，队列关闭且处理完剩余任务后退出"""
+        while True:
+            try:
+                job = self.job_queue.get(timeout=1)
+                if job is None:
+                    if self.job_queue.closed:
+                        break
+                    continue
+                
+                CAPTURE_QUEUE_DEPTH.set(len(self.job_queue))
+                self._process_capture_job(job)
+            
             except Exception as e:
                 self.logger.error(f"工作线程循环错误: {e}")
                 time.sleep(1)
     
-    def _execute_capture_task(self, task: CaptureTask):
-        """执行截图任务
+    def _capture_task(self, task: CaptureTask, index: int) -> Optional[CaptureJob]:
+        """执行截图任务的取帧部分
         
         Args:
             task: 截图任务
+            index: 本次截图在任务中的序号
+        
+        Returns:
+            Optional[CaptureJob]: 待处理的截图，失败返回None
         """
         start_time = time.time()
         
         try:
-            self.logger.debug(f"执行截图任务: {task.task_id}")
+            self.logger.debug("执行截图任务: %s", task.task_id)
             
-            # 截图
-            screenshot_data = self.screenshot_manager.capture_screen(task.region)
-            if not screenshot_data:
+            # 截图（原始帧）
+            frame = self.screenshot_manager.capture_frame(task.region)
+            if frame is None:
                 self.logger.error(f"截图失败，任务: {task.task_id}")
-                return
+                self._update_stats(False)
+                return None
             
+            return CaptureJob(task=task, index=index, frame=frame, start_time=start_time)
+        
+        except Exception as e:
+            self.logger.error(f"执行截图任务失败: {task.task_id}, 错误: {e}")
+            self._update_stats(False)
+            return None
+    
+    def _process_capture_job(self, job: CaptureJob):
+        """处理截图：预处理、编码保存、记录历史，并提交回调
+        
+        Args:
+            job: 待处理的截图
+        """
+        task = job.task
+        
+        try:
             # 处理图片
-            processed_data = self._process_screenshot(
-                screenshot_data, task.preprocess, task.compress
-            )
-            if not processed_data:
+            processed_frame = self._process_screenshot(job.frame, task.preprocess)
+            if processed_frame is None:
                 self.logger.error(f"图片处理失败，任务: {task.task_id}")
+                self._update_stats(False)
                 return
             
-            # 保存文件
+            # 保存文件（仅在落盘时编码）
             file_path = None
+            file_size = None
             if task.auto_save:
                 if task.save_path:
                     file_path = task.save_path
                 else:
-                    filename = f"{task.task_id}_{task.current_count}_{int(time.time() * 1000)}.png"
+                    filename = f"{task.task_id}_{job.index}_{int(time.time() * 1000)}.png"
                     file_path = os.path.join(self.screenshot_dir, filename)
                 
-                if not self.screenshot_manager.save_screenshot(processed_data, file_path):
+                encoded_data = self._encode_screenshot(processed_frame, task.compress)
+                if not encoded_data or not self.screenshot_manager.save_screenshot(encoded_data, file_path):
                     self.logger.error(f"保存截图失败: {file_path}")
+                    self._update_stats(False)
                     return
+                file_size = len(encoded_data)
+                self._index_file(file_path, file_size, task.task_id)
             
             # 记录历史
             self._record_capture(
                 task_id=task.task_id,
-                screenshot_data=processed_data,
+                frame=processed_frame,
                 region=task.region,
                 file_path=file_path,
-                processing_time=time.time() - start_time
+                processing_time=time.time() - job.start_time,
+                file_size=file_size
             )
             
-            # 执行回调
+            # 回调在独立线程池中执行（传入原始帧）
             if task.callback:
-                try:
-                    task.callback(processed_data, file_path)
-                except Exception as e:
-                    self.logger.error(f"回调执行失败: {e}")
+                self._submit_callback(task, processed_frame, file_path)
             
             # 更新统计
-            self.total_captures += 1
-            self.successful_captures += 1
-            self.total_capture_time += time.time() - start_time
+            self._update_stats(True, time.time() - job.start_time)
             
-            self.logger.debug(f"截图任务执行成功: {task.task_id}")
+            self.logger.debug("截图任务执行成功: %s", task.task_id)
             
         except Exception as e:
             self.logger.error(f"执行截图任务失败: {task.task_id}, 错误: {e}")
+            self._update_stats(False)
             
-            # 更新统计
+    def _submit_callback(self, task: CaptureTask, frame: np.ndarray, file_path: Optional[str]):
+        """提交回调到回调线程池"""
+        def run_callback():
+            try:
+                task.callback(frame, file_path)
+            except Exception as e:
+                self.logger.error(f"回调执行失败: {e}")
+        
+        executor = self.callback_executor
+        if executor is None:
+            run_callback()
+            return
+        try:
+            executor.submit(run_callback)
+        except RuntimeError:
+            # 线程池已关闭（正在停止），直接在当前线程执行
+            run_callback()
+    
+    def _update_stats(self, success: bool, capture_time: float = 0):
+        """更新性能统计"""
+        with self.stats_lock:
             self.total_captures += 1
-            self.failed_captures += 1
+            if success:
+                self.successful_captures += 1
+                self.total_capture_time += capture_time
+            else:
+                self.failed_captures += 1
+        
+        CAPTURES.labels("success" if success else "failure").inc()
+        if success:
+            CAPTURE_SECONDS.observe(capture_time)
+            CAPTURE_LAST_SUCCESS.set_to_current_time()
     
-    def _process_screenshot(self, screenshot_data: bytes, preprocess: bool, compress: bool) -> Optional[bytes]:
+    def _process_screenshot(self, frame: np.ndarray, preprocess: bool) -> Optional[np.ndarray]:
         """处理截图
         
         Args:
-            screenshot_data: 原始截图数据
+            frame: 原始截图帧
             preprocess: 是否预处理
-            compress: 是否压缩
             
         Returns:
-            Optional[bytes]: 处理后的截图数据
+            Optional[np.ndarray]: 处理后的截图帧
         """
         try:
-            processed_data = screenshot_data
-            
-            # 预处理
             if preprocess:
-                processed_data = self.image_processor.preprocess_image(processed_data)
-                if not processed_data:
-                    return None
+                return self.image_processor.preprocess_image(frame)
+            return frame
             
-            # 压缩
-            if compress:
-                processed_data = self.image_processor.optimize_image(processed_data)
-                if not processed_data:
-                    return None
+        except Exception as e:
+            self.logger.error(f"处理截图失败: {e}")
+            return None
+    
+    def _encode_screenshot(self, frame: np.ndarray, compress: bool) -> Optional[bytes]:
+        """将截图帧编码为PNG，用于保存
+        
+        Args:
+            frame: 截图帧
+            compress: 是否使用高压缩率编码
             
-            return processed_data
+        Returns:
+            Optional[bytes]: PNG格式截图数据
+        """
+        try:
+            if compress:
+                return self.image_processor.optimize_image(frame)
+            return encode_frame(frame)
             
         except Exception as e:
-            self.logger.error(f"处理截图失败: {e}")
+            self.logger.error(f"编码截图失败: {e}")
             return None
     
-    def _record_capture(self, task_id: str, screenshot_data: bytes, 
+    def _record_capture(self, task_id: str, frame: np.ndarray, 
                        region: Optional[Tuple[int, int, int, int]], 
-                       file_path: Optional[str] = None, processing_time: float = 0):
+                       file_path: Optional[str] = None, processing_time: float = 0,
+                       file_size: Optional[int] = None):
         """记录截图历史
         
         Args:
             task_id: 任务ID
-            screenshot_data: 截图数据
+            frame: 截图帧
             region: 截图区域
             file_path: 文件路径
             processing_time: 处理时间
+            file_size: 保存后的文件大小，未保存时记录原始帧大小
         """
         try:
             # 获取图片信息
-            image_info = self.image_processor.get_image_info(screenshot_data)
+            image_info = self.image_processor.get_image_info(frame)
             if not image_info:
                 return
             
@@ -681,7 +843,7 @@ class CaptureManager(BaseModule):
                 task_id=task_id,
                 timestamp=time.time(),
                 file_path=file_path,
-                file_size=len(screenshot_data),
+                file_size=file_size if file_size is not None else frame.nbytes,
                 width=image_info.get("width", 0),
                 height=image_info.get("height", 0),
                 format=image_info.get("format", "Unknown"),
@@ -690,62 +852,103 @@ class CaptureManager(BaseModule):
                 success=True
             )
             
-            # 添加到历史记录
-            with self.history_lock:
-                self.capture_history.append(asdict(record))
-                
-                # 限制历史记录数量
-                max_records = self.retention_config.get("maxRecords", 10000)
-                if len(self.capture_history) > max_records:
-                    self.capture_history = self.capture_history[-max_records:]
+            # 追加到历史记录
+            record_data = asdict(record)
+            self.recent_history.append(record_data)
+            if self.history_store is None:
+                return
+            self.history_store.append(record_data)
             
-            # 定期保存历史记录
-            if len(self.capture_history) % 10 == 0:
-                self._save_history()
+            # 定期限制历史记录数量
+            with self.history_lock:
+                self.history_appends += 1
+                trim_due = self.history_appends % self.history_trim_interval == 0
+            if trim_due:
+                # 裁剪掉的记录对应的文件一并删除，否则文件失去索引后再也不会被清理
+                self._remove_files(self.history_store.remove_oldest(self.retention_config.get("maxRecords", 10000)))
             
         except Exception as e:
             self.logger.error(f"记录截图历史失败: {e}")
     
     def _load_history(self):
-        """加载历史记录"""
+        """打开历史记录存储，并迁移旧版 capture_history.json"""
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.capture_history = json.load(f)
+            history_store = CaptureHistoryStore(os.path.splitext(self.history_file)[0] + ".db")
+            history_store.connect()
                 
-                self.logger.info(f"加载截图历史记录: {len(self.capture_history)} 条")
-            else:
-                self.capture_history = []
+            migrated = history_store.import_json(self.history_file)
+            if migrated:
+                self.logger.info(f"迁移旧版截图历史记录: {migrated} 条")
+            
+            self.history_store = history_store
+            self.logger.info(f"加载截图历史记录: {history_store.count()} 条")
                 
         except Exception as e:
             self.logger.error(f"加载历史记录失败: {e}")
-            self.capture_history = []
+            self.history_store = None
     
-    def _save_history(self):
-        """保存历史记录"""
+    def _close_history(self):
+        """关闭历史记录存储"""
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.capture_history, f, ensure_ascii=False, indent=2)
+            if self.history_store is not None:
+                self.history_store.disconnect()
+                self.history_store = None
                 
         except Exception as e:
-            self.logger.error(f"保存历史记录失败: {e}")
+            self.logger.error(f"关闭历史记录存储失败: {e}")
     
-    def _cleanup_expired_records(self):
-        """清理过期记录"""
+    def _open_screenshot_index(self):
+        """打开截图文件索引"""
         try:
-            days = self.retention_config.get("screenshots", 7)
-            cutoff_time = time.time() - (days * 24 * 3600)
-            
-            with self.history_lock:
-                original_count = len(self.capture_history)
-                self.capture_history = [
-                    record for record in self.capture_history
-                    if record.get("timestamp", 0) >= cutoff_time
-                ]
-                
-                cleaned_count = original_count - len(self.capture_history)
-                if cleaned_count > 0:
-                    self.logger.info(f"清理过期历史记录: {cleaned_count} 条")
-            
+            screenshot_index = ScreenshotIndex(os.path.join(self.screenshot_dir, INDEX_FILENAME))
+            screenshot_index.connect()
+            self.screenshot_index = screenshot_index
         except Exception as e:
-            self.logger.error(f"清理过期记录失败: {e}")
\ No newline at end of file
+            self.logger.error(f"打开截图索引失败: {e}")
+            self.screenshot_index = None
+    
+    def _close_screenshot_index(self):
+        """关闭截图文件索引"""
+        try:
+            if self.screenshot_index is not None:
+                self.screenshot_index.disconnect()
+                self.screenshot_index = None
+        except Exception as e:
+            self.logger.error(f"关闭截图索引失败: {e}")
+    
+    def _index_file(self, file_path: str, file_size: int, task_id: str):
+        """保存成功的截图登记到截图文件索引"""
+        try:
+            if self.screenshot_index is not None:
+                self.screenshot_index.add(file_path, time.time(), file_size, task_id=task_id)
+        except Exception as e:
+            self.logger.error(f"登记截图索引失败: {e}")
+    
+    def _remove_files(self, file_paths: List[str]) -> int:
+        """删除截图文件并移出截图文件索引
+        
+        Args:
+            file_paths: 文件路径列表
+        
+        Returns:
+            int: 删除的文件数量
+        """
+        removed_count = 0
+        for file_path in file_paths:
+            if self.screenshot_index is not None:
+                self.screenshot_index.remove(file_path)
+            try:
+                os.remove(file_path)
+                removed_count += 1
+                self.logger.debug("删除旧截图文件: %s", file_path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.logger.error(f"删除文件失败: {file_path}, 错误: {e}")
+        return removed_count
+    
+    def _cleanup_expired_records(self):
+        """清理过期记录（按截图文件索引和历史记录删除过期文件）"""
+        removed_files = self.cleanup_old_files()
+        if removed_files > 0:
+            self.logger.info(f"清理过期截图文件: {removed_files} 个")
\ No newline at end of file
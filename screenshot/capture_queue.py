@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图处理队列模块
+截图线程与处理线程之间的有界队列，队列满时按策略处理：
+阻塞等待（背压）、丢弃最旧、丢弃最新，或合并同一任务尚未处理的帧
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+# 支持的队列满处理策略
+QUEUE_POLICIES = ("block", "drop_oldest", "drop_newest", "coalesce")
+
+
+class CaptureJobQueue:
+    """有界截图处理队列类"""
+    
+    def __init__(self, maxsize: int = 8, policy: str = "block"):
+        """初始化处理队列
+        
+        Args:
+            maxsize: 队列容量
+            policy: 队列满时的处理策略，block（阻塞生产者）、drop_oldest（丢弃最旧）、
+                    drop_newest（丢弃新任务）、coalesce（同一任务只保留最新一帧，否则丢弃最旧）
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"不支持的队列策略: {policy}")
+        
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        
+        # 统计
+        self.put_count = 0
+        self.dropped_count = 0
+        self.coalesced_count = 0
+    
+    def put(self, job: Any, key: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """放入一个任务
+        
+        Args:
+            job: 任务数据
+            key: 合并键（coalesce策略下同一键只保留最新任务）
+            timeout: block策略下的最长等待时间（秒），None表示一直等待
+        
+        Returns:
+            bool: 任务是否已入队（丢弃、超时或队列已关闭时返回False）
+        """
+        with self.condition:
+            if self.closed:
+                return False
+            self.put_count += 1
+            
+            if self.policy == "coalesce" and key is not None:
+                for item in self.items:
+                    if item[0] == key:
+                        item[1] = job
+                        self.coalesced_count += 1
+                        return True
+            
+            if len(self.items) >= self.maxsize:
+                if self.policy == "block":
+                    if not self.condition.wait_for(lambda: self.closed or len(self.items) < self.maxsize, timeout):
+                        self.dropped_count += 1
+                        return False
+                    if self.closed:
+                        return False
+                elif self.policy == "drop_newest":
+                    self.dropped_count += 1
+                    return False
+                else:
+                    self.items.popleft()
+                    self.dropped_count += 1
+            
+            self.items.append([key, job])
+            self.condition.notify_all()
+            return True
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """取出一个任务
+        
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+        
+        Returns:
+            Optional[Any]: 任务数据，超时或队列已关闭且为空时返回None
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items or self.closed, timeout):
+                return None
+            if not self.items:
+                return None
+            job = self.items.popleft()[1]
+            self.condition.notify_all()
+            return job
+    
+    def close(self):
+        """关闭队列，唤醒所有等待的生产者和消费者（已入队的任务仍可取出）"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+    
+    def reopen(self):
+        """重新打开队列并清空残留任务"""
+        with self.condition:
+            self.closed = False
+            self.items.clear()
+    
+    def __len__(self) -> int:
+        with self.condition:
+            return len(self.items)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列统计
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        with self.condition:
+            return {
+                "policy": self.policy,
+                "maxsize": self.maxsize,
+                "pending": len(self.items),
+                "put_count": self.put_count,
+                "dropped_count": self.dropped_count,
+                "coalesced_count": self.coalesced_count
+            }
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+连续帧流采集模块
+后台线程持续从设备拉取屏幕帧，写入预分配的环形缓冲区，
+调用方可直接读取最新帧或等待指定时间之后的新帧，无需再发起阻塞式截图
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.interfaces import BaseModule
+
+
+class FrameRingBuffer:
+    """预分配的帧环形缓冲区
+    
+    所有帧槽在首次写入时按帧尺寸一次性分配，之后的写入只做内存拷贝。
+    每个槽记录帧时间戳和全局序号，读者可以据此判断帧是否已被覆盖。
+    """
+    
+    def __init__(self, capacity: int = 4):
+        """初始化环形缓冲区
+        
+        Args:
+            capacity: 缓冲帧数量
+        """
+        if capacity < 2:
+            raise ValueError("环形缓冲区容量至少为2")
+        
+        self.capacity = capacity
+        self.frames = None
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.sequences = np.zeros(capacity, dtype=np.int64)
+        
+        # 已写入的帧总数，最新帧序号为 sequence - 1
+        self.sequence = 0
+        self.condition = threading.Condition()
+    
+    def _ensure_storage(self, frame: np.ndarray):
+        """按帧尺寸分配存储，尺寸变化（如屏幕旋转）时重新分配"""
+        if self.frames is None or self.frames.shape[1:] != frame.shape or self.frames.dtype != frame.dtype:
+            self.frames = np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+            self.timestamps[:] = 0
+            self.sequences[:] = 0
+    
+    def write(self, frame: np.ndarray, timestamp: float) -> int:
+        """写入一帧
+        
+        Args:
+            frame: 帧数据
+            timestamp: 帧时间戳
+        
+        Returns:
+            int: 帧序号
+        """
+        with self.condition:
+            self._ensure_storage(frame)
+            slot = self.sequence % self.capacity
+            np.copyto(self.frames[slot], frame)
+            self.timestamps[slot] = timestamp
+            self.sequences[slot] = self.sequence
+            self.sequence += 1
+            self.condition.notify_all()
+            return self.sequence - 1
+    
+    def _read_slot(self, slot: int, copy: bool) -> Tuple[np.ndarray, float, int]:
+        frame = self.frames[slot]
+        return (frame.copy() if copy else frame), float(self.timestamps[slot]), int(self.sequences[slot])
+    
+    def latest(self, copy: bool = True) -> Optional[Tuple[np.ndarray, float, int]]:
+        """读取最新一帧
+        
+        Args:
+            copy: 是否复制帧数据。不复制时返回的视图在之后 capacity-1 次写入内有效
+        
+        Returns:
+            Optional[Tuple[np.ndarray, float, int]]: (帧, 时间戳, 序号)
+        """
+        with self.condition:
+            if self.sequence == 0:
+                return None
+            return self._read_slot((self.sequence - 1) % self.capacity, copy)
+    
+    def wait_for(self, after_ts: float, timeout: Optional[float] = None,
+                 copy: bool = True) -> Optional[Tuple[np.ndarray, float, int]]:
+        """等待时间戳晚于 after_ts 的帧
+        
+        Args:
+            after_ts: 时间戳下限
+            timeout: 超时时间（秒），None表示一直等待
+            copy: 是否复制帧数据
+        
+        Returns:
+            Optional[Tuple[np.ndarray, float, int]]: (帧, 时间戳, 序号)，超时返回None
+        """
+        def ready():
+            if self.sequence == 0:
+                return False
+            return self.timestamps[(self.sequence - 1) % self.capacity] > after_ts
+        
+        with self.condition:
+            if not self.condition.wait_for(ready, timeout):
+                return None
+            return self._read_slot((self.sequence - 1) % self.capacity, copy)
+    
+    def clear(self):
+        """清空缓冲区（保留已分配的存储）"""
+        with self.condition:
+            self.sequence = 0
+            self.timestamps[:] = 0
+            self.sequences[:] = 0
+
+
+class FrameStreamer(BaseModule):
+    """连续帧流采集器类"""
+    
+    def __init__(self, config_manager, logger, uiautomator2_manager):
+        """初始化帧流采集器
+        
+        Args:
+            config_manager: 配置管理器实例
+            logger: 日志记录器实例
+            uiautomator2_manager: UIAutomator2管理器实例，需提供 take_frame()
+        """
+        super().__init__(config_manager, logger)
+        self.u2_manager = uiautomator2_manager
+        self.config = self.config_manager.get('screenshot', {}).get('stream', {})
+        
+        # 缓冲区大小和最小采集间隔（秒，0表示尽可能快）
+        self.buffer = FrameRingBuffer(self.config.get('bufferSize', 4))
+        self.min_interval = self.config.get('minInterval', 0)
+        
+        # 采集线程
+        self.capture_thread = None
+        self.is_running = False
+        self.stop_event = threading.Event()
+        
+        # 统计
+        self.frames_captured = 0
+        self.capture_errors = 0
+        self.total_capture_time = 0.0
+    
+    def initialize(self) -> bool:
+        """初始化模块并启动采集线程
+        
+        Returns:
+            bool: 初始化是否成功
+        """
+        try:
+            if not self.start():
+                return False
+            self.is_initialized = True
+            self.start_time = time.time()
+            self.logger.info("帧流采集器初始化成功")
+            return True
+        except Exception as e:
+            self.logger.error(f"帧流采集器初始化失败: {e}")
+            return False
+    
+    def cleanup(self) -> bool:
+        """停止采集并清理资源
+        
+        Returns:
+            bool: 清理是否成功
+        """
+        try:
+            self.stop()
+            self.buffer.clear()
+            self.is_initialized = False
+            self.logger.info("帧流采集器资源清理完成")
+            return True
+        except Exception as e:
+            self.logger.error(f"帧流采集器资源清理失败: {e}")
+            return False
+    
+    def start(self) -> bool:
+        """启动采集线程
+        
+        Returns:
+            bool: 启动是否成功
+        """
+        if self.is_running:
+            return True
+        if not self.u2_manager:
+            self.logger.error("启动帧流采集失败：缺少UIAutomator2管理器")
+            return False
+        
+        self.stop_event.clear()
+        self.is_running = True
+        self.capture_thread = threading.Thread(target=self._capture_loop, name="FrameStreamer", daemon=True)
+        self.capture_thread.start()
+        self.logger.info("帧流采集已启动")
+        return True
+    
+    def stop(self):
+        """停止采集线程"""
+        self.is_running = False
+        self.stop_event.set()
+        if self.capture_thread and self.capture_thread.is_alive():
+            self.capture_thread.join(timeout=5)
+        self.capture_thread = None
+        self.logger.info("帧流采集已停止")
+    
+    def latest_frame(self, copy: bool = True) -> Optional[np.ndarray]:
+        """获取最新帧
+        
+        Args:
+            copy: 是否复制帧数据
+        
+        Returns:
+            Optional[np.ndarray]: 最新帧，尚无帧时返回None
+        """
+        entry = self.buffer.latest(copy)
+        return entry[0] if entry else None
+    
+    def latest_timestamp(self) -> float:
+        """获取最新帧时间戳
+        
+        Returns:
+            float: 时间戳，尚无帧时返回0
+        """
+        entry = self.buffer.latest(copy=False)
+        return entry[1] if entry else 0
+    
+    def latest_frame_with_timestamp(self, copy: bool = True) -> Optional[Tuple[np.ndarray, float]]:
+        """获取最新帧及其时间戳
+        
+        Args:
+            copy: 是否复制帧数据
+        
+        Returns:
+            Optional[Tuple[np.ndarray, float]]: (帧, 时间戳)
+        """
+        entry = self.buffer.latest(copy)
+        return (entry[0], entry[1]) if entry else None
+    
+    def wait_for_frame(self, after_ts: float, timeout: float = 5.0,
+                       copy: bool = True) -> Optional[np.ndarray]:
+        """等待采集开始时间晚于 after_ts 的新帧
+        
+        帧时间戳取截图请求发出的时间，因此返回的帧一定反映 after_ts 之后的屏幕状态
+        
+        Args:
+            after_ts: 时间戳下限（time.time()）
+            timeout: 超时时间（秒）
+            copy: 是否复制帧数据
+        
+        Returns:
+            Optional[np.ndarray]: 新帧，超时返回None
+        """
+        entry = self.buffer.wait_for(after_ts, timeout, copy)
+        return entry[0] if entry else None
+    
+    def wait_for_frame_with_timestamp(self, after_ts: float, timeout: float = 5.0,
+                                      copy: bool = True) -> Optional[Tuple[np.ndarray, float]]:
+        """等待新帧并返回其时间戳
+        
+        Args:
+            after_ts: 时间戳下限（time.time()）
+            timeout: 超时时间（秒）
+            copy: 是否复制帧数据
+        
+        Returns:
+            Optional[Tuple[np.ndarray, float]]: (帧, 时间戳)，超时返回None
+        """
+        entry = self.buffer.wait_for(after_ts, timeout, copy)
+        return (entry[0], entry[1]) if entry else None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取采集统计
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        avg_capture_time = self.total_capture_time / self.frames_captured if self.frames_captured > 0 else 0
+        return {
+            "frames_captured": self.frames_captured,
+            "capture_errors": self.capture_errors,
+            "average_capture_time": avg_capture_time,
+            "fps": 1.0 / avg_capture_time if avg_capture_time > 0 else 0,
+            "latest_timestamp": self.latest_timestamp(),
+            "buffer_size": self.buffer.capacity
+        }
+    
+    def get_status(self) -> Dict[str, Any]:
+        """获取模块状态
+        
+        Returns:
+            Dict[str, Any]: 状态信息
+        """
+        status = super().get_status()
+        status.update({
+            'running': self.is_running,
+            'stats': self.get_stats()
+        })
+        return status
+    
+    def _capture_loop(self):
+        """采集线程循环"""
+        while self.is_running:
+            request_time = time.time()
+            try:
+                frame = self.u2_manager.take_frame()
+                if frame is None:
+                    self.capture_errors += 1
+                    self.stop_event.wait(0.1)
+                    continue
+                
+                self.buffer.write(frame, request_time)
+                self.frames_captured += 1
+                self.total_capture_time += time.time() - request_time
+            
+            except Exception as e:
+                self.capture_errors += 1
+                self.logger.error(f"帧流采集错误: {e}")
+                self.stop_event.wait(1)
+                continue
+            
+            if self.min_interval > 0:
+                remaining = self.min_interval - (time.time() - request_time)
+                if remaining > 0:
+                    self.stop_event.wait(remaining)
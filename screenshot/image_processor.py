@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片处理器
+负责截图帧的预处理、保存前编码和图片信息获取
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from utils.interfaces import BaseModule
+from utils.frame_utils import ImageLike, decode_image, encode_frame
+
+
+class ImageProcessor(BaseModule):
+    """图片处理器类"""
+    
+    def __init__(self, config_manager, logger):
+        """初始化图片处理器
+        
+        Args:
+            config_manager: 配置管理器实例
+            logger: 日志记录器实例
+        """
+        super().__init__(config_manager, logger)
+        self.config = self.config_manager.get('screenshot', {})
+        
+        # 压缩保存时的PNG压缩级别
+        self.optimize_compression = self.config.get('optimizeCompression', 9)
+    
+    def initialize(self) -> bool:
+        """初始化模块
+        
+        Returns:
+            bool: 初始化是否成功
+        """
+        self.is_initialized = True
+        self.start_time = time.time()
+        self.logger.info("图片处理器初始化成功")
+        return True
+    
+    def cleanup(self) -> bool:
+        """清理模块资源
+        
+        Returns:
+            bool: 清理是否成功
+        """
+        self.is_initialized = False
+        self.logger.info("图片处理器资源清理完成")
+        return True
+    
+    def preprocess_image(self, image_data: ImageLike) -> Optional[np.ndarray]:
+        """预处理图片
+        
+        统一转换为连续内存的3通道BGR帧
+        
+        Args:
+            image_data: 原始帧或编码后的图片数据
+        
+        Returns:
+            Optional[np.ndarray]: 预处理后的帧
+        """
+        try:
+            frame = decode_image(image_data)
+            if frame is None:
+                return None
+            
+            if frame.ndim == 2:
+                frame = np.repeat(frame[:, :, np.newaxis], 3, axis=2)
+            elif frame.shape[2] == 4:
+                frame = frame[:, :, :3]
+            
+            return np.ascontiguousarray(frame)
+        except Exception as e:
+            self.logger.error(f"图片预处理失败: {e}")
+            return None
+    
+    def optimize_image(self, image_data: ImageLike) -> Optional[bytes]:
+        """以高压缩率编码图片，用于落盘保存
+        
+        Args:
+            image_data: 原始帧或编码后的图片数据
+        
+        Returns:
+            Optional[bytes]: PNG格式图片数据
+        """
+        try:
+            frame = decode_image(image_data)
+            if frame is None:
+                return None
+            return encode_frame(frame, compression=self.optimize_compression)
+        except Exception as e:
+            self.logger.error(f"图片压缩失败: {e}")
+            return None
+    
+    def get_image_info(self, image_data: ImageLike) -> Optional[Dict[str, Any]]:
+        """获取图片信息
+        
+        Args:
+            image_data: 原始帧或编码后的图片数据
+        
+        Returns:
+            Optional[Dict[str, Any]]: 图片信息
+        """
+        try:
+            if isinstance(image_data, np.ndarray):
+                image_format = "RAW"
+            elif bytes(image_data[:4]) == b'\x89PNG':
+                image_format = "PNG"
+            else:
+                image_format = "ENCODED"
+            
+            frame = decode_image(image_data)
+            if frame is None:
+                return None
+            
+            return {
+                "width": frame.shape[1],
+                "height": frame.shape[0],
+                "channels": 1 if frame.ndim == 2 else frame.shape[2],
+                "format": image_format
+            }
+        except Exception as e:
+            self.logger.error(f"获取图片信息失败: {e}")
+            return None
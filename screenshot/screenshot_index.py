@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图文件索引模块
+使用 SQLite 记录截图文件的路径、时间、大小和所属任务，写入和删除时同步更新，
+最新N个、时间范围、按任务查询以及过期清理都走索引，不再扫描整个截图目录
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.interfaces import DatabaseInterface
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS screenshots (
+    path TEXT PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    task_id TEXT,
+    digest TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_screenshots_timestamp ON screenshots (timestamp);
+CREATE INDEX IF NOT EXISTS idx_screenshots_task ON screenshots (task_id, timestamp);
+"""
+
+# 索引文件名（位于截图根目录，所有写入方共用）
+INDEX_FILENAME = "screenshot_index.db"
+
+
+class ScreenshotIndex(DatabaseInterface):
+    """截图文件索引类"""
+    
+    def __init__(self, db_path: str):
+        """初始化截图文件索引
+        
+        Args:
+            db_path: 数据库文件路径，":memory:" 表示内存数据库
+        """
+        self.db_path = db_path
+        self.connection = None
+        self.lock = threading.RLock()
+    
+    def connect(self) -> bool:
+        """连接数据库并创建表结构
+        
+        Returns:
+            bool: 连接是否成功
+        """
+        with self.lock:
+            if self.connection is not None:
+                return True
+            if self.db_path != ":memory:":
+                db_dir = os.path.dirname(self.db_path)
+                if db_dir:
+                    os.makedirs(db_dir, exist_ok=True)
+            
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            self.connection.commit()
+            return True
+    
+    def disconnect(self) -> bool:
+        """断开数据库连接
+        
+        Returns:
+            bool: 断开是否成功
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            return True
+    
+    def query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        """执行查询
+        
+        Args:
+            sql: SQL语句
+            params: 参数
+        
+        Returns:
+            List[Dict[str, Any]]: 查询结果
+        """
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(sql, params).fetchall()]
+    
+    def execute(self, sql: str, params: Tuple = ()) -> bool:
+        """执行SQL语句
+        
+        Args:
+            sql: SQL语句
+            params: 参数
+        
+        Returns:
+            bool: 执行是否成功
+        """
+        with self.lock:
+            self.connection.execute(sql, params)
+            self.connection.commit()
+            return True
+    
+    def add(self, path: str, timestamp: Optional[float] = None, size: int = 0,
+            task_id: Optional[str] = None, digest: Optional[str] = None):
+        """登记截图文件（同一路径再次写入或被引用时更新为较新的时间，大小为0时保留原大小）
+        
+        Args:
+            path: 文件路径
+            timestamp: 写入时间，None表示当前时间
+            size: 文件大小
+            task_id: 所属任务ID
+            digest: 内容哈希
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO screenshots (path, timestamp, size, task_id, digest) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET timestamp = max(timestamp, excluded.timestamp), "
+                "size = max(size, excluded.size), task_id = coalesce(excluded.task_id, task_id), "
+                "digest = coalesce(excluded.digest, digest)",
+                (path, timestamp, size, task_id, digest)
+            )
+            self.connection.commit()
+    
+    def remove(self, path: str) -> bool:
+        """移除截图文件记录
+        
+        Args:
+            path: 文件路径
+        
+        Returns:
+            bool: 记录是否存在
+        """
+        with self.lock:
+            cursor = self.connection.execute("DELETE FROM screenshots WHERE path = ?", (path,))
+            self.connection.commit()
+            return cursor.rowcount > 0
+    
+    def latest(self, limit: int = 100, task_id: Optional[str] = None,
+               start_time: Optional[float] = None, end_time: Optional[float] = None) -> List[Dict[str, Any]]:
+        """按时间倒序查询截图文件
+        
+        Args:
+            limit: 数量限制
+            task_id: 任务ID过滤
+            start_time: 开始时间
+            end_time: 结束时间
+        
+        Returns:
+            List[Dict[str, Any]]: 截图文件记录列表
+        """
+        conditions = []
+        params = []
+        if task_id:
+            conditions.append("task_id = ?")
+            params.append(task_id)
+        if start_time:
+            conditions.append("timestamp >= ?")
+            params.append(start_time)
+        if end_time:
+            conditions.append("timestamp <= ?")
+            params.append(end_time)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.query(
+            f"SELECT path, timestamp, size, task_id, digest FROM screenshots {where} "
+            f"ORDER BY timestamp DESC LIMIT ?",
+            tuple(params) + (limit,)
+        )
+    
+    def delete_before(self, cutoff_time: float) -> List[str]:
+        """移除早于指定时间的记录
+        
+        Args:
+            cutoff_time: 截止时间
+        
+        Returns:
+            List[str]: 被移除记录的文件路径（由调用方删除文件）
+        """
+        with self.lock:
+            paths = [row[0] for row in self.connection.execute(
+                "SELECT path FROM screenshots WHERE timestamp < ?", (cutoff_time,)
+            ).fetchall()]
+            self.connection.execute("DELETE FROM screenshots WHERE timestamp < ?", (cutoff_time,))
+            self.connection.commit()
+            return paths
+    
+    def count(self) -> int:
+        """获取记录总数
+        
+        Returns:
+            int: 记录数量
+        """
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM screenshots").fetchone()[0]
+    
+    def add_existing(self, paths: List[str]) -> int:
+        """登记已存在的文件（时间取文件修改时间）
+        
+        只收录调用方确认由本程序写入的文件（如内容存储清单中的文件），不扫描目录，
+        以免把目录中的其他图片纳入过期清理
+        
+        Args:
+            paths: 文件路径列表
+        
+        Returns:
+            int: 收录的文件数量
+        """
+        rows = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            rows.append((path, stat.st_mtime, stat.st_size))
+        
+        with self.lock:
+            self.connection.executemany("INSERT OR IGNORE INTO screenshots (path, timestamp, size) VALUES (?, ?, ?)",
+                                        rows)
+            self.connection.commit()
+        return len(rows)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图管理器
+基于UIAutomator2管理器获取屏幕原始帧，负责区域裁剪、最新截图缓存和截图保存
+"""
+
+import os
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.interfaces import BaseModule, ScreenshotInterface
+from utils.frame_utils import crop_frame, encode_frame, write_frame
+
+
+class ScreenshotManager(BaseModule, ScreenshotInterface):
+    """截图管理器类"""
+    
+    def __init__(self, config_manager, logger, uiautomator2_manager):
+        """初始化截图管理器
+        
+        Args:
+            config_manager: 配置管理器实例
+            logger: 日志记录器实例
+            uiautomator2_manager: UIAutomator2管理器实例
+        """
+        super().__init__(config_manager, logger)
+        self.u2_manager = uiautomator2_manager
+        self.config = self.config_manager.get('screenshot', {})
+        
+        # 最新一帧缓存
+        self.latest_frame = None
+        self.latest_frame_time = 0
+        self.frame_lock = threading.Lock()
+    
+    def initialize(self) -> bool:
+        """初始化模块
+        
+        Returns:
+            bool: 初始化是否成功
+        """
+        try:
+            if not self.u2_manager or not self.u2_manager.is_connected:
+                self.logger.error("截图管理器初始化失败：设备未连接")
+                return False
+            
+            self.is_initialized = True
+            self.start_time = time.time()
+            self.logger.info("截图管理器初始化成功")
+            return True
+        except Exception as e:
+            self.logger.error(f"截图管理器初始化失败：{str(e)}")
+            return False
+    
+    def cleanup(self) -> bool:
+        """清理模块资源
+        
+        Returns:
+            bool: 清理是否成功
+        """
+        with self.frame_lock:
+            self.latest_frame = None
+            self.latest_frame_time = 0
+        self.is_initialized = False
+        self.logger.info("截图管理器资源清理完成")
+        return True
+    
+    def capture_frame(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """截取屏幕原始帧
+        
+        Args:
+            region: 截图区域 (x, y, width, height)，None表示全屏
+        
+        Returns:
+            Optional[np.ndarray]: BGR帧
+        """
+        try:
+            frame = self.u2_manager.take_frame()
+            if frame is None:
+                return None
+            
+            with self.frame_lock:
+                self.latest_frame = frame
+                self.latest_frame_time = time.time()
+            
+            return crop_frame(frame, region)
+        except Exception as e:
+            self.logger.error(f"截取屏幕帧失败：{str(e)}")
+            return None
+    
+    def capture_screen(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[bytes]:
+        """截取屏幕并编码为PNG
+        
+        Args:
+            region: 截图区域 (x, y, width, height)，None表示全屏
+        
+        Returns:
+            Optional[bytes]: PNG格式截图数据
+        """
+        frame = self.capture_frame(region)
+        if frame is None:
+            return None
+        return encode_frame(frame)
+    
+    def save_screenshot(self, image_data: Union[bytes, np.ndarray], path: str) -> bool:
+        """保存截图
+        
+        Args:
+            image_data: 已编码的图像数据或原始帧
+            path: 保存路径
+        
+        Returns:
+            bool: 保存是否成功
+        """
+        try:
+            if isinstance(image_data, np.ndarray):
+                return write_frame(image_data, path)
+            
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(image_data)
+            return True
+        except Exception as e:
+            self.logger.error(f"保存截图失败：{path}，错误：{str(e)}")
+            return False
+    
+    def get_latest_frame(self) -> Optional[np.ndarray]:
+        """获取最新一帧
+        
+        Returns:
+            Optional[np.ndarray]: BGR帧
+        """
+        with self.frame_lock:
+            return self.latest_frame
+    
+    def get_latest_screenshot(self) -> Optional[bytes]:
+        """获取最新截图
+        
+        Returns:
+            Optional[bytes]: PNG格式截图数据
+        """
+        frame = self.get_latest_frame()
+        if frame is None:
+            return None
+        return encode_frame(frame)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """获取模块状态
+        
+        Returns:
+            Dict[str, Any]: 状态信息
+        """
+        status = super().get_status()
+        status.update({
+            'latest_frame_time': self.latest_frame_time
+        })
+        return status
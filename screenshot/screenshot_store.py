@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容寻址截图存储模块
+按原始帧内容的哈希保存截图，相同内容只写入一次；可选的感知哈希（dHash）把
+几乎相同的画面也指向已有文件。逻辑文件名与时间戳记录在只追加的清单文件中，
+内存中只保留最近的条目，清单超过上限的两倍时按保留的条目重写
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from utils.frame_utils import encode_frame
+from utils.tracing import traced
+
+# 编码数据的文件头与扩展名
+BLOB_EXTENSIONS = (
+    (b'\x89PNG', '.png'),
+    (b'\xff\xd8', '.jpg'),
+)
+
+
+@dataclass
+class StoredScreenshot:
+    """清单条目数据类"""
+    name: str
+    timestamp: float
+    digest: str
+    path: str
+    size: int
+    deduplicated: bool = False
+    near_duplicate: bool = False
+    phash: Optional[str] = None
+
+
+class ScreenshotStore:
+    """内容寻址截图存储类"""
+    
+    def __init__(self, root_dir: str, near_duplicate_distance: int = 0, writer=None, logger=None,
+                 max_entries: int = 10000, index=None):
+        """初始化截图存储
+        
+        Args:
+            root_dir: 存储根目录，文件保存在 blobs/ 子目录，清单为 manifest.jsonl
+            near_duplicate_distance: 感知哈希的最大汉明距离，0表示只合并完全相同的帧
+            writer: 可选的 AsyncFileWriter，存在时文件和清单交给它异步写入
+            logger: 日志记录器实例
+            max_entries: 内存与清单中保留的最近条目数
+            index: 可选的 ScreenshotIndex，文件写入成功（或再次被引用）后登记，过期清理按索引进行
+        """
+        self.root_dir = root_dir
+        self.blob_dir = os.path.join(root_dir, "blobs")
+        self.manifest_path = os.path.join(root_dir, "manifest.jsonl")
+        self.near_duplicate_distance = near_duplicate_distance
+        self.writer = writer
+        self.logger = logger
+        self.max_entries = max(1, max_entries)
+        self.index = index
+        self.lock = threading.RLock()
+        
+        # 索引：内容哈希 -> 文件路径（写入成功后登记），写入中的内容，逻辑名 -> 最新条目，感知哈希（并行数组）
+        self.blobs = {}
+        self.pending_blobs = {}
+        self.completed = deque()
+        self.latest = {}
+        self.entries = deque()
+        self.phashes = np.zeros(0, dtype=np.uint64)
+        self.phash_digests = []
+        self.manifest_lines = 0
+        
+        # 统计（随条目增减维护，不再遍历条目）
+        self.bytes_written = 0
+        self.bytes_saved = 0
+        self.deduplicated_count = 0
+        self.near_duplicate_count = 0
+        
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._load_manifest()
+    
+    def put_frame(self, frame: np.ndarray, name: str, timestamp: Optional[float] = None) -> Optional[StoredScreenshot]:
+        """保存原始帧（内容已存在时只追加清单条目）
+        
+        Args:
+            frame: OpenCV格式图像帧
+            name: 逻辑文件名
+            timestamp: 截图时间，None表示当前时间
+        
+        Returns:
+            Optional[StoredScreenshot]: 清单条目，失败返回None
+        """
+        frame = np.ascontiguousarray(frame)
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"{frame.shape}{frame.dtype}".encode("ascii"))
+        hasher.update(frame.data)
+        digest = hasher.hexdigest()
+        phash = self.perceptual_hash(frame) if self.near_duplicate_distance > 0 else None
+        
+        return self._put(digest, name, timestamp, lambda: encode_frame(frame), '.png', phash, frame.nbytes)
+    
+    def put_bytes(self, data: bytes, name: str, timestamp: Optional[float] = None) -> Optional[StoredScreenshot]:
+        """保存已编码的图像数据（按字节内容去重）
+        
+        Args:
+            data: 图像数据
+            name: 逻辑文件名
+            timestamp: 截图时间，None表示当前时间
+        
+        Returns:
+            Optional[StoredScreenshot]: 清单条目，失败返回None
+        """
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        extension = next((ext for magic, ext in BLOB_EXTENSIONS if data.startswith(magic)), '.bin')
+        return self._put(digest, name, timestamp, lambda: data, extension, None, len(data))
+    
+    def resolve(self, name: str) -> Optional[str]:
+        """获取逻辑文件名对应的文件路径
+        
+        Args:
+            name: 逻辑文件名
+        
+        Returns:
+            Optional[str]: 最新一次保存对应的文件路径
+        """
+        with self.lock:
+            entry = self.latest.get(name)
+            return entry.path if entry else None
+    
+    def get_entries(self, limit: int = 100, name_prefix: Optional[str] = None) -> List[StoredScreenshot]:
+        """获取最近的清单条目（按时间倒序）
+        
+        Args:
+            limit: 条目数量限制
+            name_prefix: 逻辑文件名前缀过滤
+        
+        Returns:
+            List[StoredScreenshot]: 清单条目列表
+        """
+        with self.lock:
+            entries = [entry for entry in reversed(self.entries)
+                       if name_prefix is None or entry.name.startswith(name_prefix)]
+        return sorted(entries, key=lambda entry: entry.timestamp, reverse=True)[:limit]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        with self.lock:
+            self._apply_completed()
+            return {
+                "entries": len(self.entries),
+                "unique_blobs": len(self.blobs),
+                "deduplicated": self.deduplicated_count,
+                "near_duplicates": self.near_duplicate_count,
+                "bytes_written": self.bytes_written,
+                "bytes_saved": self.bytes_saved
+            }
+    
+    def get_blob_paths(self) -> List[str]:
+        """获取已写入的内容文件路径
+        
+        Returns:
+            List[str]: 文件路径列表
+        """
+        with self.lock:
+            self._apply_completed()
+            return list(self.blobs.values())
+    
+    def discard(self, paths: List[str]) -> int:
+        """文件已被删除时移出去重索引，之后相同内容会重新写入
+        
+        Args:
+            paths: 已删除的文件路径
+        
+        Returns:
+            int: 移出的内容数量
+        """
+        paths = set(paths)
+        with self.lock:
+            self._apply_completed()
+            digests = [digest for digest, path in self.blobs.items() if path in paths]
+            self._forget(digests)
+            return len(digests)
+    
+    @staticmethod
+    def perceptual_hash(frame: np.ndarray) -> int:
+        """计算64位差值哈希（dHash）
+        
+        Args:
+            frame: OpenCV格式图像帧
+        
+        Returns:
+            int: 感知哈希
+        """
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return int(np.packbits(bits).view('>u8')[0])
+    
+    def _put(self, digest: str, name: str, timestamp: Optional[float], encode, extension: str,
+             phash: Optional[int], raw_size: int) -> Optional[StoredScreenshot]:
+        """写入文件（内容不存在时）并追加清单条目，编码在锁外进行"""
+        try:
+            timestamp = timestamp if timestamp is not None else time.time()
+            with self.lock:
+                path, digest, near_duplicate = self._lookup(digest, phash)
+            data = encode() if path is None else None
+            
+            with self.lock:
+                # 编码期间其他线程可能已写入相同内容
+                if path is None:
+                    path, digest, near_duplicate = self._lookup(digest, phash)
+                deduplicated = path is not None
+                if deduplicated:
+                    size = 0
+                    self.bytes_saved += raw_size
+                    # 与写入中的内容相同时，以该文件的写入结果为准
+                    blob_future = self.pending_blobs[digest][1] if digest in self.pending_blobs else None
+                else:
+                    path = os.path.join(self.blob_dir, digest[:2], digest + extension)
+                    blob_future = self._write(path, data)
+                    size = len(data)
+                    self.bytes_written += size
+                    # 写入成功后才登记到去重索引，失败时撤销，之后相同的画面会重新写入
+                    self.pending_blobs[digest] = (path, blob_future, phash)
+                    blob_future.add_done_callback(
+                        lambda future, digest=digest: self.completed.append((digest, future))
+                    )
+                
+                entry = StoredScreenshot(name, timestamp, digest, path, size, deduplicated, near_duplicate,
+                                         f"{phash:016x}" if phash is not None else None)
+                manifest_future = self._write(self.manifest_path, json.dumps(asdict(entry), ensure_ascii=False) + "\n",
+                                              append=True)
+                self.manifest_lines += 1
+                # 写入完成的 Future（新内容为文件写入，重复内容为清单写入），不写入清单
+                entry.future = blob_future or manifest_future
+                self._add_entry(entry)
+                if self.index is not None:
+                    entry.future.add_done_callback(lambda future, entry=entry: self._index_entry(future, entry))
+                if self.manifest_lines >= 2 * self.max_entries:
+                    self._compact_manifest()
+                return entry
+        
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"保存截图到内容存储失败: {e}")
+            return None
+    
+    def _lookup(self, digest: str, phash: Optional[int]):
+        """查找相同或相似的已有内容（含写入中的内容），返回 (路径, 内容哈希, 是否相似)"""
+        self._apply_completed()
+        path = self._existing_blob(digest)
+        if path is None and digest in self.pending_blobs:
+            path = self.pending_blobs[digest][0]
+        if path is None and phash is not None:
+            similar = self._find_similar(phash)
+            if similar is not None and self._existing_blob(similar) is not None:
+                return self.blobs[similar], similar, True
+        return path, digest, False
+    
+    def _existing_blob(self, digest: str) -> Optional[str]:
+        """已登记内容的文件路径（需持有锁）；文件已被过期清理删除时移出去重索引"""
+        path = self.blobs.get(digest)
+        if path is not None and not os.path.exists(path):
+            self._forget([digest])
+            return None
+        return path
+    
+    def _forget(self, digests: List[str]):
+        """移出去重索引（需持有锁）"""
+        for digest in digests:
+            del self.blobs[digest]
+        if digests and self.phash_digests:
+            keep = [index for index, digest in enumerate(self.phash_digests) if digest in self.blobs]
+            self.phashes = self.phashes[keep]
+            self.phash_digests = [self.phash_digests[index] for index in keep]
+    
+    def _index_entry(self, future: Future, entry: StoredScreenshot):
+        """写入成功后把文件登记到截图索引（重复内容更新为最近一次引用的时间）"""
+        try:
+            if not future.cancelled() and future.exception() is None:
+                self.index.add(entry.path, entry.timestamp, entry.size, digest=entry.digest)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"登记截图索引失败: {e}")
+    
+    @traced("storage.screenshot_write", "storage", record_args=("path", "append"))
+    def _write(self, path: str, data, append: bool = False) -> Future:
+        """写入文件：有异步写入器时提交请求，否则同步写入（覆盖写入先写临时文件再重命名）"""
+        if self.writer is not None:
+            return self.writer.write(path, data, append=append)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        target = path if append else path + ".tmp"
+        with open(target, 'ab' if append else 'wb') as f:
+            f.write(data)
+        if not append:
+            os.replace(target, path)
+        future = Future()
+        future.set_result(path)
+        return future
+    
+    def _find_similar(self, phash: int) -> Optional[str]:
+        """查找汉明距离在阈值内的已有内容"""
+        if len(self.phashes) == 0:
+            return None
+        distances = np.unpackbits((self.phashes ^ np.uint64(phash)).view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+        best = int(np.argmin(distances))
+        return self.phash_digests[best] if distances[best] <= self.near_duplicate_distance else None
+    
+    def _apply_completed(self):
+        """处理已完成的内容写入（需持有锁）：成功的登记到去重索引，失败的撤销"""
+        while self.completed:
+            digest, future = self.completed.popleft()
+            pending = self.pending_blobs.pop(digest, None)
+            if pending is None:
+                continue
+            path, _, phash = pending
+            if future.cancelled() or future.exception() is not None:
+                if self.logger:
+                    self.logger.error(f"截图内容写入失败，不再用于去重: {path}")
+                continue
+            self.blobs[digest] = path
+            if phash is not None:
+                self._add_phash(phash, digest)
+    
+    def _add_entry(self, entry: StoredScreenshot):
+        """追加清单条目并淘汰超出上限的最早条目（需持有锁）"""
+        self.entries.append(entry)
+        self.latest[entry.name] = entry
+        self.deduplicated_count += entry.deduplicated
+        self.near_duplicate_count += entry.near_duplicate
+        while len(self.entries) > self.max_entries:
+            oldest = self.entries.popleft()
+            if self.latest.get(oldest.name) is oldest:
+                del self.latest[oldest.name]
+            self.deduplicated_count -= oldest.deduplicated
+            self.near_duplicate_count -= oldest.near_duplicate
+    
+    def _compact_manifest(self):
+        """按内存中保留的条目重写清单（需持有锁；与追加写入走同一写入队列，顺序不变）"""
+        lines = [json.dumps(asdict(entry), ensure_ascii=False) + "\n" for entry in self.entries]
+        self._write(self.manifest_path, "".join(lines))
+        self.manifest_lines = len(lines)
+    
+    def _add_phash(self, phash: int, digest: str):
+        """登记感知哈希"""
+        self.phashes = np.append(self.phashes, np.uint64(phash))
+        self.phash_digests.append(digest)
+    
+    def _load_manifest(self):
+        """从清单文件重建索引（只保留最近的条目，文件已被删除的内容不再参与去重）"""
+        if not os.path.exists(self.manifest_path):
+            return
+        
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                self.manifest_lines += 1
+                try:
+                    entry = StoredScreenshot(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue
+                
+                self._add_entry(entry)
+                if entry.digest not in self.blobs and os.path.exists(entry.path):
+                    self.blobs[entry.digest] = entry.path
+                    if entry.phash and not entry.near_duplicate:
+                        self._add_phash(int(entry.phash, 16), entry.digest)
+        
+        # 上次运行留下的清单过长时立即重写，下次启动只读取保留的条目
+        if self.manifest_lines > self.max_entries:
+            self._compact_manifest()
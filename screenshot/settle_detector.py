@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+画面稳定检测模块
+比较连续帧（或指定区域）的缩略图差异，画面先发生变化、随后连续N帧不再变化时立即返回，
+用于替代操作后的固定等待时间
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.frame_utils import crop_frame, to_grayscale
+
+
+@dataclass
+class SettleResult:
+    """稳定检测结果数据类"""
+    stable: bool
+    elapsed: float
+    frames: int
+    last_diff: float
+    changed: bool
+
+
+class ScreenSettleDetector:
+    """画面稳定检测器类"""
+    
+    def __init__(self, frame_source: Callable[[], Optional[np.ndarray]],
+                 threshold: float = 2.0, stable_frames: int = 3, downscale: int = 8,
+                 poll_interval: float = 0.05, min_wait: float = 0.2,
+                 change_timeout: float = 1.0):
+        """初始化画面稳定检测器
+        
+        Args:
+            frame_source: 帧来源，每次调用返回一帧新画面
+            threshold: 判定为稳定的平均像素差阈值（0-255）
+            stable_frames: 需要连续低于阈值的帧差次数
+            downscale: 比较前的缩小倍数
+            poll_interval: 两次取帧的最小间隔（秒）
+            min_wait: 开始检测前的最短等待（秒），给界面响应操作留出时间
+            change_timeout: 等待画面开始变化的最长时间（秒），超时后画面未变化也按普通稳定检测处理
+        """
+        self.frame_source = frame_source
+        self.threshold = threshold
+        self.stable_frames = max(1, stable_frames)
+        self.downscale = max(1, downscale)
+        self.poll_interval = poll_interval
+        self.min_wait = min_wait
+        self.change_timeout = change_timeout
+    
+    @classmethod
+    def from_config(cls, frame_source: Callable[[], Optional[np.ndarray]], config: dict) -> "ScreenSettleDetector":
+        """根据配置创建检测器
+        
+        Args:
+            frame_source: 帧来源
+            config: settle配置字典
+        
+        Returns:
+            ScreenSettleDetector: 检测器实例
+        """
+        return cls(
+            frame_source,
+            threshold=config.get('threshold', 2.0),
+            stable_frames=config.get('stableFrames', 3),
+            downscale=config.get('downscale', 8),
+            poll_interval=config.get('pollInterval', 0.05),
+            min_wait=config.get('minWait', 0.2),
+            change_timeout=config.get('changeTimeout', 1.0)
+        )
+    
+    def signature(self, frame: np.ndarray, roi: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """计算帧的缩略灰度签名
+        
+        Args:
+            frame: 原始帧
+            roi: 关注区域 (x, y, width, height)，None表示全屏
+        
+        Returns:
+            np.ndarray: int16缩略灰度图
+        """
+        gray = to_grayscale(crop_frame(frame, roi))
+        height, width = gray.shape[:2]
+        size = (max(1, width // self.downscale), max(1, height // self.downscale))
+        small = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return small.astype(np.int16)
+    
+    @staticmethod
+    def difference(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+        """计算两个签名的平均绝对差
+        
+        Args:
+            signature_a: 签名A
+            signature_b: 签名B
+        
+        Returns:
+            float: 平均像素差，尺寸不一致时返回无穷大
+        """
+        if signature_a.shape != signature_b.shape:
+            return float('inf')
+        return float(np.mean(np.abs(signature_a - signature_b)))
+    
+    def wait_until_stable(self, timeout: float, roi: Optional[Tuple[int, int, int, int]] = None,
+                          reference: Optional[np.ndarray] = None) -> SettleResult:
+        """等待画面稳定
+        
+        Args:
+            timeout: 最长等待时间（秒），即原固定等待时间的上限
+            roi: 关注区域 (x, y, width, height)，None表示全屏
+            reference: 操作前的参考帧，None时以检测到的第一帧为基准。画面相对基准发生变化后
+                       才接受稳定结果，避免操作尚未生效时把操作前的静止画面当作已稳定；
+                       若 change_timeout 内没有变化则按普通稳定检测处理
+        
+        Returns:
+            SettleResult: 检测结果
+        """
+        start = time.time()
+        deadline = start + timeout
+        
+        if self.min_wait > 0:
+            time.sleep(min(self.min_wait, timeout))
+        
+        reference_signature = self.signature(reference, roi) if reference is not None else None
+        changed = False
+        previous = None
+        stable_count = 0
+        frames = 0
+        last_diff = float('inf')
+        
+        while True:
+            poll_start = time.time()
+            if poll_start >= deadline:
+                break
+            
+            frame = self.frame_source()
+            if frame is not None:
+                frames += 1
+                current = self.signature(frame, roi)
+                if reference_signature is None:
+                    reference_signature = current
+                
+                if not changed:
+                    changed = (self.difference(current, reference_signature) > self.threshold
+                               or poll_start - start >= self.change_timeout)
+                
+                if previous is not None:
+                    last_diff = self.difference(current, previous)
+                    stable_count = stable_count + 1 if last_diff <= self.threshold else 0
+                    if changed and stable_count >= self.stable_frames:
+                        return SettleResult(True, time.time() - start, frames, last_diff, changed)
+                previous = current
+            
+            remaining = self.poll_interval - (time.time() - poll_start)
+            if remaining > 0:
+                time.sleep(min(remaining, max(0, deadline - time.time())))
+        
+        return SettleResult(False, time.time() - start, frames, last_diff, changed)
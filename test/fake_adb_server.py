@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟ADB服务端
+实现ADB服务端协议的一个子集（host:version、host:devices、host:transport、shell:），
+shell命令交给本机 sh 执行（预先定义模拟的 getprop、wm 命令），供离线测试设备通信使用
+"""
+
+import shlex
+import shutil
+import socket
+import socketserver
+import subprocess
+import threading
+
+
+# 默认模拟的系统属性
+DEFAULT_PROPS = {
+    "ro.product.model": "MuMu",
+    "ro.product.manufacturer": "Netease",
+    "ro.build.version.release": "12",
+    "ro.build.version.sdk": "32"
+}
+
+
+class _AdbRequestHandler(socketserver.BaseRequestHandler):
+    """处理单个客户端连接"""
+    
+    def handle(self):
+        server = self.server
+        sock = self.request
+        with server.lock:
+            server.connections += 1
+        
+        while True:
+            request = self._read_request(sock)
+            if request is None:
+                return
+            with server.lock:
+                server.requests.append(request)
+            
+            if request == "host:version":
+                self._okay(sock, "%04x" % server.version)
+                return
+            if request == "host:devices":
+                self._okay(sock, "".join(f"{serial}\tdevice\n" for serial in server.serials))
+                return
+            if request.startswith("host:transport"):
+                serial = request[len("host:transport:"):] if request.startswith("host:transport:") else None
+                if serial is not None and serial not in server.serials:
+                    self._fail(sock, f"device '{serial}' not found")
+                    return
+                sock.sendall(b"OKAY")
+                continue
+            if request.startswith("shell:"):
+                sock.sendall(b"OKAY")
+                self._run_shell(sock, request[len("shell:"):])
+                return
+            
+            self._fail(sock, f"unknown request: {request}")
+            return
+    
+    @staticmethod
+    def _read_request(sock):
+        header = sock.recv(4)
+        if len(header) < 4:
+            return None
+        length = int(header, 16)
+        data = b""
+        while len(data) < length:
+            chunk = sock.recv(length - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data.decode("utf-8")
+    
+    @staticmethod
+    def _okay(sock, message):
+        payload = message.encode("utf-8")
+        sock.sendall(b"OKAY" + b"%04x" % len(payload) + payload)
+    
+    @staticmethod
+    def _fail(sock, message):
+        payload = message.encode("utf-8")
+        sock.sendall(b"FAIL" + b"%04x" % len(payload) + payload)
+    
+    def _run_shell(self, sock, command):
+        """执行shell请求：sh 为持久会话，其余为一次性命令"""
+        if command in ("", "sh"):
+            process = subprocess.Popen([self.server.shell_path], stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            process.stdin.write(self.server.prelude().encode("utf-8"))
+            process.stdin.flush()
+            
+            def forward_input():
+                try:
+                    while True:
+                        chunk = sock.recv(65536)
+                        if not chunk:
+                            break
+                        process.stdin.write(chunk)
+                        process.stdin.flush()
+                except OSError:
+                    pass
+                finally:
+                    try:
+                        process.stdin.close()
+                    except OSError:
+                        pass
+            
+            input_thread = threading.Thread(target=forward_input, daemon=True)
+            input_thread.start()
+            try:
+                while True:
+                    chunk = process.stdout.read1(65536)
+                    if not chunk:
+                        break
+                    sock.sendall(chunk)
+            except OSError:
+                pass
+            process.wait()
+        else:
+            result = subprocess.run([self.server.shell_path, "-c", self.server.prelude() + command],
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            sock.sendall(result.stdout)
+        
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """模拟ADB服务端"""
+    
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self, serials=("fake-device",), version: int = 41, props=None,
+                 screen_size: str = "720x1280", density: int = 320):
+        """初始化模拟服务端（监听本机随机端口）
+        
+        Args:
+            serials: 已连接的设备序列号
+            version: 服务端协议版本
+            props: 模拟的系统属性，None使用默认属性
+            screen_size: wm size 返回的屏幕尺寸
+            density: wm density 返回的屏幕密度
+        """
+        super().__init__(("127.0.0.1", 0), _AdbRequestHandler)
+        self.serials = list(serials)
+        self.version = version
+        self.props = dict(DEFAULT_PROPS if props is None else props)
+        self.screen_size = screen_size
+        self.density = density
+        self.shell_path = shutil.which("sh") or "/bin/sh"
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+        self.thread = None
+    
+    def prelude(self) -> str:
+        """生成定义模拟 getprop、wm 命令的shell函数"""
+        dump = "".join(f"[{key}]: [{value}]\n" for key, value in self.props.items())
+        cases = "".join(f"    {shlex.quote(key)}) printf '%s\\n' {shlex.quote(value)};;\n"
+                        for key, value in self.props.items())
+        return (
+            "getprop() {\n"
+            f"  if [ $# -eq 0 ]; then printf '%s' {shlex.quote(dump)}; return 0; fi\n"
+            "  case \"$1\" in\n"
+            f"{cases}"
+            "    *) echo;;\n"
+            "  esac\n"
+            "}\n"
+            "wm() {\n"
+            "  case \"$1\" in\n"
+            f"    size) echo 'Physical size: {self.screen_size}';;\n"
+            f"    density) echo 'Physical density: {self.density}';;\n"
+            "    *) return 1;;\n"
+            "  esac\n"
+            "}\n"
+        )
+    
+    @property
+    def port(self) -> int:
+        """监听端口"""
+        return self.server_address[1]
+    
+    def start(self):
+        """在后台线程中启动服务"""
+        self.thread = threading.Thread(target=self.serve_forever, name="FakeAdbServer", daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """停止服务"""
+        self.shutdown()
+        self.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
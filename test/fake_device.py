@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟设备
+使用 data/screenshots/ 中录制的截图模拟 uiautomator2 设备，供离线测试和性能测试使用
+"""
+
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from utils.frame_utils import encode_frame
+from utils.uiautomator2_manager import UIAutomator2Manager
+
+# 录制截图目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCREENSHOT_DIR = os.path.join(PROJECT_ROOT, "data", "screenshots")
+
+
+def make_list_content(rows: int = 20, row_height: int = 180, width: int = 680, separator: int = 8, seed: int = 0):
+    """生成行高固定的列表长图：每行为随机纹理，行之间是纯色分隔带
+    
+    Args:
+        rows: 行数
+        row_height: 行高（含分隔带）
+        width: 宽度
+        separator: 分隔带高度
+        seed: 随机种子
+    
+    Returns:
+        np.ndarray: BGR长图
+    """
+    rng = np.random.default_rng(seed)
+    content = rng.integers(0, 256, (rows * row_height, width // 8, 3), dtype=np.uint8)
+    content = cv2.resize(content, (width, rows * row_height), interpolation=cv2.INTER_NEAREST)
+    for index in range(rows):
+        content[index * row_height:index * row_height + separator] = 30
+    return content
+
+
+# 默认场景：主界面点击市场按钮进入报价界面，报价界面的列表由三张录制截图拼成，点击关闭按钮返回主界面
+# （没有录制报价按钮、显示全部报价之后的中间界面，这两次点击停留在报价界面）
+DEFAULT_SCREENS = {
+    "home": {
+        "image": "20251122_000009_full.png",
+        "taps": [{"roi": [306, 1144, 120, 120], "to": "quotes"}]
+    },
+    "quotes": {
+        "image": "before_scroll_800_20251122_015204.png",
+        "taps": [{"roi": [650, 295, 70, 70], "to": "home"}],
+        "list": {
+            "viewport": [20, 490, 680, 720],
+            "images": ["before_scroll_800_20251122_015204.png", "after_scroll_800_test_20251122_015212.png",
+                       "after_scroll_800_test_20251122_014326.png"]
+        }
+    }
+}
+
+
+class FakeU2Device:
+    """模拟 uiautomator2 设备：以录制截图为画面的界面状态机
+    
+    每个界面由一张录制截图、若干点击区域（点击后切换到目标界面）和可选的可滚动列表组成，
+    screenshot/click/swipe 等操作按配置的延迟和抖动耗时，抖动由随机种子决定，多次运行结果一致
+    """
+    
+    def __init__(self, screens=None, initial: str = "home", screenshot_dir: str = SCREENSHOT_DIR,
+                 latency=0.0, jitter: float = 0.0, seed: int = 0, transition_delay: float = 0.0,
+                 inertia: float = 1.0, serial: str = "fake-u2-device", package: str = "com.fake.market",
+                 content=None):
+        """初始化模拟设备
+        
+        Args:
+            screens: 界面定义 {名称: {"image", "taps": [{"roi", "to"}], "list": {"viewport", "images"|"content"}}}，
+                None时使用 DEFAULT_SCREENS
+            initial: 初始界面
+            screenshot_dir: 录制截图目录
+            latency: 操作延迟（秒），数值表示所有操作相同，字典按操作名（screenshot、click、swipe、
+                dump_hierarchy、app_current）分别指定
+            jitter: 每次操作额外延迟的上限（秒），在 [0, jitter] 内均匀分布
+            seed: 抖动的随机种子
+            transition_delay: 点击后界面切换的动画时间（秒），期间截图仍为原界面
+            inertia: 列表实际滚动距离与滑动距离之比
+            serial: 设备序列号
+            package: 模拟的应用包名
+            content: 报价界面列表的长图（宽度与可视区域相同），替换 DEFAULT_SCREENS 中由录制截图拼成的列表，
+                screens 给出时忽略
+        """
+        if screens is None:
+            screens = DEFAULT_SCREENS
+            if content is not None:
+                quotes = DEFAULT_SCREENS["quotes"]
+                screens = dict(screens, quotes=dict(quotes, list=dict(quotes["list"], content=content)))
+        
+        self.screens = {}
+        for name, definition in screens.items():
+            image = definition.get("frame")
+            if image is None:
+                image = cv2.imread(os.path.join(screenshot_dir, definition["image"]))
+            if image is None:
+                raise FileNotFoundError(f"没有找到录制截图: {definition.get('image')}")
+            screen = {"frame": image, "taps": definition.get("taps", []), "list": None}
+            if definition.get("list"):
+                screen["list"] = self._load_list(definition["list"], image, screenshot_dir)
+            self.screens[name] = screen
+        
+        self.initial = initial
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.transition_delay = transition_delay
+        self.inertia = inertia
+        self.serial = serial
+        self.package = package
+        self.lock = threading.Lock()
+        self.reset()
+    
+    @staticmethod
+    def _load_list(definition, background, screenshot_dir):
+        """加载界面中的可滚动列表（content 直接给出长图，images 取各录制截图的可视区域拼接）"""
+        x, y, width, height = definition["viewport"]
+        content = definition.get("content")
+        if content is None:
+            frames = [cv2.imread(os.path.join(screenshot_dir, name)) for name in definition["images"]]
+            content = np.vstack([frame[y:y + height, x:x + width] for frame in frames])
+        if content.shape[0] < height:
+            raise ValueError("列表长图高度不能小于可视区域高度")
+        return {"viewport": (x, y, width, height), "content": content, "background": background}
+    
+    def reset(self):
+        """回到初始界面，清空滚动位置和操作记录"""
+        with self.lock:
+            self.screen = self.initial
+            self.pending = None
+            self.positions = {name: 0 for name in self.screens}
+            self.actions = []
+            self.screenshot_count = 0
+            self.busy_time = 0.0
+    
+    @property
+    def info(self):
+        """设备信息（字段与 uiautomator2 的 device.info 相同）"""
+        height, width = self.screens[self.initial]["frame"].shape[:2]
+        return {
+            "serial": self.serial,
+            "brand": "fake",
+            "model": "FakeU2Device",
+            "version": "12",
+            "sdk": 32,
+            "displayWidth": width,
+            "displayHeight": height,
+            "displayRotation": 0,
+            "currentPackageName": self.package
+        }
+    
+    @property
+    def scroll_list(self):
+        """当前界面的可滚动列表（viewport、content、background），没有列表时为None"""
+        with self.lock:
+            return self.screens[self._current_screen()]["list"]
+    
+    @property
+    def current_screen(self) -> str:
+        """当前显示的界面（切换动画结束后才更新）"""
+        with self.lock:
+            return self._current_screen()
+    
+    def _current_screen(self) -> str:
+        """当前界面（需持有锁）"""
+        if self.pending is not None and time.monotonic() >= self.pending[1]:
+            self.screen = self.pending[0]
+            self.pending = None
+        return self.screen
+    
+    def _delay(self, operation: str):
+        """模拟操作耗时"""
+        latency = self.latency.get(operation, 0.0) if isinstance(self.latency, dict) else self.latency
+        with self.lock:
+            if self.jitter > 0:
+                latency += self.random.uniform(0, self.jitter)
+            self.busy_time += latency
+        if latency > 0:
+            time.sleep(latency)
+    
+    def screenshot(self, filename=None, format='pillow'):
+        """截取当前界面
+        
+        Args:
+            filename: 保存路径，提供时写入文件并返回路径
+            format: 'opencv'（BGR数组）、'pillow'（PIL图像）或 'raw'（PNG数据）
+        """
+        self._delay("screenshot")
+        with self.lock:
+            screen = self.screens[self._current_screen()]
+            frame = screen["frame"].copy()
+            scroll_list = screen["list"]
+            if scroll_list is not None:
+                x, y, width, height = scroll_list["viewport"]
+                position = self.positions[self.screen]
+                frame[y:y + height, x:x + width] = scroll_list["content"][position:position + height]
+            self.screenshot_count += 1
+        
+        if filename:
+            cv2.imwrite(filename, frame)
+            return filename
+        if format == 'opencv':
+            return frame
+        if format == 'pillow':
+            return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if format == 'raw':
+            return encode_frame(frame)
+        raise ValueError(f"不支持的截图格式: {format}")
+    
+    def click(self, x, y):
+        """点击：落在当前界面的点击区域内时切换界面"""
+        self._delay("click")
+        with self.lock:
+            self.actions.append(('click', x, y))
+            for tap in self.screens[self._current_screen()]["taps"]:
+                left, top, width, height = tap["roi"]
+                if left <= x < left + width and top <= y < top + height:
+                    self.pending = (tap["to"], time.monotonic() + self.transition_delay)
+                    self.positions[tap["to"]] = 0
+                    self._current_screen()
+                    break
+    
+    def long_click(self, x, y, duration=None):
+        """长按（按点击处理）"""
+        self.click(x, y)
+    
+    def swipe(self, fx, fy, tx, ty, duration=None):
+        """滑动：起点在当前界面的列表内时滚动列表（向上滑动列表向下滚动，到底后停止）"""
+        self._delay("swipe")
+        with self.lock:
+            self.actions.append(('swipe', fx, fy, tx, ty))
+            scroll_list = self.screens[self._current_screen()]["list"]
+            if scroll_list is None:
+                return
+            x, y, width, height = scroll_list["viewport"]
+            if not (x <= fx < x + width and y <= fy < y + height):
+                return
+            max_position = scroll_list["content"].shape[0] - height
+            distance = int(round((fy - ty) * self.inertia))
+            self.positions[self.screen] = min(max(self.positions[self.screen] + distance, 0), max_position)
+    
+    def dump_hierarchy(self, compressed=False, pretty=False) -> str:
+        """返回当前界面的层次结构XML（根节点为界面，子节点为各点击区域）"""
+        self._delay("dump_hierarchy")
+        with self.lock:
+            name = self._current_screen()
+            screen = self.screens[name]
+        height, width = screen["frame"].shape[:2]
+        nodes = [f'<node index="0" text="" resource-id="{self.package}:id/{name}" class="android.widget.FrameLayout" '
+                 f'package="{self.package}" clickable="false" bounds="[0,0][{width},{height}]">']
+        for index, tap in enumerate(screen["taps"]):
+            left, top, tap_width, tap_height = tap["roi"]
+            nodes.append(f'<node index="{index}" text="" resource-id="{self.package}:id/to_{tap["to"]}" '
+                         f'class="android.widget.Button" package="{self.package}" clickable="true" '
+                         f'bounds="[{left},{top}][{left + tap_width},{top + tap_height}]" />')
+        nodes.append('</node>')
+        return "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>\n" \
+               f'<hierarchy rotation="0">{"".join(nodes)}</hierarchy>'
+    
+    def app_current(self):
+        """当前应用信息（activity 为当前界面名称）"""
+        self._delay("app_current")
+        with self.lock:
+            return {"package": self.package, "activity": f".{self._current_screen()}", "pid": 4242}
+    
+    def app_start(self, package_name, activity=None):
+        """启动应用（回到初始界面）"""
+        self.reset()
+    
+    def app_stop(self, package_name):
+        """停止应用"""
+        with self.lock:
+            self.actions.append(('app_stop', package_name))
+
+
+class FakeDeviceManager(UIAutomator2Manager):
+    """连接模拟设备的UIAutomator2管理器，其余行为与 UIAutomator2Manager 相同"""
+    
+    def __init__(self, config_manager, logger, device_id=None, device=None, **device_options):
+        """初始化模拟设备管理器
+        
+        Args:
+            config_manager: 配置管理器实例
+            logger: 日志记录器实例
+            device_id: 设备序列号
+            device: 已创建的 FakeU2Device，None时按 device_options 创建
+            **device_options: 传给 FakeU2Device 的参数（latency、jitter、seed、screens 等）
+        """
+        super().__init__(config_manager, logger, device_id=device_id)
+        if device is None:
+            device = FakeU2Device(serial=device_id or "fake-u2-device", **device_options)
+        self.fake_device = device
+    
+    def _load_uiautomator2(self):
+        """返回连接到模拟设备的替代模块"""
+        connect = lambda serial=None: self.fake_device
+        return SimpleNamespace(connect=connect, connect_usb=connect, connect_wifi=connect)
+
+
+class FrameU2Manager:
+    """只提供原始帧的UIAutomator2管理器替身（始终返回同一帧，不支持PNG字节截图）"""
+    
+    def __init__(self, frame):
+        self.frame = frame
+        self.is_connected = True
+        self.frame_calls = 0
+    
+    def take_frame(self, color='bgr'):
+        self.frame_calls += 1
+        return self.frame
+    
+    def take_screenshot(self):
+        raise AssertionError("不应再通过PNG字节截图")
@@ -1,48 +1,75 @@
-import cv2
-import numpy as np
-import uiautomator2 as u2
+import os
+import sys
 import time
 
-def find_button(template_path, threshold=0.8):
+import uiautomator2 as u2
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from recognition.template_matcher import TemplateMatcher
+
+_device = None
+_matcher = None
+
+
+def get_device():
+    """连接设备（只连接一次）"""
+    global _device
+    if _device is None:
+        _device = u2.connect("127.0.0.1:5557")
+    return _device
+
+
+def get_matcher():
+    """创建模板匹配器（模板解码结果在多次调用间复用）"""
+    global _matcher
+    if _matcher is None:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        _matcher = TemplateMatcher(config, Logger())
+        _matcher.initialize()
+    return _matcher
+
+
+def find_button(template_path, threshold=0.8, screen=None):
     """
     图像识别找按钮
     :param template_path: 按钮模板图路径
     :param threshold: 匹配阈值（0-1，越高越精准）
+    :param screen: 已有的屏幕帧，None时重新截图
     :return: 按钮中心点坐标 (x, y)，没找到返回 None
     """
-    # 1. 截当前游戏全屏图
-    d = u2.connect("127.0.0.1:5557")
-    screen_path = "temp_screen.png"
-    d.screenshot(screen_path)  # 用uiautomator2截图，更方便
-
-    # 2. 读取全屏图和模板图
-    screen = cv2.imread(screen_path)
-    template = cv2.imread(template_path)
-    if screen is None or template is None:
-        print("截图或模板图读取失败！")
+    # 1. 截当前游戏全屏图（直接获取内存中的BGR帧，不经过临时文件）
+    if screen is None:
+        screen = get_device().screenshot(format="opencv")
+    if screen is None:
+        print("截图失败！")
         return None
 
-    # 3. 图像匹配（模板匹配）
-    h, w = template.shape[:2]
-    result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
-    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+    # 2. 图像匹配（模板只解码一次，缓存在匹配器中）
+    matcher = get_matcher()
+    result = matcher.match_template(screen, template_path, threshold=0)
+    if result is None:
+        print("模板图读取失败！")
+        return None
 
-    # 4. 判断是否匹配成功
-    if max_val >= threshold:
-        # 计算中心点坐标
-        x = max_loc[0] + w // 2
-        y = max_loc[1] + h // 2
-        print(f"找到按钮！坐标：({x}, {y})，匹配度：{max_val:.2f}")
+    # 3. 判断是否匹配成功
+    if result['score'] >= threshold:
+        x, y = result['x'], result['y']
+        print(f"找到按钮！坐标：({x}, {y})，匹配度：{result['score']:.2f}")
         return (x, y)
     else:
-        print(f"未找到按钮，最高匹配度：{max_val:.2f}（低于阈值 {threshold}）")
+        print(f"未找到按钮，最高匹配度：{result['score']:.2f}（低于阈值 {threshold}）")
         return None
 
 def click_button_by_image(template_path):
     """
     图像识别并点击按钮
     """
-    d = u2.connect("127.0.0.1:5557")
+    d = get_device()
     # 确保游戏在前台
     d.screen_on()
     d.app_start("com.example.game", stop=True)  # 替换为你的游戏包名（可选）
@@ -62,5 +89,5 @@ def click_button_by_image(template_path):
 
 if __name__ == "__main__":
     # 替换为你的按钮模板图路径
-    BUTTON_TEMPLATE = "market_automation\market_btn.png"
-    click_button_by_image(BUTTON_TEMPLATE)
\ No newline at end of file
+    BUTTON_TEMPLATE = os.path.join("market_automation", "market_btn.png")
+    click_button_by_image(BUTTON_TEMPLATE)
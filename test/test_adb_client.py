@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADB服务端协议客户端测试
+使用本地模拟ADB服务端验证请求格式、持久shell会话和命令输出分隔
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.device_manager import DeviceManager
+from utils.adb_client import AdbClient, AdbError
+from test.fake_adb_server import FakeAdbServer
+
+
+def create_device_manager(port, serial="fake-device"):
+    """创建连接模拟服务端的设备管理器"""
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    config.set('device.serial', serial)
+    config.set('device.adbPort', port)
+    config.set('device.adb_path', os.path.join(PROJECT_ROOT, "missing-adb"))
+    return DeviceManager(config, Logger(console_output=False))
+
+
+def test_host_requests():
+    """测试服务端版本和设备列表"""
+    print("测试ADB服务端请求...")
+    
+    with FakeAdbServer(serials=["fake-device", "emulator-5554"]) as server:
+        client = AdbClient(port=server.port)
+        assert client.version() == 41
+        assert client.devices() == [("fake-device", "device"), ("emulator-5554", "device")]
+        assert client.shell("echo one-shot", serial="fake-device") == "one-shot\n"
+        
+        try:
+            client.shell("echo hi", serial="missing")
+            assert False, "未知设备应抛出AdbError"
+        except AdbError as e:
+            assert "not found" in str(e)
+    print("✅ ADB服务端请求正确")
+
+
+def test_shell_session_framing():
+    """测试持久shell会话的输出分隔与退出码"""
+    print("测试持久shell会话...")
+    
+    with FakeAdbServer() as server:
+        client = AdbClient(port=server.port)
+        with client.open_shell("fake-device") as session:
+            assert session.run("echo hello") == ("hello\n", 0)
+            assert session.run("printf abc") == ("abc", 0)
+            assert session.run("printf 'a\\nb\\n'; exit_code=3; (exit $exit_code)") == ("a\nb\n", 3)
+            assert session.run("echo err >&2") == ("err\n", 0)
+            
+            # 读取stdin的命令不会吞掉后续命令
+            assert session.run("cat") == ("", 0)
+            assert session.run("echo after") == ("after\n", 0)
+            
+            output, _ = session.run("seq 1 20000")
+            assert output.splitlines()[-1] == "20000"
+        
+        # 所有命令共用一条连接
+        assert server.connections == 1
+        assert server.requests == ["host:transport:fake-device", "shell:sh"]
+    print("✅ 持久shell会话正确")
+
+
+def test_device_manager_uses_session():
+    """测试设备管理器通过持久会话执行命令"""
+    print("测试设备管理器命令执行...")
+    
+    with FakeAdbServer() as server:
+        device_manager = create_device_manager(server.port)
+        
+        assert device_manager.check_device()
+        assert device_manager.device_info.model == "MuMu"
+        for index in range(10):
+            assert device_manager.execute_command(f"echo {index}") == str(index)
+        assert device_manager.execute_command("false") is None
+        
+        # 版本、设备列表各一次连接，之后所有shell命令共用一条会话连接
+        assert server.connections == 3
+        device_manager.close()
+    print("✅ 设备管理器复用shell会话")
+
+
+def test_device_manager_fallback():
+    """测试服务端不可用时回退到adb进程"""
+    print("测试服务端不可用回退...")
+    
+    server = FakeAdbServer()
+    port = server.port
+    server.server_close()
+    
+    device_manager = create_device_manager(port)
+    assert device_manager.execute_command("echo hi") is None
+    assert not device_manager.adb_server_available
+    print("✅ 服务端不可用时回退到adb进程")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_host_requests,
+        test_shell_session_framing,
+        test_device_manager_uses_session,
+        test_device_manager_fallback
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
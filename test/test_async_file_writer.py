@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步文件写入测试
+验证批量合并追加写入、目录只创建一次、fsync策略以及文件存储管理器的非阻塞保存与退出时写完队列
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.async_file_writer import AsyncFileWriter
+from utils.file_storage_manager import FileStorageManager
+
+
+def test_batched_appends():
+    """测试同一文件的追加写入按批合并且保持顺序"""
+    print("测试批量追加写入...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, "logs", "operation.log")
+        writer = AsyncFileWriter(workers=2, queue_size=256, batch_size=64, fsync_policy="batch")
+        
+        # 未启动时提交直接失败
+        assert isinstance(writer.write(log_path, "lost\n", append=True).exception(), RuntimeError)
+        
+        # 第一次写入卡住写入线程，后续请求积压后按批取出
+        release = threading.Event()
+        original_append = writer._append_file
+        writer._append_file = lambda *args: (release.wait(5), original_append(*args))
+        writer.start()
+        futures = [writer.write(log_path, f"line {index}\n", append=True) for index in range(200)]
+        release.set()
+        assert writer.flush(5)
+        assert all(future.result(0) == log_path for future in futures)
+        
+        with open(log_path, encoding="utf-8") as f:
+            assert f.read().splitlines() == [f"line {index}" for index in range(200)]
+        
+        stats = writer.get_stats()
+        assert stats["written_count"] == 200 and stats["error_count"] == 0
+        assert stats["file_writes"] <= 1 + 200 // 64 + 1
+        assert stats["fsync_count"] == stats["file_writes"]
+        writer.close()
+    print(f"✅ 200次追加合并为 {stats['file_writes']} 次写入")
+
+
+def test_replace_and_errors():
+    """测试整体写入、fsync策略与写入失败"""
+    print("测试整体写入与失败处理...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir, AsyncFileWriter(fsync_policy="never") as writer:
+        path = os.path.join(temp_dir, "a", "b", "image.png")
+        assert writer.write(path, b"first").result(5) == path
+        assert writer.write(path, b"second").result(5) == path
+        with open(path, "rb") as f:
+            assert f.read() == b"second"
+        assert os.listdir(os.path.dirname(path)) == ["image.png"]
+        
+        blocked = os.path.join(temp_dir, "file")
+        with open(blocked, "w") as f:
+            f.write("x")
+        failed = writer.write(os.path.join(blocked, "child.png"), b"data")
+        assert isinstance(failed.exception(5), OSError)
+        assert writer.get_stats()["error_count"] == 1
+        assert writer.get_stats()["fsync_count"] == 0
+    print("✅ 整体写入与失败处理正确")
+
+
+def test_storage_manager_does_not_block():
+    """测试文件存储管理器保存时不等待写盘"""
+    print("测试文件存储管理器异步保存...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('database.dataPath', temp_dir)
+        config.set('database.fileStorage.fsyncPolicy', 'always')
+        config.set('database.fileStorage.dedupScreenshots', False)
+        storage = FileStorageManager(config, Logger(console_output=False))
+        
+        # 让写入线程卡住一段时间，保存调用仍立即返回
+        release = threading.Event()
+        original_replace = storage.writer._replace_file
+        storage.writer._replace_file = lambda *args: (release.wait(5), original_replace(*args))
+        
+        start = time.time()
+        paths = [storage.save_screenshot(b"\x89PNG" + bytes([index])) for index in range(20)]
+        operation_log = SimpleNamespace(timestamp=time.time(), formatted_time="2025-01-01 00:00:00",
+                                        operation_type="click", result="success", error_message="timeout")
+        assert storage.save_operation_log(operation_log)
+        assert time.time() - start < 0.5
+        assert len(set(paths)) == 20
+        
+        release.set()
+        assert storage.flush(5)
+        for index, path in enumerate(paths):
+            with open(path, "rb") as f:
+                assert f.read() == b"\x89PNG" + bytes([index])
+        assert len(storage.get_screenshots(limit=100)) == 20
+        
+        log_dir = os.path.join(temp_dir, "logs")
+        with open(os.path.join(log_dir, os.listdir(log_dir)[0]), encoding="utf-8") as f:
+            assert f.read() == "[2025-01-01 00:00:00] click: success\nError: timeout\n"
+        
+        assert storage.get_write_stats()["written_count"] == 21
+        storage.close()
+    print("✅ 文件存储管理器保存不阻塞")
+
+
+def test_pending_writes_flushed_at_exit():
+    """测试进程退出时（未调用 close）写完队列中的截图"""
+    print("测试退出时写完队列...")
+    
+    script = """
+import os, sys, time
+sys.path.insert(0, sys.argv[1])
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.file_storage_manager import FileStorageManager
+
+config = ConfigManager(os.path.join(sys.argv[1], "config", "market_config.json"))
+config.set('database.dataPath', sys.argv[2])
+config.set('database.fileStorage.dedupScreenshots', False)
+storage = FileStorageManager(config, Logger(console_output=False))
+original_replace = storage.writer._replace_file
+storage.writer._replace_file = lambda *args: (time.sleep(0.05), original_replace(*args))
+for index in range(10):
+    print(storage.save_screenshot(b"\\x89PNG" + bytes([index])))
+"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output = subprocess.run([sys.executable, "-c", script, PROJECT_ROOT, temp_dir],
+                                capture_output=True, text=True, timeout=60, check=True).stdout
+        paths = output.split()
+        assert len(paths) == 10 and all(os.path.exists(path) for path in paths)
+    print("✅ 退出时写完队列")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_batched_appends,
+        test_replace_and_errors,
+        test_storage_manager_does_not_block,
+        test_pending_writes_flushed_at_exit
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
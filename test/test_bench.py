@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能测试套件测试
+验证分位数汇总、基线比较、阶段计时的替换与恢复，以及命令行输出JSON和退化返回码
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from bench.stats import summarize, compare_results
+from bench.phase_timer import PhaseTimer
+from bench.benchmarks import run_benchmarks
+from bench import run_bench
+from utils import frame_utils
+
+
+def test_summarize_and_compare():
+    """测试分位数汇总与基线比较"""
+    print("测试分位数汇总与基线比较...")
+    
+    summary = summarize([i / 1000 for i in range(1, 101)], wall_time=2.0)
+    assert summary["count"] == 100 and summary["throughput"] == 50
+    assert summary["min_ms"] == 1 and summary["max_ms"] == 100
+    assert abs(summary["p50_ms"] - 50.5) < 1e-6 and abs(summary["p99_ms"] - 99.01) < 1e-6
+    assert summarize([]) == {"count": 0}
+    
+    baseline = {"encode": {"p50_ms": 10.0, "p95_ms": 12.0}, "tap": {"p50_ms": 0.1, "p95_ms": 0.2},
+                "removed": {"p50_ms": 1.0, "p95_ms": 1.0}}
+    current = {"encode": {"p50_ms": 13.0, "p95_ms": 13.0}, "tap": {"p50_ms": 0.5, "p95_ms": 0.6},
+               "skipped": {"count": 0}}
+    comparisons = compare_results(current, baseline, tolerance=0.2)
+    assert [(item["name"], item["metric"]) for item in comparisons] == [
+        ("encode", "p50"), ("encode", "p95"), ("tap", "p50"), ("tap", "p95")]
+    # 只有超过容差且绝对差值超过1毫秒的才算退化
+    assert [item["regressed"] for item in comparisons] == [True, False, False, False]
+    print("✅ 分位数汇总与基线比较正确")
+
+
+class Worker:
+    """被计时的示例类"""
+    
+    def work(self, value):
+        return value * 2
+
+
+def test_phase_timer():
+    """测试实例、类、模块上的方法替换计时与恢复"""
+    print("测试阶段计时...")
+    
+    worker = Worker()
+    original_work = Worker.work
+    original_encode = frame_utils.encode_frame
+    with PhaseTimer() as timer:
+        timer.wrap(worker, 'work', 'instance')
+        timer.wrap(Worker, 'work', 'class')
+        timer.wrap(frame_utils, 'encode_frame', 'module')
+        assert worker.work(2) == 4 and Worker().work(3) == 6
+        assert frame_utils.encode_frame(np.zeros((4, 4), dtype=np.uint8))
+        samples = timer.get_samples()
+    
+    assert len(samples["instance"]) == 1 and len(samples["class"]) == 1 and len(samples["module"]) == 1
+    assert 'work' not in vars(worker) and Worker.work is original_work
+    assert frame_utils.encode_frame is original_encode
+    print("✅ 阶段计时正确")
+
+
+def test_run_benchmarks():
+    """测试运行基础环节性能测试"""
+    print("测试运行性能测试...")
+    
+    report = run_benchmarks(["png_encode", "history_save", "ocr"], iterations=3, label="test")
+    results = report["results"]
+    assert report["meta"]["label"] == "test" and report["meta"]["iterations"] == 3
+    assert results["png_encode"]["count"] == 3 and results["history_save"]["count"] == 3
+    assert results["ocr_prepare"]["count"] == 3
+    assert results["ocr"]["count"] == 0 or results["ocr"]["count"] == 3
+    for key in ("p50_ms", "p95_ms", "p99_ms", "throughput"):
+        assert key in results["png_encode"]
+    
+    try:
+        run_benchmarks(["missing"])
+        assert False, "未知测试名称应报错"
+    except ValueError:
+        pass
+    print("✅ 运行性能测试正确")
+
+
+def test_cli_baseline():
+    """测试命令行保存JSON与基线退化返回码"""
+    print("测试命令行基线比较...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output = os.path.join(temp_dir, "results", "current.json")
+        assert run_bench.main(["--only", "png_encode", "--iterations", "3", "--output", output]) == 0
+        with open(output, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        assert report["results"]["png_encode"]["count"] == 3
+        
+        # 基线快很多时报告退化
+        baseline = os.path.join(temp_dir, "baseline.json")
+        report["results"]["png_encode"].update(p50_ms=0.001, p95_ms=0.001)
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        assert run_bench.main(["--only", "png_encode", "--iterations", "3", "--baseline", baseline]) == 1
+    print("✅ 命令行基线比较正确")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_summarize_and_compare,
+        test_phase_timer,
+        test_run_benchmarks,
+        test_cli_baseline
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
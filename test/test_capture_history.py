@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图历史存储测试
+验证只追加写入、按任务和时间范围查询、范围删除清理、旧版JSON迁移、内存列式环形缓冲区以及按截图文件索引清理旧文件
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import cv2
+
+from utils.logger import Logger
+from screenshot.capture_history import CaptureHistoryStore, CaptureHistoryRing
+from screenshot.screenshot_store import ScreenshotStore
+from market_automation.market_clicker import MarketClicker
+from test.fake_adb_server import FakeAdbServer
+from test.fake_device import FrameU2Manager
+from test.test_capture_scheduler import create_capture_manager, SAMPLE_SCREENSHOT
+
+
+def make_record(index, task_id="task_a", timestamp=None, region=None):
+    """构造一条截图记录"""
+    return {
+        "record_id": f"record_{index}",
+        "task_id": task_id,
+        "timestamp": timestamp if timestamp is not None else 1000.0 + index,
+        "file_path": f"/tmp/capture_{index}.png",
+        "file_size": 1024,
+        "width": 720,
+        "height": 1280,
+        "format": "PNG",
+        "region": region,
+        "processing_time": 0.01,
+        "success": True,
+        "error_message": None
+    }
+
+
+def test_append_and_query():
+    """测试追加写入与索引查询"""
+    print("测试追加与查询...")
+    
+    store = CaptureHistoryStore(":memory:")
+    assert store.connect()
+    for index in range(20):
+        store.append(make_record(index, task_id="task_a" if index % 2 == 0 else "task_b"))
+    store.append(make_record(20, region=(10, 20, 30, 40)))
+    
+    assert store.count() == 21
+    
+    latest = store.get_records(limit=3)
+    assert [record["record_id"] for record in latest] == ["record_20", "record_19", "record_18"]
+    assert latest[0]["region"] == (10, 20, 30, 40)
+    assert latest[1]["region"] is None and latest[1]["success"] is True
+    assert latest[0] == dict(make_record(20, region=(10, 20, 30, 40)))
+    
+    task_b = store.get_records(task_id="task_b")
+    assert len(task_b) == 10 and all(record["task_id"] == "task_b" for record in task_b)
+    
+    window = store.get_records(task_id="task_a", start_time=1004, end_time=1010)
+    assert [record["record_id"] for record in window] == ["record_10", "record_8", "record_6", "record_4"]
+    
+    # 时间查询走索引
+    plan = store.query("EXPLAIN QUERY PLAN SELECT * FROM capture_history WHERE task_id = ? AND timestamp >= ?",
+                       ("task_a", 0))
+    assert any("idx_capture_history_task" in row["detail"] for row in plan)
+    store.disconnect()
+    print("✅ 追加与查询正确")
+
+
+def test_retention():
+    """测试过期删除与数量裁剪"""
+    print("测试保留策略...")
+    
+    store = CaptureHistoryStore(":memory:")
+    store.connect()
+    records = [make_record(index) for index in range(50)]
+    for record in records:
+        record["file_path"] = f"/screens/{record['record_id']}.png"
+    store.append_many(records)
+    
+    assert sorted(store.remove_before(1010)) == [f"/screens/record_{index}.png" for index in range(10)]
+    assert store.count() == 40
+    assert len(store.remove_oldest(15)) == 25
+    assert store.count() == 15
+    assert store.get_records(limit=100)[-1]["record_id"] == "record_35"
+    assert store.remove_oldest(100) == []
+    store.disconnect()
+    print("✅ 保留策略正确")
+
+
+def test_history_ring():
+    """测试按列存储的内存环形缓冲区"""
+    print("测试内存环形缓冲区...")
+    
+    ring = CaptureHistoryRing(capacity=8)
+    assert ring.get_records() == [] and ring.get_stats() == {"records": 0}
+    for index in range(12):
+        ring.append(make_record(index, task_id="task_a" if index % 3 else "task_b",
+                                region=(0, index, 10, 10) if index % 2 else None))
+    
+    # 超出容量后覆盖最旧的记录
+    assert len(ring) == 8
+    assert ring.oldest_timestamp() == 1004
+    assert ring.get_records(limit=2) == [make_record(11, region=(0, 11, 10, 10)), make_record(10, region=None)]
+    assert [record["record_id"] for record in ring.get_records(task_id="task_b")] == ["record_9", "record_6"]
+    assert [record["record_id"] for record in ring.get_records(start_time=1009, end_time=1010)] == ["record_10", "record_9"]
+    assert ring.get_records(task_id="missing") == []
+    assert ring.covers(1005) and not ring.covers(1003) and not ring.covers(None)
+    
+    stats = ring.get_stats()
+    assert stats["records"] == 8 and stats["success_rate"] == 1.0
+    assert abs(stats["average_processing_time"] - 0.01) < 1e-9
+    assert abs(stats["captures_per_second"] - 1.0) < 1e-9
+    
+    assert ring.expire(1007) == 3
+    assert len(ring) == 5 and ring.oldest_timestamp() == 1007
+    assert ring.get_records(limit=100)[-1]["record_id"] == "record_7"
+    print("✅ 内存环形缓冲区正确")
+
+
+def test_history_ring_task_codes():
+    """测试任务ID编号在槽位被覆盖或过期后回收，驻留表不随任务数增长"""
+    print("测试任务ID编号回收...")
+    
+    ring = CaptureHistoryRing(capacity=4)
+    for index in range(100):
+        ring.append(make_record(index, task_id=f"task_{index}"))
+    assert len(ring.task_ids) == 4 and sorted(ring.task_index) == ["task_96", "task_97", "task_98", "task_99"]
+    assert [record["task_id"] for record in ring.get_records()] == ["task_99", "task_98", "task_97", "task_96"]
+    assert ring.get_records(task_id="task_95") == []
+    
+    # 同一任务的多条记录共用编号，全部过期后回收
+    ring.append(make_record(100, task_id="task_99"))
+    assert ring.expire(1099) == 2 and sorted(ring.task_index) == ["task_99"]
+    assert ring.task_refs[ring.task_index["task_99"]] == 2
+    ring.append(make_record(101, task_id="task_new"))
+    assert len(ring.task_ids) == 4
+    assert [record["task_id"] for record in ring.get_records()] == ["task_new", "task_99", "task_99"]
+    print("✅ 任务ID编号回收正确")
+
+
+def test_capture_manager_history():
+    """测试截图捕获管理器迁移旧版历史并追加记录"""
+    print("测试截图捕获管理器历史记录...")
+    
+    with FakeAdbServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        legacy_file = os.path.join(temp_dir, "capture_history.json")
+        now = time.time()
+        with open(legacy_file, 'w', encoding='utf-8') as f:
+            json.dump([make_record(0, "legacy", now - 60), make_record(1, "legacy", now - 30 * 24 * 3600)], f)
+        
+        capture_manager = create_capture_manager(server, temp_dir)
+        
+        # 旧版JSON导入后改名，过期记录在初始化时清理
+        assert not os.path.exists(legacy_file)
+        assert os.path.exists(legacy_file + ".migrated")
+        assert [record["record_id"] for record in capture_manager.get_history(task_id="legacy")] == ["record_0"]
+        
+        task_id = capture_manager.schedule_capture(interval=0.02, count=3, auto_save=False, preprocess=False)
+        deadline = time.time() + 2
+        while len(capture_manager.get_history(task_id=task_id)) < 3 and time.time() < deadline:
+            time.sleep(0.02)
+        
+        history = capture_manager.get_history(task_id=task_id)
+        assert len(history) == 3 and history[0]["timestamp"] >= history[-1]["timestamp"]
+        assert capture_manager.get_performance_stats()["history_records"] == 4
+        assert capture_manager.get_performance_stats()["recent_history"]["records"] == 3
+        assert capture_manager.get_history(limit=2) == capture_manager.history_store.get_records(limit=2)
+        
+        capture_manager.cleanup()
+        
+        # 重新打开后记录仍在
+        reopened = CaptureHistoryStore(os.path.join(temp_dir, "capture_history.db"))
+        reopened.connect()
+        assert reopened.count() == 4
+        reopened.disconnect()
+    print("✅ 截图捕获管理器历史记录正确")
+
+
+def test_cleanup_old_files_uses_history():
+    """测试旧截图清理按历史记录删除文件，不扫描目录"""
+    print("测试按历史记录清理旧截图...")
+    
+    with FakeAdbServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        capture_manager = create_capture_manager(server, temp_dir)
+        task_id = capture_manager.schedule_capture(interval=0.02, count=2, auto_save=True, preprocess=False,
+                                                   compress=False)
+        deadline = time.time() + 3
+        while len(capture_manager.get_history(task_id=task_id)) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+        
+        saved = [record["file_path"] for record in capture_manager.get_history(task_id=task_id)]
+        assert len(saved) == 2 and all(os.path.exists(path) for path in saved)
+        
+        # 不在历史记录中的文件不会被触及
+        untracked = os.path.join(temp_dir, "untracked.png")
+        open(untracked, "wb").close()
+        
+        assert capture_manager.cleanup_old_files(days=1) == 0
+        assert capture_manager.cleanup_old_files(days=-1) == 2
+        assert not any(os.path.exists(path) for path in saved)
+        assert os.path.exists(untracked)
+        assert os.path.exists(os.path.join(temp_dir, "capture_history.db"))
+        assert capture_manager.get_history() == []
+        capture_manager.cleanup()
+    print("✅ 按历史记录清理旧截图")
+
+
+def test_cleanup_old_files_uses_index():
+    """测试旧截图清理按共用的截图文件索引删除各写入方的文件，未登记的文件不被触及"""
+    print("测试按截图索引清理旧截图...")
+    
+    with FakeAdbServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        capture_manager = create_capture_manager(server, temp_dir)
+        task_id = capture_manager.schedule_capture(interval=0.02, count=1, auto_save=True, preprocess=False,
+                                                   compress=False)
+        deadline = time.time() + 3
+        while not capture_manager.get_history(task_id=task_id) and time.time() < deadline:
+            time.sleep(0.02)
+        captured = capture_manager.get_history(task_id=task_id)[0]["file_path"]
+        
+        # 市场点击器直接保存的截图和内容存储的 blobs/ 文件登记到同一个索引
+        config = capture_manager.config_manager
+        config.set('screenshot.save_path', temp_dir)
+        market_clicker = MarketClicker(FrameU2Manager(cv2.imread(SAMPLE_SCREENSHOT)), config,
+                                       Logger(console_output=False))
+        clicker_path = market_clicker.take_screenshot("market")
+        market_clicker.cleanup()
+        store = ScreenshotStore(temp_dir, index=capture_manager.screenshot_index)
+        blob_path = store.put_bytes(b"\x89PNG blob", "blob.png").path
+        
+        # 目录中未登记的旧文件（如录制的测试截图）不会被删除
+        untracked = os.path.join(temp_dir, "20251122_000009_full.png")
+        open(untracked, "wb").close()
+        os.utime(untracked, (time.time() - 30 * 24 * 3600,) * 2)
+        
+        indexed = {row["path"] for row in capture_manager.screenshot_index.latest()}
+        assert indexed == {captured, clicker_path, blob_path}
+        assert capture_manager.cleanup_old_files(days=1) == 0
+        assert capture_manager.cleanup_old_files(days=-1) == 3
+        assert not any(os.path.exists(path) for path in indexed)
+        assert os.path.exists(untracked)
+        assert capture_manager.screenshot_index.count() == 0
+        capture_manager.cleanup()
+    print("✅ 按截图索引清理旧截图")
+
+
+def test_trim_removes_files():
+    """测试按数量裁剪和启动时过期清理会删除对应文件，目录中不留下失去索引的截图"""
+    print("测试裁剪历史记录时删除文件...")
+    
+    # 仍被保留记录引用的文件不返回
+    store = CaptureHistoryStore(":memory:")
+    store.connect()
+    records = [make_record(index) for index in range(6)]
+    for index, record in enumerate(records):
+        record["file_path"] = f"/screens/{min(index, 3)}.png"
+    store.append_many(records)
+    assert store.remove_oldest(10) == []
+    assert store.remove_oldest(3) == ["/screens/0.png", "/screens/1.png", "/screens/2.png"]
+    assert store.remove_before(1004) == [] and store.count() == 2
+    store.disconnect()
+    
+    with FakeAdbServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        capture_manager = create_capture_manager(server, temp_dir)
+        capture_manager.retention_config = dict(capture_manager.retention_config, maxRecords=3)
+        capture_manager.history_trim_interval = 1
+        capture_manager.schedule_capture(interval=0.02, count=8, auto_save=True, preprocess=False, compress=False)
+        deadline = time.time() + 5
+        while capture_manager.history_appends < 8 and time.time() < deadline:
+            time.sleep(0.02)
+        
+        def screenshot_files():
+            return {os.path.join(temp_dir, name) for name in os.listdir(temp_dir)
+                    if not name.startswith(("capture_history", "screenshot_index"))}
+        
+        indexed = {record["file_path"] for record in capture_manager.history_store.get_records(limit=100)}
+        assert capture_manager.history_appends == 8 and len(indexed) == 3
+        assert screenshot_files() == indexed
+        
+        # 启动时的过期清理同样删除文件
+        expired = os.path.join(temp_dir, "expired.png")
+        open(expired, "wb").close()
+        record = make_record(99, "expired", time.time() - 30 * 24 * 3600)
+        record["file_path"] = expired
+        capture_manager.history_store.append(record)
+        capture_manager._cleanup_expired_records()
+        assert not os.path.exists(expired)
+        
+        assert capture_manager.cleanup_old_files(days=1) == 0
+        assert screenshot_files() == indexed
+        capture_manager.cleanup()
+    print("✅ 裁剪历史记录时删除文件")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_append_and_query,
+        test_retention,
+        test_history_ring,
+        test_history_ring_task_codes,
+        test_capture_manager_history,
+        test_cleanup_old_files_uses_history,
+        test_cleanup_old_files_uses_index,
+        test_trim_removes_files
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图调度器测试
+验证最小堆调度的准时性、取消和无漂移的间隔调度
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.device_manager import DeviceManager
+from screenshot.screenshot_manager import ScreenshotManager
+from screenshot.image_processor import ImageProcessor
+from screenshot.capture_manager import CaptureManager
+from screenshot.capture_queue import CaptureJobQueue
+from test.fake_adb_server import FakeAdbServer
+from test.fake_device import FrameU2Manager
+
+SAMPLE_SCREENSHOT = os.path.join(PROJECT_ROOT, "data", "screenshots", "20251122_000009_full.png")
+
+
+def create_capture_manager(server, temp_dir, **capture_config):
+    """创建使用模拟设备的截图捕获管理器"""
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    for key, value in capture_config.items():
+        config.set(f'screenshot.capture.{key}', value)
+    config.set('device.serial', "fake-device")
+    config.set('device.adbPort', server.port)
+    logger = Logger(console_output=False)
+    
+    screenshot_manager = ScreenshotManager(config, logger, FrameU2Manager(cv2.imread(SAMPLE_SCREENSHOT)))
+    image_processor = ImageProcessor(config, logger)
+    assert screenshot_manager.initialize() and image_processor.initialize()
+    
+    capture_manager = CaptureManager(config, logger, DeviceManager(config, logger),
+                                     screenshot_manager, image_processor)
+    capture_manager.screenshot_dir = temp_dir
+    capture_manager.history_file = os.path.join(temp_dir, "capture_history.json")
+    assert capture_manager.initialize()
+    return capture_manager
+
+
+def test_interval_without_drift():
+    """测试间隔截图按首次截图时间对齐，不累积漂移"""
+    print("测试无漂移间隔调度...")
+    
+    with FakeAdbServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        capture_manager = create_capture_manager(server, temp_dir)
+        capture_times = []
+        
+        task_id = capture_manager.schedule_capture(
+            interval=0.05, count=8, auto_save=False, preprocess=False,
+            callback=lambda frame, path: capture_times.append(time.time())
+        )
+        origin = capture_manager.capture_tasks[task_id].created_time
+        
+        deadline = time.time() + 3
+        while len(capture_times) < 8 and time.time() < deadline:
+            time.sleep(0.02)
+        capture_manager.cleanup()
+        
+        assert len(capture_times) == 8
+        offsets = [capture_time - (origin + index * 0.05) for index, capture_time in enumerate(capture_times)]
+        assert all(-0.001 <= offset < 0.04 for offset in offsets), offsets
+        assert task_id not in capture_manager.capture_tasks
+    print(f"✅ 最大偏差：{max(offsets) * 1000:.1f}ms")
+
+
+def test_cancel_and_ordering():
+    """测试取消任务与按截止时间顺序执行"""
+    print("测试取消与执行顺序...")
+    
+    with FakeAdbServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        capture_manager = create_capture_manager(server, temp_dir)
+        order = []
+        
+        def record(name):
+            return lambda frame, path: order.append(name)
+        
+        # 大量远期任务不影响近期任务
+        far_tasks = [capture_manager.schedule_capture(delay=3600, auto_save=False) for _ in range(500)]
+        late = capture_manager.schedule_capture(delay=0.15, auto_save=False, preprocess=False, callback=record("late"))
+        cancelled = capture_manager.schedule_capture(delay=0.1, auto_save=False, callback=record("cancelled"))
+        early = capture_manager.schedule_capture(delay=0.05, auto_save=False, preprocess=False, callback=record("early"))
+        
+        assert capture_manager.cancel_task(cancelled)
+        assert not capture_manager.cancel_task(cancelled)
+        for task_id in far_tasks:
+            assert capture_manager.cancel_task(task_id)
+        
+        # 取消的任务残留条目会被清理
+        assert len(capture_manager.schedule_heap) < 100
+        
+        deadline = time.time() + 2
+        while len(order) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.05)
+        capture_manager.cleanup()
+        
+        assert order == ["early", "late"]
+        assert early not in capture_manager.capture_tasks and late not in capture_manager.capture_tasks
+    print("✅ 取消与执行顺序正确")
+
+
+def test_queue_policies():
+    """测试处理队列满时的各种策略"""
+    print("测试处理队列策略...")
+    
+    drop_oldest = CaptureJobQueue(2, "drop_oldest")
+    for job in range(4):
+        assert drop_oldest.put(job)
+    assert [drop_oldest.get(0), drop_oldest.get(0)] == [2, 3]
+    assert drop_oldest.get_stats()["dropped_count"] == 2
+    
+    drop_newest = CaptureJobQueue(2, "drop_newest")
+    assert [drop_newest.put(job) for job in range(3)] == [True, True, False]
+    assert drop_newest.get(0) == 0
+    
+    coalesce = CaptureJobQueue(2, "coalesce")
+    coalesce.put("a1", key="a")
+    coalesce.put("b1", key="b")
+    coalesce.put("a2", key="a")
+    coalesce.put("c1", key="c")
+    assert [coalesce.get(0), coalesce.get(0), coalesce.get(0)] == ["b1", "c1", None]
+    assert coalesce.get_stats()["coalesced_count"] == 1
+    
+    block = CaptureJobQueue(1, "block")
+    assert block.put(1)
+    start = time.time()
+    assert not block.put(2, timeout=0.05)
+    assert time.time() - start >= 0.05
+    block.close()
+    assert block.get(0) == 1 and block.get(0) is None
+    print("✅ 处理队列策略正确")
+
+
+def test_slow_callback_does_not_stall_captures():
+    """测试慢回调不影响其他任务按时截图"""
+    print("测试慢回调隔离...")
+    
+    with FakeAdbServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        capture_manager = create_capture_manager(server, temp_dir, processingWorkers=2, queuePolicy="drop_oldest")
+        fast_times = []
+        
+        capture_manager.schedule_capture(interval=0.05, count=5, auto_save=False, preprocess=False,
+                                         callback=lambda frame, path: time.sleep(0.5))
+        task_id = capture_manager.schedule_capture(
+            interval=0.05, count=5, auto_save=False, preprocess=False,
+            callback=lambda frame, path: fast_times.append(time.time())
+        )
+        origin = capture_manager.capture_tasks[task_id].created_time
+        
+        # 慢回调占满回调线程池，但截图和处理照常进行
+        deadline = time.time() + 1
+        while capture_manager.get_performance_stats()["successful_captures"] < 10 and time.time() < deadline:
+            time.sleep(0.02)
+        assert capture_manager.get_performance_stats()["successful_captures"] == 10
+        assert time.time() - origin < 0.6
+        capture_manager.cleanup()
+        
+        assert len(fast_times) == 5
+    print("✅ 慢回调不影响截图")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_interval_without_drift,
+        test_cancel_and_ordering,
+        test_queue_policies,
+        test_slow_callback_does_not_stall_captures
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+设备信息测试
+验证设备属性一次批量查询、解析和缓存失效
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.device_manager import DeviceManager, DeviceInfo, parse_getprop, parse_wm_size
+from test.fake_adb_server import FakeAdbServer
+
+
+def create_device_manager(port):
+    """创建连接模拟服务端的设备管理器"""
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    config.set('device.serial', "fake-device")
+    config.set('device.adbPort', port)
+    return DeviceManager(config, Logger(console_output=False))
+
+
+def test_parse_device_info():
+    """测试解析批量查询输出"""
+    print("测试设备信息解析...")
+    
+    output = (
+        "[ro.build.version.release]: [12]\n"
+        "[ro.build.version.sdk]: [32]\n"
+        "[ro.product.model]: [MuMu]\n"
+        "[persist.sys.motd]: [line one\nline two]\n"
+        "#wm-size\n"
+        "Physical size: 1080x1920\n"
+        "Override size: 720x1280\n"
+        "#wm-density\n"
+        "Physical density: 320\n"
+    )
+    info = DeviceInfo.parse("fake-device", output)
+    
+    assert info.model == "MuMu" and info.manufacturer == "Unknown"
+    assert info.api_level == 32
+    assert (info.screen_width, info.screen_height, info.density) == (720, 1280, 320)
+    assert info.screen_resolution == "720x1280"
+    assert info.properties["persist.sys.motd"] == "line one\nline two"
+    assert "properties" not in info.to_dict()
+    
+    assert parse_getprop("") == {}
+    assert parse_wm_size("error") == (0, 0)
+    print("✅ 设备信息解析正确")
+
+
+def test_device_info_single_query():
+    """测试设备信息一次查询并缓存"""
+    print("测试设备信息批量查询...")
+    
+    with FakeAdbServer() as server:
+        device_manager = create_device_manager(server.port)
+        assert device_manager.check_device()
+        
+        info = device_manager.get_device_info()
+        assert info.manufacturer == "Netease" and info.android_version == "12"
+        assert info.screen_resolution == "720x1280" and info.density == 320
+        
+        # 命中缓存，不再发送命令
+        commands_before = device_manager.shell_session.command_count
+        assert device_manager.get_device_info() is info
+        assert device_manager.shell_session.command_count == commands_before == 1
+        
+        # 显式失效后重新查询
+        device_manager.invalidate_device_info()
+        assert device_manager.get_device_info() is not info
+        assert device_manager.shell_session.command_count == 2
+        
+        # 设备检查总是重新查询，确认设备仍然响应
+        assert device_manager.check_device()
+        assert device_manager.shell_session.command_count == 3
+        device_manager.close()
+    print("✅ 设备信息只需一次查询")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_parse_device_info,
+        test_device_info_single_query
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
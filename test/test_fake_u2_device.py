@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟设备测试
+验证录制截图界面状态机、操作延迟与抖动，以及离线执行完整的市场操作序列
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from market_automation.market_clicker import MarketClicker
+from test.fake_device import FakeU2Device, FakeDeviceManager, make_list_content
+
+
+def test_screen_state_machine():
+    """测试点击切换界面、列表滚动与界面信息"""
+    print("测试界面状态机...")
+    
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    u2_manager = FakeDeviceManager(config, Logger(console_output=False), device_id="127.0.0.1:5557")
+    assert u2_manager.initialize()
+    assert u2_manager.device_id == "127.0.0.1:5557"
+    assert u2_manager.device_info["width"] == 720 and u2_manager.device_info["height"] == 1280
+    device = u2_manager.fake_device
+    
+    home = u2_manager.take_frame()
+    assert u2_manager.get_current_app()["activity"] == ".home"
+    
+    # 点击空白处不切换，点击市场按钮进入报价界面
+    assert u2_manager.tap_element(100, 100) and device.current_screen == "home"
+    assert u2_manager.tap_element(366, 1204) and device.current_screen == "quotes"
+    assert 'resource-id="com.fake.market:id/to_home"' in u2_manager.dump_hierarchy()
+    quotes = u2_manager.take_frame()
+    assert not np.array_equal(home, quotes)
+    
+    # 列表外的滑动不滚动，列表内的滑动滚动到底后停止
+    u2_manager.swipe_element(358, 300, 358, 100)
+    assert np.array_equal(u2_manager.take_frame(), quotes)
+    for _ in range(5):
+        u2_manager.swipe_element(358, 1100, 358, 500)
+    assert device.positions["quotes"] == 720 * 2
+    assert u2_manager.take_screenshot()[:8] == b"\x89PNG\r\n\x1a\n"
+    
+    # 关闭报价界面回到主界面，再次进入时列表回到顶部
+    u2_manager.tap_element(684, 330)
+    assert device.current_screen == "home"
+    u2_manager.tap_element(366, 1204)
+    assert np.array_equal(u2_manager.take_frame(), quotes)
+    assert u2_manager.cleanup()
+    
+    # 直接指定报价列表长图，默认格式返回PIL图像
+    content = make_list_content(rows=6)
+    device = FakeU2Device(initial="quotes", content=content)
+    assert device.scroll_list["content"] is content and device.scroll_list["viewport"] == (20, 490, 680, 720)
+    assert device.screenshot().size == (720, 1280)
+    device.swipe(358, 1100, 358, 500)
+    assert np.array_equal(device.screenshot(format='opencv')[490:1210, 20:700], content[360:1080])
+    assert FakeU2Device().scroll_list is None
+    print("✅ 界面状态机正确")
+
+
+def test_latency_and_jitter():
+    """测试操作延迟、抖动的可重复性与切换动画"""
+    print("测试延迟与抖动...")
+    
+    latency = {"screenshot": 0.02, "click": 0.01}
+    first = FakeU2Device(latency=latency, jitter=0.01, seed=7)
+    second = FakeU2Device(latency=latency, jitter=0.01, seed=7)
+    for device in (first, second):
+        start = time.time()
+        for _ in range(3):
+            device.screenshot(format='opencv')
+            device.click(10, 10)
+        assert time.time() - start >= 0.09
+        device.swipe(358, 1100, 358, 700)
+    assert first.busy_time == second.busy_time
+    assert 0.09 <= first.busy_time <= 0.15
+    
+    # 切换动画期间截图仍为原界面
+    device = FakeU2Device(transition_delay=0.1)
+    device.click(366, 1204)
+    assert device.current_screen == "home"
+    time.sleep(0.12)
+    assert device.current_screen == "quotes"
+    print("✅ 延迟与抖动正确")
+
+
+def test_market_sequence_offline():
+    """测试离线执行完整的市场操作序列（启用画面稳定检测）"""
+    print("测试离线市场操作序列...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('screenshot.save_path', temp_dir)
+        logger = Logger(console_output=False)
+        u2_manager = FakeDeviceManager(config, logger, latency={"screenshot": 0.005}, jitter=0.005)
+        assert u2_manager.initialize()
+        market_clicker = MarketClicker(u2_manager, config, logger)
+        assert market_clicker.initialize()
+        
+        start = time.time()
+        assert market_clicker.execute_market_sequence()
+        elapsed = time.time() - start
+        
+        result = market_clicker.quote_paginator.last_result
+        assert result.reached_end and result.lost_count == 0
+        assert result.offsets[-1] == 0 and sum(result.offsets) == 720 * 2
+        assert os.path.exists(result.stitched_path)
+        assert u2_manager.fake_device.current_screen == "quotes"
+        clicks = [action[1:] for action in u2_manager.fake_device.actions if action[0] == 'click']
+        coordinates = market_clicker.coordinates
+        assert clicks == [(coordinates[name]['x'], coordinates[name]['y'])
+                          for name in ('market_button', 'quote_button', 'show_all_quotes')]
+        # 画面稳定后立即进入下一步，总耗时远小于各步等待上限之和
+        wait_times = market_clicker.wait_times
+        max_wait = (wait_times['after_market_click'] + wait_times['after_quote_click'] + wait_times['after_show_all']
+                    + result.swipes * wait_times['after_scroll'])
+        assert elapsed < max_wait, elapsed
+    print(f"✅ 离线市场操作序列完成，耗时{elapsed:.2f}秒")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_screen_state_machine,
+        test_latency_and_jitter,
+        test_market_sequence_offline
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
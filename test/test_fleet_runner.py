@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多设备运行器测试
+使用模拟ADB服务端发现设备、模拟设备执行市场操作序列
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.uiautomator2_manager import UIAutomator2Manager
+from market_automation.fleet_runner import FleetRunner
+from test.fake_adb_server import FakeAdbServer
+from test.fake_device import FakeU2Device
+
+SERIALS = ["127.0.0.1:5557", "127.0.0.1:5558", "127.0.0.1:5559"]
+
+
+def create_config(port, save_path):
+    """创建测试配置：关闭画面稳定检测，等待时间为0"""
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    config.set('device.adbPort', port)
+    config.set('screenshot.save_path', save_path)
+    config.set('market_automation.settle.enabled', False)
+    for key in ('after_market_click', 'after_quote_click', 'after_show_all', 'after_scroll'):
+        config.set(f'market_automation.{key}', 0)
+    config.set('fleet.startInterval', 0)
+    return config
+
+
+def test_fleet_runs_all_devices():
+    """测试所有设备并行执行并汇总结果"""
+    print("测试多设备并行运行...")
+    
+    devices = {}
+    
+    def u2_factory(serial):
+        u2_manager = UIAutomator2Manager(config, logger, device_id=serial)
+        u2_manager.device = devices.setdefault(serial, FakeU2Device(serial=serial))
+        u2_manager.device_id = serial
+        u2_manager.is_connected = True
+        return u2_manager
+    
+    with FakeAdbServer(serials=SERIALS) as server, tempfile.TemporaryDirectory() as temp_dir:
+        config = create_config(server.port, temp_dir)
+        config.set('fleet.exclude', [SERIALS[2]])
+        logger = Logger(console_output=False)
+        
+        runner = FleetRunner(config, logger, u2_factory=u2_factory)
+        assert runner.initialize()
+        result = runner.run(rounds=2)
+        
+        assert result.succeeded == SERIALS[:2] and result.failed == []
+        summary = result.to_dict()
+        assert summary["total_rounds"] == 4 and summary["succeeded_rounds"] == 4
+        assert summary["recognition"]["match_count"] > 0
+        
+        # 每台设备使用独立的设备连接和截图目录
+        for serial in SERIALS[:2]:
+            assert devices[serial].actions[0] == ('click', 366, 1204)
+            device_dir = os.path.join(temp_dir, serial.replace(':', '_'))
+            assert len(os.listdir(device_dir)) > 0
+        assert SERIALS[2] not in devices
+        runner.cleanup()
+    print(f"✅ 多设备运行完成，耗时：{result.duration:.2f}秒")
+
+
+def test_fleet_connection_failure():
+    """测试单台设备连接失败不影响其他设备"""
+    print("测试设备连接失败...")
+    
+    with FakeAdbServer(serials=SERIALS[:2]) as server, tempfile.TemporaryDirectory() as temp_dir:
+        config = create_config(server.port, temp_dir)
+        logger = Logger(console_output=False)
+        
+        def u2_factory(serial):
+            if serial == SERIALS[1]:
+                return None
+            u2_manager = UIAutomator2Manager(config, logger, device_id=serial)
+            u2_manager.device = FakeU2Device(serial=serial)
+            u2_manager.is_connected = True
+            return u2_manager
+        
+        runner = FleetRunner(config, logger, u2_factory=u2_factory)
+        assert runner.initialize()
+        result = runner.run()
+        
+        assert result.succeeded == [SERIALS[0]] and result.failed == [SERIALS[1]]
+        assert result.devices[1].error
+        runner.cleanup()
+    print("✅ 连接失败的设备单独记录")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_fleet_runs_all_devices,
+        test_fleet_connection_failure
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
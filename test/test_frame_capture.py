@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原始帧截图测试
+验证截图以未压缩帧在内存中流转，只在写入磁盘时编码
+"""
+
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.frame_utils import decode_image, encode_frame
+from market_automation.market_clicker import MarketClicker
+from screenshot.screenshot_manager import ScreenshotManager
+from test.fake_device import FrameU2Manager
+
+SAMPLE_SCREENSHOT = os.path.join(PROJECT_ROOT, "data", "screenshots", "20251122_000009_full.png")
+
+
+def test_frame_round_trip():
+    """测试帧编码/解码往返无损"""
+    print("测试帧编码/解码...")
+    
+    frame = cv2.imread(SAMPLE_SCREENSHOT)
+    data = encode_frame(frame)
+    
+    assert data[:4] == b'\x89PNG'
+    assert np.array_equal(decode_image(data), frame)
+    assert decode_image(frame) is frame
+    print("✅ 帧编码/解码往返一致")
+
+
+def test_market_clicker_writes_frame():
+    """测试市场点击器使用原始帧截图并在保存时编码"""
+    print("测试市场点击器截图...")
+    
+    frame = cv2.imread(SAMPLE_SCREENSHOT)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('screenshot.save_path', temp_dir)
+        u2_manager = FrameU2Manager(frame)
+        
+        market_clicker = MarketClicker(u2_manager, config, Logger(console_output=False))
+        file_path = market_clicker.take_screenshot("frame_test")
+        
+        assert file_path and os.path.exists(file_path)
+        assert u2_manager.frame_calls == 1
+        assert np.array_equal(cv2.imread(file_path), frame)
+    print("✅ 市场点击器截图成功")
+
+
+def test_screenshot_manager_region():
+    """测试截图管理器区域裁剪"""
+    print("测试截图管理器区域裁剪...")
+    
+    frame = cv2.imread(SAMPLE_SCREENSHOT)
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    screenshot_manager = ScreenshotManager(config, Logger(console_output=False), FrameU2Manager(frame))
+    assert screenshot_manager.initialize()
+    
+    region_frame = screenshot_manager.capture_frame((300, 1150, 120, 100))
+    assert region_frame.shape == (100, 120, 3)
+    assert screenshot_manager.get_latest_frame() is frame
+    print("✅ 区域裁剪正确")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_frame_round_trip,
+        test_market_clicker_writes_frame,
+        test_screenshot_manager_region
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
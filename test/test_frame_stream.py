@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+连续帧流采集测试
+使用本地模拟设备验证环形缓冲区、后台采集线程，以及市场点击器按配置创建帧流
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.uiautomator2_manager import UIAutomator2Manager
+from market_automation.market_clicker import MarketClicker
+from screenshot.frame_stream import FrameRingBuffer, FrameStreamer
+from test.fake_device import FakeU2Device
+
+
+def create_fake_u2_manager(latency=0.0):
+    """创建连接到模拟设备的UIAutomator2管理器"""
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    logger = Logger(console_output=False)
+    u2_manager = UIAutomator2Manager(config, logger)
+    u2_manager.device = FakeU2Device(latency=latency)
+    u2_manager.is_connected = True
+    return config, logger, u2_manager
+
+
+def test_ring_buffer_wraps():
+    """测试环形缓冲区覆盖与序号"""
+    print("测试环形缓冲区...")
+    
+    buffer = FrameRingBuffer(capacity=3)
+    assert buffer.latest() is None
+    
+    for i in range(5):
+        buffer.write(np.full((4, 4, 3), i, dtype=np.uint8), timestamp=100.0 + i)
+    
+    frame, timestamp, sequence = buffer.latest()
+    assert frame[0, 0, 0] == 4
+    assert timestamp == 104.0
+    assert sequence == 4
+    assert buffer.frames.shape == (3, 4, 4, 3)
+    assert buffer.wait_for(104.0, timeout=0.05) is None
+    print("✅ 环形缓冲区正确")
+
+
+def test_streamer_with_fake_device():
+    """测试后台采集线程从模拟设备持续取帧"""
+    print("测试帧流采集...")
+    
+    config, logger, u2_manager = create_fake_u2_manager(latency=0.005)
+    streamer = FrameStreamer(config, logger, u2_manager)
+    assert streamer.initialize()
+    
+    try:
+        start = time.time()
+        frame = streamer.wait_for_frame(start, timeout=2)
+        assert frame is not None and frame.shape == (1280, 720, 3)
+        assert streamer.latest_timestamp() >= start
+        
+        later = time.time()
+        assert streamer.wait_for_frame(later, timeout=2) is not None
+        assert streamer.get_stats()["frames_captured"] >= 2
+    finally:
+        streamer.cleanup()
+    
+    assert not streamer.is_running
+    print("✅ 帧流采集正确")
+
+
+def test_market_clicker_reads_stream():
+    """测试市场点击器从帧流读取最新帧"""
+    print("测试市场点击器读取帧流...")
+    
+    config, logger, u2_manager = create_fake_u2_manager()
+    streamer = FrameStreamer(config, logger, u2_manager)
+    streamer.initialize()
+    
+    try:
+        market_clicker = MarketClicker(u2_manager, config, logger)
+        market_clicker.attach_frame_stream(streamer)
+        market_clicker.last_action_time = time.time()
+        
+        frame = market_clicker.grab_frame(market_clicker.last_action_time, timeout=2)
+        assert frame is not None
+        assert streamer.latest_timestamp() > market_clicker.last_action_time
+    finally:
+        streamer.cleanup()
+    print("✅ 市场点击器读取帧流正确")
+
+
+def test_market_clicker_creates_modules():
+    """测试按配置在初始化时创建帧流和模板匹配器，清理时一并停止"""
+    print("测试按配置创建帧流和模板匹配器...")
+    
+    config, logger, u2_manager = create_fake_u2_manager()
+    market_clicker = MarketClicker(u2_manager, config, logger)
+    assert market_clicker.initialize()
+    assert market_clicker.frame_stream is None and market_clicker.template_matcher is None
+    
+    config.set('screenshot.stream.enabled', True)
+    config.set('recognition.enabled', True)
+    market_clicker = MarketClicker(u2_manager, config, logger)
+    assert market_clicker.initialize()
+    streamer = market_clicker.frame_stream
+    assert streamer.is_running and market_clicker.template_matcher.is_initialized
+    assert market_clicker.grab_frame(time.time(), timeout=2) is not None
+    
+    market_clicker.cleanup()
+    assert not streamer.is_running
+    assert market_clicker.frame_stream is None and market_clicker.template_matcher is None
+    print("✅ 按配置创建帧流和模板匹配器正确")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_ring_buffer_wraps,
+        test_streamer_with_fake_device,
+        test_market_clicker_reads_stream,
+        test_market_clicker_creates_modules
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
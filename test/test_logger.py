@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志记录器测试
+验证日志经队列在后台线程中格式化输出、未启用级别不格式化参数，以及文件处理器的增删与关闭
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.logger import Logger
+
+
+class FormatProbe:
+    """记录被格式化的次数和所在线程"""
+    
+    def __init__(self, text):
+        self.text = text
+        self.threads = []
+    
+    def __str__(self):
+        self.threads.append(threading.current_thread().name)
+        return self.text
+
+
+def read_lines(path):
+    """读取日志文件的各行"""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_queue_logging():
+    """测试消息在后台线程中格式化，DEBUG关闭时参数不被格式化"""
+    print("测试队列日志...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file = os.path.join(temp_dir, "logs", "run.log")
+        logger = Logger(level="INFO", log_file=log_file, console_output=False)
+        assert logger.listener is not None and not logger.is_enabled_for("DEBUG")
+        
+        hidden = FormatProbe("hidden")
+        shown = FormatProbe("shown")
+        logger.debug("命令输出: %s", hidden)
+        logger.info("点击坐标：(%s, %s) %s", 1, 2, shown)
+        logger.log_performance("tap", 0.0123, "x=1")
+        worker = threading.Thread(target=logger.warning, args=("来自线程 %s", "worker"), name="worker")
+        worker.start()
+        worker.join()
+        logger.flush()
+        
+        lines = read_lines(log_file)
+        # 文件输出在监听线程中格式化（pytest 等在根日志器上挂的处理器仍在调用线程中格式化）
+        assert hidden.threads == [] and set(shown.threads) - {threading.current_thread().name}
+        assert lines[0].endswith("[MainThread] 点击坐标：(1, 2) shown")
+        assert lines[1].endswith("性能统计: tap 耗时 0.012秒 - x=1")
+        assert "[WARNING]" in lines[2] and lines[2].endswith("[worker] 来自线程 worker")
+        
+        # 开启DEBUG后才格式化
+        logger.set_level("DEBUG")
+        logger.debug("命令输出: %s", hidden)
+        logger.close()
+        assert hidden.threads and read_lines(log_file)[-1].endswith("命令输出: hidden")
+        logger.clear_handlers()
+    print("✅ 队列日志正确")
+
+
+def test_handlers_and_close():
+    """测试增删文件处理器、关闭后同步输出，以及新建日志器替换监听线程"""
+    print("测试处理器增删与关闭...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first_file = os.path.join(temp_dir, "first.log")
+        second_file = os.path.join(temp_dir, "second.log")
+        logger = Logger(console_output=False)
+        
+        logger.add_file_handler(first_file)
+        logger.info("第一条")
+        logger.add_file_handler(second_file)
+        logger.info("第二条")
+        logger.remove_file_handler(first_file)
+        logger.info("第三条")
+        logger.flush()
+        assert [line.split("] ")[-1] for line in read_lines(first_file)] == ["第一条", "第二条"]
+        assert [line.split("] ")[-1] for line in read_lines(second_file)] == ["第二条", "第三条"]
+        
+        # 新建日志器时停止之前的监听线程，之前排队的日志已写完
+        logger.info("替换前")
+        other = Logger(console_output=False, use_queue=False)
+        assert logger.listener is None and other.listener is None
+        assert read_lines(second_file)[-1].endswith("替换前")
+        
+        # 同步模式与关闭后都在调用线程中输出
+        other.add_file_handler(first_file)
+        probe = FormatProbe("sync")
+        other.info("同步 %s", probe)
+        assert set(probe.threads) == {threading.current_thread().name}
+        assert read_lines(first_file)[-1].endswith("同步 sync")
+        other.clear_handlers()
+        logger.clear_handlers()
+    print("✅ 处理器增删与关闭正确")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_queue_logging,
+        test_handlers_and_close
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标测试
+验证计数器、仪表、直方图的多线程更新与文本格式输出，HTTP端点与快照文件，
+以及截图、市场操作、设备命令和文件写入的指标
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.device_manager import DeviceManager
+from utils.file_storage_manager import FileStorageManager
+from utils.metrics import MetricsRegistry, MetricsServer, SnapshotWriter, registry
+from market_automation.market_clicker import MarketClicker
+from test.fake_adb_server import FakeAdbServer
+from test.fake_device import FakeDeviceManager
+from test.test_capture_scheduler import create_capture_manager
+
+
+def test_metric_types():
+    """测试各类指标的更新、多线程累加与文本格式"""
+    print("测试指标类型...")
+    
+    local_registry = MetricsRegistry()
+    counter = local_registry.counter("jobs_total", "任务数", ("result",))
+    gauge = local_registry.gauge("queue_depth", "队列深度")
+    histogram = local_registry.histogram("latency_seconds", "耗时", buckets=(0.1, 1.0))
+    assert local_registry.counter("jobs_total", "任务数", ("result",)) is counter
+    try:
+        local_registry.gauge("jobs_total", "任务数")
+        assert False, "同名不同类型的指标应报错"
+    except ValueError:
+        pass
+    
+    # 多个线程同时累加，合计不丢失
+    def work():
+        for _ in range(10000):
+            counter.labels("ok").inc()
+            histogram.observe(0.5)
+    
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.labels(result="error").inc(2)
+    assert counter.labels("ok").get() == 80000 and counter.labels("error").get() == 2
+    
+    histogram.observe(0.05)
+    histogram.observe(3)
+    value = histogram.get()
+    assert value["buckets"] == [(0.1, 1), (1.0, 80001), (float("inf"), 80002)]
+    assert value["count"] == 80002 and abs(value["sum"] - 40003.05) < 1e-6
+    
+    gauge.set(3)
+    gauge.inc()
+    assert gauge.get() == 4
+    gauge.set_function(lambda: 7)
+    assert gauge.get() == 7
+    
+    text = local_registry.render()
+    assert "# TYPE jobs_total counter" in text and 'jobs_total{result="ok"} 80000' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 80002' in text and "latency_seconds_count 80002" in text
+    assert "queue_depth 7" in text
+    print("✅ 指标类型正确")
+
+
+def test_endpoint_and_snapshot():
+    """测试HTTP端点与快照文件（含计数器速率）"""
+    print("测试HTTP端点与快照文件...")
+    
+    local_registry = MetricsRegistry()
+    counter = local_registry.counter("captures_total", "截图次数")
+    counter.inc(5)
+    
+    server = MetricsServer(local_registry, port=0).start()
+    try:
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "captures_total 5" in response.read().decode("utf-8")
+        with urllib.request.urlopen(server.url + ".json", timeout=5) as response:
+            snapshot = json.loads(response.read().decode("utf-8"))
+        assert snapshot["metrics"]["captures_total"]["values"][0]["value"] == 5
+        try:
+            urllib.request.urlopen(server.url.replace("/metrics", "/missing"), timeout=5)
+            assert False, "未知路径应返回404"
+        except urllib.error.HTTPError as e:
+            assert e.code == 404
+    finally:
+        server.stop()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "metrics", "snapshot.json")
+        writer = SnapshotWriter(local_registry, path, interval=60)
+        assert writer.write()
+        time.sleep(0.05)
+        counter.inc(10)
+        assert writer.write()
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        item = snapshot["metrics"]["captures_total"]["values"][0]
+        assert item["value"] == 15 and 0 < item["rate"] < 10 / 0.05 + 1
+        assert not os.path.exists(path + ".tmp")
+    print("✅ HTTP端点与快照文件正确")
+
+
+def test_module_metrics():
+    """测试截图、市场操作、设备命令与文件写入的指标"""
+    print("测试模块指标...")
+    
+    def value(name, **labels):
+        metric = registry.get(name)
+        child = metric.labels(**labels) if labels else metric
+        result = child.get()
+        return result["count"] if isinstance(result, dict) else result
+    
+    with FakeAdbServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        # 设备命令耗时
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('device.serial', "fake-device")
+        config.set('device.adbPort', server.port)
+        device_manager = DeviceManager(config, Logger(console_output=False))
+        before = value("adb_command_duration_seconds", device="fake-device", transport="server")
+        assert device_manager.execute_command("echo hello") == "hello"
+        assert value("adb_command_duration_seconds", device="fake-device", transport="server") == before + 1
+        device_manager.close()
+        
+        # 截图次数、耗时与队列深度
+        capture_manager = create_capture_manager(server, temp_dir)
+        captures_before = value("capture_total", result="success")
+        capture_manager.schedule_capture(interval=0.01, count=3, auto_save=False, preprocess=False)
+        deadline = time.time() + 5
+        while value("capture_total", result="success") < captures_before + 3 and time.time() < deadline:
+            time.sleep(0.02)
+        capture_manager.cleanup()
+        assert value("capture_total", result="success") == captures_before + 3
+        assert value("capture_duration_seconds") >= 3
+        assert time.time() - registry.get("capture_last_success_timestamp_seconds").get() < 10
+        assert registry.get("capture_queue_depth").get() == 0
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 文件写入字节数
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('database.dataPath', temp_dir)
+        config.set('database.fileStorage.dedupScreenshots', False)
+        storage = FileStorageManager(config, Logger(console_output=False))
+        bytes_before = value("storage_written_bytes_total")
+        assert storage.save_screenshot(b"\x89PNG" + bytes(100), "metrics.png")
+        assert storage.flush(5)
+        assert value("storage_written_bytes_total") == bytes_before + 104
+        storage.close()
+        
+        # 市场操作序列结果
+        config.set('screenshot.save_path', temp_dir)
+        logger = Logger(console_output=False)
+        u2_manager = FakeDeviceManager(config, logger, device_id="metrics-device")
+        assert u2_manager.initialize()
+        market_clicker = MarketClicker(u2_manager, config, logger)
+        market_clicker.initialize()
+        assert market_clicker.execute_market_sequence()
+        assert value("market_sequence_total", device="metrics-device", result="success") == 1
+        assert value("market_sequence_duration_seconds", device="metrics-device") == 1
+        u2_manager.cleanup()
+    
+    text = registry.render()
+    for name in ("adb_command_duration_seconds", "capture_total", "storage_written_bytes_total",
+                 "market_sequence_last_success_timestamp_seconds", "template_match_duration_seconds"):
+        assert f"# TYPE {name} " in text, name
+    print("✅ 模块指标正确")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_metric_types,
+        test_endpoint_and_snapshot,
+        test_module_metrics
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR结果缓存测试
+验证缓存键、内存LRU淘汰、磁盘缓存跨实例复用与批量查询，以及流水线对重复字段只识别一次
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from recognition.ocr_cache import OCRCache
+from test.test_ocr_pipeline import create_pipeline, make_card_list
+
+
+def test_cache_key():
+    """测试缓存键只取决于图像内容和识别参数"""
+    print("测试缓存键...")
+    
+    image = np.full((32, 64), 255, dtype=np.uint8)
+    image[8:24, 10:20] = 0
+    options = {"lang": "eng", "config": "--psm 7"}
+    
+    assert OCRCache.make_key(image, options) == OCRCache.make_key(image.copy(), dict(options))
+    assert OCRCache.make_key(image, options) != OCRCache.make_key(image, {"lang": "eng", "config": "--psm 8"})
+    changed = image.copy()
+    changed[0, 0] = 0
+    assert OCRCache.make_key(image, options) != OCRCache.make_key(changed, options)
+    print("✅ 缓存键正确")
+
+
+def test_memory_lru():
+    """测试内存LRU淘汰最久未使用的条目"""
+    print("测试内存LRU...")
+    
+    cache = OCRCache(capacity=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    stats = cache.get_stats()
+    assert stats["memory_entries"] == 2 and stats["memory_hits"] == 3 and stats["misses"] == 1
+    assert not stats["disk_enabled"]
+    print("✅ 内存LRU正确")
+
+
+def test_disk_cache():
+    """测试磁盘缓存跨实例复用与关闭时裁剪"""
+    print("测试磁盘缓存...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "cache", "ocr_cache.db")
+        cache = OCRCache(capacity=8, db_path=db_path, max_disk_entries=2)
+        cache.put_many([("a", "1"), ("b", "2"), ("c", "3")])
+        cache.clear()
+        assert cache.get("c") == "3"
+        assert cache.get_stats()["disk_hits"] == 1
+        cache.get("c")
+        assert cache.get_stats()["memory_hits"] == 1
+        cache.close()
+        
+        reopened = OCRCache(capacity=8, db_path=db_path)
+        assert reopened.store.count() == 2
+        assert reopened.get("c") == "3" and reopened.get("z") is None
+        reopened.close()
+    print("✅ 磁盘缓存正确")
+
+
+def test_disk_batch_lookup():
+    """测试磁盘缓存按批查询，使用时间先记在内存中、攒够一批再写回"""
+    print("测试磁盘批量查询...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = OCRCache(capacity=8, db_path=os.path.join(temp_dir, "ocr_cache.db"))
+        cache.store.flush_size = 3
+        cache.put_many([("a", "1"), ("b", "2"), ("c", "3")])
+        cache.clear()
+        
+        def last_used():
+            return {row["key"]: row["last_used"] for row in cache.store.query("SELECT key, last_used FROM ocr_cache")}
+        
+        before = last_used()
+        time.sleep(0.01)
+        assert cache.get_many(["a", "b", "x"]) == {"a": "1", "b": "2"}
+        assert last_used() == before and len(cache.store.touched) == 2
+        stats = cache.get_stats()
+        assert stats["disk_hits"] == 2 and stats["misses"] == 1
+        
+        # 内存命中不再查询磁盘，累计满一批后写回
+        assert cache.get_many(["a", "c"]) == {"a": "1", "c": "3"}
+        assert cache.get_stats()["memory_hits"] == 1 and cache.store.touched == {}
+        assert all(last_used()[key] > before[key] for key in ("a", "b", "c"))
+        cache.close()
+    print("✅ 磁盘批量查询正确")
+
+
+def test_pipeline_uses_cache():
+    """测试流水线对重复字段只识别一次，再次提交同一图像时完全命中缓存"""
+    print("测试流水线缓存...")
+    
+    # 6张卡片共18个字段：第一行从图像顶端切分、第二行从分隔带中心切分，字段在两行中的相对位置不同，
+    # 因此只有同一行内数值相同的字段共用识别结果（第一行3种、第二行4种）
+    values = [(1, 2, 3), (1, 2, 3), (3, 2, 1), (4, 4, 4), (1, 2, 3), (3, 2, 1)]
+    pipeline, _ = create_pipeline()
+    image = make_card_list(values)
+    try:
+        first = pipeline.submit(image).result(30)
+        stats = pipeline.get_stats()
+        assert stats["fields_total"] == 18
+        assert stats["ocr_calls"] == 7
+        
+        second = pipeline.submit(image).result(30)
+        stats = pipeline.get_stats()
+        assert stats["ocr_calls"] == 7
+        assert stats["cache"]["memory_hits"] == 7 and stats["cache"]["hit_rate"] == 0.5
+        assert [(record.tier, record.quantity, record.price) for record in first] == values
+        assert [record.to_dict()["price"] for record in second] == [record.price for record in first]
+    finally:
+        pipeline.cleanup()
+    print("✅ 流水线缓存正确")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_cache_key,
+        test_memory_lru,
+        test_disk_cache,
+        test_disk_batch_lookup,
+        test_pipeline_uses_cache
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR报价识别流水线测试
+验证数字解析、行列切分、进程池识别生成报价记录，以及翻页时按行增量提交识别
+（环境中没有Tesseract，识别函数使用按圆点个数"读数"的模拟引擎）
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.uiautomator2_manager import UIAutomator2Manager
+from market_automation.market_clicker import MarketClicker
+from recognition import ocr_pipeline
+from recognition.ocr_pipeline import OCRPipeline, parse_number, normalize_crop
+from test.fake_device import FakeU2Device, make_list_content
+
+# 模拟卡片布局：每个字段区域内画若干圆点，圆点个数即字段数值
+FIELDS = {
+    "tier": {"roi": [10, 15, 200, 40]},
+    "quantity": {"roi": [10, 65, 200, 40]},
+    "price": {"roi": [10, 115, 200, 40]}
+}
+
+
+def blob_count_ocr(image, options):
+    """模拟OCR引擎：返回归一化图像中黑色圆点的个数，没有圆点时返回"-" """
+    count = cv2.connectedComponents(cv2.bitwise_not(image))[0] - 1
+    return str(count) if count else "-"
+
+
+def make_card_list(values, row_height=180, width=680, separator=8):
+    """生成卡片列表长图，values 为每张卡片的 (tier, quantity, price)，None表示空位"""
+    rows = (len(values) + 2) // 3
+    # 背景带水平渐变，避免卡片内部的整行被误识别为行分隔
+    image = np.tile((60 + np.arange(width) % 40).astype(np.uint8), (rows * row_height, 1))
+    image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    column_width = width / 3
+    for index, value in enumerate(values):
+        row, column = divmod(index, 3)
+        top, left = row * row_height, int(round(column * column_width))
+        if value is None:
+            image[top:top + row_height, left:int(round((column + 1) * column_width))] = 30
+            continue
+        for number, options in zip(value, FIELDS.values()):
+            x, y, field_width, height = options['roi']
+            image[top + y:top + y + height, left + x:left + x + field_width] = 70
+            for blob in range(number):
+                center = (left + x + 12 + blob * 16, top + y + 3 + height // 2)
+                cv2.circle(image, center, 5, (255, 255, 255), -1)
+    for row in range(rows):
+        image[row * row_height:row * row_height + separator] = 30
+    return image
+
+
+def create_pipeline(workers=2):
+    """创建使用模拟引擎的OCR流水线"""
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    config.set('ocr.workers', workers)
+    config.set('ocr.fields', FIELDS)
+    config.set('ocr.saveRecords', False)
+    config.set('ocr.cache.diskEnabled', False)
+    return OCRPipeline(config, Logger(console_output=False), ocr_function=blob_count_ocr), config
+
+
+def test_parse_and_normalize():
+    """测试数字解析与字段归一化"""
+    print("测试数字解析与归一化...")
+    
+    assert parse_number("6,900") == 6900
+    assert parse_number("244,999") == 244999
+    assert parse_number("100+") == 100
+    assert parse_number("1O5") == 105
+    assert parse_number("-") is None and parse_number("") is None
+    
+    # 深色背景上的白字归一化为白底黑字
+    region = np.full((30, 90, 3), 40, dtype=np.uint8)
+    cv2.putText(region, "6900", (5, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    binary = normalize_crop(region)
+    assert binary.shape[0] == 32 and set(np.unique(binary)) <= {0, 255}
+    assert np.count_nonzero(binary) > binary.size / 2
+    print("✅ 数字解析与归一化正确")
+
+
+def test_segment_cells():
+    """测试行列切分与空白卡片跳过"""
+    print("测试行列切分...")
+    
+    pipeline, _ = create_pipeline()
+    content = make_list_content(rows=4)
+    assert pipeline.segment_rows(content) == [(0, 183), (183, 363), (363, 543), (543, 720)]
+    assert len(pipeline.split_cells(content)) == 12
+    
+    # 残缺行不计入，空白卡片跳过
+    content[183:363, 453:] = 30
+    assert len(pipeline.split_cells(content[:600])) == 8
+    print("✅ 行列切分正确")
+
+
+def test_pipeline_records():
+    """测试进程池识别生成报价记录"""
+    print("测试进程池识别...")
+    
+    values = [(1, 3, 7), (5, 0, 12), (3, 4, 2), (2, 11, 9), None, None]
+    pipeline, _ = create_pipeline()
+    
+    future = pipeline.submit(make_card_list(values), source="list.png")
+    assert isinstance(future, Future)
+    records = future.result(30)
+    
+    assert [(record.row, record.column) for record in records] == [(0, 0), (0, 1), (0, 2), (1, 0)]
+    assert [(record.tier, record.quantity, record.price) for record in records] == [
+        (1, 3, 7), (5, None, 12), (3, 4, 2), (2, 11, 9)
+    ]
+    assert all(record.source == "list.png" and record.name.startswith("icon:") for record in records)
+    assert pipeline.validate_data(records[0].to_dict())
+    assert not pipeline.validate_data({"name": "x", "price": None})
+    
+    stats = pipeline.get_stats()
+    assert stats["cells_recognized"] == 4 and stats["records_extracted"] == 4 and stats["error_count"] == 0
+    
+    # 开启保存后识别完成即追加到按日期命名的文件
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pipeline.output_path = temp_dir
+        pipeline.save_records = True
+        pipeline.submit(make_card_list(values)).result(30)
+        files = os.listdir(temp_dir)
+        with open(os.path.join(temp_dir, files[0]), encoding="utf-8") as f:
+            assert len(f.read().splitlines()) == 4
+    pipeline.cleanup()
+    print("✅ 进程池识别生成4条报价记录")
+
+
+def test_finish_on_prepare_thread():
+    """测试写缓存和保存记录在准备线程中执行，清理时等待未完成的识别"""
+    print("测试识别收尾线程...")
+    
+    values = [(1, 3, 7), (5, 1, 12), (3, 4, 2)]
+    pipeline, _ = create_pipeline()
+    pipeline.save_records = True
+    threads = []
+    pipeline.validate_data = lambda data: True
+    pipeline.save_data = lambda data: threads.append(threading.current_thread().name)
+    
+    future = pipeline.submit(make_card_list(values))
+    pipeline.cleanup()
+    assert future.done() and len(future.result()) == 3
+    assert len(threads) == 3 and all(name.startswith("OCRPrepare") for name in threads)
+    assert not pipeline.in_flight
+    print("✅ 识别收尾在准备线程中执行")
+
+
+def test_paginator_submits_rows():
+    """测试翻页时按完整行增量提交识别，每行只识别一次"""
+    print("测试翻页增量识别...")
+    
+    values = [((index % 5) + 1, index % 7, index % 11 + 1) for index in range(30)]
+    pipeline, config = create_pipeline()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config.set('screenshot.save_path', temp_dir)
+        config.set('market_automation.settle.enabled', False)
+        config.set('market_automation.after_scroll', 0)
+        logger = Logger(console_output=False)
+        
+        device = FakeU2Device(initial="quotes", content=make_card_list(values))
+        u2_manager = UIAutomator2Manager(config, logger)
+        u2_manager.device = device
+        u2_manager.is_connected = True
+        market_clicker = MarketClicker(u2_manager, config, logger)
+        market_clicker.attach_ocr_pipeline(pipeline)
+        
+        result = market_clicker.quote_paginator.paginate(save=False)
+        records = market_clicker.quote_paginator.collect_records(30)
+        
+        assert result.reached_end and result.ocr_rows == 10
+        assert len(market_clicker.quote_paginator.ocr_futures) > 1
+        assert [record.row * 3 + record.column for record in records] == list(range(30))
+        assert [record.price for record in records] == [value[2] for value in values]
+    pipeline.cleanup()
+    print(f"✅ 分{len(market_clicker.quote_paginator.ocr_futures)}批识别{len(records)}张卡片")
+
+
+def test_market_clicker_creates_pipeline():
+    """测试按 ocr.enabled 在初始化时创建OCR流水线，清理时一并关闭"""
+    print("测试按配置创建OCR流水线...")
+    
+    pipeline, config = create_pipeline()
+    logger = Logger(console_output=False)
+    u2_manager = UIAutomator2Manager(config, logger)
+    market_clicker = MarketClicker(u2_manager, config, logger)
+    assert market_clicker.initialize()
+    assert market_clicker.quote_paginator.ocr_pipeline is None
+    
+    # 已绑定外部实例时不再创建，清理时也不关闭外部实例
+    config.set('ocr.enabled', True)
+    market_clicker = MarketClicker(u2_manager, config, logger)
+    market_clicker.attach_ocr_pipeline(pipeline)
+    assert market_clicker.initialize() and market_clicker.quote_paginator.ocr_pipeline is pipeline
+    market_clicker.cleanup()
+    assert market_clicker.quote_paginator.ocr_pipeline is pipeline
+    
+    market_clicker = MarketClicker(u2_manager, config, logger)
+    assert market_clicker.initialize()
+    owned = market_clicker.quote_paginator.ocr_pipeline
+    assert isinstance(owned, OCRPipeline) and owned.is_initialized
+    market_clicker.cleanup()
+    assert market_clicker.quote_paginator.ocr_pipeline is None and not owned.is_initialized
+    print("✅ 按配置创建OCR流水线正确")
+
+
+def test_unavailable_engine():
+    """测试未安装pytesseract时的处理"""
+    print("测试识别引擎不可用...")
+    
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    pipeline = OCRPipeline(config, Logger(console_output=False))
+    if ocr_pipeline.pytesseract is None:
+        assert not pipeline.available
+        assert pipeline.submit(make_list_content(rows=2)) is None
+        assert pipeline.recognize_text(make_list_content(rows=1)) is None
+    assert pipeline.match_template(None, None) is None
+    print("✅ 识别引擎不可用时返回None")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_parse_and_normalize,
+        test_segment_cells,
+        test_pipeline_records,
+        test_finish_on_prepare_thread,
+        test_paginator_submits_rows,
+        test_market_clicker_creates_pipeline,
+        test_unavailable_engine
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
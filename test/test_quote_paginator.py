@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报价列表翻页测试
+验证行分隔识别、按行高对齐的滑动距离、到底检测、翻页上限以及速度统计
+"""
+
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.uiautomator2_manager import UIAutomator2Manager
+from market_automation.market_clicker import MarketClicker
+from recognition.scroll_tracker import find_row_separators, estimate_row_pitch
+from test.fake_device import FakeU2Device, make_list_content
+
+
+def create_clicker(device, save_path, **automation):
+    """创建连接到模拟滚动设备的市场点击器（关闭画面稳定检测）"""
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    config.set('screenshot.save_path', save_path)
+    config.set('market_automation.settle.enabled', False)
+    config.set('market_automation.after_scroll', 0)
+    for key, value in automation.items():
+        config.set(f'automation.{key}', value)
+    logger = Logger(console_output=False)
+    
+    u2_manager = UIAutomator2Manager(config, logger)
+    u2_manager.device = device
+    u2_manager.is_connected = True
+    return MarketClicker(u2_manager, config, logger)
+
+
+def test_row_separators():
+    """测试行分隔识别与行高估计"""
+    print("测试行分隔识别...")
+    
+    content = make_list_content(rows=6)
+    separators = find_row_separators(content)
+    # 顶部与图像边缘相接的分隔带不计入
+    assert separators == [183 + 180 * index for index in range(5)]
+    assert estimate_row_pitch(separators) == 180
+    assert estimate_row_pitch(separators[:1]) is None
+    assert find_row_separators(content[190:350]) == []
+    print("✅ 行分隔识别正确")
+
+
+def test_paginate_until_end():
+    """测试滚动到底并按行高对齐滑动距离"""
+    print("测试滚动到列表底部...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        device = FakeU2Device(initial="quotes", inertia=1.1, content=make_list_content(rows=20))
+        market_clicker = create_clicker(device, temp_dir, maxScrollCount=20, maxPages=20)
+        result = market_clicker.quote_paginator.paginate()
+        
+        assert result.reached_end and result.lost_count == 0
+        assert np.array_equal(cv2.imread(result.stitched_path), device.scroll_list["content"])
+        assert result.rows == 20 and result.row_pitch == 180
+        # 校准后每次前进3个整行（一屏减去重叠区域内最多的整行数），最后一次滑动画面不变
+        assert all(abs(offset - 540) <= 2 for offset in result.offsets[2:-2]), result.offsets
+        assert result.offsets[-1] == 0
+        assert result.pages == result.swipes == len(result.offsets)
+        assert result.pages_per_second > 0 and result.rows_per_second > 0
+        
+        status = market_clicker.get_status()
+        assert status['pagination']['rows'] == 20
+    print(f"✅ {result.pages}页，{result.rows}行，{result.rows_per_second:.1f}行/秒")
+
+
+def test_pagination_limits():
+    """测试最多页数与最多滑动次数限制"""
+    print("测试翻页上限...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        device = FakeU2Device(initial="quotes", content=make_list_content(rows=20))
+        result = create_clicker(device, temp_dir, maxPages=3).quote_paginator.paginate(save=False)
+        assert result.pages == 3 and not result.reached_end
+        assert result.stitched_path is None
+        
+        device = FakeU2Device(initial="quotes", content=make_list_content(rows=20))
+        result = create_clicker(device, temp_dir, maxScrollCount=2).quote_paginator.paginate(save=False)
+        assert result.swipes == 2 and len(device.actions) == 2
+    print("✅ 翻页上限生效")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_row_separators,
+        test_paginate_until_end,
+        test_pagination_limits
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
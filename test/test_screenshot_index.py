@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图文件索引测试
+验证最新N个、时间范围与按任务查询、从内容存储清单收录已有文件以及文件存储管理器按索引清理截图
+"""
+
+import glob
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.file_storage_manager import FileStorageManager
+from screenshot.screenshot_index import ScreenshotIndex
+
+
+def test_index_queries():
+    """测试索引查询与过期删除"""
+    print("测试截图索引查询...")
+    
+    index = ScreenshotIndex(":memory:")
+    assert index.connect()
+    for number in range(10):
+        index.add(f"/shots/{number}.png", timestamp=100 + number, size=number, task_id="even" if number % 2 == 0 else "odd")
+    
+    assert [row["path"] for row in index.latest(3)] == ["/shots/9.png", "/shots/8.png", "/shots/7.png"]
+    assert [row["path"] for row in index.latest(10, task_id="even", start_time=103)] == \
+        ["/shots/8.png", "/shots/6.png", "/shots/4.png"]
+    assert [row["path"] for row in index.latest(10, start_time=102, end_time=104)] == \
+        ["/shots/4.png", "/shots/3.png", "/shots/2.png"]
+    
+    # 再次引用同一文件时更新为较新的时间，保留原任务ID
+    index.add("/shots/0.png", timestamp=200, size=0)
+    index.add("/shots/0.png", timestamp=150, size=0)
+    assert index.latest(1) == [{"path": "/shots/0.png", "timestamp": 200, "size": 0, "task_id": "even", "digest": None}]
+    
+    plan = index.query("EXPLAIN QUERY PLAN SELECT path FROM screenshots WHERE timestamp < ?", (0,))
+    assert any("idx_screenshots_timestamp" in row["detail"] for row in plan)
+    
+    assert sorted(index.delete_before(105)) == [f"/shots/{number}.png" for number in range(1, 5)]
+    assert index.count() == 6
+    assert index.remove("/shots/9.png") and not index.remove("/shots/9.png")
+    index.disconnect()
+    print("✅ 截图索引查询正确")
+
+
+def test_storage_manager_index():
+    """测试文件存储管理器按索引查询和清理截图，不收录目录中未登记的文件"""
+    print("测试文件存储管理器截图索引...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        screenshot_dir = os.path.join(temp_dir, "screenshots")
+        os.makedirs(screenshot_dir)
+        existing = os.path.join(screenshot_dir, "old.png")
+        with open(existing, "wb") as f:
+            f.write(b"\x89PNG old")
+        os.utime(existing, (time.time() - 30 * 24 * 3600,) * 2)
+        
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('database.dataPath', temp_dir)
+        config.set('database.fileStorage.dedupScreenshots', False)
+        storage = FileStorageManager(config, Logger(console_output=False))
+        
+        # 目录中已有的文件不扫描收录，过期清理也不会删除
+        assert storage.get_screenshots() == []
+        
+        paths = [storage.save_screenshot(b"\x89PNG" + bytes([number]), f"shot_{number}.png") for number in range(3)]
+        assert storage.flush(5)
+        assert storage.get_screenshots(limit=2) == [paths[2], paths[1]]
+        assert storage.get_screenshots(start_time=time.time() - 60) == paths[::-1]
+        
+        assert storage.cleanup_old_files()
+        assert os.path.exists(existing)
+        assert all(os.path.exists(path) for path in paths)
+        assert storage.get_screenshots() == paths[::-1]
+        storage.close()
+        
+        # 重新打开时直接使用已有索引
+        storage = FileStorageManager(config, Logger(console_output=False))
+        assert storage.screenshot_index.count() == 3
+        storage.close()
+    
+    # 索引为空时只收录内容存储清单中的文件
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('database.dataPath', temp_dir)
+        storage = FileStorageManager(config, Logger(console_output=False))
+        path = storage.save_screenshot(b"\x89PNG blob")
+        assert storage.flush(5)
+        storage.close()
+        for name in glob.glob(os.path.join(temp_dir, "screenshots", "screenshot_index.db*")):
+            os.remove(name)
+        os.utime(path, (time.time() - 30 * 24 * 3600,) * 2)
+        
+        storage = FileStorageManager(config, Logger(console_output=False))
+        assert storage.get_screenshots() == [path]
+        assert storage.cleanup_old_files()
+        assert not os.path.exists(path)
+        storage.close()
+    print("✅ 文件存储管理器截图索引正确")
+
+
+def test_expired_blob_is_rewritten():
+    """测试过期删除的去重文件在再次保存时重新写入"""
+    print("测试去重文件过期后重新写入...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('database.dataPath', temp_dir)
+        storage = FileStorageManager(config, Logger(console_output=False))
+        
+        path = storage.save_screenshot(b"\x89PNG same")
+        assert storage.flush(5)
+        assert storage._cleanup_screenshots(-1) == 1
+        assert not os.path.exists(path)
+        
+        assert storage.save_screenshot(b"\x89PNG same") == path
+        assert storage.flush(5)
+        assert os.path.exists(path)
+        assert storage.get_screenshots() == [path]
+        storage.close()
+    print("✅ 去重文件过期后重新写入")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_index_queries,
+        test_storage_manager_index,
+        test_expired_blob_is_rewritten
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容寻址截图存储测试
+验证相同画面只写入一次、感知哈希合并相似画面、写入失败回滚、清单重建与压缩，
+以及市场点击器和文件存储管理器的去重保存
+"""
+
+import glob
+import os
+import sys
+import tempfile
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.file_storage_manager import FileStorageManager
+from screenshot.screenshot_store import ScreenshotStore
+from market_automation.market_clicker import MarketClicker
+from test.fake_device import FrameU2Manager
+
+SAMPLE_SCREENSHOT = os.path.join(PROJECT_ROOT, "data", "screenshots", "20251122_000009_full.png")
+
+
+class FailingWriter:
+    """前 failures 次内容写入失败的异步写入器替身（清单照常写入）"""
+    
+    def __init__(self, failures=1):
+        self.failures = failures
+    
+    def write(self, path, data, append=False):
+        future = Future()
+        if "blobs" in path and self.failures > 0:
+            self.failures -= 1
+            future.set_exception(OSError("磁盘已满"))
+            return future
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab' if append else 'wb') as f:
+            f.write(data)
+        future.set_result(path)
+        return future
+
+
+def blob_files(root_dir):
+    """列出存储中的内容文件"""
+    return glob.glob(os.path.join(root_dir, "blobs", "*", "*"))
+
+
+def test_exact_duplicates():
+    """测试相同画面只写入一次，清单保留每个逻辑文件名"""
+    print("测试完全相同画面去重...")
+    
+    frame = cv2.imread(SAMPLE_SCREENSHOT)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = ScreenshotStore(temp_dir)
+        first = store.put_frame(frame, "test_main_1.png", timestamp=1)
+        second = store.put_frame(frame.copy(), "test_main_2.png", timestamp=2)
+        other = store.put_frame(frame[:, ::-1], "mirrored.png", timestamp=3)
+        
+        assert not first.deduplicated and second.deduplicated and not other.deduplicated
+        assert first.path == second.path != other.path
+        assert np.array_equal(cv2.imread(first.path), frame)
+        assert len(blob_files(temp_dir)) == 2
+        assert store.resolve("test_main_2.png") == first.path
+        assert [entry.name for entry in store.get_entries(limit=2)] == ["mirrored.png", "test_main_2.png"]
+        assert store.get_stats()["bytes_saved"] == frame.nbytes
+        
+        # 重新打开后从清单恢复索引
+        reopened = ScreenshotStore(temp_dir)
+        assert reopened.resolve("test_main_1.png") == first.path
+        assert reopened.put_frame(frame, "test_main_3.png").deduplicated
+        assert reopened.get_stats()["entries"] == 4
+        assert len(blob_files(temp_dir)) == 2
+    print("✅ 相同画面只写入一次")
+
+
+def test_near_duplicates():
+    """测试感知哈希把几乎相同的画面指向已有文件"""
+    print("测试相似画面去重...")
+    
+    frame = cv2.imread(SAMPLE_SCREENSHOT)
+    noisy = frame.copy()
+    noisy[600:604, 300:304] = 255
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        exact_only = ScreenshotStore(os.path.join(temp_dir, "exact"))
+        exact_only.put_frame(frame, "a.png")
+        assert not exact_only.put_frame(noisy, "b.png").deduplicated
+        
+        store = ScreenshotStore(os.path.join(temp_dir, "near"), near_duplicate_distance=4)
+        original = store.put_frame(frame, "a.png")
+        similar = store.put_frame(noisy, "b.png")
+        different = store.put_frame(255 - frame, "c.png")
+        
+        assert similar.near_duplicate and similar.path == original.path
+        assert not different.deduplicated
+        assert ScreenshotStore.perceptual_hash(frame) == int(original.phash, 16)
+    print("✅ 相似画面合并正确")
+
+
+def test_failed_write_not_reused():
+    """测试内容写入失败时不登记到去重索引，之后相同内容重新写入"""
+    print("测试写入失败回滚...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = ScreenshotStore(temp_dir, writer=FailingWriter(), logger=Logger(console_output=False))
+        first = store.put_bytes(b"\x89PNG same", "a.png")
+        assert first.future.exception() is not None and not os.path.exists(first.path)
+        second = store.put_bytes(b"\x89PNG same", "b.png")
+        assert not second.deduplicated and second.future.result() == second.path
+        assert os.path.exists(second.path)
+        assert store.put_bytes(b"\x89PNG same", "c.png").deduplicated
+        assert store.get_stats()["unique_blobs"] == 1
+    print("✅ 写入失败回滚正确")
+
+
+def test_manifest_compaction():
+    """测试内存只保留最近的条目，清单过长时重写，重新打开时只读取保留的条目"""
+    print("测试清单压缩...")
+    
+    def manifest_lines(root_dir):
+        with open(os.path.join(root_dir, "manifest.jsonl"), encoding="utf-8") as f:
+            return len(f.read().splitlines())
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = ScreenshotStore(temp_dir, max_entries=3)
+        for index in range(7):
+            store.put_bytes(b"\x89PNG" + bytes([index % 4]), f"shot_{index}.png", timestamp=index)
+        
+        # 第6条时清单重写为3条，随后追加1条
+        assert manifest_lines(temp_dir) == 4
+        assert [entry.name for entry in store.get_entries()] == ["shot_6.png", "shot_5.png", "shot_4.png"]
+        assert store.resolve("shot_0.png") is None and store.resolve("shot_6.png") is not None
+        stats = store.get_stats()
+        assert stats["entries"] == 3 and stats["deduplicated"] == 3 and stats["unique_blobs"] == 4
+        
+        reopened = ScreenshotStore(temp_dir, max_entries=3)
+        assert manifest_lines(temp_dir) == 3 and reopened.get_stats()["entries"] == 3
+        assert reopened.put_bytes(b"\x89PNG\x00", "shot_7.png").deduplicated
+    print("✅ 清单压缩正确")
+
+
+def test_market_clicker_dedup():
+    """测试市场点击器重复截图只写入一次"""
+    print("测试市场点击器截图去重...")
+    
+    frame = cv2.imread(SAMPLE_SCREENSHOT)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('screenshot.save_path', temp_dir)
+        config.set('screenshot.dedup.enabled', True)
+        market_clicker = MarketClicker(FrameU2Manager(frame), config, Logger(console_output=False))
+        
+        paths = [market_clicker.take_screenshot(f"before_scroll_{index}") for index in range(5)]
+        assert len(set(paths)) == 1 and os.path.exists(paths[0])
+        assert len(blob_files(temp_dir)) == 1
+        assert market_clicker.screenshot_store.get_stats()["deduplicated"] == 4
+        assert [row["path"] for row in market_clicker.screenshot_index.latest()] == paths[:1]
+        
+        # 内容文件被过期清理删除后，相同画面重新写入
+        os.remove(paths[0])
+        assert market_clicker.take_screenshot("after_cleanup") == paths[0] and os.path.exists(paths[0])
+        market_clicker.cleanup()
+        
+        # 未启用去重时按文件名保存，同样登记到截图索引
+        config.set('screenshot.dedup.enabled', False)
+        market_clicker = MarketClicker(FrameU2Manager(frame), config, Logger(console_output=False))
+        path = market_clicker.take_screenshot("plain")
+        assert os.path.dirname(path) == temp_dir
+        assert market_clicker.screenshot_index.latest(1)[0]["path"] == path
+        assert market_clicker.screenshot_index.count() == 2
+        market_clicker.cleanup()
+    print("✅ 市场点击器截图去重")
+
+
+def test_market_clicker_shared_store():
+    """测试市场点击器绑定文件存储管理器的存储，同一目录只有一个存储实例"""
+    print("测试共用截图存储...")
+    
+    frame = cv2.imread(SAMPLE_SCREENSHOT)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('database.dataPath', temp_dir)
+        config.set('screenshot.save_path', os.path.join(temp_dir, "screenshots"))
+        storage = FileStorageManager(config, Logger(console_output=False))
+        market_clicker = MarketClicker(FrameU2Manager(frame), config, Logger(console_output=False))
+        market_clicker.attach_screenshot_store(storage.screenshot_store)
+        
+        clicker_path = market_clicker.take_screenshot("market")
+        storage_path = storage.save_screenshot(b"\x89PNG other")
+        assert storage.flush(5)
+        assert market_clicker.screenshot_store is storage.screenshot_store
+        assert [entry.path for entry in storage.screenshot_store.get_entries()] == [storage_path, clicker_path]
+        assert sorted(storage.get_screenshots()) == sorted([clicker_path, storage_path])
+        
+        # 绑定的存储由其所有者关闭
+        market_clicker.cleanup()
+        assert market_clicker.screenshot_store is storage.screenshot_store
+        storage.close()
+    print("✅ 共用截图存储正确")
+
+
+def test_storage_manager_dedup():
+    """测试文件存储管理器按内容保存截图"""
+    print("测试文件存储管理器去重...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('database.dataPath', temp_dir)
+        storage = FileStorageManager(config, Logger(console_output=False))
+        
+        paths = [storage.save_screenshot(b"\x89PNG" + bytes([index % 2])) for index in range(6)]
+        assert storage.flush(5)
+        assert len(set(paths)) == 2 and all(path.endswith(".png") for path in paths)
+        assert len(blob_files(os.path.join(temp_dir, "screenshots"))) == 2
+        assert len(storage.get_screenshots()) == 2
+        assert storage.get_write_stats()["dedup"]["unique_blobs"] == 2
+        storage.close()
+    print("✅ 文件存储管理器去重")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_exact_duplicates,
+        test_near_duplicates,
+        test_failed_write_not_reused,
+        test_manifest_compaction,
+        test_market_clicker_dedup,
+        test_market_clicker_shared_store,
+        test_storage_manager_dedup
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
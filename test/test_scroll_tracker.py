@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报价列表滚动跟踪测试
+验证滚动偏移估计、惯性校准、跟踪丢失后的重新同步以及市场点击器的整表扫描
+"""
+
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.uiautomator2_manager import UIAutomator2Manager
+from market_automation.market_clicker import MarketClicker
+from recognition.scroll_tracker import ScrollTracker
+from test.fake_device import FakeU2Device
+
+
+def scan(device, tracker, max_swipes=20):
+    """按跟踪器给出的距离滑动模拟设备直到列表到底"""
+    tracker.add_frame(device.screenshot(format='opencv'))
+    for _ in range(max_swipes):
+        if tracker.at_end:
+            break
+        distance = tracker.next_swipe_distance()
+        device.swipe(360, 1170, 360, 1170 - distance)
+        frame = device.screenshot(format='opencv')
+        if tracker.add_frame(frame, commanded=distance) is None:
+            tracker.resync(frame)
+    return tracker.stitched()
+
+
+def test_estimate_offset():
+    """测试相邻两帧的偏移估计"""
+    print("测试滚动偏移估计...")
+    
+    scroll_list = FakeU2Device(initial="quotes").scroll_list
+    content = scroll_list["content"]
+    tracker = ScrollTracker(scroll_list["viewport"])
+    previous = tracker._signature(content[:720])
+    for offset in (0, 37, 180, 415, 560):
+        current = tracker._signature(content[offset:offset + 720])
+        assert tracker.estimate_offset(previous, current)[0] == offset
+    
+    # 超出重叠区域时不做错误匹配
+    current = tracker._signature(content[700:1420])
+    assert tracker.estimate_offset(previous, current) is None
+    print("✅ 偏移估计正确")
+
+
+def test_stitch_with_inertia():
+    """测试不同惯性下拼接结果与完整列表一致"""
+    print("测试惯性滚动下的拼接...")
+    
+    for inertia in (0.5, 0.8, 1.0, 1.15, 1.3):
+        device = FakeU2Device(initial="quotes", inertia=inertia)
+        tracker = ScrollTracker(device.scroll_list["viewport"])
+        stitched = scan(device, tracker)
+        
+        assert np.array_equal(stitched, device.scroll_list["content"]), inertia
+        stats = tracker.get_stats()
+        assert stats["at_end"] and stats["lost_count"] == 0
+        assert stats["stitched_height"] == device.scroll_list["content"].shape[0]
+        # 校准后的每次滑动都前进一屏减去重叠区域（最后一次受列表底部限制，惯性过小时受最大滑动距离限制）
+        if inertia >= 0.8:
+            assert all(offset == 560 for offset in stats["offsets"][1:-2]), stats["offsets"]
+    print("✅ 各惯性系数下拼接结果一致")
+
+
+def test_lost_tracking_resync():
+    """测试跟踪丢失后重新同步"""
+    print("测试跟踪丢失...")
+    
+    device = FakeU2Device(initial="quotes")
+    tracker = ScrollTracker(device.scroll_list["viewport"])
+    tracker.add_frame(device.screenshot(format='opencv'))
+    
+    device.swipe(360, 1170, 360, 450)
+    device.swipe(360, 1170, 360, 1000)
+    frame = device.screenshot(format='opencv')
+    assert tracker.add_frame(frame, commanded=720) is None
+    tracker.resync(frame)
+    
+    stats = tracker.get_stats()
+    assert stats["lost_count"] == 1 and stats["gaps"] == 1
+    assert tracker.stitched().shape == (1440, 680, 3)
+    print("✅ 跟踪丢失后从当前帧继续拼接")
+
+
+def test_market_clicker_scan():
+    """测试市场点击器扫描整个报价列表"""
+    print("测试市场点击器扫描报价列表...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('screenshot.save_path', temp_dir)
+        config.set('market_automation.settle.enabled', False)
+        config.set('market_automation.after_scroll', 0)
+        logger = Logger(console_output=False)
+        
+        device = FakeU2Device(initial="quotes", inertia=1.2)
+        u2_manager = UIAutomator2Manager(config, logger)
+        u2_manager.device = device
+        u2_manager.is_connected = True
+        
+        market_clicker = MarketClicker(u2_manager, config, logger)
+        path = market_clicker.scan_quote_list()
+        
+        assert path and np.array_equal(cv2.imread(path), device.scroll_list["content"])
+        swipes = [action for action in device.actions if action[0] == 'swipe']
+        assert len(swipes) == market_clicker.scroll_tracker.frame_count - 1 <= 6
+        assert all(action[2] == 1170 for action in swipes)
+        assert market_clicker.get_status()['scroll_tracker']['at_end']
+    print(f"✅ {len(swipes)}次滑动扫描完整列表")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_estimate_offset,
+        test_stitch_with_inertia,
+        test_lost_tracking_resync,
+        test_market_clicker_scan
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
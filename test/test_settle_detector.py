@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+画面稳定检测测试
+验证稳定检测在画面静止后立即返回，并在画面持续变化时按上限超时
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from screenshot.settle_detector import ScreenSettleDetector
+
+
+class SequenceSource:
+    """按顺序返回帧的帧来源，序列结束后重复最后一帧"""
+    
+    def __init__(self, frames):
+        self.frames = frames
+        self.index = 0
+    
+    def __call__(self):
+        frame = self.frames[min(self.index, len(self.frames) - 1)]
+        self.index += 1
+        return frame
+
+
+def make_frame(value):
+    return np.full((128, 72, 3), value, dtype=np.uint8)
+
+
+def test_returns_once_stable():
+    """测试画面静止后提前返回"""
+    print("测试画面稳定后提前返回...")
+    
+    source = SequenceSource([make_frame(0), make_frame(80), make_frame(160), make_frame(200)])
+    detector = ScreenSettleDetector(source, stable_frames=3, poll_interval=0, min_wait=0)
+    
+    result = detector.wait_until_stable(timeout=2.0)
+    assert result.stable
+    assert result.elapsed < 1.0
+    assert result.frames == 7
+    print(f"✅ 稳定检测耗时：{result.elapsed:.3f}秒")
+
+
+def test_times_out_while_changing():
+    """测试画面持续变化时按上限超时"""
+    print("测试画面持续变化时超时...")
+    
+    frames = [make_frame(i * 40 % 256) for i in range(1000)]
+    detector = ScreenSettleDetector(SequenceSource(frames), poll_interval=0.01, min_wait=0)
+    
+    start = time.time()
+    result = detector.wait_until_stable(timeout=0.3)
+    assert not result.stable
+    assert 0.25 <= time.time() - start < 1.0
+    print("✅ 超时返回正确")
+
+
+def test_reference_requires_change():
+    """测试提供参考帧时需先观察到画面变化"""
+    print("测试参考帧变化检测...")
+    
+    reference = make_frame(0)
+    frames = [make_frame(0)] * 5 + [make_frame(120)]
+    detector = ScreenSettleDetector(SequenceSource(frames), stable_frames=2,
+                                    poll_interval=0, min_wait=0, change_timeout=5)
+    
+    result = detector.wait_until_stable(timeout=2.0, reference=reference)
+    assert result.stable and result.changed
+    assert result.frames == 8
+    
+    # 没有参考帧时以第一帧为基准：操作前的静止画面不会被当作已稳定
+    frames = [make_frame(0)] * 4 + [make_frame(120)]
+    detector = ScreenSettleDetector(SequenceSource(frames), stable_frames=2,
+                                    poll_interval=0, min_wait=0, change_timeout=5)
+    result = detector.wait_until_stable(timeout=2.0)
+    assert result.stable and result.changed
+    assert result.frames == 7
+    
+    # 画面一直未变化时，change_timeout 后按普通稳定检测返回
+    detector = ScreenSettleDetector(SequenceSource([make_frame(0)]), stable_frames=2,
+                                    poll_interval=0.01, min_wait=0, change_timeout=0.1)
+    result = detector.wait_until_stable(timeout=2.0)
+    assert result.stable and 0.1 <= result.elapsed < 1.0
+    
+    roi_signature = detector.signature(make_frame(10), roi=(0, 0, 32, 64))
+    assert roi_signature.shape == (8, 4)
+    print("✅ 参考帧变化检测正确")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_returns_once_stable,
+        test_times_out_while_changing,
+        test_reference_requires_change
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板匹配器测试
+使用录制截图验证模板缓存和内存帧匹配
+"""
+
+import os
+import sys
+
+import cv2
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.frame_utils import encode_frame
+from recognition.template_matcher import TemplateMatcher
+
+QUOTE_SCREENSHOT = os.path.join(PROJECT_ROOT, "data", "screenshots", "before_scroll_800_20251122_014318.png")
+OFF_BUTTON = os.path.join(PROJECT_ROOT, "market_automation", "off_btn.png")
+MARKET_BUTTON = os.path.join(PROJECT_ROOT, "market_automation", "market_btn.png")
+
+
+def create_matcher():
+    """创建模板匹配器"""
+    config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+    matcher = TemplateMatcher(config, Logger(console_output=False))
+    matcher.initialize()
+    return matcher
+
+
+def test_match_off_button():
+    """测试在内存帧中定位关闭按钮"""
+    print("测试关闭按钮匹配...")
+    
+    matcher = create_matcher()
+    frame = cv2.imread(QUOTE_SCREENSHOT)
+    
+    result = matcher.match_template(frame, OFF_BUTTON, threshold=0.9)
+    assert result is not None
+    assert abs(result['x'] - 683) <= 2 and abs(result['y'] - 331) <= 2
+    
+    # 编码后的截图数据同样可以匹配
+    assert matcher.match_template(encode_frame(frame), OFF_BUTTON, threshold=0.9) is not None
+    print(f"✅ 关闭按钮坐标：({result['x']}, {result['y']})，匹配度：{result['score']:.2f}")
+
+
+def test_template_cache():
+    """测试模板只解码一次"""
+    print("测试模板缓存...")
+    
+    matcher = create_matcher()
+    assert matcher.register_template("off_button", OFF_BUTTON)
+    entry = matcher.get_template("off_button")
+    
+    assert entry.gray.ndim == 2
+    assert len(entry.pyramid) >= 2
+    assert entry.pyramid[1].shape[0] == (entry.height + 1) // 2
+    assert matcher.get_template("off_button") is entry
+    
+    frame = cv2.imread(QUOTE_SCREENSHOT)
+    assert matcher.locate_element(frame, {'template': "off_button", 'threshold': 0.9}) is not None
+    assert matcher.locate_element(frame, {'template': "off_button", 'threshold': 0.9}) is not None
+    assert matcher.get_stats()["cache_misses"] == 1
+    print("✅ 模板缓存正确")
+
+
+def test_template_missing():
+    """测试模板不存在时返回None"""
+    print("测试模板不存在...")
+    
+    matcher = create_matcher()
+    frame = cv2.imread(QUOTE_SCREENSHOT)
+    assert matcher.match_template(frame, os.path.join(PROJECT_ROOT, "missing.png")) is None
+    print("✅ 模板不存在时返回None")
+
+
+def test_roi_search():
+    """测试搜索区域命中与未命中回退全屏"""
+    print("测试搜索区域匹配...")
+    
+    matcher = create_matcher()
+    frame = cv2.imread(QUOTE_SCREENSHOT)
+    
+    # 区域内命中，不再进行全屏搜索
+    assert matcher.register_template("off_button", OFF_BUTTON, roi=(630, 280, 100, 100), threshold=0.9)
+    result = matcher.match_template(frame, "off_button")
+    assert result['mode'] == 'roi'
+    assert abs(result['x'] - 683) <= 2 and abs(result['y'] - 331) <= 2
+    
+    # 区域未命中时回退到全屏搜索
+    result = matcher.match_template(frame, "off_button", roi=(0, 0, 100, 100))
+    assert result['mode'] != 'roi'
+    assert abs(result['x'] - 683) <= 2 and abs(result['y'] - 331) <= 2
+    
+    stats = matcher.get_stats()
+    assert stats["roi_hits"] == 1 and stats["roi_misses"] == 1
+    print("✅ 搜索区域匹配正确")
+
+
+def test_coarse_to_fine_matches_full():
+    """测试金字塔粗到精搜索与全图搜索结果一致"""
+    print("测试粗到精搜索...")
+    
+    matcher = create_matcher()
+    frame = cv2.imread(QUOTE_SCREENSHOT)
+    prepared = matcher.prepare_frame(frame)
+    
+    full = matcher.match_template(prepared, OFF_BUTTON, threshold=0.9, mode='full')
+    coarse = matcher.match_template(prepared, OFF_BUTTON, threshold=0.9, mode='coarse_to_fine')
+    assert coarse['mode'] == 'coarse_to_fine'
+    assert (coarse['x'], coarse['y']) == (full['x'], full['y'])
+    assert abs(coarse['score'] - full['score']) < 1e-4
+    assert prepared.level(2).shape[0] == (prepared.level(1).shape[0] + 1) // 2
+    print(f"✅ 粗到精搜索坐标：({coarse['x']}, {coarse['y']})")
+
+
+def test_match_many():
+    """测试单帧批量匹配多个模板"""
+    print("测试批量模板匹配...")
+    
+    matcher = create_matcher()
+    frame = cv2.imread(QUOTE_SCREENSHOT)
+    card = frame[500:640, 20:220].copy()
+    
+    assert matcher.register_template("off_button", OFF_BUTTON, threshold=0.9)
+    assert matcher.register_template("market_button", MARKET_BUTTON, threshold=0.9)
+    assert matcher.register_template("quote_card", card, threshold=0.95)
+    
+    hits = matcher.match_many(frame)
+    assert set(hits) == {"off_button", "quote_card"}
+    assert hits["quote_card"]['left'] == 20 and hits["quote_card"]['top'] == 500
+    
+    # 与逐个匹配结果一致
+    single = matcher.match_template(frame, "off_button")
+    assert (hits["off_button"]['x'], hits["off_button"]['y']) == (single['x'], single['y'])
+    assert abs(hits["off_button"]['score'] - single['score']) < 1e-6
+    
+    # 只匹配指定模板
+    assert set(matcher.match_many(frame, ["market_button", "off_button"])) == {"off_button"}
+    assert matcher.get_stats()["batch_count"] == 2
+    matcher.cleanup()
+    print(f"✅ 批量匹配命中：{sorted(hits)}")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_match_off_button,
+        test_template_cache,
+        test_template_missing,
+        test_roi_search,
+        test_coarse_to_fine_matches_full,
+        test_match_many
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+耗时追踪测试
+验证嵌套区间、装饰器参数记录、环形缓冲区、Chrome trace 导出，以及市场操作序列各步骤的追踪
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_manager import ConfigManager
+from utils.logger import Logger
+from utils.tracing import Tracer, tracer, configure_tracing
+from market_automation.market_clicker import MarketClicker
+from test.fake_device import FakeDeviceManager
+
+
+class PerformanceLog:
+    """收集 log_performance 调用的日志记录器"""
+    
+    def __init__(self):
+        self.records = []
+    
+    def log_performance(self, operation, duration, details=""):
+        self.records.append((operation, duration, details))
+
+
+def test_nested_spans():
+    """测试嵌套区间的父子关系、附加信息与异常记录"""
+    print("测试嵌套区间...")
+    
+    local_tracer = Tracer(capacity=100)
+    with local_tracer.span("outer", "test", step=1) as outer:
+        with local_tracer.span("inner", "test") as inner:
+            inner.set(size=10)
+        outer.set(done=True)
+    try:
+        with local_tracer.span("failed", "test"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    
+    inner_span, outer_span, failed_span = local_tracer.get_spans()
+    assert inner_span.parent_id == outer_span.span_id and inner_span.depth == 1
+    assert outer_span.parent_id is None and failed_span.parent_id is None
+    assert outer_span.start <= inner_span.start and inner_span.end <= outer_span.end
+    assert outer_span.args == {"step": 1, "done": True} and inner_span.args == {"size": 10}
+    assert failed_span.error == "ValueError: boom"
+    assert local_tracer.get_stats()["spans"]["failed"]["errors"] == 1
+    print("✅ 嵌套区间正确")
+
+
+def test_decorator_and_ring():
+    """测试装饰器参数记录、关闭追踪与环形缓冲区"""
+    print("测试装饰器与环形缓冲区...")
+    
+    local_tracer = Tracer(capacity=5)
+    
+    @local_tracer.trace("work", "test", record_args=("value",))
+    def work(value, scale=2):
+        return value * scale
+    
+    assert [work(index) for index in range(8)] == [index * 2 for index in range(8)]
+    spans = local_tracer.get_spans()
+    assert len(spans) == 5 and [span.args["value"] for span in spans] == [3, 4, 5, 6, 7]
+    stats = local_tracer.get_stats()
+    assert stats["recorded"] == 8 and stats["dropped"] == 3 and stats["spans"]["work"]["count"] == 5
+    
+    local_tracer.configure(enabled=False)
+    assert work(1) == 2
+    with local_tracer.span("ignored") as context:
+        context.set(ignored=True)
+    assert local_tracer.get_stats()["recorded"] == 8
+    
+    # 每个线程有独立的区间栈
+    local_tracer.configure(enabled=True, capacity=100)
+    local_tracer.clear()
+    with local_tracer.span("main"):
+        thread = threading.Thread(target=work, args=(1,), name="worker")
+        thread.start()
+        thread.join()
+    worker_span = local_tracer.get_spans(name="work")[0]
+    assert worker_span.parent_id is None and worker_span.thread_name == "worker"
+    print("✅ 装饰器与环形缓冲区正确")
+
+
+def test_chrome_trace_and_slow_log():
+    """测试 Chrome trace 导出与慢操作日志"""
+    print("测试Chrome trace导出...")
+    
+    log = PerformanceLog()
+    local_tracer = Tracer(logger=log, slow_threshold=0.01)
+    with local_tracer.span("fast", "test"):
+        pass
+    with local_tracer.span("slow", "test", path="a.png"):
+        threading.Event().wait(0.02)
+    assert [record[0] for record in log.records] == ["slow"] and log.records[0][2] == "path=a.png"
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = local_tracer.export_chrome_trace(os.path.join(temp_dir, "trace", "run.json"))
+        with open(path, "r", encoding="utf-8") as f:
+            trace = json.load(f)
+    events = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert [event["name"] for event in events] == ["fast", "slow"]
+    assert events[1]["dur"] >= 20000 and events[1]["ts"] >= events[0]["ts"]
+    assert events[1]["args"] == {"path": "a.png"}
+    assert any(event["ph"] == "M" and event["name"] == "thread_name" for event in trace["traceEvents"])
+    assert local_tracer.export_chrome_trace() is None
+    print("✅ Chrome trace导出正确")
+
+
+def test_market_sequence_spans():
+    """测试市场操作序列各步骤、设备操作和存储写入均被追踪"""
+    print("测试市场操作序列追踪...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(os.path.join(PROJECT_ROOT, "config", "market_config.json"))
+        config.set('screenshot.save_path', temp_dir)
+        config.set('tracing.traceFile', None)
+        logger = Logger(console_output=False)
+        assert configure_tracing(config, logger) is tracer
+        u2_manager = FakeDeviceManager(config, logger)
+        assert u2_manager.initialize()
+        market_clicker = MarketClicker(u2_manager, config, logger)
+        market_clicker.initialize()
+        
+        tracer.clear()
+        assert market_clicker.execute_market_sequence()
+    
+    sequence = tracer.get_spans(name="market.execute_market_sequence")[-1]
+    spans = [span for span in tracer.get_spans() if sequence.start <= span.start and span.end <= sequence.end
+             and span.thread_id == sequence.thread_id]
+    names = {span.name for span in spans}
+    for name in ("market.click_market_button", "market.click_quote_button", "market.click_show_all_quotes",
+                 "market.wait_for_settle", "market.take_screenshot", "market.scan_quote_list",
+                 "market.scroll_quote_list", "u2.tap_element", "u2.swipe_element", "u2.take_frame",
+                 "storage.write_frame"):
+        assert name in names, name
+    
+    by_id = {span.span_id: span for span in spans}
+    tap = next(span for span in spans if span.name == "u2.tap_element")
+    assert by_id[tap.parent_id].name == "market.click_market_button"
+    assert tap.args == {"x": market_clicker.coordinates['market_button']['x'],
+                        "y": market_clicker.coordinates['market_button']['y']}
+    print("✅ 市场操作序列追踪正确")
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_nested_spans,
+        test_decorator_and_ring,
+        test_chrome_trace_and_slow_log,
+        test_market_sequence_spans
+    ]
+    
+    for test_func in tests:
+        test_func()
+    
+    print(f"\n测试结果：{len(tests)}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
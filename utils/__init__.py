@@ -6,7 +6,9 @@
 
 from .config_manager import ConfigManager
 from .logger import Logger
-from .device_manager import DeviceManager
+from .device_manager import DeviceManager, DeviceInfo
+from .adb_client import AdbClient, AdbShellSession, AdbError
+from .async_file_writer import AsyncFileWriter
 from .interfaces import (
     BaseModule,
     ScreenshotInterface,
@@ -21,6 +23,11 @@ __all__ = [
     'ConfigManager',
     'Logger',
     'DeviceManager',
+    'DeviceInfo',
+    'AdbClient',
+    'AdbShellSession',
+    'AdbError',
+    'AsyncFileWriter',
     'BaseModule',
     'ScreenshotInterface',
     'ADBInterface',
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADB服务端协议客户端
+直接通过TCP（默认 127.0.0.1:5037）与ADB服务端通信，不再为每条命令启动 adb 进程。
+持久shell会话在同一连接上依次执行命令，用唯一的结束标记分隔每条命令的输出和退出码
+"""
+
+import re
+import socket
+import threading
+import uuid
+from typing import List, Optional, Tuple
+
+
+class AdbError(Exception):
+    """ADB协议错误"""
+    pass
+
+
+class AdbClient:
+    """ADB服务端协议客户端类
+    
+    请求格式为4位十六进制长度加请求内容，服务端以 OKAY 或 FAIL（附带错误信息）应答
+    """
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 5037, timeout: float = 10.0):
+        """初始化ADB客户端
+        
+        Args:
+            host: ADB服务端地址
+            port: ADB服务端端口
+            timeout: 连接和读取超时时间（秒）
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+    
+    def connect(self) -> socket.socket:
+        """建立到ADB服务端的连接
+        
+        Returns:
+            socket.socket: 已连接的套接字
+        """
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError as e:
+            raise AdbError(f"无法连接ADB服务端 {self.host}:{self.port}: {e}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+    
+    @staticmethod
+    def send_request(sock: socket.socket, request: str):
+        """发送一条请求并检查应答状态
+        
+        Args:
+            sock: 已连接的套接字
+            request: 请求内容，如 host:version、shell:ls
+        """
+        payload = request.encode('utf-8')
+        sock.sendall(b"%04x" % len(payload) + payload)
+        status = AdbClient._recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbError(AdbClient._read_message(sock))
+        raise AdbError(f"未知的ADB应答: {status!r}")
+    
+    def transport(self, sock: socket.socket, serial: Optional[str] = None):
+        """将连接切换到指定设备
+        
+        Args:
+            sock: 已连接的套接字
+            serial: 设备序列号，None表示唯一连接的设备
+        """
+        self.send_request(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+    
+    def version(self) -> int:
+        """获取ADB服务端版本
+        
+        Returns:
+            int: 服务端协议版本号
+        """
+        with self.connect() as sock:
+            self.send_request(sock, "host:version")
+            return int(self._read_message(sock), 16)
+    
+    def devices(self) -> List[Tuple[str, str]]:
+        """获取设备列表
+        
+        Returns:
+            List[Tuple[str, str]]: [(序列号, 状态)]
+        """
+        with self.connect() as sock:
+            self.send_request(sock, "host:devices")
+            output = self._read_message(sock)
+        
+        devices = []
+        for line in output.splitlines():
+            parts = line.split('\t')
+            if len(parts) >= 2:
+                devices.append((parts[0], parts[1]))
+        return devices
+    
+    def shell(self, command: str, serial: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """一次性执行shell命令（输出读到连接关闭为止）
+        
+        Args:
+            command: shell命令
+            serial: 设备序列号
+            timeout: 读取超时时间（秒）
+        
+        Returns:
+            str: 命令输出（stdout与stderr合并）
+        """
+        with self.connect() as sock:
+            sock.settimeout(timeout or self.timeout)
+            self.transport(sock, serial)
+            self.send_request(sock, f"shell:{command}")
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return b"".join(chunks).decode('utf-8', errors='replace')
+    
+    def open_shell(self, serial: Optional[str] = None) -> "AdbShellSession":
+        """打开持久shell会话
+        
+        Args:
+            serial: 设备序列号
+        
+        Returns:
+            AdbShellSession: shell会话
+        """
+        return AdbShellSession(self, serial)
+    
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        """读取固定长度的数据"""
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise AdbError("ADB连接已关闭")
+            data.extend(chunk)
+        return bytes(data)
+    
+    @staticmethod
+    def _read_message(sock: socket.socket) -> str:
+        """读取带4位十六进制长度前缀的消息"""
+        length = int(AdbClient._recv_exact(sock, 4), 16)
+        return AdbClient._recv_exact(sock, length).decode('utf-8', errors='replace') if length else ""
+
+
+class AdbShellSession:
+    """持久shell会话类
+    
+    在一条 shell:sh 连接上依次写入命令，每条命令之后输出 "换行+结束标记:退出码"，
+    读到结束标记即得到该命令的完整输出，连接保持打开供下一条命令使用
+    """
+    
+    def __init__(self, client: AdbClient, serial: Optional[str] = None):
+        """初始化shell会话
+        
+        Args:
+            client: ADB客户端
+            serial: 设备序列号
+        """
+        self.client = client
+        self.serial = serial
+        self.sock = None
+        self.buffer = bytearray()
+        self.lock = threading.Lock()
+        self.token = uuid.uuid4().hex
+        self.command_count = 0
+    
+    @property
+    def is_open(self) -> bool:
+        """会话连接是否已打开"""
+        return self.sock is not None
+    
+    def open(self):
+        """打开会话连接（已打开时不做任何操作）"""
+        if self.sock is not None:
+            return
+        sock = self.client.connect()
+        try:
+            self.client.transport(sock, self.serial)
+            self.client.send_request(sock, "shell:sh")
+        except Exception:
+            sock.close()
+            raise
+        self.sock = sock
+        self.buffer.clear()
+    
+    def close(self):
+        """关闭会话连接"""
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+        self.buffer.clear()
+    
+    def run(self, command: str, timeout: Optional[float] = None) -> Tuple[str, int]:
+        """在会话中执行一条命令
+        
+        命令的标准输入重定向到 /dev/null，避免读取stdin的命令吞掉后续命令。
+        超时或连接异常时关闭会话，下次调用会重新建立连接
+        
+        Args:
+            command: shell命令
+            timeout: 超时时间（秒）
+        
+        Returns:
+            Tuple[str, int]: (命令输出, 退出码)
+        """
+        with self.lock:
+            self.open()
+            self.command_count += 1
+            sentinel = f"__ADB_END_{self.token}_{self.command_count}__"
+            script = f"{{ {command}\n}} </dev/null 2>&1\nprintf '\\n%s:%d\\n' '{sentinel}' $?\n"
+            pattern = re.compile(b"\n" + re.escape(sentinel.encode('ascii')) + b":(-?\\d+)\n")
+            
+            try:
+                self.sock.settimeout(timeout or self.client.timeout)
+                self.sock.sendall(script.encode('utf-8'))
+                while True:
+                    match = pattern.search(self.buffer)
+                    if match:
+                        output = bytes(self.buffer[:match.start()])
+                        exit_code = int(match.group(1))
+                        del self.buffer[:match.end()]
+                        return output.decode('utf-8', errors='replace'), exit_code
+                    chunk = self.sock.recv(65536)
+                    if not chunk:
+                        raise AdbError("shell会话已被设备关闭")
+                    self.buffer.extend(chunk)
+            except (OSError, AdbError):
+                self.close()
+                raise
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步文件写入模块
+生产者提交写入请求后立即拿到 Future，后台写入线程从有界队列中批量取出请求：
+同一文件的追加写入合并为一次写入，目录只创建一次，按配置的策略执行 fsync。
+同一路径的请求总是由同一个写入线程处理，保证追加顺序
+"""
+
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from .tracing import traced
+
+# 支持的 fsync 策略：never（交给系统）、batch（每批每个文件一次）、always（每次写入后）
+FSYNC_POLICIES = ("never", "batch", "always")
+
+
+@dataclass
+class WriteRequest:
+    """写入请求数据类"""
+    path: str
+    data: bytes
+    append: bool = False
+    future: Future = field(default_factory=Future)
+
+
+class AsyncFileWriter:
+    """异步批量文件写入器类"""
+    
+    def __init__(self, workers: int = 1, queue_size: int = 64, batch_size: int = 32,
+                 fsync_policy: str = "batch", logger=None):
+        """初始化异步文件写入器
+        
+        Args:
+            workers: 写入线程数
+            queue_size: 每个写入线程的队列容量，队列满时生产者等待（背压）
+            batch_size: 每批最多处理的请求数
+            fsync_policy: fsync 策略，never、batch 或 always
+            logger: 日志记录器实例
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"不支持的fsync策略: {fsync_policy}")
+        
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.fsync_policy = fsync_policy
+        self.logger = logger
+        
+        self.queues = [queue.Queue(self.queue_size) for _ in range(self.workers)]
+        self.threads = []
+        self.created_dirs = set()
+        self.dirs_lock = threading.Lock()
+        self.is_running = False
+        
+        # 统计
+        self.stats_lock = threading.Lock()
+        self.submitted_count = 0
+        self.written_count = 0
+        self.written_bytes = 0
+        self.batch_count = 0
+        self.file_writes = 0
+        self.fsync_count = 0
+        self.error_count = 0
+    
+    def start(self) -> "AsyncFileWriter":
+        """启动写入线程"""
+        if self.is_running:
+            return self
+        self.is_running = True
+        self.threads = []
+        for index, request_queue in enumerate(self.queues):
+            thread = threading.Thread(target=self._writer_loop, args=(request_queue,),
+                                      name=f"AsyncFileWriter-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+    
+    def write(self, path: str, data: Union[bytes, str], append: bool = False,
+              timeout: Optional[float] = None) -> Future:
+        """提交写入请求
+        
+        Args:
+            path: 文件路径
+            data: 写入的数据，字符串按UTF-8编码
+            append: 是否追加写入，否则整体替换文件（先写临时文件再重命名）
+            timeout: 队列满时的最长等待时间（秒），None表示一直等待
+        
+        Returns:
+            Future: 写入完成后结果为文件路径，失败时为异常
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        request = WriteRequest(path, data, append)
+        
+        if not self.is_running:
+            request.future.set_exception(RuntimeError("写入器未启动"))
+            return request.future
+        
+        try:
+            self.queues[zlib.crc32(path.encode("utf-8")) % self.workers].put(request, timeout=timeout)
+        except queue.Full:
+            request.future.set_exception(TimeoutError(f"写入队列已满: {path}"))
+            return request.future
+        
+        with self.stats_lock:
+            self.submitted_count += 1
+        return request.future
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的请求全部写入
+        
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+        
+        Returns:
+            bool: 是否在超时前全部写入
+        """
+        markers = [self._put_marker(request_queue) for request_queue in self.queues]
+        deadline = None if timeout is None else time.time() + timeout
+        for marker in markers:
+            remaining = None if deadline is None else max(0, deadline - time.time())
+            try:
+                marker.result(remaining)
+            except Exception:
+                return False
+        return True
+    
+    def close(self, timeout: Optional[float] = None):
+        """写完剩余请求后停止写入线程
+        
+        Args:
+            timeout: 等待每个写入线程结束的最长时间（秒）
+        """
+        if not self.is_running:
+            return
+        self.is_running = False
+        for request_queue in self.queues:
+            request_queue.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+    
+    def pending(self) -> int:
+        """队列中等待写入的请求数"""
+        return sum(request_queue.qsize() for request_queue in self.queues)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写入统计
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        with self.stats_lock:
+            return {
+                "workers": self.workers,
+                "fsync_policy": self.fsync_policy,
+                "pending": self.pending(),
+                "submitted_count": self.submitted_count,
+                "written_count": self.written_count,
+                "written_bytes": self.written_bytes,
+                "batch_count": self.batch_count,
+                "file_writes": self.file_writes,
+                "fsync_count": self.fsync_count,
+                "error_count": self.error_count
+            }
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def _put_marker(self, request_queue: queue.Queue) -> Future:
+        """放入一个空请求，其 Future 在之前的请求写完后完成"""
+        marker = WriteRequest("", b"")
+        if not self.is_running:
+            marker.future.set_result("")
+        else:
+            request_queue.put(marker)
+        return marker.future
+    
+    def _writer_loop(self, request_queue: queue.Queue):
+        """写入线程：取出一批请求后按文件合并写入"""
+        while True:
+            request = request_queue.get()
+            if request is None:
+                return
+            
+            batch = [request]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    request = request_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+            
+            self._write_batch(batch)
+            if stop:
+                return
+    
+    @traced("storage.write_batch", "storage")
+    def _write_batch(self, batch: List[WriteRequest]):
+        """写入一批请求：相邻的同一文件追加请求合并为一次写入（已取消的请求跳过）"""
+        groups = []
+        for request in batch:
+            if not request.future.set_running_or_notify_cancel():
+                continue
+            if not request.path:
+                groups.append([request])
+            elif request.append and groups and groups[-1][0].append and groups[-1][0].path == request.path:
+                groups[-1].append(request)
+            else:
+                groups.append([request])
+        
+        # batch 策略下每个文件只在本批最后一次写入后 fsync
+        last_group = {group[0].path: index for index, group in enumerate(groups)}
+        for index, group in enumerate(groups):
+            path = group[0].path
+            if not path:
+                group[0].future.set_result("")
+                continue
+            
+            try:
+                self._ensure_directory(path)
+                data = b"".join(request.data for request in group)
+                sync = self.fsync_policy == "always" or (self.fsync_policy == "batch" and last_group[path] == index)
+                if group[0].append:
+                    self._append_file(path, data, sync)
+                else:
+                    self._replace_file(path, data, sync)
+                
+                with self.stats_lock:
+                    self.written_count += len(group)
+                    self.written_bytes += len(data)
+                    self.file_writes += 1
+                    self.fsync_count += 1 if sync else 0
+                for request in group:
+                    request.future.set_result(path)
+            
+            except Exception as e:
+                with self.stats_lock:
+                    self.error_count += len(group)
+                if self.logger:
+                    self.logger.error(f"异步写入文件失败: {path}, 错误: {e}")
+                for request in group:
+                    request.future.set_exception(e)
+        
+        with self.stats_lock:
+            self.batch_count += 1
+    
+    def _ensure_directory(self, path: str):
+        """创建文件所在目录（每个目录只创建一次）"""
+        directory = os.path.dirname(path)
+        if not directory or directory in self.created_dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self.dirs_lock:
+            self.created_dirs.add(directory)
+    
+    @staticmethod
+    def _append_file(path: str, data: bytes, sync: bool):
+        """追加写入文件"""
+        with open(path, 'ab') as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+    
+    @staticmethod
+    def _replace_file(path: str, data: bytes, sync: bool):
+        """写入临时文件后重命名，读取方不会看到写了一半的文件"""
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
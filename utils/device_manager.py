@@ -2,14 +2,139 @@
 # -*- coding: utf-8 -*-
 """
 设备管理器
-负责管理与Android设备的通信和操作
+负责管理与Android设备的通信和操作。
+shell命令优先通过ADB服务端协议的持久会话执行，服务端不可用时回退到 adb 子进程
 """
 
 import os
 import time
+import re
 import json
+import socket
 import subprocess
-from typing import Dict, Any, Optional, List
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, Optional, List, Tuple
+
+from .adb_client import AdbClient, AdbError
+from .tracing import traced
+from .metrics import registry
+
+
+# 批量查询设备信息：一次往返获取全部系统属性和屏幕参数
+DEVICE_INFO_COMMAND = "getprop; echo '#wm-size'; wm size; echo '#wm-density'; wm density; true"
+
+# getprop 输出格式：[key]: [value]，值可能跨行
+GETPROP_PATTERN = re.compile(r"^\[([^\]]+)\]: \[(.*?)\]$", re.MULTILINE | re.DOTALL)
+
+# 设备命令指标（transport：server 为持久shell会话，subprocess 为adb子进程）
+ADB_COMMAND_SECONDS = registry.histogram(
+    "adb_command_duration_seconds", "设备shell命令耗时（秒）", ("device", "transport"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+ADB_COMMAND_FAILURES = registry.counter(
+    "adb_command_failures_total", "执行失败或超时的设备shell命令数", ("device", "transport"))
+
+
+@dataclass
+class DeviceInfo:
+    """设备信息数据类"""
+    device_id: str
+    model: str = "Unknown"
+    manufacturer: str = "Unknown"
+    android_version: str = "Unknown"
+    api_level: int = 0
+    screen_width: int = 0
+    screen_height: int = 0
+    density: int = 0
+    properties: Dict[str, str] = field(default_factory=dict, repr=False)
+    last_update: float = 0.0
+    
+    @property
+    def screen_resolution(self) -> str:
+        """屏幕分辨率字符串，如 720x1280"""
+        if not self.screen_width or not self.screen_height:
+            return "Unknown"
+        return f"{self.screen_width}x{self.screen_height}"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（不含完整属性表）"""
+        data = asdict(self)
+        data.pop('properties')
+        data['screen_resolution'] = self.screen_resolution
+        return data
+    
+    @classmethod
+    def parse(cls, device_id: str, output: str) -> "DeviceInfo":
+        """解析批量查询命令的输出
+        
+        Args:
+            device_id: 设备ID
+            output: DEVICE_INFO_COMMAND 的输出
+        
+        Returns:
+            DeviceInfo: 设备信息
+        """
+        prop_text, _, rest = output.partition("#wm-size")
+        size_text, _, density_text = rest.partition("#wm-density")
+        properties = parse_getprop(prop_text)
+        
+        width, height = parse_wm_size(size_text)
+        sdk = properties.get("ro.build.version.sdk", "")
+        return cls(
+            device_id=device_id,
+            model=properties.get("ro.product.model") or "Unknown",
+            manufacturer=properties.get("ro.product.manufacturer") or "Unknown",
+            android_version=properties.get("ro.build.version.release") or "Unknown",
+            api_level=int(sdk) if sdk.isdigit() else 0,
+            screen_width=width,
+            screen_height=height,
+            density=parse_wm_density(density_text),
+            properties=properties,
+            last_update=time.time()
+        )
+
+
+def parse_getprop(output: str) -> Dict[str, str]:
+    """解析 getprop 全量输出
+    
+    Args:
+        output: getprop 输出
+    
+    Returns:
+        Dict[str, str]: 属性字典
+    """
+    return {key: value for key, value in GETPROP_PATTERN.findall(output.replace("\r\n", "\n"))}
+
+
+def _parse_wm_value(output: str, pattern: str) -> Optional[re.Match]:
+    """解析 wm 输出，Override 值优先于 Physical 值"""
+    override = re.search(rf"Override {pattern}", output)
+    return override or re.search(rf"Physical {pattern}", output)
+
+
+def parse_wm_size(output: str) -> Tuple[int, int]:
+    """解析 wm size 输出
+    
+    Args:
+        output: wm size 输出
+    
+    Returns:
+        Tuple[int, int]: (宽, 高)，无法解析时返回 (0, 0)
+    """
+    match = _parse_wm_value(output, r"size:\s*(\d+)x(\d+)")
+    return (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+
+
+def parse_wm_density(output: str) -> int:
+    """解析 wm density 输出
+    
+    Args:
+        output: wm density 输出
+    
+    Returns:
+        int: 屏幕密度，无法解析时返回0
+    """
+    match = _parse_wm_value(output, r"density:\s*(\d+)")
+    return int(match.group(1)) if match else 0
 
 
 class DeviceManager:
@@ -31,8 +156,19 @@ class DeviceManager:
         self.adb_path = self.device_config.get("adb_path", "adb")
         self.connection_timeout = self.device_config.get("connectionTimeout", 30)
         
-        # 设备信息缓存
-        self.device_info = {}
+        # ADB服务端直连（持久shell会话），不可用时回退到adb子进程
+        self.use_adb_server = self.device_config.get("useAdbServer", True)
+        self.adb_client = AdbClient(
+            self.device_config.get("adbHost", "127.0.0.1"),
+            self.device_config.get("adbPort", 5037),
+            timeout=self.connection_timeout
+        )
+        self.shell_session = None
+        self.adb_server_available = True
+        
+        # 设备信息缓存（显式失效或超过有效期后重新查询）
+        self.device_info = None
+        self.device_info_ttl = self.device_config.get("infoCacheTtl", 300)
         self.last_check_time = 0
     
     def check_device(self) -> bool:
@@ -43,6 +179,7 @@ class DeviceManager:
         """
         try:
             self.logger.info("检查设备连接状态")
+            self.adb_server_available = True
             
             # 检查adb是否可用
             if not self._check_adb_available():
@@ -65,14 +202,11 @@ class DeviceManager:
                 self.device_id = devices[0]
                 self.logger.info(f"使用设备: {self.device_id}")
             
-            # 检查设备是否响应
-            if not self._check_device_responsive():
+            # 重新查询设备信息（同时确认设备响应，不使用缓存）
+            if self.get_device_info(refresh=True) is None:
                 self.logger.error("设备无响应")
                 return False
             
-            # 获取设备信息
-            self._update_device_info()
-            
             self.logger.info("设备检查通过")
             return True
             
@@ -80,18 +214,29 @@ class DeviceManager:
             self.logger.error(f"设备检查失败: {e}")
             return False
     
-    def get_device_info(self) -> Dict[str, Any]:
+    def get_device_info(self, refresh: bool = False) -> Optional[DeviceInfo]:
         """获取设备信息
         
+        缓存有效期内直接返回缓存，设备变更或超过有效期时重新查询
+        
+        Args:
+            refresh: 是否强制重新查询
+        
         Returns:
-            Dict[str, Any]: 设备信息
+            Optional[DeviceInfo]: 设备信息，查询失败返回None
         """
-        # 缓存5分钟
-        if time.time() - self.last_check_time > 300:
+        cached = self.device_info
+        if (refresh or cached is None or cached.device_id != self.device_id
+                or time.time() - self.last_check_time > self.device_info_ttl):
             self._update_device_info()
         
         return self.device_info
     
+    def invalidate_device_info(self):
+        """使设备信息缓存失效（如切换设备、修改分辨率后调用）"""
+        self.device_info = None
+        self.last_check_time = 0
+    
     def push_file(self, local_path: str, remote_path: str) -> bool:
         """推送文件到设备
         
@@ -113,7 +258,7 @@ class DeviceManager:
             # 创建远程目录
             remote_dir = os.path.dirname(remote_path)
             if remote_dir:
-                self._run_adb_command(f"shell mkdir -p {remote_dir}")
+                self.execute_command(f"mkdir -p {remote_dir}")
             
             # 推送文件
             result = self._run_adb_command(f"push {local_path} {remote_path}")
@@ -159,9 +304,72 @@ class DeviceManager:
             self.logger.error(f"拉取文件失败: {e}")
             return False
     
+    @traced("adb.execute_command", "adb", record_args=("command",))
     def execute_command(self, command: str, timeout: int = 30) -> Optional[str]:
         """在设备上执行命令
         
+        优先在ADB服务端的持久shell会话中执行（一次socket往返），服务端不可用时回退到adb子进程
+        
+        Args:
+            command: 要执行的命令
+            timeout: 超时时间（秒）
+        
+        Returns:
+            Optional[str]: 命令输出
+        """
+        start_time = time.perf_counter()
+        output = self._run_command(command, timeout)
+        
+        labels = (self.device_id or "default", "server" if self._adb_server_enabled() else "subprocess")
+        ADB_COMMAND_SECONDS.labels(*labels).observe(time.perf_counter() - start_time)
+        if output is None:
+            ADB_COMMAND_FAILURES.labels(*labels).inc()
+        return output
+    
+    def _run_command(self, command: str, timeout: int) -> Optional[str]:
+        """执行命令：优先使用持久shell会话，服务端不可用时回退到adb子进程"""
+        if self._adb_server_enabled():
+            try:
+                self.logger.debug("在设备上执行命令: %s", command)
+                output, exit_code = self._get_shell_session().run(command, timeout)
+                
+                if exit_code != 0:
+                    self.logger.error("命令执行失败: %s, 退出码: %s, 输出: %s", command, exit_code, output.strip())
+                    return None
+                
+                output = output.strip()
+                self.logger.debug("命令输出: %s", output)
+                return output
+            
+            except socket.timeout:
+                self.logger.error(f"命令执行超时: {command}")
+                return None
+            except (AdbError, OSError) as e:
+                self.logger.warning(f"ADB服务端不可用，改用adb进程执行命令: {e}")
+                self.adb_server_available = False
+        
+        return self._execute_command_subprocess(command, timeout)
+    
+    def close(self):
+        """关闭持久shell会话"""
+        if self.shell_session is not None:
+            self.shell_session.close()
+            self.shell_session = None
+    
+    def _adb_server_enabled(self) -> bool:
+        """是否通过ADB服务端协议执行命令"""
+        return self.use_adb_server and self.adb_server_available
+    
+    def _get_shell_session(self):
+        """获取当前设备的持久shell会话，设备变更时重新创建"""
+        if self.shell_session is None or self.shell_session.serial != (self.device_id or None):
+            self.close()
+            self.shell_session = self.adb_client.open_shell(self.device_id or None)
+        return self.shell_session
+    
+    def _execute_command_subprocess(self, command: str, timeout: int = 30) -> Optional[str]:
+        """通过adb子进程执行命令
+        
         Args:
             command: 要执行的命令
             timeout: 超时时间（秒）
@@ -170,7 +378,7 @@ class DeviceManager:
             Optional[str]: 命令输出
         """
         try:
-            self.logger.debug(f"在设备上执行命令: {command}")
+            self.logger.debug("在设备上执行命令: %s", command)
             
             # 构建adb命令
             adb_command = f"shell {command}"
@@ -191,7 +399,7 @@ class DeviceManager:
                 return None
             
             output = result.stdout.strip()
-            self.logger.debug(f"命令输出: {output}")
+            self.logger.debug("命令输出: %s", output)
             return output
             
         except subprocess.TimeoutExpired:
@@ -290,6 +498,14 @@ class DeviceManager:
         Returns:
             bool: ADB是否可用
         """
+        if self._adb_server_enabled():
+            try:
+                self.adb_client.version()
+                return True
+            except AdbError as e:
+                self.logger.warning(f"ADB服务端不可用，改用adb进程: {e}")
+                self.adb_server_available = False
+        
         try:
             result = subprocess.run(
                 [self.adb_path, "version"],
@@ -307,6 +523,13 @@ class DeviceManager:
         Returns:
             List[str]: 设备ID列表
         """
+        if self._adb_server_enabled():
+            try:
+                return [serial for serial, state in self.adb_client.devices() if state == 'device']
+            except AdbError as e:
+                self.logger.warning(f"通过ADB服务端获取设备列表失败: {e}")
+                self.adb_server_available = False
+        
         try:
             result = subprocess.run(
                 [self.adb_path, "devices"],
@@ -331,45 +554,17 @@ class DeviceManager:
         except Exception:
             return []
     
-    def _check_device_responsive(self) -> bool:
-        """检查设备是否响应
-        
-        Returns:
-            bool: 设备是否响应
-        """
-        try:
-            # 尝试获取设备属性
-            output = self.execute_command("getprop ro.product.model", timeout=10)
-            return output is not None
-        except Exception:
-            return False
-    
     def _update_device_info(self):
-        """更新设备信息"""
+        """更新设备信息（一次命令获取全部属性和屏幕参数）"""
         try:
             self.logger.debug("更新设备信息")
             
-            device_info = {}
-            
-            # 获取基本信息
-            device_info['model'] = self.execute_command("getprop ro.product.model") or "Unknown"
-            device_info['manufacturer'] = self.execute_command("getprop ro.product.manufacturer") or "Unknown"
-            device_info['android_version'] = self.execute_command("getprop ro.build.version.release") or "Unknown"
-            device_info['api_level'] = self.execute_command("getprop ro.build.version.sdk") or "Unknown"
-            
-            # 获取屏幕分辨率
-            wm_size = self.execute_command("wm size")
-            if wm_size and "Physical size:" in wm_size:
-                size_part = wm_size.split("Physical size:")[1].strip()
-                device_info['screen_resolution'] = size_part
-            
-            # 获取设备ID
-            device_info['device_id'] = self.device_id
-            
-            # 获取时间戳
-            device_info['last_update'] = time.time()
+            output = self.execute_command(DEVICE_INFO_COMMAND, timeout=10)
+            if output is None:
+                self.device_info = None
+                return
             
-            self.device_info = device_info
+            self.device_info = DeviceInfo.parse(self.device_id, output)
             self.last_check_time = time.time()
             
         except Exception as e:
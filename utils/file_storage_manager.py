@@ -7,20 +7,36 @@
 - 截图保存
 - 操作日志保存
 - 文件清理
+截图和操作日志默认交给后台异步写入器批量写盘，调用方立即拿到文件路径
 """
 
 import os
 import json
+import atexit
 import time
 import shutil
 import gzip
-from typing import Dict, Any, List, Optional
+import itertools
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 import logging
 import threading
 from pathlib import Path
 
-from database.models import OperationLog, Statistics
+from utils.async_file_writer import AsyncFileWriter
+from utils.tracing import traced
+from utils.metrics import registry
+from screenshot.screenshot_store import ScreenshotStore
+from screenshot.screenshot_index import ScreenshotIndex, INDEX_FILENAME
+
+if TYPE_CHECKING:
+    from database.models import OperationLog, Statistics
+
+# 文件写入指标（按提交计数，异步写入时写盘稍后完成）
+STORAGE_WRITES = registry.counter("storage_writes_total", "提交的文件写入次数", ("mode",))
+STORAGE_WRITTEN_BYTES = registry.counter("storage_written_bytes_total", "提交写入文件的字节数")
+STORAGE_QUEUE_DEPTH = registry.gauge("storage_write_queue_depth", "异步写入器中等待写盘的请求数")
 
 
 class FileStorageManager:
@@ -49,11 +65,49 @@ class FileStorageManager:
         self.data_path = self.config.get('dataPath', './data')
         self.subdirectories = self.config.get('subdirectories', {})
         
-        # 线程锁
-        self.lock = threading.Lock()
+        # 文件名序号（同一毫秒内生成多个截图文件名时避免重复）
+        self.sequence = itertools.count()
+        
+        # 异步写入器（asyncWrites 为 False 时在调用线程中同步写入）
+        self.writer = None
+        if self.file_storage_config.get('asyncWrites', True):
+            self.writer = AsyncFileWriter(
+                workers=self.file_storage_config.get('writerThreads', 1),
+                queue_size=self.file_storage_config.get('writeQueueSize', 64),
+                batch_size=self.file_storage_config.get('writeBatchSize', 32),
+                fsync_policy=self.file_storage_config.get('fsyncPolicy', 'batch'),
+                logger=logger
+            ).start()
+            # 写入线程为守护线程，进程退出前写完队列中的截图和日志
+            atexit.register(self.close)
         
         # 初始化目录
         self._initialize_directories()
+        
+        self.screenshot_dir = os.path.join(self.data_path, self.subdirectories.get('screenshots', 'screenshots'))
+        
+        # 截图文件索引：写入完成和删除时更新，查询与过期清理不再扫描目录
+        self.screenshot_index = ScreenshotIndex(os.path.join(self.screenshot_dir, INDEX_FILENAME))
+        
+        # 内容寻址截图存储（dedupScreenshots 为 False 时按文件名直接保存），写入成功后由存储登记到索引；
+        # 同一目录的其他写入方（如 MarketClicker.attach_screenshot_store）应共用此实例
+        self.screenshot_store = None
+        if self.file_storage_config.get('dedupScreenshots', True):
+            self.screenshot_store = ScreenshotStore(self.screenshot_dir, writer=self.writer, logger=logger,
+                                                    max_entries=self.file_storage_config.get('manifestMaxEntries', 10000),
+                                                    index=self.screenshot_index)
+        self._open_screenshot_index()
+    
+    def _open_screenshot_index(self):
+        """打开截图文件索引，索引为空时收录内容存储清单中的文件（不扫描截图目录）"""
+        try:
+            self.screenshot_index.connect()
+            if self.screenshot_index.count() == 0 and self.screenshot_store is not None:
+                indexed = self.screenshot_index.add_existing(self.screenshot_store.get_blob_paths())
+                if indexed:
+                    self.logger.info(f"截图索引重建完成，收录 {indexed} 个文件")
+        except Exception as e:
+            self.logger.error(f"打开截图索引失败: {e}")
     
     def _initialize_directories(self):
         """初始化目录结构"""
@@ -72,7 +126,7 @@ class FileStorageManager:
     
     
     def save_screenshot(self, image_data: bytes, filename: str = None) -> str:
-        """保存截图
+        """保存截图（异步写入时不等待写盘，立即返回路径）
         
         Args:
             image_data: 图像数据
@@ -82,89 +136,162 @@ class FileStorageManager:
             str: 保存的文件路径
         """
         try:
-            with self.lock:
-                # 生成文件名
-                if not filename:
-                    timestamp = int(time.time() * 1000)  # 使用毫秒时间戳避免重复
-                    filename = f"screenshot_{timestamp}.png"
-                
-                screenshot_dir = os.path.join(self.data_path, self.subdirectories.get('screenshots', 'screenshots'))
-                
-                # 确保目录存在
-                os.makedirs(screenshot_dir, exist_ok=True)
-                
-                filepath = os.path.join(screenshot_dir, filename)
-                
-                # 保存图像
-                with open(filepath, 'wb') as f:
-                    f.write(image_data)
-                
-                self.logger.debug(f"截图保存成功: {filepath}")
-                return filepath
+            future = self.submit_screenshot(image_data, filename)
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+            return future.path
         except Exception as e:
             self.logger.error(f"保存截图时发生错误: {e}")
             return ""
     
+    def submit_screenshot(self, image_data: bytes, filename: str = None) -> Future:
+        """提交截图写入请求
+    
+        Args:
+            image_data: 图像数据
+            filename: 文件名，如果为None则自动生成
+        
+        Returns:
+            Future: 写入完成后结果为文件路径，future.path 为目标路径
+        """
+        # 生成文件名
+        if not filename:
+            timestamp = int(time.time() * 1000)  # 毫秒时间戳加序号避免重复
+            filename = f"screenshot_{timestamp}_{next(self.sequence)}.png"
+        
+        # 按内容保存，重复的截图只追加清单条目（写入完成后由存储登记到索引）
+        if self.screenshot_store is not None:
+            entry = self.screenshot_store.put_bytes(image_data, filename)
+            if entry is None:
+                raise IOError(f"无法保存截图: {filename}")
+            entry.future.path = entry.path
+            return entry.future
+        
+        # 写入完成后登记到索引
+        filepath = os.path.join(self.screenshot_dir, filename)
+        future = self._write_file(filepath, image_data)
+        future.path = filepath
+        future.add_done_callback(lambda done: self._index_screenshot(done, filepath, len(image_data)))
+        return future
+    
+    def _index_screenshot(self, future: Future, filepath: str, size: int):
+        """写入成功的截图登记到索引"""
+        try:
+            if future.exception() is None:
+                self.screenshot_index.add(filepath, time.time(), size)
+        except Exception as e:
+            self.logger.error(f"登记截图索引失败: {e}")
+    
     
-    def save_operation_log(self, operation_log: OperationLog) -> bool:
-        """保存操作日志
+    def save_operation_log(self, operation_log: "OperationLog") -> bool:
+        """保存操作日志（异步写入时只提交追加请求）
         
         Args:
             operation_log: 操作日志对象
             
         Returns:
-            bool: 保存是否成功
+            bool: 保存是否成功（异步写入时表示已提交）
         """
         try:
-            with self.lock:
-                # 生成文件名
-                timestamp = int(operation_log.timestamp)
-                date_str = datetime.fromtimestamp(timestamp).strftime('%Y%m%d')
-                filename = f"operation_{date_str}.log"
-                filepath = os.path.join(self.data_path, self.subdirectories.get('logs', 'logs'), filename)
+            # 生成文件名
+            timestamp = int(operation_log.timestamp)
+            date_str = datetime.fromtimestamp(timestamp).strftime('%Y%m%d')
+            filename = f"operation_{date_str}.log"
+            filepath = os.path.join(self.data_path, self.subdirectories.get('logs', 'logs'), filename)
                 
-                # 追加日志到文件
-                log_entry = f"[{operation_log.formatted_time}] {operation_log.operation_type}: {operation_log.result}\n"
-                if operation_log.error_message:
-                    log_entry += f"Error: {operation_log.error_message}\n"
+            # 追加日志到文件
+            log_entry = f"[{operation_log.formatted_time}] {operation_log.operation_type}: {operation_log.result}\n"
+            if operation_log.error_message:
+                log_entry += f"Error: {operation_log.error_message}\n"
                 
-                with open(filepath, 'a', encoding='utf-8') as f:
-                    f.write(log_entry)
+            future = self._write_file(filepath, log_entry, append=True)
+            if future.done() and future.exception() is not None:
+                raise future.exception()
                 
-                self.logger.debug(f"操作日志保存成功: {filepath}")
-                return True
+            self.logger.debug("操作日志已提交: %s", filepath)
+            return True
         except Exception as e:
             self.logger.error(f"保存操作日志时发生错误: {e}")
             return False
     
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的写入全部完成
+        
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+        
+        Returns:
+            bool: 是否在超时前全部写入
+        """
+        if self.writer is None:
+            return True
+        return self.writer.flush(timeout)
     
-    def get_screenshots(self, limit: int = 100) -> List[str]:
-        """获取截图列表
+    def close(self):
+        """写完剩余请求，停止异步写入器并关闭截图索引"""
+        if self.writer is not None:
+            atexit.unregister(self.close)
+            self.writer.close()
+        self.screenshot_index.disconnect()
+    
+    def get_write_stats(self) -> Dict[str, Any]:
+        """获取写入统计
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        stats = {"async": False} if self.writer is None else dict(self.writer.get_stats(), **{"async": True})
+        if self.screenshot_store is not None:
+            stats["dedup"] = self.screenshot_store.get_stats()
+        return stats
+    
+    @traced("storage.write_file", "storage", record_args=("filepath", "append"))
+    def _write_file(self, filepath: str, data, append: bool = False) -> Future:
+        """写入文件：异步写入器可用时提交请求，否则在当前线程同步写入
+        
+        Args:
+            filepath: 文件路径
+            data: 写入的数据（bytes 或 str）
+            append: 是否追加写入
+        
+        Returns:
+            Future: 写入完成后结果为文件路径
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        STORAGE_WRITES.labels('append' if append else 'replace').inc()
+        STORAGE_WRITTEN_BYTES.inc(len(data))
+        
+        if self.writer is not None:
+            future = self.writer.write(filepath, data, append=append)
+            STORAGE_QUEUE_DEPTH.set(self.writer.pending())
+            return future
+        
+        future = Future()
+        try:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            with open(filepath, 'ab' if append else 'wb') as f:
+                f.write(data)
+            future.set_result(filepath)
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    
+    def get_screenshots(self, limit: int = 100, start_time: Optional[float] = None,
+                        end_time: Optional[float] = None) -> List[str]:
+        """获取截图列表（按索引查询，最新的在前）
         
         Args:
             limit: 限制数量
+            start_time: 开始时间
+            end_time: 结束时间
             
         Returns:
             List[str]: 截图路径列表
         """
         try:
-            screenshot_dir = os.path.join(self.data_path, self.subdirectories.get('screenshots', 'screenshots'))
-            screenshots = []
-            
-            # 检查目录是否存在
-            if not os.path.exists(screenshot_dir):
-                return screenshots
-            
-            # 遍历截图文件
-            for filename in os.listdir(screenshot_dir):
-                if filename.endswith('.png') or filename.endswith('.jpg'):
-                    filepath = os.path.join(screenshot_dir, filename)
-                    screenshots.append(filepath)
-            
-            # 按修改时间排序（最新的在前）
-            screenshots.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-            
-            return screenshots[:limit]
+            return [record['path'] for record in self.screenshot_index.latest(limit, None, start_time, end_time)]
         except Exception as e:
             self.logger.error(f"获取截图列表时发生错误: {e}")
             return []
@@ -219,12 +346,9 @@ class FileStorageManager:
             current_time = time.time()
             cleaned_files = 0
             
-            # 清理截图
+            # 清理截图（按索引范围删除，不扫描目录）
             screenshot_retention = self.retention_config.get('screenshots', 7)
-            cleaned_files += self._cleanup_directory(
-                os.path.join(self.data_path, self.subdirectories.get('screenshots', 'screenshots')),
-                screenshot_retention * 24 * 3600
-            )
+            cleaned_files += self._cleanup_screenshots(screenshot_retention * 24 * 3600)
             
             # 分析结果功能已移除，不再清理相关目录
             
@@ -248,6 +372,36 @@ class FileStorageManager:
             self.logger.error(f"清理旧文件时发生错误: {e}")
             return False
     
+    def _cleanup_screenshots(self, max_age: int) -> int:
+        """按截图索引删除过期的截图文件
+        
+        Args:
+            max_age: 最大年龄（秒）
+        
+        Returns:
+            int: 清理的文件数量
+        """
+        try:
+            expired_paths = self.screenshot_index.delete_before(time.time() - max_age)
+            if self.screenshot_store is not None:
+                self.screenshot_store.discard(expired_paths)
+            
+            cleaned_count = 0
+            for filepath in expired_paths:
+                try:
+                    os.remove(filepath)
+                    cleaned_count += 1
+                    self.logger.debug(f"删除旧截图: {filepath}")
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    self.logger.warning(f"删除文件失败: {filepath}, 错误: {e}")
+            
+            return cleaned_count
+        except Exception as e:
+            self.logger.error(f"清理截图时发生错误: {e}")
+            return 0
+    
     def _cleanup_directory(self, directory: str, max_age: int) -> int:
         """清理指定目录中的旧文件
         
@@ -283,4 +437,3 @@ class FileStorageManager:
         except Exception as e:
             self.logger.error(f"清理目录时发生错误: {directory}, 错误: {e}")
             return 0
-    
\ No newline at end of file
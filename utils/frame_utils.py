@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧数据工具
+提供原始截图帧（NumPy数组）与编码图片之间的转换功能
+截图在内存中始终以未压缩的BGR数组流转，只有真正写入磁盘时才进行编码
+"""
+
+import os
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .tracing import traced
+
+
+# PNG压缩级别（0-9），数值越小编码越快、文件越大
+DEFAULT_PNG_COMPRESSION = 1
+
+# 可被解析为帧的图片数据类型
+ImageLike = Union[np.ndarray, bytes, bytearray, memoryview]
+
+
+def encode_frame(frame: np.ndarray, ext: str = ".png",
+                 compression: int = DEFAULT_PNG_COMPRESSION) -> Optional[bytes]:
+    """将帧编码为图片字节数据
+    
+    Args:
+        frame: BGR或灰度帧
+        ext: 编码格式扩展名，如 ".png"、".jpg"
+        compression: PNG压缩级别（0-9）
+    
+    Returns:
+        Optional[bytes]: 编码后的字节数据，失败返回None
+    """
+    params = []
+    if ext.lower() == ".png":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, int(compression)]
+    ok, buffer = cv2.imencode(ext, frame, params)
+    if not ok:
+        return None
+    return buffer.tobytes()
+
+
+def decode_image(image_data: ImageLike, grayscale: bool = False) -> Optional[np.ndarray]:
+    """将图片数据解析为帧
+    
+    已经是数组的数据直接返回（必要时转换为灰度），字节数据则进行解码
+    
+    Args:
+        image_data: 帧数组或编码后的图片字节数据
+        grayscale: 是否返回灰度图
+    
+    Returns:
+        Optional[np.ndarray]: BGR帧或灰度帧，失败返回None
+    """
+    if image_data is None:
+        return None
+    
+    if isinstance(image_data, np.ndarray):
+        frame = image_data
+    else:
+        buffer = np.frombuffer(image_data, dtype=np.uint8)
+        if buffer.size == 0:
+            return None
+        flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+        return cv2.imdecode(buffer, flags)
+    
+    if grayscale:
+        return to_grayscale(frame)
+    return frame
+
+
+def to_grayscale(frame: np.ndarray) -> np.ndarray:
+    """将帧转换为灰度图
+    
+    Args:
+        frame: BGR、BGRA或灰度帧
+    
+    Returns:
+        np.ndarray: 灰度帧
+    """
+    if frame.ndim == 2:
+        return frame
+    if frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def crop_frame(frame: np.ndarray, region: Optional[Tuple[int, int, int, int]]) -> np.ndarray:
+    """按区域裁剪帧（返回视图，不复制数据）
+    
+    Args:
+        frame: 原始帧
+        region: 裁剪区域 (x, y, width, height)，None表示全屏
+    
+    Returns:
+        np.ndarray: 裁剪后的帧
+    """
+    if region is None:
+        return frame
+    x, y, width, height = region
+    frame_height, frame_width = frame.shape[:2]
+    x1, y1 = max(0, int(x)), max(0, int(y))
+    x2, y2 = min(frame_width, int(x + width)), min(frame_height, int(y + height))
+    return frame[y1:y2, x1:x2]
+
+
+@traced("storage.write_frame", "storage", record_args=("file_path",))
+def write_frame(frame: np.ndarray, file_path: str,
+                compression: int = DEFAULT_PNG_COMPRESSION) -> bool:
+    """将帧编码并写入文件
+    
+    Args:
+        frame: 待保存的帧
+        file_path: 文件路径，扩展名决定编码格式
+        compression: PNG压缩级别（0-9）
+    
+    Returns:
+        bool: 写入是否成功
+    """
+    ext = os.path.splitext(file_path)[1] or ".png"
+    data = encode_frame(frame, ext, compression)
+    if data is None:
+        return False
+    
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    with open(file_path, 'wb') as f:
+        f.write(data)
+    return True
@@ -71,6 +71,18 @@ class ScreenshotInterface(ABC):
         """
         pass
     
+    @abstractmethod
+    def capture_frame(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Any]:
+        """截取屏幕原始帧（不编码）
+        
+        Args:
+            region: 截图区域 (x, y, width, height)，None表示全屏
+            
+        Returns:
+            Optional[Any]: 未压缩的帧数组
+        """
+        pass
+    
     @abstractmethod
     def save_screenshot(self, image_data: bytes, path: str) -> bool:
         """保存截图
@@ -563,6 +575,18 @@ class UIAutomator2Interface(ABC):
         """
         pass
 
+    @abstractmethod
+    def take_frame(self, color: str = 'bgr') -> Optional[Any]:
+        """截取屏幕原始帧
+        
+        Args:
+            color: 通道顺序，'bgr' 或 'rgb'
+            
+        Returns:
+            Optional[Any]: 未压缩的帧数组
+        """
+        pass
+
 
 class CoordinateAdapterInterface(ABC):
     """坐标适配器接口"""
@@ -2,15 +2,40 @@
 # -*- coding: utf-8 -*-
 """
 日志记录器
-负责记录和管理日志信息
+负责记录和管理日志信息。
+调用线程只把日志记录放入队列，消息格式化和控制台/文件输出在后台监听线程中进行；
+消息使用 % 风格的参数延迟格式化，未启用的级别（如 DEBUG）在调用处直接返回
 """
 
 import os
 import sys
+import atexit
+import queue
 import logging
 import logging.handlers
+import threading
 from typing import Optional
 
+# 共享的 "MarketAutomation" 日志器同一时间只有一个后台监听线程，新建 Logger 时替换
+_listener_lock = threading.Lock()
+_active_logger = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """把日志记录原样放入队列，消息格式化推迟到监听线程（参数在输出前不应再被修改）"""
+    
+    def prepare(self, record):
+        return record
+
+
+def _close_active_logger():
+    """进程退出时写完已排队的日志"""
+    if _active_logger is not None:
+        _active_logger.close()
+
+
+atexit.register(_close_active_logger)
+
 
 class Logger:
     """日志记录器类"""
@@ -20,7 +45,8 @@ class Logger:
                  log_file: Optional[str] = None,
                  max_file_size: str = "10MB",
                  max_files: int = 5,
-                 console_output: bool = True):
+                 console_output: bool = True,
+                 use_queue: bool = True):
         """初始化日志记录器
         
         Args:
@@ -29,12 +55,15 @@ class Logger:
             max_file_size: 最大文件大小
             max_files: 最大文件数量
             console_output: 是否输出到控制台
+            use_queue: 是否经队列交给后台线程输出，否则在调用线程中同步输出
         """
         self.logger = logging.getLogger("MarketAutomation")
         self.logger.setLevel(getattr(logging, level.upper(), logging.INFO))
         
-        # 清除现有处理器
-        self.logger.handlers.clear()
+        # 输出处理器（使用队列时由监听线程调用）
+        self.handlers = []
+        self.queue_handler = None
+        self.listener = None
         
         # 设置日志格式
         formatter = logging.Formatter(
@@ -46,7 +75,7 @@ class Logger:
         if console_output:
             console_handler = logging.StreamHandler(sys.stdout)
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
+            self.handlers.append(console_handler)
         
         # 添加文件处理器
         if log_file:
@@ -66,7 +95,82 @@ class Logger:
                 encoding='utf-8'
             )
             file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
+            self.handlers.append(file_handler)
+        
+        self._install_handlers(use_queue)
+    
+    def _install_handlers(self, use_queue: bool):
+        """替换共享日志器上的处理器，使用队列时启动后台监听线程（先停止之前的监听线程）"""
+        global _active_logger
+        with _listener_lock:
+            previous, _active_logger = _active_logger, None
+            if previous is not None and previous.listener is not None:
+                previous.listener.stop()
+                previous.listener = None
+            
+            # 清除现有处理器
+            self.logger.handlers.clear()
+            if not use_queue:
+                for handler in self.handlers:
+                    self.logger.addHandler(handler)
+                return
+            
+            log_queue = queue.SimpleQueue()
+            self.queue_handler = _DeferredQueueHandler(log_queue)
+            self.logger.addHandler(self.queue_handler)
+            self.listener = logging.handlers.QueueListener(log_queue, *self.handlers)
+            self.listener.start()
+            _active_logger = self
+    
+    def _update_handlers(self, add=(), remove=()):
+        """增删输出处理器：使用队列时先写完已排队的日志，再以新的处理器重启监听线程"""
+        with _listener_lock:
+            self.handlers = [handler for handler in self.handlers if handler not in remove] + list(add)
+            if self.listener is None:
+                for handler in remove:
+                    self.logger.removeHandler(handler)
+                for handler in add:
+                    self.logger.addHandler(handler)
+                return
+            
+            self.listener.stop()
+            self.listener.handlers = tuple(self.handlers)
+            self.listener.start()
+    
+    def flush(self):
+        """等待已排队的日志全部输出"""
+        with _listener_lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener.start()
+            for handler in self.handlers:
+                handler.flush()
+    
+    def close(self):
+        """停止后台监听线程（先写完已排队的日志），之后的日志在调用线程中同步输出"""
+        global _active_logger
+        with _listener_lock:
+            if self.listener is None:
+                return
+            self.listener.stop()
+            self.listener = None
+            self.logger.removeHandler(self.queue_handler)
+            self.queue_handler = None
+            for handler in self.handlers:
+                self.logger.addHandler(handler)
+            if _active_logger is self:
+                _active_logger = None
+    
+    def is_enabled_for(self, level: str) -> bool:
+        """判断级别是否启用，用于在构造开销较大的日志参数前检查
+        
+        Args:
+            level: 日志级别
+        
+        Returns:
+            bool: 是否启用
+        """
+        return self.logger.isEnabledFor(getattr(logging, level.upper(), logging.INFO))
     
     def _parse_size(self, size_str: str) -> int:
         """解析文件大小字符串
@@ -88,53 +192,59 @@ class Logger:
         else:
             return int(size_str)
     
-    def debug(self, message: str):
+    def debug(self, message: str, *args):
         """记录调试信息
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在该级别启用时格式化
         """
-        self.logger.debug(message)
+        self.logger.debug(message, *args)
     
-    def info(self, message: str):
+    def info(self, message: str, *args):
         """记录一般信息
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在该级别启用时格式化
         """
-        self.logger.info(message)
+        self.logger.info(message, *args)
     
-    def warning(self, message: str):
+    def warning(self, message: str, *args):
         """记录警告信息
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在该级别启用时格式化
         """
-        self.logger.warning(message)
+        self.logger.warning(message, *args)
     
-    def error(self, message: str):
+    def error(self, message: str, *args):
         """记录错误信息
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在该级别启用时格式化
         """
-        self.logger.error(message)
+        self.logger.error(message, *args)
     
-    def critical(self, message: str):
+    def critical(self, message: str, *args):
         """记录严重错误信息
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在该级别启用时格式化
         """
-        self.logger.critical(message)
+        self.logger.critical(message, *args)
     
-    def exception(self, message: str):
+    def exception(self, message: str, *args):
         """记录异常信息
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在该级别启用时格式化
         """
-        self.logger.exception(message)
+        self.logger.exception(message, *args)
     
     def set_level(self, level: str):
         """设置日志级别
@@ -182,7 +292,7 @@ class Logger:
             encoding='utf-8'
         )
         file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        self._update_handlers(add=[file_handler])
     
     def remove_file_handler(self, log_file: str):
         """移除文件处理器
@@ -190,16 +300,18 @@ class Logger:
         Args:
             log_file: 日志文件路径
         """
-        for handler in self.logger.handlers[:]:
-            if isinstance(handler, logging.handlers.RotatingFileHandler) and handler.baseFilename == os.path.abspath(log_file):
-                handler.close()
-                self.logger.removeHandler(handler)
+        removed = [handler for handler in self.handlers
+                   if isinstance(handler, logging.handlers.RotatingFileHandler) and handler.baseFilename == os.path.abspath(log_file)]
+        self._update_handlers(remove=removed)
+        for handler in removed:
+            handler.close()
     
     def clear_handlers(self):
         """清除所有处理器"""
-        for handler in self.logger.handlers[:]:
+        removed = list(self.handlers)
+        self._update_handlers(remove=removed)
+        for handler in removed:
             handler.close()
-            self.logger.removeHandler(handler)
     
     def log_function_call(self, func_name: str, args: tuple = (), kwargs: dict = None):
         """记录函数调用
@@ -209,6 +321,8 @@ class Logger:
             args: 位置参数
             kwargs: 关键字参数
         """
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         kwargs = kwargs or {}
         args_str = ", ".join([str(arg) for arg in args])
         kwargs_str = ", ".join([f"{k}={v}" for k, v in kwargs.items()])
@@ -219,8 +333,7 @@ class Logger:
         if kwargs_str:
             params.append(kwargs_str)
         
-        params_str = ", ".join(params)
-        self.debug(f"调用函数: {func_name}({params_str})")
+        self.debug("调用函数: %s(%s)", func_name, ", ".join(params))
     
     def log_performance(self, operation: str, duration: float, details: str = ""):
         """记录性能信息
@@ -230,10 +343,10 @@ class Logger:
             duration: 持续时间（秒）
             details: 详细信息
         """
-        message = f"性能统计: {operation} 耗时 {duration:.3f}秒"
         if details:
-            message += f" - {details}"
-        self.info(message)
+            self.info("性能统计: %s 耗时 %.3f秒 - %s", operation, duration, details)
+        else:
+            self.info("性能统计: %s 耗时 %.3f秒", operation, duration)
     
     def log_network_request(self, method: str, url: str, status_code: int = None, response_time: float = None):
         """记录网络请求
@@ -262,5 +375,5 @@ class Logger:
             message: 错误消息
             exception: 异常对象
         """
-        self.error(f"{message}: {str(exception)}")
-        self.debug(f"异常堆栈: {exception.__class__.__name__}: {str(exception)}")
\ No newline at end of file
+        self.error("%s: %s", message, exception)
+        self.debug("异常堆栈: %s: %s", exception.__class__.__name__, exception)
\ No newline at end of file
@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标模块
+Prometheus 风格的计数器、仪表和固定分桶直方图。计数器与直方图按线程分片累加（每个线程只写自己的分片，
+更新不加锁），读取时汇总。指标可通过可选的本地 HTTP 端点（/metrics 文本格式、/metrics.json）抓取，
+也可定期写入快照文件，用于判断多个自动化进程中哪些变慢或停滞
+"""
+
+import atexit
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# 默认直方图分桶（秒），与 Prometheus 客户端一致
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+class _ShardedValues:
+    """按线程分片的一组累加值：每个线程只写自己的分片，读取时对所有分片求和"""
+    
+    __slots__ = ("size", "local", "shards", "lock")
+    
+    def __init__(self, size: int):
+        self.size = size
+        self.local = threading.local()
+        self.shards = []
+        self.lock = threading.Lock()
+    
+    def shard(self) -> List[float]:
+        """当前线程的分片，首次使用时登记"""
+        shard = getattr(self.local, "shard", None)
+        if shard is None:
+            shard = [0.0] * self.size
+            with self.lock:
+                self.shards.append(shard)
+            self.local.shard = shard
+        return shard
+    
+    def totals(self) -> List[float]:
+        """各位置在所有分片上的合计"""
+        with self.lock:
+            shards = list(self.shards)
+        return [sum(shard[index] for shard in shards) for index in range(self.size)]
+
+
+class CounterChild:
+    """一组标签值对应的计数器"""
+    
+    __slots__ = ("values",)
+    
+    def __init__(self):
+        self.values = _ShardedValues(1)
+    
+    def inc(self, amount: float = 1.0):
+        """增加计数（不能为负）"""
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        self.values.shard()[0] += amount
+    
+    def get(self) -> float:
+        """当前计数"""
+        return self.values.totals()[0]
+
+
+class GaugeChild:
+    """一组标签值对应的仪表（可增可减，或在读取时由函数计算）"""
+    
+    __slots__ = ("value", "function", "lock")
+    
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+        self.lock = threading.Lock()
+    
+    def set(self, value: float):
+        """设置当前值"""
+        self.value = float(value)
+    
+    def inc(self, amount: float = 1.0):
+        """增加"""
+        with self.lock:
+            self.value += amount
+    
+    def dec(self, amount: float = 1.0):
+        """减少"""
+        with self.lock:
+            self.value -= amount
+    
+    def set_to_current_time(self):
+        """设置为当前时间戳（秒），用于判断多久没有进展"""
+        self.value = time.time()
+    
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """读取时调用 function 计算当前值，None表示取消"""
+        self.function = function
+    
+    def get(self) -> float:
+        """当前值"""
+        function = self.function
+        if function is not None:
+            try:
+                return float(function())
+            except Exception:
+                return math.nan
+        return self.value
+
+
+class HistogramChild:
+    """一组标签值对应的固定分桶直方图"""
+    
+    __slots__ = ("buckets", "values")
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # 各分桶（含 +Inf）的非累计次数，之后是总和与总数
+        self.values = _ShardedValues(len(buckets) + 3)
+    
+    def observe(self, value: float):
+        """记录一次观测值"""
+        shard = self.values.shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+    
+    def time(self) -> "_Timer":
+        """计时上下文：退出时记录经过的秒数"""
+        return _Timer(self)
+    
+    def get(self) -> Dict[str, Any]:
+        """累计分桶次数、总和与总数"""
+        totals = self.values.totals()
+        cumulative = 0.0
+        buckets = []
+        for bound, count in zip(self.buckets + (math.inf,), totals[:-2]):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return {"buckets": buckets, "sum": totals[-2], "count": totals[-1]}
+
+
+class _Timer:
+    """直方图计时上下文"""
+    
+    __slots__ = ("histogram", "start")
+    
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Metric:
+    """指标基类：按标签值管理子指标，没有标签时直接在指标上更新"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """初始化指标
+        
+        Args:
+            name: 指标名称
+            documentation: 说明（导出为 HELP）
+            labelnames: 标签名称
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        self.default = None if self.labelnames else self.labels()
+    
+    def labels(self, *values, **kwargs):
+        """获取一组标签值对应的子指标（首次使用时创建）
+        
+        Args:
+            *values: 按 labelnames 顺序的标签值
+            **kwargs: 按名称指定的标签值
+        
+        Returns:
+            子指标
+        """
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self.children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"指标 {self.name} 需要标签：{', '.join(self.labelnames)}")
+            with self.lock:
+                child = self.children.setdefault(key, self._new_child())
+        return child
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def _child(self):
+        if self.default is None:
+            raise ValueError(f"指标 {self.name} 有标签，请先调用 labels()")
+        return self.default
+    
+    def collect(self) -> List[Tuple[Dict[str, str], Any]]:
+        """各组标签及其当前值"""
+        with self.lock:
+            children = list(self.children.items())
+        return [(dict(zip(self.labelnames, key)), child.get()) for key, child in children]
+
+
+class Counter(Metric):
+    """计数器：只增不减，速率（如每秒截图数）由抓取端或快照文件计算"""
+    
+    kind = "counter"
+    
+    def _new_child(self):
+        return CounterChild()
+    
+    def inc(self, amount: float = 1.0):
+        """增加计数"""
+        self._child().inc(amount)
+    
+    def get(self) -> float:
+        """当前计数"""
+        return self._child().get()
+
+
+class Gauge(Metric):
+    """仪表：当前值，如队列深度"""
+    
+    kind = "gauge"
+    
+    def _new_child(self):
+        return GaugeChild()
+    
+    def set(self, value: float):
+        """设置当前值"""
+        self._child().set(value)
+    
+    def inc(self, amount: float = 1.0):
+        """增加"""
+        self._child().inc(amount)
+    
+    def dec(self, amount: float = 1.0):
+        """减少"""
+        self._child().dec(amount)
+    
+    def set_to_current_time(self):
+        """设置为当前时间戳（秒）"""
+        self._child().set_to_current_time()
+    
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """读取时调用 function 计算当前值"""
+        self._child().set_function(function)
+    
+    def get(self) -> float:
+        """当前值"""
+        return self._child().get()
+
+
+class Histogram(Metric):
+    """固定分桶直方图：如匹配耗时、设备命令耗时"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """初始化直方图
+        
+        Args:
+            name: 指标名称
+            documentation: 说明
+            labelnames: 标签名称
+            buckets: 分桶上界（升序，不含 +Inf）
+        """
+        self.buckets = tuple(sorted(float(bound) for bound in buckets if bound != math.inf))
+        if not self.buckets:
+            raise ValueError("直方图至少需要一个分桶")
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_child(self):
+        return HistogramChild(self.buckets)
+    
+    def observe(self, value: float):
+        """记录一次观测值"""
+        self._child().observe(value)
+    
+    def time(self) -> _Timer:
+        """计时上下文"""
+        return self._child().time()
+    
+    def get(self) -> Dict[str, Any]:
+        """累计分桶次数、总和与总数"""
+        return self._child().get()
+
+
+def _format_value(value: float) -> str:
+    """按 Prometheus 文本格式输出数值"""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """输出标签部分 {a="1",b="2"}"""
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """指标注册表类"""
+    
+    def __init__(self):
+        """初始化指标注册表"""
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+    
+    def _register(self, metric_class, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        """按名称获取或创建指标，同名指标类型或标签不一致时报错"""
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not metric_class or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已按不同的类型或标签注册")
+            return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """获取或创建计数器"""
+        return self._register(Counter, name, documentation, labelnames)
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """获取或创建仪表"""
+        return self._register(Gauge, name, documentation, labelnames)
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """获取或创建直方图"""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+    
+    def get(self, name: str) -> Optional[Metric]:
+        """按名称获取指标"""
+        return self.metrics.get(name)
+    
+    def render(self) -> str:
+        """输出 Prometheus 文本格式（0.0.4）
+        
+        Returns:
+            str: 指标文本
+        """
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda item: item.name)
+        
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in metric.collect():
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                for bound, count in value["buckets"]:
+                    bucket_labels = dict(labels, le=_format_value(bound))
+                    lines.append(f"{metric.name}_bucket{_format_labels(bucket_labels)} {_format_value(count)}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {_format_value(value['count'])}")
+        return "\n".join(lines) + "\n"
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """输出JSON快照
+        
+        Returns:
+            Dict[str, Any]: {"timestamp", "pid", "uptime", "metrics": {名称: {"type", "help", "values"}}}
+        """
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda item: item.name)
+        
+        result = {}
+        for metric in metrics:
+            values = []
+            for labels, value in metric.collect():
+                if metric.kind == "histogram":
+                    values.append({
+                        "labels": labels,
+                        "buckets": {_format_value(bound): count for bound, count in value["buckets"]},
+                        "sum": value["sum"],
+                        "count": value["count"]
+                    })
+                else:
+                    values.append({"labels": labels, "value": None if math.isnan(value) else value})
+            result[metric.name] = {"type": metric.kind, "help": metric.documentation, "values": values}
+        
+        now = time.time()
+        return {"timestamp": now, "pid": os.getpid(), "uptime": now - self.start_time, "metrics": result}
+
+
+class MetricsServer:
+    """本地指标 HTTP 端点：/metrics（Prometheus 文本格式）与 /metrics.json（JSON快照）"""
+    
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+        """初始化指标端点
+        
+        Args:
+            registry: 指标注册表
+            host: 监听地址
+            port: 监听端口，0表示由系统分配
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+    
+    def start(self) -> "MetricsServer":
+        """在后台线程中启动服务（端口被占用时抛出 OSError）"""
+        if self.server is not None:
+            return self
+        registry = self.registry
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body = registry.render().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path == "/metrics.json":
+                    body = json.dumps(registry.snapshot(), ensure_ascii=False).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True)
+        self.thread.start()
+        return self
+    
+    @property
+    def url(self) -> str:
+        """抓取地址"""
+        return f"http://{self.host}:{self.port}/metrics"
+    
+    def stop(self):
+        """停止服务"""
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join(5)
+        self.server = None
+        self.thread = None
+
+
+class SnapshotWriter:
+    """定期把指标快照写入JSON文件（先写临时文件再替换），计数器附带距上次快照的每秒速率"""
+    
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float = 10.0, logger=None):
+        """初始化快照写入器
+        
+        Args:
+            registry: 指标注册表
+            path: 快照文件路径
+            interval: 写入间隔（秒）
+            logger: 日志记录器
+        """
+        self.registry = registry
+        self.path = path
+        self.interval = max(0.1, interval)
+        self.logger = logger
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.previous = None
+    
+    def start(self) -> "SnapshotWriter":
+        """启动后台写入线程"""
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="MetricsSnapshot", daemon=True)
+            self.thread.start()
+        return self
+    
+    def stop(self):
+        """停止后台线程并写入最后一次快照"""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join(5)
+            self.thread = None
+        self.write()
+    
+    def write(self) -> bool:
+        """立即写入一次快照
+        
+        Returns:
+            bool: 是否写入成功
+        """
+        try:
+            snapshot = self.registry.snapshot()
+            self._add_rates(snapshot)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+            return True
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.error(f"写入指标快照失败：{str(e)}")
+            return False
+    
+    def _add_rates(self, snapshot: Dict[str, Any]):
+        """为计数器计算距上次快照的每秒速率（首次快照按运行时长计算）"""
+        previous, self.previous = self.previous, snapshot
+        elapsed = snapshot["timestamp"] - previous["timestamp"] if previous else snapshot["uptime"]
+        if elapsed <= 0:
+            return
+        for name, metric in snapshot["metrics"].items():
+            if metric["type"] != "counter":
+                continue
+            old_values = {}
+            if previous and name in previous["metrics"]:
+                old_values = {json.dumps(item["labels"], sort_keys=True): item["value"]
+                              for item in previous["metrics"][name]["values"]}
+            for item in metric["values"]:
+                old_value = old_values.get(json.dumps(item["labels"], sort_keys=True), 0.0)
+                item["rate"] = (item["value"] - old_value) / elapsed
+    
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.write()
+
+
+# 进程内共享的指标注册表，各模块在导入时注册自己的指标
+registry = MetricsRegistry()
+_server = None
+_snapshot_writer = None
+_exit_registered = False
+
+
+def configure_metrics(config_manager, logger=None) -> MetricsRegistry:
+    """按配置（metrics 节）启动共享注册表的 HTTP 端点和快照文件，重复调用不会重复启动
+    
+    Args:
+        config_manager: 配置管理器实例
+        logger: 日志记录器
+    
+    Returns:
+        MetricsRegistry: 共享指标注册表
+    """
+    global _server, _snapshot_writer, _exit_registered
+    config = config_manager.get('metrics', {})
+    
+    if config.get('httpEnabled', False) and _server is None:
+        server = MetricsServer(registry, config.get('host', '127.0.0.1'), config.get('port', 9464))
+        try:
+            _server = server.start()
+            if logger is not None:
+                logger.info(f"指标端点已启动：{_server.url}")
+        except OSError as e:
+            if logger is not None:
+                logger.error(f"启动指标端点失败：{str(e)}")
+    
+    snapshot_file = config.get('snapshotFile')
+    if snapshot_file and _snapshot_writer is None:
+        # 多个进程共用一份配置时，路径中的 {pid} 替换为进程号
+        path = snapshot_file.format(pid=os.getpid())
+        _snapshot_writer = SnapshotWriter(registry, path, config.get('snapshotInterval', 10.0), logger).start()
+    
+    if (_server is not None or _snapshot_writer is not None) and not _exit_registered:
+        atexit.register(shutdown_metrics)
+        _exit_registered = True
+    return registry
+
+
+def shutdown_metrics():
+    """停止 HTTP 端点，写入最后一次快照"""
+    global _server, _snapshot_writer
+    if _server is not None:
+        _server.stop()
+        _server = None
+    if _snapshot_writer is not None:
+        _snapshot_writer.stop()
+        _snapshot_writer = None
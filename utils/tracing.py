@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+耗时追踪模块
+以上下文管理器或装饰器记录嵌套的耗时区间（span，单调时钟），保存在内存环形缓冲区中，
+可导出为 Chrome trace-event JSON（chrome://tracing 或 Perfetto 打开），查看每次操作序列的时间花在哪里
+"""
+
+import atexit
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class Span:
+    """耗时区间数据类"""
+    name: str
+    category: str
+    start: float
+    duration: float = 0.0
+    span_id: int = 0
+    parent_id: Optional[int] = None
+    depth: int = 0
+    thread_id: int = 0
+    thread_name: str = ""
+    args: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    
+    @property
+    def end(self) -> float:
+        """结束时间（time.perf_counter 秒）"""
+        return self.start + self.duration
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return asdict(self)
+
+
+class _NullSpanContext:
+    """追踪关闭时使用的空上下文"""
+    
+    span = None
+    
+    def set(self, **args):
+        """忽略附加信息"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_CONTEXT = _NullSpanContext()
+
+
+class _SpanContext:
+    """进行中的耗时区间"""
+    
+    __slots__ = ("tracer", "span")
+    
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+    
+    def set(self, **args):
+        """附加信息（如处理的字节数），导出时写入 args"""
+        self.span.args.update(args)
+    
+    def __enter__(self):
+        self.tracer._enter(self.span)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer._exit(self.span, exc_value)
+        return False
+
+
+class Tracer:
+    """耗时追踪器类"""
+    
+    def __init__(self, capacity: int = 10000, enabled: bool = True, logger=None,
+                 slow_threshold: float = 0.0, trace_file: Optional[str] = None):
+        """初始化耗时追踪器
+        
+        Args:
+            capacity: 环形缓冲区保存的区间数量，写满后丢弃最早的区间
+            enabled: 是否记录
+            logger: 日志记录器，slow_threshold 大于0时用 log_performance 记录慢操作
+            slow_threshold: 慢操作阈值（秒），0表示不记录日志
+            trace_file: Chrome trace JSON 文件路径，None表示不导出
+        """
+        self.enabled = enabled
+        self.logger = logger
+        self.slow_threshold = slow_threshold
+        self.trace_file = trace_file
+        self.spans = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.ids = itertools.count(1)
+        self.origin = time.perf_counter()
+        self.recorded = 0
+    
+    @property
+    def capacity(self) -> int:
+        """环形缓冲区容量"""
+        return self.spans.maxlen
+    
+    def configure(self, enabled: Optional[bool] = None, capacity: Optional[int] = None, logger=None,
+                  slow_threshold: Optional[float] = None, trace_file: Optional[str] = None):
+        """修改追踪设置（None表示不修改）
+        
+        Args:
+            enabled: 是否记录
+            capacity: 环形缓冲区容量，修改时保留最近的区间
+            logger: 日志记录器
+            slow_threshold: 慢操作阈值（秒）
+            trace_file: Chrome trace JSON 文件路径
+        """
+        with self.lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if capacity is not None and capacity != self.spans.maxlen:
+                self.spans = deque(self.spans, maxlen=capacity)
+            if logger is not None:
+                self.logger = logger
+            if slow_threshold is not None:
+                self.slow_threshold = slow_threshold
+            if trace_file is not None:
+                self.trace_file = trace_file
+    
+    def span(self, name: str, category: str = "app", **args):
+        """创建耗时区间上下文
+        
+        Args:
+            name: 区间名称
+            category: 分类（导出为 cat）
+            **args: 附加信息
+        
+        Returns:
+            上下文管理器，进入后可用 set() 补充附加信息
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _SpanContext(self, Span(name, category, 0.0, args=args))
+    
+    def trace(self, name: Optional[str] = None, category: str = "app", record_args: Tuple[str, ...] = ()):
+        """装饰器：函数每次调用记录为一个耗时区间
+        
+        Args:
+            name: 区间名称，None时使用函数的限定名
+            category: 分类
+            record_args: 要记录到 args 的参数名
+        
+        Returns:
+            Callable: 装饰器
+        """
+        def decorator(function: Callable) -> Callable:
+            span_name = name or function.__qualname__
+            signature = inspect.signature(function) if record_args else None
+            
+            @functools.wraps(function)
+            def wrapper(*call_args, **call_kwargs):
+                if not self.enabled:
+                    return function(*call_args, **call_kwargs)
+                args = {}
+                if signature is not None:
+                    bound = signature.bind_partial(*call_args, **call_kwargs).arguments
+                    args = {key: bound[key] for key in record_args if key in bound}
+                with _SpanContext(self, Span(span_name, category, 0.0, args=args)):
+                    return function(*call_args, **call_kwargs)
+            
+            return wrapper
+        return decorator
+    
+    def _enter(self, span: Span):
+        """开始区间：记录父区间、线程和开始时间"""
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        thread = threading.current_thread()
+        span.span_id = next(self.ids)
+        span.parent_id = stack[-1].span_id if stack else None
+        span.depth = len(stack)
+        span.thread_id = thread.ident
+        span.thread_name = thread.name
+        stack.append(span)
+        span.start = time.perf_counter()
+    
+    def _exit(self, span: Span, error: Optional[BaseException]):
+        """结束区间并放入环形缓冲区"""
+        span.duration = time.perf_counter() - span.start
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        stack = self.local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        elif span in stack:
+            stack.remove(span)
+        
+        with self.lock:
+            self.spans.append(span)
+            self.recorded += 1
+        
+        if self.slow_threshold > 0 and span.duration >= self.slow_threshold and self.logger is not None:
+            details = ", ".join(f"{key}={value}" for key, value in span.args.items())
+            self.logger.log_performance(span.name, span.duration, details)
+    
+    def get_spans(self, name: Optional[str] = None, category: Optional[str] = None,
+                  limit: Optional[int] = None) -> List[Span]:
+        """获取缓冲区中的区间（按结束顺序）
+        
+        Args:
+            name: 只返回该名称的区间
+            category: 只返回该分类的区间
+            limit: 只返回最近的若干条
+        
+        Returns:
+            List[Span]: 区间列表
+        """
+        with self.lock:
+            spans = list(self.spans)
+        spans = [span for span in spans
+                 if (name is None or span.name == name) and (category is None or span.category == category)]
+        return spans[-limit:] if limit else spans
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """按名称汇总缓冲区中的区间耗时
+        
+        Returns:
+            Dict[str, Any]: 统计信息（各名称的次数、总耗时、平均耗时、最大耗时、错误数）
+        """
+        summary = {}
+        for span in self.get_spans():
+            item = summary.setdefault(span.name, {"count": 0, "total": 0.0, "max": 0.0, "errors": 0})
+            item["count"] += 1
+            item["total"] += span.duration
+            item["max"] = max(item["max"], span.duration)
+            item["errors"] += 1 if span.error else 0
+        for item in summary.values():
+            item["mean"] = item["total"] / item["count"]
+        
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "capacity": self.capacity,
+                "buffered": len(self.spans),
+                "recorded": self.recorded,
+                "dropped": self.recorded - len(self.spans),
+                "spans": summary
+            }
+    
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """转换为 Chrome trace-event 格式（完整事件 ph=X，时间单位微秒）
+        
+        Returns:
+            Dict[str, Any]: {"traceEvents": [...], "displayTimeUnit": "ms"}
+        """
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in sorted(self.get_spans(), key=lambda item: item.start):
+            threads.setdefault(span.thread_id, span.thread_name)
+            args = {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                    for key, value in span.args.items()}
+            if span.error:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - self.origin) * 1e6, 3),
+                "dur": round(span.duration * 1e6, 3),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args
+            })
+        for thread_id, thread_name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                           "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+    
+    def export_chrome_trace(self, path: Optional[str] = None) -> Optional[str]:
+        """把缓冲区中的区间写入 Chrome trace JSON 文件
+        
+        Args:
+            path: 文件路径，None时使用配置的 trace_file
+        
+        Returns:
+            Optional[str]: 文件路径，没有指定路径或写入失败时返回None
+        """
+        path = path or self.trace_file
+        if not path:
+            return None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+            return path
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.error(f"导出追踪文件失败：{str(e)}")
+            return None
+    
+    def clear(self):
+        """清空缓冲区"""
+        with self.lock:
+            self.spans.clear()
+            self.recorded = 0
+
+
+# 进程内共享的追踪器，各模块通过 span()/traced() 记录
+tracer = Tracer()
+_exit_export_registered = False
+
+
+def span(name: str, category: str = "app", **args):
+    """在共享追踪器上创建耗时区间上下文，见 Tracer.span"""
+    return tracer.span(name, category, **args)
+
+
+def traced(name: Optional[str] = None, category: str = "app", record_args: Tuple[str, ...] = ()):
+    """在共享追踪器上记录函数调用的装饰器，见 Tracer.trace"""
+    return tracer.trace(name, category, record_args)
+
+
+def configure_tracing(config_manager, logger=None) -> Tracer:
+    """按配置（tracing 节）设置共享追踪器，配置了 traceFile 时在进程退出时导出
+    
+    Args:
+        config_manager: 配置管理器实例
+        logger: 日志记录器，用于记录慢操作
+    
+    Returns:
+        Tracer: 共享追踪器
+    """
+    global _exit_export_registered
+    config = config_manager.get('tracing', {})
+    tracer.configure(
+        enabled=config.get('enabled', True),
+        capacity=config.get('capacity', 10000),
+        logger=logger,
+        slow_threshold=config.get('slowThreshold', 0.0),
+        trace_file=config.get('traceFile')
+    )
+    if tracer.trace_file and not _exit_export_registered:
+        atexit.register(tracer.export_chrome_trace)
+        _exit_export_registered = True
+    return tracer
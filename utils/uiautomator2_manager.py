@@ -9,20 +9,27 @@ import time
 import json
 import traceback
 from typing import Dict, Any, Optional, Tuple, List
+
+import numpy as np
+
 from .interfaces import UIAutomator2Interface, BaseModule
+from .frame_utils import encode_frame
+from .tracing import traced
 
 
 class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
     """UIAutomator2管理器实现类"""
     
-    def __init__(self, config_manager, logger):
+    def __init__(self, config_manager, logger, device_id: Optional[str] = None):
         """初始化UIAutomator2管理器
         
         Args:
             config_manager: 配置管理器实例
             logger: 日志记录器实例
+            device_id: 要连接的设备ID，None表示使用配置中的 uiautomator2.device_id
         """
         super().__init__(config_manager, logger)
+        self.target_device_id = device_id
         self.device = None
         self.device_id = None
         self.device_info = None
@@ -37,14 +44,13 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
         """
         try:
             # 导入uiautomator2
-            import uiautomator2 as u2
-            self._uiautomator2 = u2
+            self._uiautomator2 = self._load_uiautomator2()
             
             # 加载配置
             self.config = self.config_manager.get('uiautomator2', {})
             
             # 连接设备
-            device_id = self.config.get('device_id', None)
+            device_id = self.target_device_id or self.config.get('device_id', None)
             if self.connect_device(device_id):
                 self.is_initialized = True
                 self.start_time = time.time()
@@ -75,6 +81,15 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
             self.logger.error(f"UIAutomator2管理器资源清理异常：{str(e)}")
             return False
     
+    def _load_uiautomator2(self):
+        """加载提供 connect/connect_usb/connect_wifi 的uiautomator2模块（模拟设备可替换）
+        
+        Returns:
+            module: uiautomator2模块
+        """
+        import uiautomator2 as u2
+        return u2
+    
     def connect_device(self, device_id: Optional[str] = None) -> bool:
         """连接设备
         
@@ -157,6 +172,7 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
             self.logger.error(f"获取设备信息异常：{str(e)}")
             return None
     
+    @traced("u2.tap_element", "u2", record_args=("x", "y"))
     def tap_element(self, x: int, y: int, duration: int = 100) -> bool:
         """点击元素
         
@@ -173,12 +189,13 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
                 return False
                 
             self.device.click(x, y)
-            self.logger.debug(f"点击坐标：({x}, {y})")
+            self.logger.debug("点击坐标：(%s, %s)", x, y)
             return True
         except Exception as e:
             self.logger.error(f"点击元素异常：{str(e)}")
             return False
     
+    @traced("u2.swipe_element", "u2", record_args=("y1", "y2"))
     def swipe_element(self, x1: int, y1: int, x2: int, y2: int, duration: int = 300) -> bool:
         """滑动操作
         
@@ -197,7 +214,7 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
                 return False
                 
             self.device.swipe(x1, y1, x2, y2, duration/1000.0)  # 转换为秒
-            self.logger.debug(f"滑动从({x1}, {y1})到({x2}, {y2})，持续时间：{duration}ms")
+            self.logger.debug("滑动从(%s, %s)到(%s, %s)，持续时间：%sms", x1, y1, x2, y2, duration)
             return True
         except Exception as e:
             self.logger.error(f"滑动操作异常：{str(e)}")
@@ -348,7 +365,7 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
             if center:
                 x, y = center
                 self.device.long_click(x, y, duration/1000.0)  # 转换为秒
-                self.logger.debug(f"长按坐标：({x}, {y})，持续时间：{duration}ms")
+                self.logger.debug("长按坐标：(%s, %s)，持续时间：%sms", x, y, duration)
                 return True
             else:
                 return False
@@ -373,7 +390,7 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
                 
             # 输入文本
             self.device.send_keys(text)
-            self.logger.debug(f"输入文本：{text}")
+            self.logger.debug("输入文本：%s", text)
             return True
         except Exception as e:
             self.logger.error(f"输入文本异常：{str(e)}")
@@ -475,7 +492,7 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
             else:
                 self.device.app_start(package_name)
                 
-            self.logger.debug(f"启动应用：{package_name}")
+            self.logger.debug("启动应用：%s", package_name)
             return True
         except Exception as e:
             self.logger.error(f"启动应用异常：{str(e)}")
@@ -495,7 +512,7 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
                 return False
                 
             self.device.app_stop(package_name)
-            self.logger.debug(f"停止应用：{package_name}")
+            self.logger.debug("停止应用：%s", package_name)
             return True
         except Exception as e:
             self.logger.error(f"停止应用异常：{str(e)}")
@@ -517,24 +534,46 @@ class UIAutomator2Manager(BaseModule, UIAutomator2Interface):
             self.logger.error(f"获取界面层次结构异常：{str(e)}")
             return None
     
-    def take_screenshot(self) -> Optional[bytes]:
-        """截取屏幕
+    @traced("u2.take_frame", "u2")
+    def take_frame(self, color: str = 'bgr') -> Optional[np.ndarray]:
+        """截取屏幕原始帧（不经过PNG编码）
         
+        Args:
+            color: 通道顺序，'bgr'（OpenCV默认）或 'rgb'
+            
         Returns:
-            Optional[bytes]: 截图数据
+            Optional[np.ndarray]: 形状为 (height, width, 3) 的uint8数组
         """
         try:
             if not self.device:
                 return None
                 
-            screenshot = self.device.screenshot()
-            if screenshot:
-                import io
-                img_bytes = io.BytesIO()
-                screenshot.save(img_bytes, format='PNG')
-                return img_bytes.getvalue()
-            else:
+            frame = self.device.screenshot(format='opencv')
+            if frame is None:
+                return None
+            
+            if color == 'rgb':
+                # 通道反转只生成视图，不复制数据
+                frame = frame[:, :, ::-1]
+            return frame
+        except Exception as e:
+            self.logger.error(f"截取屏幕帧异常：{str(e)}")
+            return None
+    
+    @traced("u2.take_screenshot", "u2")
+    def take_screenshot(self) -> Optional[bytes]:
+        """截取屏幕
+        
+        需要编码数据时才使用此方法，内存中处理请使用 take_frame
+        
+        Returns:
+            Optional[bytes]: PNG格式截图数据
+        """
+        try:
+            frame = self.take_frame()
+            if frame is None:
                 return None
+            return encode_frame(frame)
         except Exception as e:
             self.logger.error(f"截取屏幕异常：{str(e)}")
             return None